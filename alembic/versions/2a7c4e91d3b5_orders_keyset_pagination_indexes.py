@@ -0,0 +1,40 @@
+"""Orders keyset pagination indexes: (status, created_at DESC, id DESC), (created_at DESC, id DESC)
+
+Revision ID: 2a7c4e91d3b5
+Revises: 1eb33bfe6725
+Create Date: 2025-12-02 10:14:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2a7c4e91d3b5'
+down_revision: Union[str, None] = '1eb33bfe6725'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY avoids blocking writes on a populated table; it cannot run
+    # inside a transaction, hence the autocommit block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_status_created_at_id', 'orders',
+            ['status', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_orders_created_at_id', 'orders',
+            [sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_created_at_id', table_name='orders', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_orders_status_created_at_id', table_name='orders', postgresql_concurrently=True, if_exists=True)
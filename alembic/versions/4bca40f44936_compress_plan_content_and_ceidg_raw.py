@@ -0,0 +1,89 @@
+"""Compress biznesplans.content_markdown and ceidg_data.raw_response with zstd (bytea)
+
+Revision ID: 4bca40f44936
+Revises: 2a7c4e91d3b5
+Create Date: 2025-12-04 09:41:22.806314
+
+Existing rows are converted in Python, in batches of BATCH_SIZE committed
+separately, into a new bytea column that then replaces the old one. Stop
+the application and workers while this runs: rows written by the old code
+during the conversion would be lost in the swap.
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.utils.compression import pack, unpack
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4bca40f44936'
+down_revision: Union[str, None] = '2a7c4e91d3b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+
+def _encode_text(value: str) -> bytes:
+    return pack(value.encode('utf-8'))
+
+
+def _decode_text(value: bytes) -> str:
+    return unpack(bytes(value)).decode('utf-8')
+
+
+def _encode_json(value) -> bytes:
+    return pack(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def _decode_json(value: bytes):
+    return json.loads(unpack(bytes(value)))
+
+
+def _convert_column(table_name, column_name, old_type, new_type, convert) -> None:
+    """Rewrite `column_name` as `new_type` via a temporary column, BATCH_SIZE rows per commit"""
+    if context.is_offline_mode():
+        raise RuntimeError(f'{table_name}.{column_name} is converted in Python; run this migration online')
+
+    temp_name = f'{column_name}_new'
+    op.add_column(table_name, sa.Column(temp_name, new_type, nullable=True))
+
+    table = sa.table(
+        table_name,
+        sa.column('id', sa.Integer),
+        sa.column(column_name, old_type),
+        sa.column(temp_name, new_type),
+    )
+    source, target = table.c[column_name], table.c[temp_name]
+    update = table.update().where(table.c.id == sa.bindparam('row_id')).values({temp_name: sa.bindparam('value')})
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = 0
+        while True:
+            rows = bind.execute(
+                sa.select(table.c.id, source)
+                .where(table.c.id > last_id, source.isnot(None))
+                .order_by(table.c.id)
+                .limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            bind.execute(update, [{'row_id': row_id, 'value': convert(value)} for row_id, value in rows])
+            last_id = rows[-1][0]
+
+    op.drop_column(table_name, column_name)
+    op.alter_column(table_name, temp_name, new_column_name=column_name)
+
+
+def upgrade() -> None:
+    _convert_column('biznesplans', 'content_markdown', sa.Text(), sa.LargeBinary(), _encode_text)
+    _convert_column('ceidg_data', 'raw_response', sa.JSON(), sa.LargeBinary(), _encode_json)
+
+
+def downgrade() -> None:
+    _convert_column('ceidg_data', 'raw_response', sa.LargeBinary(), sa.JSON(), _decode_json)
+    _convert_column('biznesplans', 'content_markdown', sa.LargeBinary(), sa.Text(), _decode_text)
@@ -0,0 +1,113 @@
+"""LLM cost ledger (llm_calls) and daily rollups (llm_cost_rollups)
+
+Revision ID: 7d2f5c18a9e3
+Revises: 4bca40f44936
+Create Date: 2025-12-05 11:20:43.117902
+
+On PostgreSQL the ledger is backfilled from existing plans: one row per
+generator_logs section and one per plan for reviewer totals (reviewer
+calls were only logged in aggregate). The model was not logged, so
+backfilled rows carry LLM_MODEL. Rollups are then rebuilt from the ledger.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from config.settings import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2f5c18a9e3'
+down_revision: Union[str, None] = '4bca40f44936'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_CALLS = """
+INSERT INTO llm_calls (order_id, day, agent, model, section, input_tokens, output_tokens,
+                       cache_read_tokens, cache_creation_tokens, cost_usd, duration_seconds, created_at)
+SELECT b.order_id,
+       (COALESCE(b.generation_started_at, b.created_at) AT TIME ZONE :tz)::date,
+       'generator', :model, LEFT(COALESCE(s->>'name', 'unknown'), 100),
+       COALESCE((s->>'input_tokens')::int, 0),
+       COALESCE((s->>'output_tokens')::int, 0),
+       COALESCE((s->>'cache_read_tokens')::int, 0),
+       COALESCE((s->>'cache_creation_tokens')::int, 0),
+       COALESCE((s->>'cost_usd')::numeric, 0),
+       (s->>'duration_seconds')::float,
+       COALESCE(b.generation_started_at, b.created_at)
+FROM biznesplans b
+CROSS JOIN LATERAL json_array_elements(
+    CASE WHEN json_typeof(b.generator_logs->'sections') = 'array' THEN b.generator_logs->'sections' ELSE '[]'::json END
+) AS s
+UNION ALL
+SELECT b.order_id,
+       (COALESCE(b.generation_started_at, b.created_at) AT TIME ZONE :tz)::date,
+       'reviewer', :model, 'review',
+       COALESCE((b.reviewer_logs->>'total_input_tokens')::int, 0),
+       COALESCE((b.reviewer_logs->>'total_output_tokens')::int, 0),
+       0, 0,
+       (b.reviewer_logs->>'total_cost_usd')::numeric,
+       NULL,
+       COALESCE(b.generation_completed_at, b.created_at)
+FROM biznesplans b
+WHERE b.reviewer_logs->>'total_cost_usd' IS NOT NULL
+"""
+
+# CUBE(model, section) yields the (model, section), (model, *), (*, section)
+# and (*, *) rows that app.services.costs maintains per call.
+REBUILD_ROLLUPS = """
+INSERT INTO llm_cost_rollups (day, model, section, calls, input_tokens, output_tokens,
+                              cache_read_tokens, cache_creation_tokens, cost_usd, updated_at)
+SELECT day, COALESCE(model, '*'), COALESCE(section, '*'), count(*),
+       sum(input_tokens), sum(output_tokens), sum(cache_read_tokens), sum(cache_creation_tokens),
+       sum(cost_usd), now()
+FROM llm_calls
+GROUP BY day, CUBE (model, section)
+"""
+
+
+def upgrade() -> None:
+    op.create_table('llm_calls',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('agent', sa.String(length=20), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=False),
+    sa.Column('section', sa.String(length=100), nullable=False),
+    sa.Column('input_tokens', sa.Integer(), nullable=False),
+    sa.Column('output_tokens', sa.Integer(), nullable=False),
+    sa.Column('cache_read_tokens', sa.Integer(), nullable=False),
+    sa.Column('cache_creation_tokens', sa.Integer(), nullable=False),
+    sa.Column('cost_usd', sa.Numeric(precision=12, scale=6), nullable=False),
+    sa.Column('duration_seconds', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_llm_calls_order_id'), 'llm_calls', ['order_id'], unique=False)
+    op.create_index(op.f('ix_llm_calls_day'), 'llm_calls', ['day'], unique=False)
+    op.create_table('llm_cost_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=False),
+    sa.Column('section', sa.String(length=100), nullable=False),
+    sa.Column('calls', sa.Integer(), nullable=False),
+    sa.Column('input_tokens', sa.BigInteger(), nullable=False),
+    sa.Column('output_tokens', sa.BigInteger(), nullable=False),
+    sa.Column('cache_read_tokens', sa.BigInteger(), nullable=False),
+    sa.Column('cache_creation_tokens', sa.BigInteger(), nullable=False),
+    sa.Column('cost_usd', sa.Numeric(precision=14, scale=6), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'model', 'section')
+    )
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(sa.text(BACKFILL_CALLS).bindparams(tz=settings.COST_TIMEZONE, model=settings.LLM_MODEL))
+        op.execute(REBUILD_ROLLUPS)
+
+
+def downgrade() -> None:
+    op.drop_table('llm_cost_rollups')
+    op.drop_index(op.f('ix_llm_calls_day'), table_name='llm_calls')
+    op.drop_index(op.f('ix_llm_calls_order_id'), table_name='llm_calls')
+    op.drop_table('llm_calls')
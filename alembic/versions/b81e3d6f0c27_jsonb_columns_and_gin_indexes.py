@@ -0,0 +1,113 @@
+"""JSON -> JSONB for logs, issues, PKD, services and sources; GIN indexes on the queried ones
+
+Revision ID: b81e3d6f0c27
+Revises: 7d2f5c18a9e3
+Create Date: 2025-12-08 14:03:51.640218
+
+PostgreSQL only (other dialects keep JSON). `ALTER COLUMN ... TYPE jsonb`
+would rewrite each table under an exclusive lock, so every column is
+instead copied into a new jsonb column:
+
+1. add `<column>_new` plus a trigger that fills it on every write,
+2. backfill existing rows in id ranges of BATCH_SIZE, each committed
+   separately (row locks only),
+3. swap the columns: drop the old one and rename the new one (catalog
+   only, a brief lock).
+
+The application can keep running throughout. GIN indexes are then built
+CONCURRENTLY. Offline (--sql) output converts each column in a single
+UPDATE instead of batches.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81e3d6f0c27'
+down_revision: Union[str, None] = '7d2f5c18a9e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+COLUMNS = [
+    ('biznesplans', 'generator_logs'),
+    ('biznesplans', 'reviewer_logs'),
+    ('biznesplans', 'final_issues'),
+    ('ceidg_data', 'pkd_pozostale'),
+    ('orders', 'uslugi'),
+    ('research_results', 'sources'),
+]
+
+# jsonb_path_ops GIN indexes for `@>` lookups (see app.services.orders)
+GIN_INDEXES = [
+    ('ix_biznesplans_final_issues', 'biznesplans', 'final_issues'),
+    ('ix_ceidg_data_pkd_pozostale', 'ceidg_data', 'pkd_pozostale'),
+    ('ix_orders_uslugi', 'orders', 'uslugi'),
+]
+
+
+def _convert_column(table_name: str, column_name: str, new_type: str) -> None:
+    """Retype `column_name` to `new_type` (json/jsonb) via a trigger-synced copy, see module docstring"""
+    temp_name = f'{column_name}_new'
+    sync = f'{table_name}_{column_name}_sync'
+
+    op.execute(f'ALTER TABLE {table_name} ADD COLUMN {temp_name} {new_type}')
+    op.execute(f"""
+        CREATE FUNCTION {sync}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.{temp_name} := NEW.{column_name}::{new_type};
+            RETURN NEW;
+        END $$
+    """)
+    op.execute(f"""
+        CREATE TRIGGER {sync} BEFORE INSERT OR UPDATE OF {column_name} ON {table_name}
+        FOR EACH ROW EXECUTE FUNCTION {sync}()
+    """)
+
+    backfill = f'UPDATE {table_name} SET {temp_name} = {column_name}::{new_type} WHERE {column_name} IS NOT NULL'
+    if context.is_offline_mode():
+        op.execute(backfill)
+    else:
+        # Commit the trigger first: from then on every write keeps the copy current
+        with op.get_context().autocommit_block():
+            bind = op.get_bind()
+            max_id = bind.scalar(sa.text(f'SELECT max(id) FROM {table_name}')) or 0
+            for low in range(0, max_id, BATCH_SIZE):
+                bind.execute(
+                    sa.text(f'{backfill} AND id > :low AND id <= :high'),
+                    {'low': low, 'high': low + BATCH_SIZE},
+                )
+
+    op.execute(f'DROP TRIGGER {sync} ON {table_name}')
+    op.execute(f'DROP FUNCTION {sync}()')
+    op.execute(f'ALTER TABLE {table_name} DROP COLUMN {column_name}')
+    op.execute(f'ALTER TABLE {table_name} RENAME COLUMN {temp_name} TO {column_name}')
+
+
+def upgrade() -> None:
+    if context.get_context().dialect.name != 'postgresql':
+        return
+    for table_name, column_name in COLUMNS:
+        _convert_column(table_name, column_name, 'jsonb')
+
+    with op.get_context().autocommit_block():
+        for index_name, table_name, column_name in GIN_INDEXES:
+            op.create_index(
+                index_name, table_name, [column_name], unique=False,
+                postgresql_using='gin', postgresql_ops={column_name: 'jsonb_path_ops'},
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    if context.get_context().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        for index_name, table_name, _ in reversed(GIN_INDEXES):
+            op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
+
+    for table_name, column_name in reversed(COLUMNS):
+        _convert_column(table_name, column_name, 'json')
@@ -0,0 +1,163 @@
+"""Monthly range partitions for process_logs; process_log_summaries rollup table
+
+Revision ID: c5e0a2f7b913
+Revises: b81e3d6f0c27
+Create Date: 2025-12-12 09:41:27.503118
+
+PostgreSQL: an existing table cannot be partitioned in place, so
+
+1. the table is renamed to process_logs_unpartitioned and a partitioned
+   process_logs (primary key (id, created_at), same id sequence) is
+   created with one partition per month from the oldest row through
+   PROCESS_LOG_PARTITIONS_AHEAD months ahead,
+2. that is committed, so new logs go to the partitioned table from here on,
+3. old rows are copied over in id ranges of BATCH_SIZE, each committed
+   separately, and the old table is dropped.
+
+Log ids are kept, so SSE resumption by event id keeps working; while the
+copy runs, replays and timelines miss not-yet-copied rows. Rows older than
+the retention window are rolled up by the first maintenance run
+(app.services.log_retention). Offline (--sql) output copies in a single
+INSERT.
+
+Other dialects keep a plain table; only the indexes change.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from config.settings import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e0a2f7b913'
+down_revision: Union[str, None] = 'b81e3d6f0c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 20000
+
+OLD_INDEXES = [
+    ('ix_process_logs_created_at', ['created_at']),
+    ('ix_process_logs_id', ['id']),
+    ('ix_process_logs_order_id', ['order_id']),
+]
+
+COLUMNS = 'id, order_id, phase, message, level, data, progress_current, progress_total, created_at'
+
+CREATE_TABLE = """
+CREATE TABLE {table} (
+    id integer NOT NULL DEFAULT nextval('process_logs_id_seq'),
+    order_id integer NOT NULL REFERENCES orders (id) ON DELETE CASCADE,
+    phase varchar(100) NOT NULL,
+    message varchar(500) NOT NULL,
+    level loglevel NOT NULL,
+    data json,
+    progress_current integer,
+    progress_total integer,
+    created_at timestamp with time zone NOT NULL DEFAULT now(),
+    {primary_key}
+){partitioning}
+"""
+
+# Same names and bounds as app.services.log_retention.create_partition_sql;
+# months are stepped in UTC wall time (timestamptz arithmetic follows the
+# session time zone across DST changes)
+CREATE_PARTITIONS = """
+DO $$
+DECLARE
+    month timestamp := date_trunc('month', COALESCE(
+        (SELECT min(created_at) FROM process_logs_unpartitioned), now()) AT TIME ZONE 'UTC');
+    last_month timestamp := date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => {ahead});
+BEGIN
+    WHILE month <= last_month LOOP
+        EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF process_logs FOR VALUES FROM (%L) TO (%L)',
+                       'process_logs_' || to_char(month, '"y"YYYY"m"MM'),
+                       to_char(month, 'YYYY-MM-DD"T"HH24:MI:SS"+00:00"'),
+                       to_char(month + interval '1 month', 'YYYY-MM-DD"T"HH24:MI:SS"+00:00"'));
+        month := month + interval '1 month';
+    END LOOP;
+END $$
+"""
+
+
+def _create_summaries() -> None:
+    op.create_table('process_log_summaries',
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('entries', sa.Integer(), nullable=False),
+    sa.Column('first_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('level_counts', sa.JSON(), nullable=True),
+    sa.Column('phases', sa.JSON(), nullable=True),
+    sa.Column('errors', sa.JSON(), nullable=True),
+    sa.Column('rolled_up_through', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('order_id')
+    )
+
+
+def _copy_rows(source: str, target: str) -> None:
+    """Copy all rows, in committed id batches when online (see module docstring)"""
+    copy = f'INSERT INTO {target} ({COLUMNS}) SELECT {COLUMNS} FROM {source}'
+    if context.is_offline_mode():
+        op.execute(copy)
+        return
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_id = bind.scalar(sa.text(f'SELECT max(id) FROM {source}')) or 0
+        for low in range(0, max_id, BATCH_SIZE):
+            bind.execute(sa.text(f'{copy} WHERE id > :low AND id <= :high'), {'low': low, 'high': low + BATCH_SIZE})
+
+
+def upgrade() -> None:
+    if context.get_context().dialect.name != 'postgresql':
+        for index_name, _ in OLD_INDEXES:
+            op.drop_index(index_name, table_name='process_logs')
+        op.create_index('ix_process_logs_order_id_id', 'process_logs', ['order_id', 'id'], unique=False)
+        _create_summaries()
+        return
+
+    op.execute('ALTER TABLE process_logs RENAME TO process_logs_unpartitioned')
+    op.execute('ALTER INDEX process_logs_pkey RENAME TO process_logs_unpartitioned_pkey')
+    op.execute('ALTER SEQUENCE process_logs_id_seq OWNED BY NONE')  # Survives dropping the old table
+    op.execute(CREATE_TABLE.format(
+        table='process_logs',
+        primary_key='CONSTRAINT process_logs_pkey PRIMARY KEY (id, created_at)',
+        partitioning=' PARTITION BY RANGE (created_at)',
+    ))
+    op.execute('ALTER SEQUENCE process_logs_id_seq OWNED BY process_logs.id')
+    op.create_index('ix_process_logs_order_id_id', 'process_logs', ['order_id', 'id'], unique=False)
+    op.execute(CREATE_PARTITIONS.format(ahead=settings.PROCESS_LOG_PARTITIONS_AHEAD))
+    _create_summaries()
+
+    _copy_rows('process_logs_unpartitioned', 'process_logs')
+    op.drop_table('process_logs_unpartitioned')
+
+
+def downgrade() -> None:
+    if context.get_context().dialect.name != 'postgresql':
+        op.drop_table('process_log_summaries')
+        op.drop_index('ix_process_logs_order_id_id', table_name='process_logs')
+        for index_name, columns in OLD_INDEXES:
+            op.create_index(index_name, 'process_logs', columns, unique=False)
+        return
+
+    # Rolled-up history (summaries, dropped partitions) is not restored
+    op.drop_table('process_log_summaries')
+    op.execute('ALTER TABLE process_logs RENAME TO process_logs_partitioned')
+    op.execute('ALTER INDEX process_logs_pkey RENAME TO process_logs_partitioned_pkey')
+    op.execute('ALTER INDEX ix_process_logs_order_id_id RENAME TO ix_process_logs_partitioned_order_id_id')
+    op.execute('ALTER SEQUENCE process_logs_id_seq OWNED BY NONE')
+    op.execute(CREATE_TABLE.format(
+        table='process_logs',
+        primary_key='CONSTRAINT process_logs_pkey PRIMARY KEY (id)',
+        partitioning='',
+    ))
+    op.execute('ALTER SEQUENCE process_logs_id_seq OWNED BY process_logs.id')
+    for index_name, columns in OLD_INDEXES:
+        op.create_index(index_name, 'process_logs', columns, unique=False)
+
+    _copy_rows('process_logs_partitioned', 'process_logs')
+    op.drop_table('process_logs_partitioned')  # Drops its partitions too
@@ -1,68 +1,165 @@
 """
 FastAPI Application - Biznesplan Generator
 
-Main application file with FastAPI configuration and routes.
+Application factory for the web tier. Production runs it in preforked
+workers (see app.server):
+
+    python -m app.server
+
+`python -m app.main` runs one auto-reloading process for development.
+
+Only what the web process serves is imported here; integration clients
+(Podio, CEIDG, Anthropic, Perplexity) and the generation pipeline are
+imported when first used, and benchmarks/startup.py guards the import
+cost. Integrations without credentials are left out instead of failing
+at startup (see Settings.require).
 """
 
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from dotenv import load_dotenv
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-import os
-from dotenv import load_dotenv
+from fastapi.responses import JSONResponse, Response
+from fastapi.staticfiles import StaticFiles
 
 # Load environment variables
 load_dotenv()
 
-# Create FastAPI application
-app = FastAPI(
-    title="Biznesplan Generator",
-    description="AI-powered business plan generation system",
-    version="0.1.0",
-    docs_url="/docs",  # Swagger UI
-    redoc_url="/redoc"  # ReDoc
-)
-
-# CORS middleware (if needed for frontend)
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure properly for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Mount static files (CSS, JS, images)
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
-# Health check endpoint
-@app.get("/health")
-async def health_check():
-    """Health check endpoint for monitoring"""
-    return {
-        "status": "ok",
-        "service": "biznesplan-generator",
-        "version": "0.1.0"
-    }
-
-# Root endpoint
-@app.get("/")
-async def root():
-    """Root endpoint - will serve dashboard HTML"""
-    return {
-        "message": "Biznesplan Generator API",
-        "docs": "/docs",
-        "health": "/health"
-    }
-
-# Import and include routers (will be created later)
-# from app.routes import orders, dashboard
-# app.include_router(orders.router, prefix="/api/orders", tags=["orders"])
-# app.include_router(dashboard.router, tags=["dashboard"])
+from app.routes import costs, orders
+from app.services.log_sink import get_log_sink
+from app.services.progress import get_broker
+from app.services.readiness import get_readiness_monitor
+from app.utils.instrumentation import MetricsMiddleware, instrument_engine
+from app.utils.metrics import CONTENT_TYPE, REGISTRY
+from app.utils.rate_limit import RateLimitMiddleware, build_rate_limiter
+from app.utils.responses import FastJSONResponse
+from config.database import close_db, engine, init_db, replica_engine
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def create_app() -> FastAPI:
+    """Build the web application"""
+    podio_enabled = settings.configured("podio")
+    if not podio_enabled:
+        logger.warning("Podio credentials not set: /webhooks/podio is disabled")
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """
+        Start/stop process-wide resources (per worker, after the fork).
+
+        Whatever started is stopped in reverse order, also when a later
+        start fails or the server is cancelled.
+        """
+        async with AsyncExitStack() as started:
+            started.push_async_callback(close_db)
+            await init_db()  # Fresh pools, first connection opened
+            broker = get_broker()
+            await broker.start()  # One progress subscription per worker
+            started.push_async_callback(broker.stop)
+            sink = get_log_sink()
+            await sink.start()
+            started.push_async_callback(sink.stop)  # Flush buffered process logs
+            monitor = get_readiness_monitor()
+            await monitor.start()  # Background DB/Redis probes for /ready
+            started.push_async_callback(monitor.stop)
+            if podio_enabled:
+                from app.services.podio_ingest import get_podio_ingestor
+                ingestor = get_podio_ingestor()
+                await ingestor.start()
+                started.push_async_callback(ingestor.stop)  # Upsert staged Podio items
+            yield
+
+    app = FastAPI(
+        title="Biznesplan Generator",
+        description="AI-powered business plan generation system",
+        version="0.1.0",
+        docs_url="/docs",  # Swagger UI
+        redoc_url="/redoc",  # ReDoc
+        default_response_class=FastJSONResponse,  # orjson
+        lifespan=lifespan,
+    )
+
+    # CORS middleware (if needed for frontend)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Configure properly for production
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Rate limiting (RATE_LIMIT_API per client; see app.utils.rate_limit)
+    if settings.RATE_LIMIT_ENABLED:
+        app.add_middleware(RateLimitMiddleware, limiter=build_rate_limiter())
+
+    # Metrics: request latency per route, DB query/connection timings
+    if settings.METRICS_ENABLED:
+        instrument_engine(engine)
+        if replica_engine is not None:
+            instrument_engine(replica_engine, report_pool=False)
+        app.add_middleware(MetricsMiddleware)  # Outermost: includes rate limiting and CORS
+
+        @app.get("/metrics", include_in_schema=False)
+        async def metrics():
+            """Prometheus scrape endpoint (counters of all app.server workers, see app.utils.metrics)"""
+            return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    # Mount static files (CSS, JS, images)
+    app.mount("/static", StaticFiles(directory="static"), name="static")
+
+    # Health check endpoint
+    @app.get("/health")
+    async def health_check():
+        """Health check endpoint for monitoring"""
+        return {
+            "status": "ok",
+            "service": "biznesplan-generator",
+            "version": "0.1.0"
+        }
+
+    # Readiness endpoint (load balancer)
+    @app.get("/ready")
+    async def readiness_check():
+        """
+        Ready to take traffic: last background probe of the database and
+        Redis, plus live connection pool figures. 503 when not ready.
+        """
+        ready, report = get_readiness_monitor().status()
+        return JSONResponse(report, status_code=200 if ready else 503)
+
+    # Root endpoint
+    @app.get("/")
+    async def root():
+        """Root endpoint - will serve dashboard HTML"""
+        return {
+            "message": "Biznesplan Generator API",
+            "docs": "/docs",
+            "health": "/health"
+        }
+
+    # Routers
+    app.include_router(orders.router, prefix="/api/orders", tags=["orders"])
+    app.include_router(costs.router, prefix="/api/costs", tags=["costs"])
+    if podio_enabled:
+        from app.routes import webhooks
+        app.include_router(webhooks.router, prefix="/webhooks", tags=["webhooks"])
+    # from app.routes import dashboard
+    # app.include_router(dashboard.router, tags=["dashboard"])
+
+    return app
+
 
 if __name__ == "__main__":
+    # Development server; production: python -m app.server
     import uvicorn
     uvicorn.run(
-        "app.main:app",
+        "app.main:create_app",
+        factory=True,
         host="0.0.0.0",
         port=8000,
         reload=True,  # Auto-reload on code changes (development only)
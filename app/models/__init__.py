@@ -5,6 +5,8 @@ from app.models.ceidg_data import CEIDGData
 from app.models.research_result import ResearchResult
 from app.models.biznesplan import Biznesplan
 from app.models.process_log import ProcessLog, LogLevel
+from app.models.process_log_summary import ProcessLogSummary
+from app.models.llm_cost import LLMCall, CostRollup
 
 __all__ = [
     "Order",
@@ -14,4 +16,7 @@ __all__ = [
     "Biznesplan",
     "ProcessLog",
     "LogLevel",
+    "ProcessLogSummary",
+    "LLMCall",
+    "CostRollup",
 ]
@@ -4,10 +4,11 @@ Biznesplan Model
 Stores generated business plans.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from config.database import Base
+from app.models.types import CompressedText, JSONDocument
 
 
 class Biznesplan(Base):
@@ -24,8 +25,8 @@ class Biznesplan(Base):
     # Foreign Key to Order
     order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
     
-    # Content
-    content_markdown = Column(Text, nullable=True)  # Final biznesplan in Markdown format
+    # Content (zstd-compressed; deferred: load with undefer_group("content") or awaitable_attrs)
+    content_markdown = deferred(Column(CompressedText, nullable=True), group="content")  # Final biznesplan in Markdown format
     
     # Generation Status
     status = Column(String(50), nullable=False, default="draft")  # draft / in_review / approved / rejected
@@ -35,8 +36,8 @@ class Biznesplan(Base):
     current_section_index = Column(Integer, default=0)  # Current section being generated (0-based)
     total_sections = Column(Integer, default=9)  # Total number of sections (outline, 8 sections, finalize)
     
-    # LLM API Tracking
-    generator_logs = Column(JSON, nullable=True)
+    # LLM API Tracking (deferred: load with undefer_group("logs"))
+    generator_logs = deferred(Column(JSONDocument, nullable=True), group="logs")
     """
     Logs from Generator agent:
     {
@@ -57,23 +58,38 @@ class Biznesplan(Base):
     }
     """
     
-    reviewer_logs = Column(JSON, nullable=True)
+    reviewer_logs = deferred(Column(JSONDocument, nullable=True), group="logs")
     """
-    Logs from Reviewer agent:
+    Logs from Reviewer agent (app.services.reviewer):
     {
-        "api_calls": 3,
+        "api_calls": 12,
         "total_input_tokens": 30000,
         "total_output_tokens": 1000,
         "total_cost_usd": 0.05,
+        "tokens_saved": 42000,  # Cost of the cached reviews reused instead of repeated
+        "cost_saved_usd": 0.02,
         "reviews": [
             {
-                "iteration": 1,
-                "overall_score": 0.85,
+                "iteration": 2,
+                "overall_score": 0.88,
                 "issues": [],
                 "approved": true,
-                "feedback": "High quality, meets all criteria"
+                "feedback": "High quality, meets all criteria",
+                "sections_reviewed": 1,  # Changed since the last pass
+                "sections_cached": 7,
+                "consistency_checked": true,
+                "input_tokens": 9000,
+                "output_tokens": 300,
+                "tokens_saved": 42000,
+                "cost_saved_usd": 0.02,
+                "duration_seconds": 12.5
             }
-        ]
+        ],
+        "section_reviews": {  # Review cache: section key -> review of its content hash
+            "analiza_rynku": {"hash": "9f2c...", "score": 0.9, "issues": [], "feedback": "...",
+                              "tokens": 6000, "cost_usd": 0.003}
+        },
+        "consistency": {"hash": "...", "score": 0.9, "issues": [], ...}
     }
     """
     
@@ -83,7 +99,7 @@ class Biznesplan(Base):
     final_quality_score = Column(Integer, nullable=True)  # 0-100 from Reviewer
     
     # Issues & Feedback
-    final_issues = Column(JSON, nullable=True)  # List of unresolved issues (if any)
+    final_issues = Column(JSONDocument, nullable=True)  # List of unresolved issues (if any); GIN-indexed
     """
     [
         {
@@ -110,6 +126,12 @@ class Biznesplan(Base):
     # Relationship
     order = relationship("Order", back_populates="biznesplan")
     
+    # GIN index for `final_issues @> '[{"section": ...}]'` (PostgreSQL)
+    __table_args__ = (
+        Index("ix_biznesplans_final_issues", final_issues,
+              postgresql_using="gin", postgresql_ops={"final_issues": "jsonb_path_ops"}),
+    )
+    
     def __repr__(self):
         return f"<Biznesplan(order_id={self.order_id}, status={self.status}, iterations={self.iterations})>"
     
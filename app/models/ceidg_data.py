@@ -4,10 +4,11 @@ CEIDG Data Model
 Stores business data fetched from CEIDG API (Polish business registry).
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from config.database import Base
+from app.models.types import CompressedJSON, JSONDocument
 
 
 class CEIDGData(Base):
@@ -46,7 +47,7 @@ class CEIDGData(Base):
     # Business Activity
     pkd_glowny = Column(String(10), nullable=True)  # Main PKD code
     pkd_glowny_nazwa = Column(String(500), nullable=True)  # Main PKD name
-    pkd_pozostale = Column(JSON, nullable=True)  # List of additional PKD codes and names
+    pkd_pozostale = Column(JSONDocument, nullable=True)  # [{"kod": "62.02.Z", "nazwa": ...}]; GIN-indexed
     
     # Dates
     data_rozpoczecia_dzialalnosci = Column(String(20), nullable=True)  # Start date (YYYY-MM-DD)
@@ -55,8 +56,8 @@ class CEIDGData(Base):
     # Status
     status_wpisu = Column(String(50), nullable=True)  # Entry status (e.g., "Aktywny")
     
-    # Raw Response (for debugging and future fields)
-    raw_response = Column(JSON, nullable=True)  # Full JSON response from CEIDG API
+    # Raw Response (for debugging and future fields; zstd-compressed, deferred, group "raw")
+    raw_response = deferred(Column(CompressedJSON, nullable=True), group="raw")  # Full JSON response from CEIDG API
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -66,6 +67,12 @@ class CEIDGData(Base):
     # Relationship
     order = relationship("Order", back_populates="ceidg_data")
     
+    # GIN index for `pkd_pozostale @> '[{"kod": ...}]'` (PostgreSQL)
+    __table_args__ = (
+        Index("ix_ceidg_data_pkd_pozostale", pkd_pozostale,
+              postgresql_using="gin", postgresql_ops={"pkd_pozostale": "jsonb_path_ops"}),
+    )
+    
     def __repr__(self):
         return f"<CEIDGData(nip={self.nip}, nazwa_firmy={self.nazwa_firmy})>"
     
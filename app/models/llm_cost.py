@@ -0,0 +1,78 @@
+"""
+LLM Cost Models
+
+Ledger of every LLM call plus rollups by day, model and section.
+"""
+
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, Float, Numeric, ForeignKey
+from sqlalchemy.sql import func
+from config.database import Base
+
+# Rollup dimension value meaning "all models" / "all sections"
+ALL = "*"
+
+
+class LLMCall(Base):
+    """
+    One billed LLM call (append-only).
+
+    Written in the same transaction as the CostRollup upserts, so the
+    rollups always equal the sum of the ledger.
+    """
+    __tablename__ = "llm_calls"
+
+    # Primary Key
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+
+    # Foreign Key to Order (kept when the order is deleted, for accounting)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="SET NULL"), nullable=True, index=True)
+
+    # Dimensions
+    day = Column(Date, nullable=False, index=True)  # Billing day in COST_TIMEZONE
+    agent = Column(String(20), nullable=False)  # generator / reviewer
+    model = Column(String(100), nullable=False)
+    section = Column(String(100), nullable=False)  # Section title, as in generator_logs
+
+    # Usage
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    cache_read_tokens = Column(Integer, nullable=False, default=0)
+    cache_creation_tokens = Column(Integer, nullable=False, default=0)
+    cost_usd = Column(Numeric(12, 6), nullable=False)
+    duration_seconds = Column(Float, nullable=True)
+
+    # Timestamp
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<LLMCall(order_id={self.order_id}, section={self.section}, cost_usd={self.cost_usd})>"
+
+
+class CostRollup(Base):
+    """
+    Running totals per (day, model, section).
+
+    Each call updates four rows: (model, section), (model, "*"),
+    ("*", section) and ("*", "*"); the last is the day's total, so
+    "spent today" is a primary-key lookup.
+    """
+    __tablename__ = "llm_cost_rollups"
+
+    # Composite Primary Key
+    day = Column(Date, primary_key=True)
+    model = Column(String(100), primary_key=True)
+    section = Column(String(100), primary_key=True)
+
+    # Totals
+    calls = Column(Integer, nullable=False, default=0)
+    input_tokens = Column(BigInteger, nullable=False, default=0)
+    output_tokens = Column(BigInteger, nullable=False, default=0)
+    cache_read_tokens = Column(BigInteger, nullable=False, default=0)
+    cache_creation_tokens = Column(BigInteger, nullable=False, default=0)
+    cost_usd = Column(Numeric(14, 6), nullable=False, default=0)
+
+    # Timestamp
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<CostRollup(day={self.day}, model={self.model}, section={self.section}, cost_usd={self.cost_usd})>"
@@ -4,10 +4,11 @@ Order Model
 Represents business plan orders from Podio.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from config.database import Base
+from app.models.types import JSONDocument
 import enum
 
 
@@ -46,7 +47,7 @@ class Order(Base):
     telefon = Column(String(20), nullable=True)
     
     # Business Information (from Podio)
-    uslugi = Column(JSON, nullable=True)  # List of services offered (e.g., ["Software Development", "QA"])
+    uslugi = Column(JSONDocument, nullable=True)  # List of services offered (e.g., ["Software Development", "QA"]); GIN-indexed
     planowany_dochod_roczny = Column(Integer, nullable=True)  # Expected annual revenue (PLN)
     dodatkowe_informacje = Column(String, nullable=True)  # Additional notes from client
     
@@ -78,6 +79,15 @@ class Order(Base):
     research_result = relationship("ResearchResult", back_populates="order", uselist=False, cascade="all, delete-orphan")
     biznesplan = relationship("Biznesplan", back_populates="order", uselist=False, cascade="all, delete-orphan")
     process_logs = relationship("ProcessLog", back_populates="order", cascade="all, delete-orphan", order_by="ProcessLog.created_at")
+    log_summary = relationship("ProcessLogSummary", back_populates="order", uselist=False, cascade="all, delete-orphan")
+    
+    # Composite indexes for keyset pagination (newest first, id as tie-breaker)
+    __table_args__ = (
+        Index("ix_orders_status_created_at_id", status, created_at.desc(), id.desc()),
+        Index("ix_orders_created_at_id", created_at.desc(), id.desc()),
+        # `uslugi @> '["QA"]'` (PostgreSQL)
+        Index("ix_orders_uslugi", uslugi, postgresql_using="gin", postgresql_ops={"uslugi": "jsonb_path_ops"}),
+    )
     
     def __repr__(self):
         return f"<Order(id={self.id}, nip={self.nip}, status={self.status.value})>"
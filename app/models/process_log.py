@@ -2,9 +2,13 @@
 Process Log Model
 
 Stores detailed logs of biznesplan generation process for real-time tracking.
+
+On PostgreSQL the table is range-partitioned by month on created_at, with
+primary key (id, created_at); old months are rolled up into
+ProcessLogSummary and dropped (see app.services.log_retention).
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Index, Integer, String, DateTime, JSON, ForeignKey, Enum as SQLEnum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from config.database import Base
@@ -27,11 +31,11 @@ class ProcessLog(Base):
     """
     __tablename__ = "process_logs"
     
-    # Primary Key
-    id = Column(Integer, primary_key=True, index=True)
+    # Primary Key (ids are unique and increasing across partitions: one sequence)
+    id = Column(Integer, primary_key=True)
     
     # Foreign Key to Order
-    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
     
     # Log Details
     phase = Column(String(100), nullable=False)  # e.g., "fetching_ceidg", "generating_section_3", "reviewing"
@@ -55,12 +59,17 @@ class ProcessLog(Base):
     progress_current = Column(Integer, nullable=True)  # Current step (e.g., 3)
     progress_total = Column(Integer, nullable=True)  # Total steps (e.g., 9)
     
-    # Timestamp
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    # Timestamp (partition key)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # Relationship
     order = relationship("Order", back_populates="process_logs")
     
+    # An order's logs in id order (SSE replay, eager loads); partition bounds replace a created_at index
+    __table_args__ = (
+        Index("ix_process_logs_order_id_id", order_id, id),
+    )
+    
     def __repr__(self):
         return f"<ProcessLog(order_id={self.order_id}, phase={self.phase}, level={self.level.value})>"
     
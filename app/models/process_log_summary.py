@@ -0,0 +1,50 @@
+"""
+Process Log Summary Model
+
+Per-order rollup of process logs whose monthly partitions were retired.
+"""
+
+from sqlalchemy import Column, Integer, DateTime, JSON, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from config.database import Base
+
+
+class ProcessLogSummary(Base):
+    """
+    What an order's retired process logs said, in one row.
+
+    Written by app.services.log_retention before a partition is dropped;
+    logs of one order spanning several months are merged into the same row.
+    """
+    __tablename__ = "process_log_summaries"
+
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), primary_key=True)
+
+    entries = Column(Integer, nullable=False, default=0)  # Log rows folded in
+    first_at = Column(DateTime(timezone=True), nullable=True)
+    last_at = Column(DateTime(timezone=True), nullable=True)
+
+    level_counts = Column(JSON, nullable=True)  # {"info": 40, "warning": 1}
+    phases = Column(JSON, nullable=True)
+    """
+    Phase timeline, by first entry:
+    [
+        {
+            "phase": "section_analiza_rynku",
+            "first_at": "2025-01-14T10:02:11+00:00",
+            "last_at": "2025-01-14T10:02:40+00:00",
+            "seconds": 29.0,
+            "entries": 2
+        }
+    ]
+    """
+    errors = Column(JSON, nullable=True)  # Last warnings/errors: [{"at", "phase", "level", "message"}]
+
+    rolled_up_through = Column(DateTime(timezone=True), nullable=True)  # End of the last month folded in
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    order = relationship("Order", back_populates="log_summary")
+
+    def __repr__(self):
+        return f"<ProcessLogSummary(order_id={self.order_id}, entries={self.entries})>"
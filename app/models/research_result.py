@@ -8,6 +8,7 @@ from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from config.database import Base
+from app.models.types import JSONDocument
 
 
 class ResearchResult(Base):
@@ -50,7 +51,7 @@ class ResearchResult(Base):
     """
     
     # Sources & Citations
-    sources = Column(JSON, nullable=True)
+    sources = Column(JSONDocument, nullable=True)
     """
     List of sources with citations:
     [
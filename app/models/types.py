@@ -0,0 +1,60 @@
+"""
+Custom Column Types
+
+zstd-compressed Text and JSON, stored as bytes (bytea on PostgreSQL), and
+JSON that is JSONB on PostgreSQL.
+"""
+
+import json
+
+from sqlalchemy import JSON, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import TypeDecorator
+
+from app.utils.compression import pack, unpack
+
+# JSONB on PostgreSQL (GIN-indexable, supports @>), plain JSON elsewhere.
+# Query containment with app.services.orders.json_array_contains.
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text stored zstd-compressed.
+
+    Compression happens on write and decompression when the row is loaded;
+    combine with `deferred()` so the bytes are only fetched and decoded when
+    the attribute is accessed. Short values and legacy rows are plain UTF-8
+    (see app.utils.compression.pack). Not usable in SQL comparisons or LIKE.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return pack(value.encode("utf-8"))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return unpack(bytes(value)).decode("utf-8")
+
+
+class CompressedJSON(TypeDecorator):
+    """JSON document stored zstd-compressed (same caveats as CompressedText)"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        data = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        return pack(data.encode("utf-8"))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return json.loads(unpack(bytes(value)))
@@ -0,0 +1,23 @@
+"""
+Cost Routes
+
+LLM cost dashboard, served from the daily rollups.
+"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas import CostDashboard
+from app.services.costs import cost_summary
+from config.database import get_read_db
+
+router = APIRouter()
+
+
+@router.get("", response_model=CostDashboard)
+async def get_costs(
+    days: int = Query(30, ge=1, le=366, description="Days to include, today included"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Daily totals and per-model/per-section breakdown of LLM spend"""
+    return await cost_summary(db, days)
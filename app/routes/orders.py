@@ -0,0 +1,295 @@
+"""
+Order Routes
+
+API endpoints for business plan orders.
+"""
+
+import asyncio
+import secrets
+from typing import AsyncIterator, Optional, Union
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Order, OrderStatus, ProcessLog
+from app.schemas import OrderDetail, OrderFull, OrderPage, OrderSummary, OrderTimeline
+from app.services.export import (
+    MEDIA_TYPES,
+    ExportFormat,
+    PDFUnavailableError,
+    content_length,
+    get_export_service,
+    iter_chunks,
+    render_key,
+)
+from app.services.log_retention import order_timeline
+from app.services.orders import PROFILE_SCHEMAS, LoaderProfile, get_order, get_plan_content, order_loader
+from app.services.progress import ProgressEvent, get_broker
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.responses import model_response
+from config.database import AsyncSessionLocal, get_db, get_read_db
+from config.settings import settings
+
+router = APIRouter()
+
+# Columns loaded for list views (no JSON/text payloads)
+ORDER_SUMMARY_COLUMNS = [getattr(Order, name) for name in OrderSummary.model_fields]
+
+_basic = HTTPBasic()
+
+
+def require_admin(credentials: HTTPBasicCredentials = Depends(_basic)) -> None:
+    """HTTP Basic check against ADMIN_USERNAME / ADMIN_PASSWORD"""
+    valid = secrets.compare_digest(credentials.username.encode(), settings.ADMIN_USERNAME.encode())
+    valid &= secrets.compare_digest(credentials.password.encode(), settings.ADMIN_PASSWORD.encode())
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials", headers={"WWW-Authenticate": "Basic"})
+
+
+@router.get("", response_model=OrderPage)
+async def list_orders(
+    status: Optional[OrderStatus] = Query(None, description="Filter by status"),
+    nip: Optional[str] = Query(None, min_length=10, max_length=10, description="Filter by NIP"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    List orders, newest first, with keyset pagination on (created_at, id).
+
+    Served by ix_orders_status_created_at_id / ix_orders_created_at_id, so
+    each page is an index range scan regardless of table size or page depth.
+    """
+    query = select(*ORDER_SUMMARY_COLUMNS)
+    if status is not None:
+        query = query.where(Order.status == status)
+    if nip is not None:
+        query = query.where(Order.nip == nip)
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(tuple_(Order.created_at, Order.id) < tuple_(cursor_created_at, cursor_id))
+
+    query = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1)
+    rows = (await db.execute(query)).mappings().all()
+
+    items = [OrderSummary.model_validate(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return model_response(OrderPage(items=items, next_cursor=next_cursor))
+
+
+@router.get("/{order_id}", response_model=Union[OrderFull, OrderDetail, OrderSummary])
+async def get_order_detail(
+    order_id: int,
+    profile: LoaderProfile = Query(LoaderProfile.DETAIL, description="summary / detail / full"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    One order, as much of it as `profile` asks for.
+
+    summary and detail take one query, full two (process logs); related
+    records are loaded eagerly with only the columns their schemas show.
+    """
+    order = await get_order(db, order_id, *order_loader(profile))
+    if order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return model_response(PROFILE_SCHEMAS[profile].model_validate(order))
+
+
+@router.get("/{order_id}/timeline", response_model=OrderTimeline)
+async def get_order_timeline(order_id: int, db: AsyncSession = Depends(get_read_db)):
+    """
+    Phase durations, counts by level and recent warnings/errors for an
+    order, including months whose raw logs were rolled up and dropped.
+    """
+    timeline = OrderTimeline.model_validate(await order_timeline(db, order_id))
+    if timeline.entries == 0 and await db.scalar(select(Order.id).where(Order.id == order_id)) is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return model_response(timeline)
+
+
+@router.post(
+    "/{order_id}/regenerate",
+    status_code=202,
+    response_model=OrderSummary,
+    dependencies=[Depends(require_admin)],
+)
+async def regenerate_order(order_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Run the pipeline again for a failed order (admin, HTTP Basic).
+
+    Limited per client by RATE_LIMIT_GENERATION. The old celery_task_id is
+    kept until the new task is queued, so requeue_stranded_orders cannot
+    queue the order a second time in between.
+    """
+    reset = await db.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.status == OrderStatus.FAILED)
+        .values(
+            status=OrderStatus.PENDING,
+            current_phase=None,
+            progress_percent=0,
+            error_message=None,
+            retry_count=Order.retry_count + 1,
+        )
+        .returning(Order.id)
+    )
+    if reset.scalar_one_or_none() is None:
+        if await db.scalar(select(Order.id).where(Order.id == order_id)) is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+        raise HTTPException(status_code=409, detail="Only failed orders can be regenerated")
+    await db.commit()
+
+    from app.tasks.worker import enqueue_order  # Keeps Celery out of the web process until used
+    try:
+        task_id = await asyncio.to_thread(enqueue_order, order_id)
+    except Exception:
+        await db.execute(
+            update(Order)
+            .where(Order.id == order_id)
+            .values(status=OrderStatus.FAILED, error_message="Could not queue regeneration")
+        )
+        await db.commit()
+        raise HTTPException(status_code=503, detail="Task queue unavailable")
+
+    row = (await db.execute(
+        update(Order)
+        .where(Order.id == order_id)
+        .values(celery_task_id=task_id)
+        .returning(*ORDER_SUMMARY_COLUMNS)
+    )).mappings().one()
+    await db.commit()
+    return model_response(OrderSummary.model_validate(row), status_code=202)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+@router.get("/{order_id}/plan.{export_format}")
+async def export_plan(
+    order_id: int,
+    export_format: ExportFormat,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Download the finished plan as HTML or PDF.
+
+    Output is cached on disk by content hash, which is also the ETag: repeat
+    downloads with If-None-Match get 304 without rendering or reading the
+    cached file. The body is streamed in EXPORT_CHUNK_SIZE chunks.
+    """
+    content = await get_plan_content(db, order_id)
+    if not content:
+        raise HTTPException(status_code=404, detail="Plan not found")
+
+    etag = f'"{render_key(content, export_format)}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        _, handle = await get_export_service().open(content, export_format)
+    except PDFUnavailableError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    disposition = "attachment" if export_format is ExportFormat.PDF else "inline"
+    headers["Content-Disposition"] = f'{disposition}; filename="biznesplan-{order_id}.{export_format.value}"'
+    headers["Content-Length"] = str(content_length(handle))
+    return StreamingResponse(
+        iter_chunks(handle, settings.EXPORT_CHUNK_SIZE),
+        media_type=MEDIA_TYPES[export_format],
+        headers=headers,
+    )
+
+
+async def _load_missed_events(order_id: int, last_event_id: int) -> list[ProgressEvent]:
+    """One page (SSE_REPLAY_LIMIT) of ProcessLog rows written after `last_event_id`"""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(ProcessLog)
+            .where(ProcessLog.order_id == order_id, ProcessLog.id > last_event_id)
+            .order_by(ProcessLog.id)
+            .limit(settings.SSE_REPLAY_LIMIT)
+        )
+        return [ProgressEvent.from_log(log) for log in result.scalars()]
+
+
+async def _missed_events(order_id: int, last_event_id: int, request: Request) -> AsyncIterator[ProgressEvent]:
+    """Every missed event, page by page until caught up (no session held between pages)"""
+    while True:
+        page = await _load_missed_events(order_id, last_event_id)
+        for event in page:
+            yield event
+        if len(page) < settings.SSE_REPLAY_LIMIT or await request.is_disconnected():
+            return
+        last_event_id = page[-1].id
+
+
+async def _event_stream(order_id: int, last_event_id: int, request: Request) -> AsyncIterator[str]:
+    """SSE frames: replay from the database, then live events from the broker"""
+    # Subscribe before replaying so nothing written in between is lost;
+    # live copies of replayed events are dropped below. Only replayed ids
+    # are filtered: rows from concurrent writers commit out of id order, so
+    # a live event may well be older than the last one sent.
+    async with get_broker().subscribe(order_id) as subscription:
+        yield "retry: 3000\n\n"
+
+        replayed = set()
+        async for event in _missed_events(order_id, last_event_id, request):
+            replayed.add(event.id)
+            yield event.to_sse()
+
+        while not subscription.closed:
+            if await request.is_disconnected():
+                break
+            event = await subscription.get(timeout=settings.SSE_HEARTBEAT_SECONDS)
+            if event is None:
+                if not subscription.closed:
+                    yield ": keepalive\n\n"
+                continue
+            if event.id in replayed:
+                replayed.discard(event.id)  # Published once; the set shrinks as the overlap passes
+                continue
+            yield event.to_sse()
+
+
+@router.get("/{order_id}/events")
+async def stream_order_events(
+    order_id: int,
+    request: Request,
+    last_event_id_header: Optional[int] = Header(None, alias="Last-Event-ID"),
+    last_event_id: Optional[int] = Query(None, description="Resume after this event id"),
+):
+    """
+    Server-Sent Events stream of generation progress for one order.
+
+    Browsers resume automatically via the Last-Event-ID header; missed events
+    are replayed from process_logs before switching to live updates.
+    """
+    async with AsyncSessionLocal() as session:
+        exists = await session.scalar(select(Order.id).where(Order.id == order_id))
+    if exists is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    resume_from = last_event_id_header if last_event_id_header is not None else last_event_id
+    return StreamingResponse(
+        _event_stream(order_id, resume_from or 0, request),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx)
+        },
+    )
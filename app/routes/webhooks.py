@@ -0,0 +1,67 @@
+"""
+Webhook Routes
+
+Inbound webhooks from Podio. Mounted outside /api so Podio's retry bursts
+are not counted against the API rate limit.
+"""
+
+import asyncio
+import hmac
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
+
+from app.services.podio import get_podio_client
+from app.services.podio_ingest import get_podio_ingestor
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def _validate_hook(hook_id: str, code: str) -> None:
+    try:
+        await get_podio_client().validate_hook(hook_id, code)
+    except Exception:
+        logger.exception("Podio hook %s verification failed", hook_id)
+
+
+@router.post("/podio")
+async def podio_webhook(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    token: Optional[str] = Query(None, description="PODIO_WEBHOOK_SECRET"),
+):
+    """
+    Podio item webhook.
+
+    Only stages the item id (no database or Podio calls), so it answers in
+    well under Podio's timeout; see app.services.podio_ingest.
+    """
+    if settings.PODIO_WEBHOOK_SECRET and not hmac.compare_digest(token or "", settings.PODIO_WEBHOOK_SECRET):
+        raise HTTPException(status_code=403, detail="Invalid webhook token")
+
+    form = await request.form()
+    event_type = form.get("type")
+
+    if event_type == "hook.verify":
+        hook_id, code = form.get("hook_id"), form.get("code")
+        if not hook_id or not code:
+            raise HTTPException(status_code=400, detail="hook_id and code are required")
+        background_tasks.add_task(_validate_hook, str(hook_id), str(code))
+        return {"status": "verifying"}
+
+    if event_type != "item.create":
+        return {"status": "ignored"}
+
+    item_id = str(form.get("item_id") or "")
+    if not item_id.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid item_id")
+
+    try:
+        staged = get_podio_ingestor().stage(item_id)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Ingestion backlog full", headers={"Retry-After": "5"})
+    return {"status": "accepted" if staged else "duplicate"}
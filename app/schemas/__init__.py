@@ -0,0 +1,13 @@
+"""Pydantic API Schemas"""
+
+from app.schemas.order import OrderSummary, OrderPage, OrderDetail, OrderFull, OrderTimeline
+from app.schemas.cost import CostDashboard
+
+__all__ = [
+    "OrderSummary",
+    "OrderPage",
+    "OrderDetail",
+    "OrderFull",
+    "OrderTimeline",
+    "CostDashboard",
+]
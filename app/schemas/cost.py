@@ -0,0 +1,41 @@
+"""
+Cost Schemas
+
+Pydantic response models for the cost dashboard.
+"""
+
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class CostTotals(BaseModel):
+    """Summed usage and cost"""
+    calls: int
+    input_tokens: int
+    output_tokens: int
+    cache_read_tokens: int
+    cache_creation_tokens: int
+    cost_usd: float
+
+
+class DailyCost(CostTotals):
+    day: date
+
+
+class CostBreakdown(CostTotals):
+    key: str  # Model or section
+
+
+class CostDashboard(BaseModel):
+    """Rollup-based cost overview (see app.services.costs)"""
+    today: date
+    spent_today_usd: float
+    daily_alert_usd: float
+    over_daily_alert: bool
+    daily_limit_usd: Optional[float]  # None: no cap (COST_LIMIT_DAILY = 0)
+    over_daily_budget: bool
+    daily: list[DailyCost]
+    by_model: list[CostBreakdown]
+    by_section: list[CostBreakdown]
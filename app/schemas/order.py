@@ -0,0 +1,154 @@
+"""
+Order Schemas
+
+Pydantic response models for order endpoints.
+
+The detail models nest one schema per relationship; their fields are also
+the column sets the loader profiles in app.services.orders select, so a
+field added here is loaded without touching the query.
+"""
+
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from app.models.order import OrderStatus
+from app.models.process_log import LogLevel
+
+
+class OrderSummary(BaseModel):
+    """Order list item (summary columns only)"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    podio_item_id: str
+    nip: str
+    imie_nazwisko: str
+    status: OrderStatus
+    current_phase: Optional[str] = None
+    progress_percent: Optional[int] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+
+class OrderPage(BaseModel):
+    """One page of orders; pass `next_cursor` back to get the next page"""
+    items: list[OrderSummary]
+    next_cursor: Optional[str] = None
+
+
+class CEIDGSummary(BaseModel):
+    """Registry data of the order's firm (no raw payload)"""
+    model_config = ConfigDict(from_attributes=True)
+
+    nazwa_firmy: str
+    regon: Optional[str] = None
+    pkd_glowny: Optional[str] = None
+    pkd_glowny_nazwa: Optional[str] = None
+    adres_miejscowosc: Optional[str] = None
+    adres_wojewodztwo: Optional[str] = None
+    status_wpisu: Optional[str] = None
+    data_rozpoczecia_dzialalnosci: Optional[str] = None
+
+
+class ResearchSummary(BaseModel):
+    """Market research metadata"""
+    model_config = ConfigDict(from_attributes=True)
+
+    research_method: Optional[str] = None
+    source_count: Optional[int] = None
+    source_quality_score: Optional[int] = None
+    relevance_score: Optional[int] = None
+    researched_at: Optional[datetime] = None
+
+
+class ResearchDetail(ResearchSummary):
+    """Market research with its data and sources"""
+    market_data: Optional[dict[str, Any]] = None
+    swot_data: Optional[dict[str, Any]] = None
+    sources: Optional[list[dict[str, Any]]] = None
+
+
+class PlanSummary(BaseModel):
+    """Plan status and quality figures (no content or logs)"""
+    model_config = ConfigDict(from_attributes=True)
+
+    status: str
+    iterations: Optional[int] = None
+    final_quality_score: Optional[int] = None
+    final_word_count: Optional[int] = None
+    final_page_count: Optional[int] = None
+    total_cost_usd: Optional[int] = None  # Cents
+    cache_hit_rate: Optional[int] = None
+    generation_completed_at: Optional[datetime] = None
+
+
+class PlanDetail(PlanSummary):
+    """Plan with its Markdown and unresolved issues"""
+    content_markdown: Optional[str] = None
+    final_issues: Optional[list[dict[str, Any]]] = None
+
+
+class ProcessLogItem(BaseModel):
+    """One progress log entry"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    phase: str
+    message: str
+    level: LogLevel
+    data: Optional[dict[str, Any]] = None
+    progress_current: Optional[int] = None
+    progress_total: Optional[int] = None
+    created_at: datetime
+
+
+class OrderDetail(OrderSummary):
+    """Order with client data and a summary of each related record"""
+    email: Optional[str] = None
+    telefon: Optional[str] = None
+    uslugi: Optional[list[str]] = None
+    planowany_dochod_roczny: Optional[int] = None
+    dodatkowe_informacje: Optional[str] = None
+    error_message: Optional[str] = None
+    started_at: Optional[datetime] = None
+    ceidg_data: Optional[CEIDGSummary] = None
+    research_result: Optional[ResearchSummary] = None
+    biznesplan: Optional[PlanSummary] = None
+
+
+class OrderFull(OrderDetail):
+    """Order with research data, plan content and the whole progress log"""
+    research_result: Optional[ResearchDetail] = None
+    biznesplan: Optional[PlanDetail] = None
+    process_logs: list[ProcessLogItem] = []
+
+
+class PhaseSpan(BaseModel):
+    """One phase of an order's timeline; it lasts until the next phase starts"""
+    phase: str
+    first_at: datetime
+    last_at: datetime
+    seconds: float
+    entries: int
+
+
+class LogEntrySummary(BaseModel):
+    """A warning or error kept in the timeline"""
+    at: datetime
+    phase: str
+    level: LogLevel
+    message: str
+
+
+class OrderTimeline(BaseModel):
+    """Process log history: rolled-up months plus the raw logs still kept"""
+    order_id: int
+    entries: int
+    first_at: Optional[datetime] = None
+    last_at: Optional[datetime] = None
+    level_counts: dict[str, int] = {}
+    phases: list[PhaseSpan] = []
+    errors: list[LogEntrySummary] = []
+    rolled_up_through: Optional[datetime] = None  # Older logs exist only as this summary
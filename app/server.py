@@ -0,0 +1,184 @@
+"""
+Production Server
+
+    python -m app.server [--workers N] [--port P]
+
+A gunicorn master supervising preforked uvicorn workers, one per CPU
+available to the process unless WEB_WORKERS is set. Each worker runs its
+own uvloop event loop with the httptools parser, and builds the app and
+runs its lifespan after the fork, so database pools, the progress broker
+subscription and the log sink belong to that worker alone
+(config.database.init_db / close_db).
+
+Stopping (SIGTERM, a HUP reload, or a worker recycled after
+WEB_MAX_REQUESTS):
+
+1. the worker stops accepting connections and ends its SSE streams;
+   browsers reconnect to a live worker with Last-Event-ID and the missed
+   events are replayed from process_logs,
+2. in-flight requests get up to WEB_GRACEFUL_TIMEOUT - SHUTDOWN_MARGIN
+   seconds to finish,
+3. the lifespan shutdown flushes buffered process logs and closes the
+   pools before gunicorn's own WEB_GRACEFUL_TIMEOUT kill.
+
+Every worker has its own pool, so the database sees up to
+workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections. In-process state
+would be per worker, so with more than one worker the server refuses to
+start with RATE_LIMIT_BACKEND=memory (limits would multiply by the
+worker count) or PROGRESS_BROKER=memory (SSE streams would miss other
+workers' events); --allow-per-worker-state overrides this. Counters and
+histograms on /metrics cover all workers (a shared METRICS_MULTIPROC_DIR,
+see app.utils.metrics); gauges are the answering worker's.
+benchmarks/serve_throughput.py compares this with `python -m app.main`.
+"""
+
+import argparse
+import atexit
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import warnings
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)  # Moved to the uvicorn-worker package
+    from uvicorn.workers import UvicornWorker
+
+from app.utils.metrics import REGISTRY, MultiprocessStore
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds of the graceful timeout left for the lifespan shutdown
+SHUTDOWN_MARGIN = 5
+
+
+def worker_count() -> int:
+    """WEB_WORKERS, or one per CPU this process may run on (cgroup/affinity aware)"""
+    if settings.WEB_WORKERS > 0:
+        return settings.WEB_WORKERS
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS
+        return os.cpu_count() or 1
+
+
+class DrainingServer(Server):
+    """uvicorn Server that ends SSE streams as soon as shutdown begins"""
+
+    async def shutdown(self, sockets=None) -> None:
+        from app.services.progress import get_broker
+
+        closed = get_broker().drain()
+        if closed:
+            logger.info("Closed %d SSE streams for shutdown", closed)
+        await super().shutdown(sockets)
+
+
+class AppWorker(UvicornWorker):
+    """uvicorn worker on uvloop + httptools, with lifespan and SSE draining"""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(self.cfg.graceful_timeout - SHUTDOWN_MARGIN, 1)
+
+    def init_process(self) -> None:
+        if REGISTRY.multiprocess is not None:
+            REGISTRY.multiprocess.start()
+        super().init_process()
+
+    async def _serve(self) -> None:
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if REGISTRY.multiprocess is not None:
+            REGISTRY.multiprocess.stop()  # Final totals for the other workers
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+
+class ServeApplication(BaseApplication):
+    """gunicorn application configured from a dict; the app is built in each worker"""
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import create_app
+
+        return create_app()
+
+
+def per_worker_state() -> list[str]:
+    """Settings whose state would be split between workers"""
+    problems = []
+    if settings.RATE_LIMIT_ENABLED and settings.RATE_LIMIT_BACKEND == "memory":
+        problems.append("RATE_LIMIT_BACKEND=memory")
+    if settings.PROGRESS_BROKER == "memory":
+        problems.append("PROGRESS_BROKER=memory")
+    return problems
+
+
+def share_metrics(workers: int) -> None:
+    """Have workers aggregate counters through a metrics directory (before forking)"""
+    if not settings.METRICS_ENABLED or workers < 2:
+        return
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        directory = tempfile.mkdtemp(prefix="biznesplan-metrics-")
+        master = os.getpid()
+        atexit.register(lambda: os.getpid() == master and shutil.rmtree(directory, ignore_errors=True))
+    REGISTRY.multiprocess = MultiprocessStore(directory, REGISTRY, settings.METRICS_MULTIPROC_INTERVAL)
+    REGISTRY.multiprocess.clear()
+
+
+def gunicorn_options(host: str, port: int, workers: int) -> dict:
+    return {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": "app.server.AppWorker",
+        "preload_app": False,  # Import and build the app after the fork
+        "graceful_timeout": settings.WEB_GRACEFUL_TIMEOUT,
+        "keepalive": settings.WEB_KEEPALIVE,
+        "max_requests": settings.WEB_MAX_REQUESTS,
+        "max_requests_jitter": settings.WEB_MAX_REQUESTS // 10,
+        "loglevel": settings.LOG_LEVEL.lower(),
+        "proc_name": "biznesplan-web",
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the API with preforked uvicorn workers")
+    parser.add_argument("--host", default=settings.WEB_HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=worker_count())
+    parser.add_argument("--allow-per-worker-state", action="store_true",
+                        help="Start several workers even with in-memory rate limits or progress broker")
+    args = parser.parse_args(argv)
+
+    problems = per_worker_state() if args.workers > 1 else []
+    if problems and not args.allow_per_worker_state:
+        parser.error(f"{' and '.join(problems)} would be per worker with {args.workers} workers; "
+                     "set them to redis or use --workers 1")
+    for problem in problems:
+        logger.warning("%s is per worker with %d workers", problem, args.workers)
+    share_metrics(args.workers)
+    ServeApplication(gunicorn_options(args.host, args.port, args.workers)).run()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    main()
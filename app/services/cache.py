@@ -0,0 +1,180 @@
+"""
+Two-Tier Cache
+
+In-process LRU in front of Redis, with single-flight loading.
+
+- Tier 1: per-process LRU (no network round trip)
+- Tier 2: Redis, shared by all web and Celery workers
+- Misses for the same key are coalesced into one loader call per process
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters"""
+    local_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0  # Not found in any tier
+    loads: int = 0  # Loader (upstream) calls actually made
+    coalesced: int = 0  # Misses that waited on an in-flight load
+    errors: int = 0  # Redis failures (cache degraded to local tier)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return (self.local_hits + self.redis_hits) / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "hit_rate": round(self.hit_rate, 4)}
+
+
+class LRUCache:
+    """Bounded in-process cache with per-entry expiry"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TwoTierCache:
+    """
+    JSON-serializable values cached locally and in Redis under one TTL.
+
+    Values read back from Redis are kept locally only for the remaining Redis
+    TTL, so neither tier serves an entry older than `ttl`.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: int,
+        redis=None,
+        local_maxsize: int = 1024,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.redis = redis
+        self.local = LRUCache(local_maxsize)
+        self.stats = CacheStats()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Look up both tiers (counts a miss if absent)"""
+        value = self.local.get(key)
+        if value is not None:
+            self.stats.local_hits += 1
+            return value
+
+        if self.redis is not None:
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.get(self._redis_key(key))
+                    pipe.pttl(self._redis_key(key))
+                    payload, pttl = await pipe.execute()
+            except Exception:
+                self.stats.errors += 1
+                logger.warning("Redis read failed for %s, using local tier only", self.namespace, exc_info=True)
+                payload, pttl = None, None
+            if payload is not None:
+                value = json.loads(payload)
+                remaining = pttl / 1000 if pttl and pttl > 0 else self.ttl
+                self.local.set(key, value, remaining)
+                self.stats.redis_hits += 1
+                return value
+
+        self.stats.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        self.local.set(key, value, self.ttl)
+        if self.redis is not None:
+            try:
+                await self.redis.set(self._redis_key(key), json.dumps(value, ensure_ascii=False), ex=self.ttl)
+            except Exception:
+                self.stats.errors += 1
+                logger.warning("Redis write failed for %s", self.namespace, exc_info=True)
+
+    async def delete(self, key: str) -> None:
+        self.local.delete(key)
+        if self.redis is not None:
+            try:
+                await self.redis.delete(self._redis_key(key))
+            except Exception:
+                self.stats.errors += 1
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Cached value, or the result of `loader()`.
+
+        Concurrent misses for the same key share one loader call; its result
+        (or exception) is delivered to every waiter.
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            self.stats.loads += 1
+            value = await loader()
+            if value is not None:
+                await self.set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so an unawaited future doesn't warn
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
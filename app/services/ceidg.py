@@ -0,0 +1,199 @@
+"""
+CEIDG Service
+
+Business registry lookups by NIP, cached across orders.
+
+Registry data for a NIP rarely changes, so responses are kept in the
+two-tier cache for CACHE_TTL_CEIDG and every order for a repeat NIP is
+filled from the cache instead of calling the registry again.
+"""
+
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Optional
+
+import httpx
+
+from app.models.ceidg_data import CEIDGData
+from app.services.cache import TwoTierCache
+from app.utils.redis import get_redis
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CEIDGError(Exception):
+    """CEIDG API request failed"""
+
+
+class CEIDGNotFoundError(CEIDGError):
+    """No business registered under the given NIP"""
+
+
+def normalize_nip(nip: str) -> str:
+    """Strip separators/prefix and validate a 10-digit NIP"""
+    digits = re.sub(r"[\s-]", "", str(nip)).upper().removeprefix("PL")
+    if not re.fullmatch(r"\d{10}", digits):
+        raise ValueError(f"Invalid NIP: {nip!r}")
+    return digits
+
+
+def normalize_pkd(code: Optional[str]) -> Optional[str]:
+    """Canonical PKD notation: '6201Z' / '62.01 Z' -> '62.01.Z'"""
+    if not code:
+        return None
+    compact = re.sub(r"[\s.]", "", str(code)).upper()
+    match = re.fullmatch(r"(\d{2})(\d{1,2})?([A-Z])?", compact)
+    if not match:
+        return str(code).strip()
+    division, group, letter = match.groups()
+    parts = [division]
+    if group:
+        parts.append(group)
+    if letter:
+        parts.append(letter)
+    return ".".join(parts)
+
+
+def _pkd_entry(entry) -> Optional[dict]:
+    """PKD item as {"kod", "nazwa"} (API returns either strings or objects)"""
+    if not entry:
+        return None
+    if isinstance(entry, dict):
+        return {"kod": normalize_pkd(entry.get("kod")), "nazwa": entry.get("nazwa")}
+    return {"kod": normalize_pkd(entry), "nazwa": None}
+
+
+def parse_firm(firm: dict) -> dict:
+    """Map a CEIDG v2 `firma` object onto CEIDGData column values"""
+    owner = firm.get("wlasciciel") or {}
+    address = firm.get("adresDzialalnosci") or {}
+
+    main_pkd = _pkd_entry(firm.get("pkdGlowny"))
+    other_pkd = [_pkd_entry(entry) for entry in firm.get("pkd") or []]
+    other_pkd = [entry for entry in other_pkd if entry and (not main_pkd or entry["kod"] != main_pkd["kod"])]
+
+    return {
+        "nip": owner.get("nip") or firm.get("nip"),
+        "regon": owner.get("regon") or firm.get("regon"),
+        "nazwa_firmy": firm.get("nazwa") or "",
+        "imie": owner.get("imie"),
+        "nazwisko": owner.get("nazwisko"),
+        "adres_ulica": address.get("ulica"),
+        "adres_numer_budynku": address.get("budynek"),
+        "adres_numer_lokalu": address.get("lokal"),
+        "adres_kod_pocztowy": address.get("kod"),
+        "adres_miejscowosc": address.get("miasto"),
+        "adres_gmina": address.get("gmina"),
+        "adres_powiat": address.get("powiat"),
+        "adres_wojewodztwo": address.get("wojewodztwo"),
+        "pkd_glowny": main_pkd["kod"] if main_pkd else None,
+        "pkd_glowny_nazwa": main_pkd["nazwa"] if main_pkd else None,
+        "pkd_pozostale": other_pkd,
+        "data_rozpoczecia_dzialalnosci": firm.get("dataRozpoczecia"),
+        "data_zakonczenia_dzialalnosci": firm.get("dataZakonczenia"),
+        "status_wpisu": firm.get("status"),
+    }
+
+
+class CEIDGClient:
+    """Thin async client for the CEIDG v2 API"""
+
+    def __init__(
+        self,
+        base_url: str = settings.CEIDG_API_URL,
+        api_key: Optional[str] = settings.CEIDG_API_KEY,
+        timeout: float = settings.CEIDG_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=timeout,
+            transport=transport,
+        )
+
+    async def fetch_by_nip(self, nip: str) -> dict:
+        """Raw `firma` object for a NIP"""
+        try:
+            response = await self._http.get("/firma", params={"nip": nip})
+        except httpx.HTTPError as exc:
+            raise CEIDGError(f"CEIDG request failed: {exc}") from exc
+
+        if response.status_code in (204, 404):
+            raise CEIDGNotFoundError(f"NIP {nip} not found in CEIDG")
+        if response.status_code >= 400:
+            raise CEIDGError(f"CEIDG returned HTTP {response.status_code}")
+
+        firms = response.json().get("firma") or []
+        if not firms:
+            raise CEIDGNotFoundError(f"NIP {nip} not found in CEIDG")
+        return firms[0]
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+class CEIDGService:
+    """
+    Cached CEIDG lookups.
+
+    Cache entries hold the raw registry response plus the time it was fetched,
+    so CEIDGData.fetched_at reflects the real registry call, not the cache hit.
+    """
+
+    def __init__(self, client: CEIDGClient, cache: TwoTierCache):
+        self.client = client
+        self.cache = cache
+
+    @property
+    def stats(self):
+        return self.cache.stats
+
+    async def lookup(self, nip: str) -> dict:
+        """Cached entry: {"fetched_at": iso8601, "firma": {...}}"""
+        nip = normalize_nip(nip)
+
+        async def load() -> dict:
+            firm = await self.client.fetch_by_nip(nip)
+            logger.info("Fetched NIP %s from CEIDG", nip)
+            return {"fetched_at": datetime.now(timezone.utc).isoformat(), "firma": firm}
+
+        return await self.cache.get_or_load(nip, load)
+
+    async def build_ceidg_data(self, order_id: int, nip: str) -> CEIDGData:
+        """New (unsaved) CEIDGData row for an order, filled from the cache"""
+        entry = await self.lookup(nip)
+        fields = parse_firm(entry["firma"])
+        fields["nip"] = normalize_nip(fields["nip"] or nip)
+        return CEIDGData(
+            order_id=order_id,
+            raw_response=entry["firma"],
+            fetched_at=datetime.fromisoformat(entry["fetched_at"]),
+            **fields,
+        )
+
+
+_service: Optional[CEIDGService] = None
+
+
+def get_ceidg_service() -> CEIDGService:
+    """Process-wide CEIDG service (shares one local LRU per process)"""
+    global _service
+    if _service is None:
+        settings.require("ceidg")
+        cache = TwoTierCache(
+            "ceidg",
+            ttl=settings.CACHE_TTL_CEIDG,
+            redis=get_redis(),
+            local_maxsize=settings.CACHE_LOCAL_MAX_ENTRIES,
+        )
+        _service = CEIDGService(CEIDGClient(), cache)
+    return _service
+
+
+def set_ceidg_service(service: Optional[CEIDGService]) -> None:
+    """Override the process-wide service (tests, benchmarks)"""
+    global _service
+    _service = service
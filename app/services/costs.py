@@ -0,0 +1,192 @@
+"""
+Cost Ledger
+
+Every LLM call is appended to `llm_calls` and folded into `llm_cost_rollups`
+in the same transaction, so budget checks and the cost dashboard read a
+handful of rollup rows instead of parsing generator/reviewer logs.
+
+All calls of a day update that day's ("*", "*") row, so concurrent
+recorders queue on its row lock for the length of one small transaction;
+rows are upserted in key order so they cannot deadlock.
+"""
+
+import logging
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.llm_cost import ALL, CostRollup, LLMCall
+from app.services.llm import LLMResponse
+from config.database import AsyncSessionLocal
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_UPSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Rollup counters incremented by every call
+COUNTERS = ("calls", "input_tokens", "output_tokens", "cache_read_tokens", "cache_creation_tokens", "cost_usd")
+
+
+def cost_day(moment: Optional[datetime] = None) -> date:
+    """Billing day of a moment (default: now) in COST_TIMEZONE"""
+    return (moment or datetime.now(timezone.utc)).astimezone(ZoneInfo(settings.COST_TIMEZONE)).date()
+
+
+async def record_llm_call(
+    session: AsyncSession,
+    response: LLMResponse,
+    section: str,
+    agent: str = "generator",
+    order_id: Optional[int] = None,
+    day: Optional[date] = None,
+) -> Decimal:
+    """
+    Add one call to the ledger and rollups (caller commits).
+
+    Returns the day's total after this call; a warning is logged when it
+    crosses COST_ALERT_DAILY.
+    """
+    day = day or cost_day()
+    usage = response.usage
+    cost = Decimal(f"{usage.cost_usd:.6f}")
+    tokens = {
+        "input_tokens": usage.input_tokens,
+        "output_tokens": usage.output_tokens,
+        "cache_read_tokens": usage.cache_read_tokens,
+        "cache_creation_tokens": usage.cache_creation_tokens,
+    }
+    await session.execute(insert(LLMCall).values(
+        order_id=order_id,
+        day=day,
+        agent=agent,
+        model=response.model,
+        section=section,
+        cost_usd=cost,
+        duration_seconds=round(response.duration_seconds, 1),
+        **tokens,
+    ))
+
+    keys = sorted({(response.model, section), (response.model, ALL), (ALL, section), (ALL, ALL)})
+    upsert = _UPSERT[session.bind.dialect.name](CostRollup).values([
+        {"day": day, "model": model, "section": name, "calls": 1, "cost_usd": cost, **tokens}
+        for model, name in keys
+    ])
+    columns = CostRollup.__table__.c
+    result = await session.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[columns.day, columns.model, columns.section],
+            set_={
+                **{name: columns[name] + upsert.excluded[name] for name in COUNTERS},
+                "updated_at": func.now(),
+            },
+        ).returning(columns.model, columns.section, columns.cost_usd)
+    )
+    total = next(row.cost_usd for row in result if row.model == ALL and row.section == ALL)
+
+    limit = Decimal(str(settings.COST_ALERT_DAILY))
+    if total - cost < limit <= total:
+        logger.warning("Daily LLM cost $%.2f reached COST_ALERT_DAILY ($%.2f) on %s", total, limit, day)
+    return total
+
+
+async def log_llm_call(
+    response: LLMResponse,
+    section: str,
+    agent: str = "generator",
+    order_id: Optional[int] = None,
+    session_factory=AsyncSessionLocal,
+) -> None:
+    """
+    record_llm_call in its own transaction.
+
+    Errors are logged, not raised: the call is already paid for, and losing
+    its result over accounting would only pay for it twice.
+    """
+    try:
+        async with session_factory() as session:
+            await record_llm_call(session, response, section, agent=agent, order_id=order_id)
+            await session.commit()
+    except Exception:
+        logger.exception("Failed to record LLM cost (order %s, %s)", order_id, section)
+
+
+async def spent_on(session: AsyncSession, day: Optional[date] = None) -> Decimal:
+    """Total LLM cost of a day (default: today), read from its rollup row"""
+    total = await session.scalar(
+        select(CostRollup.cost_usd).where(
+            CostRollup.day == (day or cost_day()),
+            CostRollup.model == ALL,
+            CostRollup.section == ALL,
+        )
+    )
+    return total or Decimal(0)
+
+
+async def is_over_daily_budget(session: AsyncSession, limit: Optional[float] = None) -> bool:
+    """
+    True once today's cost reached `limit` (default COST_LIMIT_DAILY); one
+    primary-key lookup. A limit of 0 means no cap and is never reached.
+    """
+    limit = settings.COST_LIMIT_DAILY if limit is None else limit
+    if limit <= 0:
+        return False
+    return await spent_on(session) >= Decimal(str(limit))
+
+
+def _totals(row) -> dict:
+    return {
+        "calls": row.calls,
+        "input_tokens": row.input_tokens,
+        "output_tokens": row.output_tokens,
+        "cache_read_tokens": row.cache_read_tokens,
+        "cache_creation_tokens": row.cache_creation_tokens,
+        "cost_usd": row.cost_usd,
+    }
+
+
+def _add(into: dict, key: str, row) -> None:
+    totals = into.setdefault(key, dict.fromkeys(COUNTERS, 0))
+    for name, value in _totals(row).items():
+        totals[name] += value
+
+
+async def cost_summary(session: AsyncSession, days: int = 30) -> dict:
+    """
+    Dashboard data for the last `days` days (today included): daily totals
+    plus per-model and per-section totals over the range.
+    """
+    today = cost_day()
+    rows = (await session.execute(
+        select(CostRollup).where(
+            CostRollup.day > today - timedelta(days=days),
+            or_(CostRollup.model == ALL, CostRollup.section == ALL),
+        ).order_by(CostRollup.day)
+    )).scalars().all()
+
+    daily, by_model, by_section = [], {}, {}
+    for row in rows:
+        if row.model == ALL and row.section == ALL:
+            daily.append({"day": row.day, **_totals(row)})
+        elif row.section == ALL:
+            _add(by_model, row.model, row)
+        else:
+            _add(by_section, row.section, row)
+
+    spent_today = next((day["cost_usd"] for day in daily if day["day"] == today), Decimal(0))
+    return {
+        "today": today,
+        "spent_today_usd": spent_today,
+        "daily_alert_usd": settings.COST_ALERT_DAILY,
+        "over_daily_alert": spent_today >= Decimal(str(settings.COST_ALERT_DAILY)),
+        "daily_limit_usd": settings.COST_LIMIT_DAILY or None,
+        "over_daily_budget": 0 < settings.COST_LIMIT_DAILY <= spent_today,
+        "daily": daily,
+        "by_model": [{"key": key, **totals} for key, totals in sorted(by_model.items())],
+        "by_section": [{"key": key, **totals} for key, totals in sorted(by_section.items())],
+    }
@@ -0,0 +1,255 @@
+"""
+Plan Export
+
+Renders a plan's Markdown to HTML (app/templates/plan.html) or PDF and
+caches the output on disk, keyed by the SHA-256 of the Markdown, the
+output format and TEMPLATE_VERSION. The key doubles as the HTTP ETag.
+
+Plans are LLM output built from order data, so the Markdown is untrusted:
+raw HTML in it is escaped, not passed through, and links or images with
+a scheme other than http(s)/mailto lose their URL before the body is
+inserted into the page unescaped.
+"""
+
+import asyncio
+import hashlib
+import html
+import io
+import logging
+import os
+import re
+import tempfile
+from enum import Enum
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the template, CSS or Markdown extensions change
+TEMPLATE_VERSION = "2"
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates"
+MARKDOWN_EXTENSIONS = ["tables", "toc", "sane_lists", "fenced_code"]
+
+# URL attributes kept only with these schemes (or none: relative, #anchor)
+SAFE_URL_SCHEMES = {"http", "https", "mailto"}
+_URL_SCHEME = re.compile(r"^([a-z][a-z0-9+.-]*):", re.IGNORECASE)
+_IGNORED_IN_URL = re.compile(r"[\x00-\x20\x7f]+")  # Browsers skip these inside a scheme
+
+
+class ExportFormat(str, Enum):
+    HTML = "html"
+    PDF = "pdf"
+
+
+MEDIA_TYPES = {
+    ExportFormat.HTML: "text/html; charset=utf-8",
+    ExportFormat.PDF: "application/pdf",
+}
+
+
+class PDFUnavailableError(RuntimeError):
+    """WeasyPrint (optional dependency) is not installed"""
+
+
+def render_key(markdown_text: str, export_format: ExportFormat) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{TEMPLATE_VERSION}\0{export_format.value}\0".encode("utf-8"))
+    digest.update(markdown_text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _document_title(markdown_text: str) -> str:
+    for line in markdown_text.splitlines():
+        if line.startswith("# "):
+            return line[2:].strip()
+    return "Biznesplan"
+
+
+_templates = None
+
+
+def _template():
+    global _templates
+    if _templates is None:
+        from jinja2 import Environment, FileSystemLoader, select_autoescape
+        _templates = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=select_autoescape(["html"]))
+    return _templates.get_template("plan.html")
+
+
+def is_safe_url(url: str) -> bool:
+    """Scheme check as a browser would read the attribute (entities decoded)"""
+    match = _URL_SCHEME.match(_IGNORED_IN_URL.sub("", html.unescape(url)))
+    return match is None or match.group(1).lower() in SAFE_URL_SCHEMES
+
+
+def _untrusted_html_extension():
+    """Markdown extension escaping raw HTML and dropping unsafe link/image URLs"""
+    from markdown.extensions import Extension
+    from markdown.treeprocessors import Treeprocessor
+
+    class SafeUrls(Treeprocessor):
+        def run(self, root) -> None:
+            for element in root.iter():
+                for attribute in ("href", "src"):
+                    url = element.get(attribute)
+                    if url is not None and not is_safe_url(url):
+                        element.set(attribute, "")
+
+    class UntrustedHtml(Extension):
+        def extendMarkdown(self, md) -> None:
+            md.preprocessors.deregister("html_block")  # Block HTML becomes escaped text
+            md.inlinePatterns.deregister("html")  # So does inline HTML
+            md.treeprocessors.register(SafeUrls(md), "safe_urls", -10)  # After unescape
+
+    return UntrustedHtml()
+
+
+def render_html(markdown_text: str) -> bytes:
+    import markdown  # Imported on first render; the web tier rarely needs it
+
+    body = markdown.markdown(
+        markdown_text, extensions=[*MARKDOWN_EXTENSIONS, _untrusted_html_extension()], output_format="html",
+    )
+    page = _template().render(title=_document_title(markdown_text), body=body)
+    return page.encode("utf-8")
+
+
+def render_pdf(markdown_text: str) -> bytes:
+    try:
+        from weasyprint import HTML  # Optional: needs system Pango/Cairo libraries
+    except ImportError as e:
+        raise PDFUnavailableError("PDF export requires the weasyprint package") from e
+    return HTML(string=render_html(markdown_text).decode("utf-8"), base_url=str(TEMPLATE_DIR)).write_pdf()
+
+
+RENDERERS = {
+    ExportFormat.HTML: render_html,
+    ExportFormat.PDF: render_pdf,
+}
+
+
+class RenderCache:
+    """
+    Size-bounded LRU cache of rendered files in a directory.
+
+    Reads touch the file's mtime; once the directory exceeds `max_bytes`,
+    the least recently used files are deleted down to 90% of the limit.
+    Files are written atomically, so several workers can share the
+    directory. Open handles survive eviction (POSIX unlink semantics).
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in os.scandir(self.directory) if entry.is_file())
+        self.evictions = 0
+
+    def _path(self, key: str, export_format: ExportFormat) -> Path:
+        return self.directory / f"{key}.{export_format.value}"
+
+    def open(self, key: str, export_format: ExportFormat) -> Optional[BinaryIO]:
+        path = self._path(key, export_format)
+        try:
+            handle = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # Evicted meanwhile; the open handle is still readable
+        return handle
+
+    def put(self, key: str, export_format: ExportFormat, data: bytes) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self._path(key, export_format))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self._size += len(data)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".tmp"):
+                continue  # Another worker's write in progress
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                evicted += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+        self.evictions += evicted
+        logger.info("Export cache: evicted %d files, %d bytes remain", evicted, total)
+
+
+def iter_chunks(handle: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    """Read an open file in chunks, closing it at the end"""
+    with handle:
+        while chunk := handle.read(chunk_size):
+            yield chunk
+
+
+def content_length(handle: BinaryIO) -> int:
+    if isinstance(handle, io.BytesIO):
+        return len(handle.getbuffer())
+    return os.fstat(handle.fileno()).st_size
+
+
+class ExportService:
+    """Cached plan rendering; concurrent requests for one key render once"""
+
+    def __init__(self, cache: RenderCache):
+        self.cache = cache
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def open(self, markdown_text: str, export_format: ExportFormat) -> tuple[str, BinaryIO]:
+        """(render key, readable handle) for the rendered document"""
+        key = render_key(markdown_text, export_format)
+        handle = self.cache.open(key, export_format)
+        if handle is not None:
+            return key, handle
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                handle = self.cache.open(key, export_format)
+                if handle is None:
+                    data = await asyncio.to_thread(RENDERERS[export_format], markdown_text)
+                    await asyncio.to_thread(self.cache.put, key, export_format, data)
+                    # Larger than the whole cache: evicted at once, serve from memory
+                    handle = self.cache.open(key, export_format) or io.BytesIO(data)
+        finally:
+            if not lock.locked():
+                self._locks.pop(key, None)
+        return key, handle
+
+
+_service: Optional[ExportService] = None
+
+
+def get_export_service() -> ExportService:
+    global _service
+    if _service is None:
+        _service = ExportService(RenderCache(settings.EXPORT_CACHE_DIR, settings.EXPORT_CACHE_MAX_BYTES))
+    return _service
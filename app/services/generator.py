@@ -0,0 +1,171 @@
+"""
+Biznesplan Generator
+
+Generates a full plan for an order whose CEIDG data and research are in
+place: sections run through SectionScheduler with prompts from
+PromptBuilder, the Reviewer scores them and flagged sections are revised
+(see app.services.reviewer), and the assembled Markdown is stored on
+Biznesplan.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import selectinload
+
+from app.models.biznesplan import Biznesplan
+from app.models.order import Order, OrderStatus
+from app.services.costs import log_llm_call
+from app.utils.instrumentation import observe_llm_call
+from app.services.llm import LLMClient, apply_generation_stats, get_llm_client, record_generation_call
+from app.services.prompts import PromptBuilder
+from app.services.reviewer import Reviewer, review_and_refine, revision_instructions
+from app.services.section_scheduler import SectionResult, SectionScheduler, SectionSpec, make_progress_reporter
+from config.database import AsyncSessionLocal
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Order of sections in the final document (the outline is only a plan)
+DOCUMENT_ORDER = (
+    "pismo_przewodnie",
+    "streszczenie",
+    "opis_dzialalnosci",
+    "analiza_rynku",
+    "analiza_konkurencji",
+    "analiza_swot",
+    "plan_marketingowy",
+    "plan_finansowy",
+)
+WORDS_PER_PAGE = 500
+
+
+def assemble_document(title: str, sections: dict) -> str:
+    """Final Markdown from SectionResults keyed by section key"""
+    parts = [f"# {title}"]
+    for number, key in enumerate((key for key in DOCUMENT_ORDER if key in sections), start=1):
+        result = sections[key]
+        parts.append(f"## {number}. {result.title}\n\n{result.content.strip()}")
+    return "\n\n".join(parts) + "\n"
+
+
+async def generate_biznesplan(
+    order_id: int,
+    session_factory=AsyncSessionLocal,
+    llm: Optional[LLMClient] = None,
+    scheduler: Optional[SectionScheduler] = None,
+    reviewer: Optional[Reviewer] = None,
+) -> int:
+    """Generate, review and store the plan for an order; returns the Biznesplan id"""
+    llm = llm or get_llm_client()
+    scheduler = scheduler or SectionScheduler()
+
+    async with session_factory() as session:
+        order = (await session.execute(
+            select(Order)
+            .where(Order.id == order_id)
+            .options(selectinload(Order.ceidg_data), selectinload(Order.research_result), selectinload(Order.biznesplan))
+        )).scalar_one()
+
+        started_at = datetime.now(timezone.utc)
+        plan = order.biznesplan or Biznesplan(order_id=order.id)
+        plan.status = "draft"
+        plan.total_sections = scheduler.total
+        plan.current_section_index = 0
+        plan.generation_started_at = started_at
+        order.biznesplan = plan
+        order.status = OrderStatus.GENERATING
+        order.current_phase = "Generating sections"
+        await session.commit()
+
+        builder = PromptBuilder(order, order.ceidg_data, order.research_result)
+        title = f"Biznesplan — {order.ceidg_data.nazwa_firmy if order.ceidg_data else order.imie_nazwisko}"
+        biznesplan_id = plan.id
+
+    logs: dict = {}
+
+    async def generate(section: SectionSpec, upstream: dict):
+        nonlocal logs
+        response = await llm.complete(builder.section_request(section, upstream))
+        logs = record_generation_call(logs, section.title, response)
+        observe_llm_call(section.key, response)
+        await log_llm_call(response, section.title, order_id=order_id, session_factory=session_factory)
+        plan_cost = logs["total_cost_usd"]
+        if plan_cost - response.usage.cost_usd <= settings.COST_ALERT_PER_PLAN < plan_cost:
+            logger.warning(
+                "Biznesplan %s (order %s) passed COST_ALERT_PER_PLAN ($%.2f): $%.2f so far",
+                biznesplan_id, order_id, settings.COST_ALERT_PER_PLAN, plan_cost,
+            )
+        return response.text, {"output_tokens": response.usage.output_tokens}
+
+    specs = {section.key: section for section in scheduler.sections}
+    revision_slots = asyncio.Semaphore(scheduler.concurrency)
+
+    async def revise(result: SectionResult, issues: list[dict], current: dict[str, SectionResult]) -> SectionResult:
+        nonlocal logs
+        section = specs[result.key]
+        latest = {**sections, **current}  # The outline is not reviewed, so only in `sections`
+        upstream = {key: latest[key] for key in scheduler.upstream[section.key]}
+        request = builder.section_request(section, upstream, revision_instructions(result, issues))
+        async with revision_slots:
+            revision_started = time.monotonic()
+            response = await llm.complete(request)
+        logs = record_generation_call(logs, f"{section.title} (poprawka)", response)
+        observe_llm_call(section.key, response)
+        await log_llm_call(response, section.title, order_id=order_id, session_factory=session_factory)
+        return SectionResult(section.key, section.title, response.text, revision_started, time.monotonic())
+
+    async def set_phase(status: OrderStatus, refinements: int) -> None:
+        if status is OrderStatus.REVIEWING:
+            phase = f"Reviewing (pass {refinements + 1})"
+        else:
+            phase = f"Refining ({refinements}/{settings.BIZNESPLAN_MAX_ITERATIONS})"
+        async with session_factory() as session:
+            await session.execute(update(Order).where(Order.id == order_id).values(status=status, current_phase=phase))
+            await session.commit()
+
+    started = time.monotonic()
+    sections = await scheduler.run(generate, make_progress_reporter(order_id, biznesplan_id, session_factory))
+    outcome, refinements = None, 0
+    if settings.BIZNESPLAN_REVIEW_ENABLED:
+        reviewer = reviewer or Reviewer(
+            llm, builder, order_id=order_id, session_factory=session_factory, upstream=scheduler.upstream,
+        )
+        reviewed, outcome, refinements = await review_and_refine(
+            reviewer, {key: sections[key] for key in DOCUMENT_ORDER if key in sections}, revise, on_phase=set_phase,
+        )
+        sections = {**sections, **reviewed}
+    document = assemble_document(title, sections)
+    word_count = len(document.split())
+
+    async with session_factory() as session:
+        plan = await session.get(Biznesplan, biznesplan_id)
+        order = await session.get(Order, order_id)
+        plan.content_markdown = document
+        plan.final_word_count = word_count
+        plan.final_page_count = max(1, round(word_count / WORDS_PER_PAGE))
+        plan.generation_completed_at = datetime.now(timezone.utc)
+        plan.generation_duration_seconds = round(time.monotonic() - started)
+        apply_generation_stats(plan, logs)
+        review_cost = 0.0
+        if outcome is not None:
+            plan.reviewer_logs = outcome.logs
+            plan.iterations = refinements
+            plan.final_quality_score = round(outcome.overall_score * 100)
+            plan.final_issues = outcome.issues
+            plan.status = "approved" if outcome.approved else "in_review"  # Not approved: left for manual review
+            review_cost = outcome.logs.get("total_cost_usd", 0.0)
+        plan.total_cost_usd = round((logs.get("total_cost_usd", 0.0) + review_cost) * 100)
+        order.current_phase = "Sections generated"
+        order.progress_percent = 100
+        await session.commit()
+
+    logger.info(
+        "Generated biznesplan %s for order %s: %d words, $%.2f",
+        biznesplan_id, order_id, word_count, logs.get("total_cost_usd", 0.0),
+    )
+    return biznesplan_id
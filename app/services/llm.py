@@ -0,0 +1,229 @@
+"""
+LLM Service
+
+Anthropic Messages API client with token/cost accounting.
+
+Usage from each response (including prompt-cache reads and writes) is
+folded into `Biznesplan.generator_logs`, and the plan's `cache_hit_rate`
+is derived from it.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+from app.services.llm_budget import (
+    BudgetTimeoutError,
+    LLMPriority,
+    Reservation,
+    TokenBudget,
+    estimate_request_tokens,
+)
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TokenUsage:
+    """Token counts of one API call (input_tokens excludes cached tokens)"""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+
+    @classmethod
+    def from_response(cls, usage) -> "TokenUsage":
+        """Read usage from an SDK response object or a plain dict"""
+        get = usage.get if isinstance(usage, dict) else lambda name, default=None: getattr(usage, name, default)
+        return cls(
+            input_tokens=get("input_tokens", 0) or 0,
+            output_tokens=get("output_tokens", 0) or 0,
+            cache_read_tokens=get("cache_read_input_tokens", 0) or 0,
+            cache_creation_tokens=get("cache_creation_input_tokens", 0) or 0,
+        )
+
+    @property
+    def prompt_tokens(self) -> int:
+        """All prompt tokens, cached or not"""
+        return self.input_tokens + self.cache_read_tokens + self.cache_creation_tokens
+
+    @property
+    def cost_usd(self) -> float:
+        return (
+            self.input_tokens * settings.LLM_PRICE_INPUT_PER_MTOK
+            + self.output_tokens * settings.LLM_PRICE_OUTPUT_PER_MTOK
+            + self.cache_read_tokens * settings.LLM_PRICE_CACHE_READ_PER_MTOK
+            + self.cache_creation_tokens * settings.LLM_PRICE_CACHE_WRITE_PER_MTOK
+        ) / 1_000_000
+
+
+@dataclass
+class LLMResponse:
+    """Text and accounting of one completed call"""
+    text: str
+    usage: TokenUsage
+    duration_seconds: float
+    model: str
+
+
+class LLMClient:
+    """
+    Async Anthropic client.
+
+    The SDK is imported on first use so importing this module stays cheap.
+    `base_url` can point at a stub endpoint for tests and benchmarks.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = settings.ANTHROPIC_API_KEY,
+        base_url: Optional[str] = None,
+        timeout: float = settings.LLM_TIMEOUT,
+        max_retries: int = settings.LLM_MAX_RETRIES,
+        budget: Optional[TokenBudget] = None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.budget = budget
+        self._client = None
+
+    def _sdk(self):
+        if self._client is None:
+            from anthropic import AsyncAnthropic
+            self._client = AsyncAnthropic(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+            )
+        return self._client
+
+    async def complete(self, request: dict, priority: LLMPriority = LLMPriority.GENERATION) -> LLMResponse:
+        """
+        Send a Messages API request (as built by PromptBuilder).
+
+        With a token budget configured, waits for estimated tokens first and
+        settles the real usage afterwards. The budget only paces calls: if
+        Redis is unreachable the call goes ahead unbudgeted (with a warning),
+        and a failed settle or release never replaces the call's outcome.
+        """
+        reservation = None
+        if self.budget is not None:
+            reservation = await self._reserve(request, priority)
+
+        started = time.monotonic()
+        try:
+            response = await self._sdk().messages.create(**request)
+        except BaseException:
+            if reservation is not None:
+                try:
+                    await self.budget.release(reservation)
+                except Exception:
+                    logger.warning("Failed to release LLM token reservation", exc_info=True)
+            raise
+
+        usage = TokenUsage.from_response(response.usage)
+        if reservation is not None:
+            try:
+                await self.budget.settle(
+                    reservation,
+                    input_tokens=usage.input_tokens + usage.cache_creation_tokens,
+                    output_tokens=usage.output_tokens,
+                )
+            except Exception:
+                logger.warning("Failed to settle LLM token usage", exc_info=True)
+
+        text = "".join(block.text for block in response.content if getattr(block, "type", None) == "text")
+        return LLMResponse(
+            text=text,
+            usage=usage,
+            duration_seconds=time.monotonic() - started,
+            model=getattr(response, "model", request.get("model")),
+        )
+
+    async def _reserve(self, request: dict, priority: LLMPriority) -> Optional[Reservation]:
+        try:
+            return await self.budget.reserve(*estimate_request_tokens(request), priority=priority)
+        except BudgetTimeoutError:
+            raise
+        except Exception:
+            logger.warning("LLM token budget unavailable, calling without it", exc_info=True)
+            return None
+
+
+_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    """Process-wide LLM client, sharing the Redis token budget when enabled"""
+    global _client
+    if _client is None:
+        settings.require("anthropic")
+        budget = None
+        if settings.LLM_BUDGET_ENABLED:
+            from app.utils.redis import get_redis
+            budget = TokenBudget(get_redis())
+        _client = LLMClient(budget=budget)
+    return _client
+
+
+def set_llm_client(client: Optional[LLMClient]) -> None:
+    """Override the process-wide client (tests, benchmarks)"""
+    global _client
+    _client = client
+
+
+def record_call_totals(logs: Optional[dict], response: LLMResponse) -> dict:
+    """
+    Fold one call into the token/cost totals of a generator_logs or
+    reviewer_logs dict.
+
+    Returns a new dict so SQLAlchemy detects the change on plain JSON columns.
+    """
+    logs = dict(logs or {})
+    usage = response.usage
+    logs["api_calls"] = logs.get("api_calls", 0) + 1
+    logs["total_input_tokens"] = logs.get("total_input_tokens", 0) + usage.input_tokens
+    logs["total_output_tokens"] = logs.get("total_output_tokens", 0) + usage.output_tokens
+    logs["cached_tokens"] = logs.get("cached_tokens", 0) + usage.cache_read_tokens
+    logs["cache_creation_tokens"] = logs.get("cache_creation_tokens", 0) + usage.cache_creation_tokens
+    logs["total_cost_usd"] = round(logs.get("total_cost_usd", 0.0) + usage.cost_usd, 6)
+    return logs
+
+
+def record_generation_call(logs: Optional[dict], section_name: str, response: LLMResponse) -> dict:
+    """Fold one call into a generator_logs dict (see Biznesplan.generator_logs); returns a new dict"""
+    logs = record_call_totals(logs, response)
+    usage = response.usage
+    logs["sections"] = list(logs.get("sections", [])) + [{
+        "name": section_name,
+        **asdict(usage),
+        "cost_usd": round(usage.cost_usd, 6),
+        "duration_seconds": round(response.duration_seconds, 1),
+    }]
+    return logs
+
+
+def cache_hit_rate(logs: Optional[dict]) -> float:
+    """Share of prompt tokens served from the prompt cache (0.0-1.0)"""
+    if not logs:
+        return 0.0
+    cached = logs.get("cached_tokens", 0)
+    total = cached + logs.get("total_input_tokens", 0) + logs.get("cache_creation_tokens", 0)
+    return cached / total if total else 0.0
+
+
+def apply_generation_stats(biznesplan, logs: dict) -> None:
+    """Store generator_logs and derived cache_hit_rate (percent) on a Biznesplan"""
+    rate = cache_hit_rate(logs)
+    biznesplan.generator_logs = logs
+    biznesplan.cache_hit_rate = round(rate * 100)
+    if logs.get("api_calls", 0) > 1 and rate < settings.PROMPT_CACHE_HIT_RATE_TARGET:
+        logger.warning(
+            "Prompt cache hit rate %.0f%% below target %.0f%% (biznesplan %s)",
+            rate * 100, settings.PROMPT_CACHE_HIT_RATE_TARGET * 100, biznesplan.id,
+        )
@@ -0,0 +1,216 @@
+"""
+LLM Token Budget
+
+Global tokens-per-minute budget shared by all Celery workers.
+
+Two token buckets (input and output tokens per minute) live in Redis. Before
+a call, a worker reserves its estimated tokens; afterwards it settles the
+real usage, refunding or charging the difference. When the budget is short,
+callers wait in a Redis priority queue instead of hitting the provider's
+rate limit and retrying all at once.
+"""
+
+import asyncio
+import enum
+import logging
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMPriority(enum.IntEnum):
+    """Queue priority (lower is served first)"""
+    INTERACTIVE = 0  # User is waiting on the response
+    GENERATION = 10  # Section generation
+    REVIEW = 20  # Reviewer passes
+    BACKGROUND = 30  # Batch / maintenance jobs
+
+
+class BudgetTimeoutError(TimeoutError):
+    """Could not reserve tokens within the allowed wait"""
+
+
+# Refill both buckets from elapsed server time, then serve the ticket only if
+# it is at the head of the priority queue and both buckets cover the request.
+# The ticket is queued and given its deadline in the same call, so a poll by
+# another worker never sees it without one (and prunes it as abandoned).
+# KEYS: bucket hash, queue zset, deadlines hash
+# ARGV: ticket, need_in, need_out, cap_in, cap_out, ticket_ttl_ms, score
+# Returns {granted (0/1), suggested wait ms}
+_RESERVE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local ticket = ARGV[1]
+local need_in, need_out = tonumber(ARGV[2]), tonumber(ARGV[3])
+local cap_in, cap_out = tonumber(ARGV[4]), tonumber(ARGV[5])
+local rate_in, rate_out = cap_in / 60000, cap_out / 60000
+
+local b = redis.call('HMGET', KEYS[1], 'in', 'out', 'ts')
+local tokens_in = tonumber(b[1]) or cap_in
+local tokens_out = tonumber(b[2]) or cap_out
+local ts = tonumber(b[3]) or now
+local elapsed = math.max(0, now - ts)
+tokens_in = math.min(cap_in, tokens_in + elapsed * rate_in)
+tokens_out = math.min(cap_out, tokens_out + elapsed * rate_out)
+redis.call('HSET', KEYS[1], 'in', tokens_in, 'out', tokens_out, 'ts', now)
+
+-- Queue (or keep alive) this ticket; drop abandoned tickets from the head
+redis.call('ZADD', KEYS[2], 'NX', ARGV[7], ticket)
+redis.call('HSET', KEYS[3], ticket, now + tonumber(ARGV[6]))
+while true do
+  local head = redis.call('ZRANGE', KEYS[2], 0, 0)[1]
+  if not head then break end
+  local deadline = tonumber(redis.call('HGET', KEYS[3], head))
+  if deadline and deadline >= now then break end
+  redis.call('ZREM', KEYS[2], head)
+  redis.call('HDEL', KEYS[3], head)
+end
+
+local head = redis.call('ZRANGE', KEYS[2], 0, 0)[1]
+if head and head ~= ticket then
+  return {0, 50}
+end
+
+if tokens_in >= need_in and tokens_out >= need_out then
+  redis.call('HSET', KEYS[1], 'in', tokens_in - need_in, 'out', tokens_out - need_out)
+  redis.call('ZREM', KEYS[2], ticket)
+  redis.call('HDEL', KEYS[3], ticket)
+  return {1, 0}
+end
+
+local wait_in = (need_in - tokens_in) / rate_in
+local wait_out = (need_out - tokens_out) / rate_out
+return {0, math.ceil(math.max(wait_in, wait_out, 1))}
+"""
+
+# Return (positive) or charge (negative) the difference between reserved
+# and actual usage. Buckets may go negative, which delays later callers.
+# KEYS: bucket hash   ARGV: delta_in, delta_out, cap_in, cap_out
+_SETTLE_SCRIPT = """
+local b = redis.call('HMGET', KEYS[1], 'in', 'out')
+local cap_in, cap_out = tonumber(ARGV[3]), tonumber(ARGV[4])
+local tokens_in = math.min(cap_in, (tonumber(b[1]) or cap_in) + tonumber(ARGV[1]))
+local tokens_out = math.min(cap_out, (tonumber(b[2]) or cap_out) + tonumber(ARGV[2]))
+redis.call('HSET', KEYS[1], 'in', tokens_in, 'out', tokens_out)
+return 1
+"""
+
+
+@dataclass
+class Reservation:
+    """Tokens held for one in-flight call"""
+    ticket: str
+    input_tokens: int
+    output_tokens: int
+    waited_seconds: float = 0.0
+
+
+def estimate_request_tokens(request: dict) -> tuple[int, int]:
+    """
+    Conservative (input, output) estimate for a Messages API request.
+
+    Input is ~4 characters per token over all text blocks; output is the
+    request's max_tokens (refunded on settle).
+    """
+    chars = 0
+    for block in request.get("system") or []:
+        chars += len(block["text"]) if isinstance(block, dict) else len(block)
+    for message in request.get("messages", []):
+        content = message["content"]
+        if isinstance(content, str):
+            chars += len(content)
+        else:
+            chars += sum(len(block.get("text", "")) for block in content)
+    return chars // 4 + 1, int(request.get("max_tokens", settings.LLM_MAX_TOKENS))
+
+
+class TokenBudget:
+    """
+    Redis token buckets with a priority wait queue.
+
+    Cache reads are not reserved against the input bucket (they do not count
+    toward the provider's input-token rate limit); settle() charges input and
+    cache-write tokens only.
+    """
+
+    def __init__(
+        self,
+        redis,
+        input_per_minute: int = settings.LLM_INPUT_TOKENS_PER_MINUTE,
+        output_per_minute: int = settings.LLM_OUTPUT_TOKENS_PER_MINUTE,
+        namespace: str = "llm_budget",
+        max_poll_interval: float = 1.0,
+        ticket_ttl: float = 30.0,
+    ):
+        self.redis = redis
+        self.input_per_minute = input_per_minute
+        self.output_per_minute = output_per_minute
+        self.max_poll_interval = max_poll_interval
+        self.ticket_ttl_ms = int(ticket_ttl * 1000)
+        self._bucket_key = f"{namespace}:bucket"
+        self._queue_key = f"{namespace}:queue"
+        self._deadlines_key = f"{namespace}:deadlines"
+        self._reserve = redis.register_script(_RESERVE_SCRIPT)
+        self._settle = redis.register_script(_SETTLE_SCRIPT)
+
+    async def reserve(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        priority: LLMPriority = LLMPriority.GENERATION,
+        timeout: Optional[float] = settings.LLM_BUDGET_MAX_WAIT,
+    ) -> Reservation:
+        """Wait (in priority order) until the estimated tokens are available"""
+        # A request larger than a full bucket could never be served
+        input_tokens = min(int(input_tokens), self.input_per_minute)
+        output_tokens = min(int(output_tokens), self.output_per_minute)
+
+        ticket = uuid.uuid4().hex
+        started = time.monotonic()
+        score = int(priority) * 10**13 + int(time.time() * 1000)
+        try:
+            while True:
+                granted, wait_ms = await self._reserve(
+                    keys=[self._bucket_key, self._queue_key, self._deadlines_key],
+                    args=[ticket, input_tokens, output_tokens,
+                          self.input_per_minute, self.output_per_minute, self.ticket_ttl_ms, score],
+                )
+                if int(granted):
+                    waited = time.monotonic() - started
+                    if waited > 1:
+                        logger.info("Waited %.1fs for LLM token budget (priority %s)", waited, priority.name)
+                    return Reservation(ticket, input_tokens, output_tokens, waited)
+
+                if timeout is not None and time.monotonic() - started > timeout:
+                    raise BudgetTimeoutError(f"No LLM token budget after {timeout}s")
+                # Jitter so waiting workers don't poll in lockstep
+                delay = min(int(wait_ms) / 1000, self.max_poll_interval)
+                await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+        except BaseException:
+            await self._cancel(ticket)
+            raise
+
+    async def settle(self, reservation: Reservation, input_tokens: int, output_tokens: int) -> None:
+        """Refund or charge the difference between reserved and actual usage"""
+        await self._settle(
+            keys=[self._bucket_key],
+            args=[reservation.input_tokens - input_tokens, reservation.output_tokens - output_tokens,
+                  self.input_per_minute, self.output_per_minute],
+        )
+
+    async def release(self, reservation: Reservation) -> None:
+        """Return the whole reservation (call never reached the provider)"""
+        await self.settle(reservation, 0, 0)
+
+    async def _cancel(self, ticket: str) -> None:
+        try:
+            await self.redis.zrem(self._queue_key, ticket)
+            await self.redis.hdel(self._deadlines_key, ticket)
+        except Exception:
+            logger.warning("Failed to remove LLM budget ticket %s", ticket, exc_info=True)
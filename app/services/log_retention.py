@@ -0,0 +1,378 @@
+"""
+Process Log Retention
+
+On PostgreSQL process_logs is range-partitioned by month on created_at
+(partitions named process_logs_yYYYYmMM). Daily maintenance:
+
+1. creates the partitions for the current and PROCESS_LOG_PARTITIONS_AHEAD
+   upcoming months, so inserts never hit a missing range,
+2. for every partition older than PROCESS_LOG_RETENTION_MONTHS full months,
+   folds its rows into one ProcessLogSummary per order (phase timeline,
+   counts by level, last warnings/errors), then detaches it and, unless
+   PROCESS_LOG_DETACH_ONLY, drops it - all in one transaction, so a month
+   is either summarised and gone or untouched.
+
+Dropping a partition is a catalog operation, unlike DELETE, which leaves
+dead rows and index bloat behind. Where the table is not partitioned
+(SQLite, or PostgreSQL before the migration) expired months are rolled up
+and DELETEd instead.
+
+order_timeline() merges an order's summary with a fold of its remaining
+raw logs, so historical timelines read one small row plus the live tail.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.process_log import LogLevel, ProcessLog
+from app.models.process_log_summary import ProcessLogSummary
+from config.database import AsyncSessionLocal
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "process_logs"
+
+# Warnings/errors kept per order in a summary (newest)
+SUMMARY_ERRORS = 20
+
+_ERROR_LEVELS = (LogLevel.WARNING, LogLevel.ERROR)
+
+_PARTITION_NAME = re.compile(rf"{PARENT_TABLE}_y(?P<year>\d{{4}})m(?P<month>\d{{2}})")
+
+
+def month_start(moment: datetime) -> datetime:
+    """First instant of the moment's month, in UTC"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    moment = moment.astimezone(timezone.utc)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Start of the month `months` after (or before) `month`"""
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT_TABLE}_y{month:%Y}m{month:%m}"
+
+
+def retention_cutoff(now: Optional[datetime] = None) -> datetime:
+    """Logs created before this are rolled up and removed"""
+    return add_months(month_start(now or datetime.now(timezone.utc)), -settings.PROCESS_LOG_RETENTION_MONTHS)
+
+
+def _utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Aware UTC datetime (SQLite returns naive ones)"""
+    if moment is None:
+        return None
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def _parse(value: Optional[str]) -> Optional[datetime]:
+    return _utc(datetime.fromisoformat(value)) if value else None
+
+
+def _iso(moment: Optional[datetime]) -> Optional[str]:
+    return moment.isoformat() if moment else None
+
+
+@dataclass
+class Timeline:
+    """
+    Running fold of an order's logs: what a ProcessLogSummary stores.
+
+    Built from grouped (phase, level) counts rather than rows, and
+    mergeable, so a month at a time can be added to a stored summary.
+    """
+    entries: int = 0
+    first_at: Optional[datetime] = None
+    last_at: Optional[datetime] = None
+    level_counts: dict[str, int] = field(default_factory=dict)
+    phases: dict[str, dict] = field(default_factory=dict)  # phase -> first_at, last_at, entries
+    errors: list[dict] = field(default_factory=list)  # Oldest first
+
+    @classmethod
+    def from_summary(cls, summary: Optional[ProcessLogSummary]) -> "Timeline":
+        timeline = cls()
+        if summary is None:
+            return timeline
+        timeline.entries = summary.entries or 0
+        timeline.first_at, timeline.last_at = _utc(summary.first_at), _utc(summary.last_at)
+        timeline.level_counts = dict(summary.level_counts or {})
+        for phase in summary.phases or []:
+            timeline.phases[phase["phase"]] = {
+                "first_at": _parse(phase["first_at"]),
+                "last_at": _parse(phase["last_at"]),
+                "entries": phase["entries"],
+            }
+        timeline.errors = list(summary.errors or [])
+        return timeline
+
+    def add_group(self, phase: str, level: LogLevel, count: int, first_at: datetime, last_at: datetime) -> None:
+        """Fold in `count` entries of one (phase, level) group"""
+        first_at, last_at = _utc(first_at), _utc(last_at)
+        key = level.value if isinstance(level, LogLevel) else str(level)
+        self._add(count, first_at, last_at, {key: count}, {phase: {"first_at": first_at, "last_at": last_at, "entries": count}})
+
+    def merge(self, other: "Timeline") -> None:
+        """Fold in a later Timeline (its errors are appended after ours)"""
+        if other.entries:
+            self._add(other.entries, other.first_at, other.last_at, other.level_counts, other.phases)
+        self.add_errors(other.errors)
+
+    def _add(self, entries: int, first_at: datetime, last_at: datetime, level_counts: dict, phases: dict) -> None:
+        self.entries += entries
+        self.first_at = min(filter(None, (self.first_at, first_at)))
+        self.last_at = max(filter(None, (self.last_at, last_at)))
+        for level, count in level_counts.items():
+            self.level_counts[level] = self.level_counts.get(level, 0) + count
+        for phase, values in phases.items():
+            current = self.phases.get(phase)
+            if current is None:
+                self.phases[phase] = dict(values)
+            else:
+                current["first_at"] = min(current["first_at"], values["first_at"])
+                current["last_at"] = max(current["last_at"], values["last_at"])
+                current["entries"] += values["entries"]
+
+    def add_errors(self, errors: Iterable[dict]) -> None:
+        """Append newer warnings/errors (oldest first), keeping the last SUMMARY_ERRORS"""
+        self.errors = (self.errors + list(errors))[-SUMMARY_ERRORS:]
+
+    def phase_list(self) -> list[dict]:
+        """
+        Phases in the order they started.
+
+        A phase lasts until the next one starts (the last one until its own
+        last entry), since most phases log once when they begin.
+        """
+        ordered = sorted(self.phases.items(), key=lambda item: item[1]["first_at"])
+        result = []
+        for index, (phase, values) in enumerate(ordered):
+            end = ordered[index + 1][1]["first_at"] if index + 1 < len(ordered) else values["last_at"]
+            result.append({
+                "phase": phase,
+                "first_at": _iso(values["first_at"]),
+                "last_at": _iso(values["last_at"]),
+                "seconds": round(max((end - values["first_at"]).total_seconds(), 0.0), 3),
+                "entries": values["entries"],
+            })
+        return result
+
+    def apply_to(self, summary: ProcessLogSummary, through: datetime) -> None:
+        summary.entries = self.entries
+        summary.first_at = self.first_at
+        summary.last_at = self.last_at
+        summary.level_counts = dict(sorted(self.level_counts.items()))
+        summary.phases = self.phase_list()
+        summary.errors = self.errors
+        summary.rolled_up_through = max(filter(None, (_utc(summary.rolled_up_through), through)))
+
+    def to_dict(self) -> dict:
+        return {
+            "entries": self.entries,
+            "first_at": self.first_at,
+            "last_at": self.last_at,
+            "level_counts": dict(sorted(self.level_counts.items())),
+            "phases": self.phase_list(),
+            "errors": self.errors,
+        }
+
+
+def _error_entry(row) -> dict:
+    return {"at": _iso(_utc(row.created_at)), "phase": row.phase, "level": row.level.value, "message": row.message}
+
+
+async def _fold_range(
+    db: AsyncSession,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    order_id: Optional[int] = None,
+) -> dict[int, Timeline]:
+    """Per-order Timelines of the logs in [start, end) (grouped in SQL; None is unbounded)"""
+    conditions = []
+    if start is not None:
+        conditions.append(ProcessLog.created_at >= start)
+    if end is not None:
+        conditions.append(ProcessLog.created_at < end)
+    if order_id is not None:
+        conditions.append(ProcessLog.order_id == order_id)
+
+    timelines: dict[int, Timeline] = {}
+    groups = await db.execute(
+        select(
+            ProcessLog.order_id, ProcessLog.phase, ProcessLog.level, func.count(),
+            func.min(ProcessLog.created_at), func.max(ProcessLog.created_at),
+        ).where(*conditions).group_by(ProcessLog.order_id, ProcessLog.phase, ProcessLog.level)
+    )
+    for row_order_id, phase, level, count, first_at, last_at in groups:
+        timelines.setdefault(row_order_id, Timeline()).add_group(phase, level, count, first_at, last_at)
+
+    errors = await db.execute(
+        select(ProcessLog.order_id, ProcessLog.created_at, ProcessLog.phase, ProcessLog.level, ProcessLog.message)
+        .where(*conditions, ProcessLog.level.in_(_ERROR_LEVELS))
+        .order_by(ProcessLog.order_id, ProcessLog.id)
+    )
+    by_order: dict[int, list[dict]] = {}
+    for row in errors:
+        by_order.setdefault(row.order_id, []).append(_error_entry(row))
+    for row_order_id, entries in by_order.items():
+        timelines[row_order_id].add_errors(entries)
+    return timelines
+
+
+async def roll_up(db: AsyncSession, start: Optional[datetime], end: datetime) -> tuple[int, int]:
+    """Merge the logs in [start, end) into per-order summaries (caller commits); returns (orders, rows)"""
+    timelines = await _fold_range(db, start, end)
+    if not timelines:
+        return 0, 0
+    existing = {
+        summary.order_id: summary
+        for summary in (await db.scalars(
+            select(ProcessLogSummary).where(ProcessLogSummary.order_id.in_(list(timelines)))
+        ))
+    }
+    for order_id, month in timelines.items():
+        summary = existing.get(order_id)
+        if summary is None:
+            summary = ProcessLogSummary(order_id=order_id)
+            db.add(summary)
+        # Months are retired oldest first, so this month's logs come after the stored ones
+        merged = Timeline.from_summary(summary)
+        merged.merge(month)
+        merged.apply_to(summary, end)
+    await db.flush()
+    return len(timelines), sum(timeline.entries for timeline in timelines.values())
+
+
+async def is_partitioned(db: AsyncSession) -> bool:
+    if db.bind.dialect.name != "postgresql":
+        return False
+    return bool(await db.scalar(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"
+    ), {"table": PARENT_TABLE}))
+
+
+async def list_partitions(db: AsyncSession) -> dict[str, datetime]:
+    """Attached monthly partitions: name -> month start"""
+    names = await db.scalars(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    ), {"table": PARENT_TABLE})
+    partitions = {}
+    for name in names:
+        match = _PARTITION_NAME.fullmatch(name)
+        if match:
+            partitions[name] = datetime(int(match["year"]), int(match["month"]), 1, tzinfo=timezone.utc)
+    return dict(sorted(partitions.items(), key=lambda item: item[1]))
+
+
+def create_partition_sql(month: datetime) -> str:
+    """DDL for one month's partition (indexes are inherited from the parent)"""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+async def ensure_partitions(db: AsyncSession, now: Optional[datetime] = None, ahead: Optional[int] = None) -> list[str]:
+    """Create missing partitions for this month and `ahead` more (caller commits); returns the new ones"""
+    ahead = settings.PROCESS_LOG_PARTITIONS_AHEAD if ahead is None else ahead
+    current = month_start(now or datetime.now(timezone.utc))
+    existing = await list_partitions(db)
+    created = []
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        if partition_name(month) not in existing:
+            await db.execute(text(create_partition_sql(month)))
+            created.append(partition_name(month))
+    return created
+
+
+async def _retire_partitions(session_factory, cutoff: datetime, stats: dict) -> None:
+    async with session_factory() as db:
+        expired = [(name, month) for name, month in (await list_partitions(db)).items()
+                   if add_months(month, 1) <= cutoff]
+    for name, month in expired:
+        async with session_factory() as db:
+            orders, rows = await roll_up(db, month, add_months(month, 1))
+            await db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            if not settings.PROCESS_LOG_DETACH_ONLY:
+                await db.execute(text(f"DROP TABLE {name}"))
+            await db.commit()
+        logger.info("Retired %s: %d rows of %d orders rolled up (%s)", name, rows, orders,
+                    "detached" if settings.PROCESS_LOG_DETACH_ONLY else "dropped")
+        stats["retired"].append(name)
+        stats["orders"] += orders
+        stats["rows"] += rows
+
+
+async def _delete_expired(session_factory, cutoff: datetime, stats: dict) -> None:
+    """Unpartitioned table: roll up and DELETE one month per transaction"""
+    async with session_factory() as db:
+        oldest = await db.scalar(select(func.min(ProcessLog.created_at)).where(ProcessLog.created_at < cutoff))
+    if oldest is None:
+        return
+    month = month_start(oldest)
+    while month < cutoff:
+        end = min(add_months(month, 1), cutoff)
+        async with session_factory() as db:
+            orders, rows = await roll_up(db, month, end)
+            await db.execute(delete(ProcessLog).where(ProcessLog.created_at >= month, ProcessLog.created_at < end))
+            await db.commit()
+        if rows:
+            logger.info("Rolled up and deleted %d process logs of %d orders from %s", rows, orders, f"{month:%Y-%m}")
+            stats["retired"].append(f"{month:%Y-%m}")
+        stats["orders"] += orders
+        stats["rows"] += rows
+        month = end
+
+
+async def maintain_process_logs(session_factory=AsyncSessionLocal, now: Optional[datetime] = None) -> dict:
+    """
+    Daily maintenance (see module docstring); safe to re-run.
+
+    Returns {"partitioned", "created", "retired", "orders", "rows"}.
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = retention_cutoff(now)
+    stats = {"partitioned": False, "created": [], "retired": [], "orders": 0, "rows": 0}
+
+    async with session_factory() as db:
+        stats["partitioned"] = await is_partitioned(db)
+        if stats["partitioned"]:
+            stats["created"] = await ensure_partitions(db, now)
+            await db.commit()
+    if stats["created"]:
+        logger.info("Created process log partitions: %s", ", ".join(stats["created"]))
+
+    if stats["partitioned"]:
+        await _retire_partitions(session_factory, cutoff, stats)
+    else:
+        await _delete_expired(session_factory, cutoff, stats)
+    return stats
+
+
+async def order_timeline(db: AsyncSession, order_id: int) -> dict:
+    """
+    An order's whole log history: its summary plus the raw logs not yet
+    rolled up, folded the same way (three small queries).
+    """
+    summary = await db.get(ProcessLogSummary, order_id)
+    timeline = Timeline.from_summary(summary)
+    since = _utc(summary.rolled_up_through) if summary is not None else None
+    tail = (await _fold_range(db, since, None, order_id=order_id)).get(order_id)
+    if tail is not None:
+        timeline.merge(tail)
+    return {"order_id": order_id, **timeline.to_dict(), "rolled_up_through": since}
@@ -0,0 +1,199 @@
+"""
+Process Log Sink
+
+Buffered bulk writer for ProcessLog rows.
+
+Generation emits a log row for every phase change. Instead of one INSERT and
+COMMIT per event, rows are queued in memory and written with a single
+multi-row INSERT once a batch fills up or the flush interval elapses.
+
+A failed INSERT is retried LOG_SINK_WRITE_ATTEMPTS times with doubling
+delays before the batch is dropped (and counted). Meanwhile nothing is
+drained, so once `max_pending` rows are queued, emit() waits: a database
+outage slows generation down instead of growing memory.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import insert
+
+from app.models.process_log import ProcessLog, LogLevel
+from app.services.progress import ProgressEvent, get_broker
+from config.database import AsyncSessionLocal
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()  # Queue sentinel
+
+
+class ProcessLogSink:
+    """
+    Async batching writer for process logs.
+
+    - Memory is bounded by `max_pending`; `emit()` waits when the queue is
+      full, which applies backpressure to producers instead of growing.
+    - A background task flushes every `batch_size` rows or `flush_interval`
+      seconds, whichever comes first.
+    - `stop()` flushes everything still queued.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        batch_size: int = settings.LOG_SINK_BATCH_SIZE,
+        flush_interval: float = settings.LOG_SINK_FLUSH_INTERVAL,
+        max_pending: int = settings.LOG_SINK_MAX_PENDING,
+        publish: bool = True,
+        write_attempts: int = settings.LOG_SINK_WRITE_ATTEMPTS,
+        retry_delay: float = settings.LOG_SINK_RETRY_DELAY,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.publish = publish
+        self.write_attempts = write_attempts
+        self.retry_delay = retry_delay
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        # Counters
+        self.rows_written = 0
+        self.batches_written = 0
+        self.write_retries = 0
+        self.rows_dropped = 0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._closed = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush queued rows and stop the background writer"""
+        if self._task is None:
+            return
+        self._closed = True
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+        # The writer stops at the sentinel; write anything queued behind it
+        # (emit() calls already waiting on a full queue can still get there)
+        while not self._queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._write(batch)
+            await asyncio.sleep(0)  # Let waiting emit() calls enqueue
+
+    async def emit(
+        self,
+        order_id: int,
+        phase: str,
+        message: str,
+        level: LogLevel = LogLevel.INFO,
+        data: Optional[dict] = None,
+        progress_current: Optional[int] = None,
+        progress_total: Optional[int] = None,
+    ) -> None:
+        """Queue a log row (waits if the buffer is full)"""
+        if self._closed or self._task is None:
+            raise RuntimeError("ProcessLogSink is not running")
+        await self._queue.put({
+            "order_id": order_id,
+            "phase": phase,
+            "message": message[:500],
+            "level": level,
+            "data": data,
+            "progress_current": progress_current,
+            "progress_total": progress_total,
+            # Event time, not flush time
+            "created_at": datetime.now(timezone.utc),
+        })
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                # Drain what is already queued before waiting
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._write(batch)
+
+    async def _insert(self, rows: list[dict]) -> list[int]:
+        """One multi-row INSERT ... RETURNING for the whole batch"""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                insert(ProcessLog).returning(ProcessLog.id, sort_by_parameter_order=True),
+                rows,
+            )
+            ids = result.scalars().all()
+            await session.commit()
+        return ids
+
+    async def _write(self, rows: list[dict]) -> None:
+        for attempt in range(1, self.write_attempts + 1):
+            try:
+                ids = await self._insert(rows)
+                break
+            except Exception:
+                if attempt == self.write_attempts:
+                    self.rows_dropped += len(rows)
+                    logger.exception("Failed to write %d process log rows, dropping them", len(rows))
+                    return
+                delay = self.retry_delay * 2 ** (attempt - 1)
+                self.write_retries += 1
+                logger.warning("Failed to write %d process log rows, retrying in %.1fs",
+                               len(rows), delay, exc_info=True)
+                await asyncio.sleep(delay)
+
+        self.rows_written += len(rows)
+        self.batches_written += 1
+
+        if self.publish:
+            broker = get_broker()
+            for row_id, row in zip(ids, rows):
+                event = ProgressEvent.from_log(ProcessLog(id=row_id, **row))
+                try:
+                    await broker.publish(event)
+                except Exception:
+                    logger.exception("Failed to publish progress event %s", row_id)
+
+
+_sink: Optional[ProcessLogSink] = None
+
+
+def get_log_sink() -> ProcessLogSink:
+    """Process-wide log sink"""
+    global _sink
+    if _sink is None:
+        _sink = ProcessLogSink()
+    return _sink
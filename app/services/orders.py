@@ -0,0 +1,198 @@
+"""
+Order Queries
+
+Reusable loader options and accessors for orders and their heavy columns.
+
+`Biznesplan.content_markdown`, `generator_logs`, `reviewer_logs` and
+`CEIDGData.raw_response` are deferred, so loading an order or its
+relationships never pulls them implicitly. Fetch them with the loader
+options below, or with the accessors that select a single column.
+
+Loader profiles ("summary", "detail", "full") load an order for the
+response schema of the same name in a fixed number of queries: to-one
+relationships are joined into the order's query, process logs come from
+one selectin query, and only the schema's columns are selected. Anything
+else raises on access instead of lazy-loading (which fails under asyncio
+or costs a query per relationship).
+
+JSON lookups (`orders_with_secondary_pkd`, `plans_with_issue_in`,
+`orders_offering`) use JSONB containment on PostgreSQL, served by the
+jsonb_path_ops GIN indexes on those columns. A PKD code without its
+subclass letter ("62.01") matches every subclass under it, which needs
+a jsonpath scan instead of the index.
+"""
+
+import enum
+from typing import Optional, Union
+
+from pydantic import BaseModel
+from sqlalchemy import cast, exists, func, inspect, literal, or_, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB, JSONPATH
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, load_only, raiseload, selectinload
+
+from app.models import Biznesplan, CEIDGData, Order, ProcessLog, ResearchResult
+from app.schemas.order import (
+    CEIDGSummary,
+    OrderDetail,
+    OrderFull,
+    OrderSummary,
+    PlanDetail,
+    PlanSummary,
+    ProcessLogItem,
+    ResearchDetail,
+    ResearchSummary,
+)
+
+# Loader options for when the heavy columns are actually needed
+WITH_PLAN_CONTENT = selectinload(Order.biznesplan).undefer_group("content")
+WITH_PLAN_LOGS = selectinload(Order.biznesplan).undefer_group("logs")
+WITH_CEIDG_RAW = selectinload(Order.ceidg_data).undefer_group("raw")
+
+
+class LoaderProfile(str, enum.Enum):
+    """How much of an order to load (and which schema it serializes to)"""
+    SUMMARY = "summary"  # Order columns only: 1 query
+    DETAIL = "detail"  # + CEIDG, research and plan summaries: 1 query
+    FULL = "full"  # + research data, plan content and process logs: 2 queries
+
+
+PROFILE_SCHEMAS: dict[LoaderProfile, type[BaseModel]] = {
+    LoaderProfile.SUMMARY: OrderSummary,
+    LoaderProfile.DETAIL: OrderDetail,
+    LoaderProfile.FULL: OrderFull,
+}
+
+
+def schema_columns(model, schema: type[BaseModel]) -> list:
+    """Mapped columns of `model` that `schema` has fields for"""
+    columns = inspect(model).column_attrs
+    return [getattr(model, name) for name in schema.model_fields if name in columns]
+
+
+def _only(schema: type[BaseModel], model=Order):
+    return load_only(*schema_columns(model, schema), raiseload=True)
+
+
+def order_loader(profile: LoaderProfile) -> tuple:
+    """Loader options for `profile` (see module docstring)"""
+    if profile is LoaderProfile.SUMMARY:
+        return _only(OrderSummary), raiseload("*")
+    full = profile is LoaderProfile.FULL
+    options = [
+        _only(PROFILE_SCHEMAS[profile]),
+        joinedload(Order.ceidg_data).options(_only(CEIDGSummary, CEIDGData)),
+        joinedload(Order.research_result).options(_only(ResearchDetail if full else ResearchSummary, ResearchResult)),
+        joinedload(Order.biznesplan).options(_only(PlanDetail if full else PlanSummary, Biznesplan)),
+    ]
+    if full:
+        options.append(selectinload(Order.process_logs).options(_only(ProcessLogItem, ProcessLog)))
+    return (*options, raiseload("*"))
+
+
+async def get_order(db: AsyncSession, order_id: int, *options) -> Optional[Order]:
+    """Order by id with the given loader options"""
+    result = await db.execute(select(Order).where(Order.id == order_id).options(*options))
+    return result.scalar_one_or_none()
+
+
+async def get_plan_content(db: AsyncSession, order_id: int) -> Optional[str]:
+    """Final Markdown of an order's plan, without loading the plan row"""
+    return await db.scalar(select(Biznesplan.content_markdown).where(Biznesplan.order_id == order_id))
+
+
+async def get_plan_logs(db: AsyncSession, order_id: int) -> tuple[Optional[dict], Optional[dict]]:
+    """(generator_logs, reviewer_logs) of an order's plan"""
+    row = (await db.execute(
+        select(Biznesplan.generator_logs, Biznesplan.reviewer_logs).where(Biznesplan.order_id == order_id)
+    )).first()
+    return (row.generator_logs, row.reviewer_logs) if row else (None, None)
+
+
+async def get_ceidg_raw_response(db: AsyncSession, order_id: int) -> Optional[dict]:
+    """Raw CEIDG API payload stored for an order"""
+    return await db.scalar(select(CEIDGData.raw_response).where(CEIDGData.order_id == order_id))
+
+
+def json_array_contains(db: AsyncSession, column, element: Union[dict, str]):
+    """
+    Condition: the JSON array in `column` has an element matching `element`
+    (all keys equal for a dict, equality for a scalar).
+
+    `column @> '[element]'` on PostgreSQL, which a GIN index can serve;
+    other dialects (SQLite in development) scan the array with json_each.
+    """
+    if db.bind.dialect.name == "postgresql":
+        return type_coerce(column, JSONB).contains([element])
+    items = func.json_each(column).table_valued("value").alias()
+    if isinstance(element, dict):
+        conditions = [func.json_extract(items.c.value, f"$.{key}") == value for key, value in element.items()]
+    else:
+        conditions = [items.c.value == element]
+    return exists(select(literal(1)).select_from(items).where(*conditions))
+
+
+def json_array_has_code(db: AsyncSession, column, key: str, code: str):
+    """
+    Condition: an object in the JSON array in `column` has `key` equal to
+    `code` or nested under it (`code` + "." + ...), e.g. "62.01" matches
+    "62.01.Z". Not served by the GIN indexes.
+    """
+    if db.bind.dialect.name == "postgresql":
+        return func.jsonb_path_exists(
+            type_coerce(column, JSONB),
+            cast(f'$[*] ? (@.{key} == $code || @.{key} starts with $prefix)', JSONPATH),
+            func.jsonb_build_object("code", code, "prefix", f"{code}."),
+        )
+    items = func.json_each(column).table_valued("value").alias()
+    value = func.json_extract(items.c.value, f"$.{key}")
+    return exists(select(literal(1)).select_from(items).where(
+        or_(value == code, func.substr(value, 1, len(code) + 1) == f"{code}.")
+    ))
+
+
+def _pkd_condition(db: AsyncSession, kod: str):
+    from app.services.ceidg import normalize_pkd  # Keeps httpx out of the web process
+    kod = normalize_pkd(kod)
+    if kod.count(".") == 2:  # Full subclass: containment, GIN-indexed
+        return json_array_contains(db, CEIDGData.pkd_pozostale, {"kod": kod})
+    return json_array_has_code(db, CEIDGData.pkd_pozostale, "kod", kod)
+
+
+async def orders_with_secondary_pkd(db: AsyncSession, kod: str, limit: int = 100) -> list[Order]:
+    """
+    Newest orders whose firm has `kod` among its secondary PKD codes.
+
+    `kod` is normalized like stored codes ("6201Z" -> "62.01.Z"); a class
+    or division ("62.01", "62") matches every subclass under it.
+    """
+    result = await db.execute(
+        select(Order)
+        .join(CEIDGData, CEIDGData.order_id == Order.id)
+        .where(_pkd_condition(db, kod))
+        .order_by(Order.created_at.desc(), Order.id.desc())
+        .limit(limit)
+    )
+    return list(result.scalars())
+
+
+async def plans_with_issue_in(db: AsyncSession, section: str, limit: int = 100) -> list[Biznesplan]:
+    """Newest plans with an unresolved issue in `section` (Biznesplan.final_issues)"""
+    result = await db.execute(
+        select(Biznesplan)
+        .where(json_array_contains(db, Biznesplan.final_issues, {"section": section}))
+        .order_by(Biznesplan.id.desc())
+        .limit(limit)
+    )
+    return list(result.scalars())
+
+
+async def orders_offering(db: AsyncSession, service: str, limit: int = 100) -> list[Order]:
+    """Newest orders listing `service` in Order.uslugi"""
+    result = await db.execute(
+        select(Order)
+        .where(json_array_contains(db, Order.uslugi, service))
+        .order_by(Order.created_at.desc(), Order.id.desc())
+        .limit(limit)
+    )
+    return list(result.scalars())
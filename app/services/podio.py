@@ -0,0 +1,172 @@
+"""
+Podio Client
+
+Fetches order items from the Podio app and validates webhooks.
+
+The web tier imports this module for the webhook, so httpx is only
+imported once a client is built.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import TYPE_CHECKING, Optional
+
+from config.settings import settings
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class PodioError(Exception):
+    """Podio API request failed or returned an unusable item"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code  # HTTP status, when Podio answered
+
+
+class PodioItemError(PodioError):
+    """The item itself is unusable (retrying will not help)"""
+
+
+# Order column -> Podio field external_id
+PODIO_FIELDS = {
+    "nip": "nip",
+    "imie_nazwisko": "imie-i-nazwisko",
+    "email": "email",
+    "telefon": "telefon",
+    "uslugi": "uslugi",
+    "planowany_dochod_roczny": "planowany-dochod-roczny",
+    "dodatkowe_informacje": "dodatkowe-informacje",
+}
+
+
+def _field_values(item: dict, external_id: str) -> list:
+    for field in item.get("fields") or []:
+        if field.get("external_id") == external_id:
+            values = []
+            for entry in field.get("values") or []:
+                value = entry.get("value")
+                if isinstance(value, dict):  # Category option
+                    value = value.get("text")
+                if value not in (None, ""):
+                    values.append(value)
+            return values
+    return []
+
+
+def _first(item: dict, external_id: str) -> Optional[str]:
+    values = _field_values(item, external_id)
+    return str(values[0]).strip() if values else None
+
+
+def parse_item(item: dict) -> dict:
+    """Map a Podio item onto Order column values"""
+    nip = re.sub(r"\D", "", _first(item, PODIO_FIELDS["nip"]) or "")
+    name = _first(item, PODIO_FIELDS["imie_nazwisko"])
+    if len(nip) != 10 or not name:
+        raise PodioItemError(f"Podio item {item.get('item_id')} is missing NIP or name")
+
+    income = _first(item, PODIO_FIELDS["planowany_dochod_roczny"])
+    app = item.get("app") or {}
+    return {
+        "podio_item_id": str(item["item_id"]),
+        "podio_app_id": str(app["app_id"]) if app.get("app_id") else None,
+        "podio_workspace_id": str(app["space_id"]) if app.get("space_id") else None,
+        "nip": nip,
+        "imie_nazwisko": name[:255],
+        "email": _first(item, PODIO_FIELDS["email"]),
+        "telefon": (_first(item, PODIO_FIELDS["telefon"]) or "")[:20] or None,
+        "uslugi": [str(v) for v in _field_values(item, PODIO_FIELDS["uslugi"])] or None,
+        "planowany_dochod_roczny": int(float(income)) if income else None,
+        "dodatkowe_informacje": _first(item, PODIO_FIELDS["dodatkowe_informacje"]),
+    }
+
+
+class PodioClient:
+    """Thin async Podio API client using app authentication"""
+
+    def __init__(
+        self,
+        app_id: Optional[str] = settings.PODIO_APP_ID,
+        app_token: Optional[str] = settings.PODIO_APP_TOKEN,
+        client_id: Optional[str] = settings.PODIO_CLIENT_ID,
+        client_secret: Optional[str] = settings.PODIO_SECRET_KEY,
+        base_url: str = settings.PODIO_API_URL,
+        timeout: float = settings.PODIO_TIMEOUT,
+        transport: Optional["httpx.AsyncBaseTransport"] = None,
+    ):
+        import httpx
+
+        self._credentials = {
+            "grant_type": "app",
+            "app_id": app_id,
+            "app_token": app_token,
+            "client_id": client_id or "",
+            "client_secret": client_secret or "",
+        }
+        self._http = httpx.AsyncClient(base_url=base_url, timeout=timeout, transport=transport)
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._token_lock = asyncio.Lock()
+
+    async def _authorization(self) -> dict:
+        async with self._token_lock:
+            if self._token is None or time.monotonic() >= self._token_expires:
+                response = await self._http.post("/oauth/token", data=self._credentials)
+                if response.status_code >= 400:
+                    raise PodioError(f"Podio authentication failed: HTTP {response.status_code}")
+                payload = response.json()
+                self._token = payload["access_token"]
+                self._token_expires = time.monotonic() + payload.get("expires_in", 3600) - 60
+        return {"Authorization": f"OAuth2 {self._token}"}
+
+    async def _request(self, method: str, path: str, **kwargs) -> "httpx.Response":
+        import httpx
+
+        try:
+            response = await self._http.request(method, path, headers=await self._authorization(), **kwargs)
+            if response.status_code == 401:  # Token revoked early
+                self._token = None
+                response = await self._http.request(method, path, headers=await self._authorization(), **kwargs)
+        except httpx.HTTPError as exc:
+            raise PodioError(f"Podio request failed: {exc}") from exc
+        if response.status_code >= 400:
+            raise PodioError(f"Podio {method} {path} returned HTTP {response.status_code}", response.status_code)
+        return response
+
+    async def get_item(self, item_id: str) -> dict:
+        try:
+            return (await self._request("GET", f"/item/{item_id}")).json()
+        except PodioError as exc:
+            if exc.status_code in (404, 410):
+                raise PodioItemError(f"Podio item {item_id} no longer exists") from exc
+            raise
+
+    async def validate_hook(self, hook_id: str, code: str) -> None:
+        """Complete Podio's hook.verify handshake"""
+        await self._request("POST", f"/hook/{hook_id}/verify/validate", json={"code": code})
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+_client: Optional[PodioClient] = None
+
+
+def get_podio_client() -> PodioClient:
+    global _client
+    if _client is None:
+        settings.require("podio")
+        _client = PodioClient()
+    return _client
+
+
+def set_podio_client(client: Optional[PodioClient]) -> None:
+    """Override the process-wide client (tests, benchmarks)"""
+    global _client
+    _client = client
@@ -0,0 +1,348 @@
+"""
+Podio Webhook Ingestion
+
+Turns bursts of (often duplicated) Podio item.create webhooks into orders.
+
+The webhook handler only stages the item id in memory and returns. A
+background task drains staged ids in batches:
+
+1. ids already in `orders` are dropped without calling Podio,
+2. the remaining items are fetched from Podio concurrently,
+3. one INSERT ... ON CONFLICT (podio_item_id) DO NOTHING RETURNING writes
+   the batch; only rows this statement actually inserted come back, even
+   with several workers racing on the same item,
+4. exactly those orders are enqueued for generation.
+
+No database session is held while Podio is called. The webhook has
+already been answered, so Podio will not resend a failed item: items
+whose fetch failed (request error, HTTP error, timeout) and whole batches
+whose processing raised are staged again after PODIO_INGEST_RETRY_DELAY,
+doubling per attempt, up to PODIO_INGEST_MAX_ATTEMPTS. Items Podio
+returns but that cannot become an order (PodioItemError) are skipped.
+
+Orders whose enqueue failed keep celery_task_id NULL;
+requeue_stranded_orders (a beat task, app.tasks.maintenance) enqueues
+them once they are PODIO_REQUEUE_AFTER seconds old.
+
+Staged ids are lost if the process crashes before a flush (at most
+PODIO_INGEST_FLUSH_INTERVAL worth, plus items waiting for a retry);
+`stop()` flushes on shutdown.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models.order import Order, OrderStatus
+from app.services.podio import PodioClient, PodioError, PodioItemError, get_podio_client, parse_item
+from config.database import AsyncSessionLocal
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()  # Queue sentinel
+
+_INSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Longest wait before an item is retried
+MAX_RETRY_DELAY = 300.0
+
+
+async def _enqueue_with_celery(order_id: int) -> str:
+    from app.tasks.worker import enqueue_order
+    return await asyncio.to_thread(enqueue_order, order_id)
+
+
+async def _enqueue_orders(session_factory, enqueue: Callable[[int], Awaitable[str]],
+                          order_ids: list[int]) -> tuple[int, int]:
+    """
+    Enqueue orders and record their task ids; returns (enqueued, failed).
+
+    Only orders still without a task id are updated, so a sweep racing
+    the ingestor cannot overwrite the id of the task that runs.
+    """
+    task_ids, failed = [], 0
+    for order_id in order_ids:
+        try:
+            task_ids.append({"order_id": order_id, "task_id": await enqueue(order_id)})
+        except Exception:
+            # Left with celery_task_id NULL for requeue_stranded_orders
+            failed += 1
+            logger.exception("Failed to enqueue order %s", order_id)
+
+    if task_ids:
+        table = Order.__table__
+        async with session_factory() as session:
+            await session.execute(
+                update(table)
+                .where(table.c.id == bindparam("order_id"), table.c.celery_task_id.is_(None))
+                .values(celery_task_id=bindparam("task_id")),
+                task_ids,
+            )
+            await session.commit()
+    return len(task_ids), failed
+
+
+async def requeue_stranded_orders(
+    session_factory=AsyncSessionLocal,
+    enqueue: Callable[[int], Awaitable[str]] = _enqueue_with_celery,
+    older_than: float = settings.PODIO_REQUEUE_AFTER,
+    limit: int = 1000,
+) -> dict:
+    """Enqueue PENDING orders that never got a Celery task (their enqueue failed)"""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=older_than)
+    async with session_factory() as session:
+        order_ids = (await session.scalars(
+            select(Order.id)
+            .where(
+                Order.status == OrderStatus.PENDING,
+                Order.celery_task_id.is_(None),
+                Order.created_at < cutoff,
+            )
+            .order_by(Order.id)
+            .limit(limit)
+        )).all()
+    enqueued, failed = await _enqueue_orders(session_factory, enqueue, list(order_ids))
+    return {"found": len(order_ids), "enqueued": enqueued, "failed": failed}
+
+
+class PodioIngestor:
+    """
+    In-memory staging plus batched idempotent upserts for Podio items.
+
+    `stage()` never waits: duplicates already staged or in flight are
+    collapsed, and a full buffer raises `asyncio.QueueFull` so the webhook
+    can answer 503 and let Podio retry.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        podio: Optional[PodioClient] = None,
+        enqueue: Callable[[int], Awaitable[str]] = _enqueue_with_celery,
+        batch_size: int = settings.PODIO_INGEST_BATCH_SIZE,
+        flush_interval: float = settings.PODIO_INGEST_FLUSH_INTERVAL,
+        max_pending: int = settings.PODIO_INGEST_MAX_PENDING,
+        fetch_concurrency: int = settings.PODIO_FETCH_CONCURRENCY,
+        max_attempts: int = settings.PODIO_INGEST_MAX_ATTEMPTS,
+        retry_delay: float = settings.PODIO_INGEST_RETRY_DELAY,
+    ):
+        self.session_factory = session_factory
+        self._podio = podio
+        self.enqueue = enqueue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fetch_concurrency = fetch_concurrency
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)  # (item id, attempt)
+        self._in_flight: set[str] = set()  # Staged, being processed or waiting for a retry
+        self._retries: dict[str, tuple[int, asyncio.TimerHandle]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.received = 0
+        self.duplicates = 0
+        self.inserted = 0
+        self.enqueued = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def podio(self) -> PodioClient:
+        if self._podio is None:
+            self._podio = get_podio_client()
+        return self._podio
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Process staged items, retries included (without waiting out their delay), and stop"""
+        if self._task is None:
+            return
+        retries, self._retries = self._retries, {}
+        for item_id, (attempt, handle) in retries.items():
+            handle.cancel()
+            await self._queue.put((item_id, attempt))
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+        # Left over: items that failed again in the final flush, or staged after it
+        failing = set()
+        for item_id, (_, handle) in self._retries.items():
+            handle.cancel()
+            failing.add(item_id)
+        self._retries = {}
+        while not self._queue.empty():
+            failing.add(self._queue.get_nowait()[0])
+        if failing:
+            self.failed += len(failing)
+            self._in_flight.difference_update(failing)
+            logger.error("Podio items not ingested at shutdown: %s", ", ".join(sorted(failing)))
+
+    def stage(self, item_id: str) -> bool:
+        """Stage an item id; False if it is already staged or in flight"""
+        if self._task is None:
+            raise RuntimeError("PodioIngestor is not running")
+        self.received += 1
+        if item_id in self._in_flight:
+            self.duplicates += 1
+            return False
+        self._queue.put_nowait((item_id, 1))
+        self._in_flight.add(item_id)
+        return True
+
+    def _retry(self, item_id: str, attempt: int) -> None:
+        """Stage an item again after a backoff, or give up on it"""
+        if attempt >= self.max_attempts:
+            self.failed += 1
+            self._in_flight.discard(item_id)
+            logger.error("Giving up on Podio item %s after %d attempts", item_id, attempt)
+            return
+        self.retried += 1
+        delay = min(self.retry_delay * 2 ** (attempt - 1), MAX_RETRY_DELAY)
+        self._schedule(item_id, attempt + 1, delay)
+
+    def _schedule(self, item_id: str, attempt: int, delay: float) -> None:
+        handle = asyncio.get_running_loop().call_later(delay, self._requeue, item_id, attempt)
+        self._retries[item_id] = (attempt, handle)
+
+    def _requeue(self, item_id: str, attempt: int) -> None:
+        self._retries.pop(item_id, None)
+        try:
+            self._queue.put_nowait((item_id, attempt))
+        except asyncio.QueueFull:
+            self._schedule(item_id, attempt, self.flush_interval)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            attempts = dict(batch)
+            try:
+                retry = await self._process(list(attempts))
+            except Exception:
+                logger.exception("Failed to ingest %d Podio items", len(attempts))
+                retry = set(attempts)
+            for item_id, attempt in attempts.items():
+                if item_id in retry:
+                    self._retry(item_id, attempt)
+                else:
+                    self._in_flight.discard(item_id)
+
+    async def _fetch_rows(self, item_ids: list[str]) -> tuple[list[dict], set[str]]:
+        """Rows for the items, and the ids whose fetch should be retried"""
+        semaphore = asyncio.Semaphore(self.fetch_concurrency)
+        retry = set()
+
+        async def fetch(item_id: str) -> Optional[dict]:
+            async with semaphore:
+                try:
+                    return parse_item(await self.podio.get_item(item_id))
+                except (PodioItemError, KeyError, ValueError):
+                    self.failed += 1
+                    logger.exception("Skipping Podio item %s", item_id)
+                except PodioError as e:  # Request failed; the item may be fine
+                    retry.add(item_id)
+                    logger.warning("Fetching Podio item %s failed: %s", item_id, e)
+                return None
+
+        rows = await asyncio.gather(*(fetch(item_id) for item_id in item_ids))
+        return [row for row in rows if row is not None], retry
+
+    async def _process(self, item_ids: list[str]) -> set[str]:
+        """Ingest a batch; returns the ids to retry"""
+        async with self.session_factory() as session:
+            known = set((await session.scalars(
+                select(Order.podio_item_id).where(Order.podio_item_id.in_(item_ids))
+            )).all())
+        self.duplicates += len(known)
+
+        # No session (and pooled connection) is held while Podio answers
+        rows, retry = await self._fetch_rows([item_id for item_id in item_ids if item_id not in known])
+        if not rows:
+            return retry
+
+        for row in rows:
+            row["status"] = OrderStatus.PENDING
+        async with self.session_factory() as session:
+            insert = _INSERT[session.bind.dialect.name]
+            result = await session.execute(
+                insert(Order)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=[Order.podio_item_id])
+                .returning(Order.id)
+            )
+            order_ids = result.scalars().all()
+            await session.commit()
+
+        self.inserted += len(order_ids)
+        self.duplicates += len(rows) - len(order_ids)
+
+        enqueued, failed = await _enqueue_orders(self.session_factory, self.enqueue, list(order_ids))
+        self.enqueued += enqueued
+        self.failed += failed
+        return retry
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "inserted": self.inserted,
+            "enqueued": self.enqueued,
+            "retried": self.retried,
+            "failed": self.failed,
+            "pending": self.pending,
+            "retrying": len(self._retries),
+            "in_flight": len(self._in_flight),
+        }
+
+
+_ingestor: Optional[PodioIngestor] = None
+
+
+def get_podio_ingestor() -> PodioIngestor:
+    """Process-wide ingestor"""
+    global _ingestor
+    if _ingestor is None:
+        _ingestor = PodioIngestor()
+    return _ingestor
+
+
+def set_podio_ingestor(ingestor: Optional[PodioIngestor]) -> None:
+    """Override the process-wide ingestor (tests, benchmarks)"""
+    global _ingestor
+    _ingestor = ingestor
@@ -0,0 +1,296 @@
+"""
+Progress Broker
+
+Fans out ProcessLog events to Server-Sent Events subscribers.
+
+Every process holds exactly one upstream subscription (Redis pub/sub), no matter
+how many browsers are connected. Incoming events are dispatched to per-order
+in-memory queues, so a dashboard with hundreds of open tabs costs one
+subscription per worker instead of one polling query per tab.
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.process_log import ProcessLog, LogLevel
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Single pub/sub channel shared by all orders
+CHANNEL = "process_logs"
+
+
+@dataclass
+class ProgressEvent:
+    """Serializable snapshot of a ProcessLog row"""
+    id: int
+    order_id: int
+    phase: str
+    message: str
+    level: str = LogLevel.INFO.value
+    data: Optional[dict] = None
+    progress_current: Optional[int] = None
+    progress_total: Optional[int] = None
+    progress_percent: int = 0
+    created_at: Optional[str] = None
+
+    @classmethod
+    def from_log(cls, log: ProcessLog) -> "ProgressEvent":
+        """Build event from a persisted ProcessLog"""
+        level = log.level or LogLevel.INFO
+        return cls(
+            id=log.id,
+            order_id=log.order_id,
+            phase=log.phase,
+            message=log.message,
+            level=level.value if isinstance(level, LogLevel) else str(level),
+            data=log.data,
+            progress_current=log.progress_current,
+            progress_total=log.progress_total,
+            progress_percent=log.progress_percent,
+            created_at=log.created_at.isoformat() if log.created_at else None,
+        )
+
+    @classmethod
+    def from_json(cls, payload: str) -> "ProgressEvent":
+        return cls(**json.loads(payload))
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False, default=str)
+
+    def to_sse(self) -> str:
+        """Format as an SSE frame (id is used by the browser as Last-Event-ID)"""
+        return f"id: {self.id}\nevent: progress\ndata: {self.to_json()}\n\n"
+
+
+class Subscription:
+    """
+    Per-connection event buffer.
+
+    If the consumer falls behind and the buffer fills up, the subscription is
+    closed instead of blocking the dispatcher. The browser reconnects with
+    Last-Event-ID and catches up from the database.
+    """
+
+    def __init__(self, order_id: int, maxsize: int):
+        self.order_id = order_id
+        self.closed = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def push(self, event: ProgressEvent) -> None:
+        if self.closed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning("SSE subscriber for order %s fell behind, closing", self.order_id)
+            self.close()
+
+    def close(self) -> None:
+        """Wake the consumer with an end-of-stream marker"""
+        self.closed = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    async def get(self, timeout: float) -> Optional[ProgressEvent]:
+        """Next event, or None on timeout / close (check `closed` to tell apart)"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ProgressBroker:
+    """
+    In-process broker.
+
+    Publishing dispatches straight to local subscribers. Used as the fallback
+    for tests and single-process deployments.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._draining = False
+
+    async def start(self) -> None:
+        """Open upstream subscription (no-op in-process)"""
+
+    async def stop(self) -> None:
+        """Close all local subscriptions"""
+        self._close_all()
+
+    def drain(self) -> int:
+        """
+        End every local stream, and any opened from now on, when the
+        process starts shutting down: browsers reconnect to another worker
+        with Last-Event-ID instead of holding this one open. Returns the
+        number of streams closed.
+        """
+        self._draining = True
+        return self._close_all()
+
+    def _close_all(self) -> int:
+        closed = 0
+        for subscriptions in list(self._subscribers.values()):
+            for subscription in list(subscriptions):
+                subscription.close()
+                closed += 1
+        self._subscribers.clear()
+        return closed
+
+    async def publish(self, event: ProgressEvent) -> None:
+        self._dispatch(event)
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    @asynccontextmanager
+    async def subscribe(self, order_id: int) -> AsyncIterator[Subscription]:
+        """Register a local subscriber for one order"""
+        subscription = Subscription(order_id, self.queue_size)
+        if self._draining:
+            subscription.close()
+        self._subscribers.setdefault(order_id, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscriptions = self._subscribers.get(order_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[order_id]
+
+    def _dispatch(self, event: ProgressEvent) -> None:
+        for subscription in list(self._subscribers.get(event.order_id, ())):
+            subscription.push(event)
+
+
+class RedisProgressBroker(ProgressBroker):
+    """
+    Redis pub/sub broker.
+
+    Publishers (web or Celery workers) PUBLISH to one channel. Each web worker
+    runs a single listener task that SUBSCRIBEs once and dispatches locally.
+    """
+
+    def __init__(self, redis_url: str, queue_size: int = 100):
+        super().__init__(queue_size)
+        self.redis_url = redis_url
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def _client(self):
+        if self._redis is None:
+            import redis.asyncio as aioredis
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await super().stop()
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def publish(self, event: ProgressEvent) -> None:
+        await self._client().publish(CHANNEL, event.to_json())
+
+    async def _listen(self) -> None:
+        """Single upstream subscription, reconnecting with backoff"""
+        backoff = 0.5
+        while True:
+            pubsub = self._client().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(CHANNEL)
+                backoff = 0.5
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        self._dispatch(ProgressEvent.from_json(message["data"]))
+                    except (TypeError, ValueError):
+                        logger.exception("Invalid progress event payload")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Progress listener lost Redis connection, retrying in %.1fs", backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+_broker: Optional[ProgressBroker] = None
+
+
+def get_broker() -> ProgressBroker:
+    """Process-wide broker selected by settings.PROGRESS_BROKER"""
+    global _broker
+    if _broker is None:
+        if settings.PROGRESS_BROKER == "redis":
+            _broker = RedisProgressBroker(settings.REDIS_URL, queue_size=settings.SSE_QUEUE_SIZE)
+        else:
+            _broker = ProgressBroker(queue_size=settings.SSE_QUEUE_SIZE)
+    return _broker
+
+
+def set_broker(broker: Optional[ProgressBroker]) -> None:
+    """Override the process-wide broker (tests, custom backends)"""
+    global _broker
+    _broker = broker
+
+
+async def record_process_log(
+    db: AsyncSession,
+    order_id: int,
+    phase: str,
+    message: str,
+    level: LogLevel = LogLevel.INFO,
+    data: Optional[dict] = None,
+    progress_current: Optional[int] = None,
+    progress_total: Optional[int] = None,
+) -> ProcessLog:
+    """
+    Persist a ProcessLog row and publish it to SSE subscribers.
+
+    Commits the session so the event is never visible before the row
+    (replay on reconnect reads from the database).
+    """
+    log = ProcessLog(
+        order_id=order_id,
+        phase=phase,
+        message=message[:500],
+        level=level,
+        data=data,
+        progress_current=progress_current,
+        progress_total=progress_total,
+        created_at=datetime.now(timezone.utc),
+    )
+    db.add(log)
+    await db.commit()
+    await get_broker().publish(ProgressEvent.from_log(log))
+    return log
@@ -0,0 +1,185 @@
+"""
+Prompt Builder
+
+Assembles generator prompts so the shared prefix is cacheable.
+
+Anthropic prompt caching matches on an exact prefix, so stable content comes
+first and is serialized byte-identically on every call:
+
+    1. System instructions       (same for every plan)
+    2. Style guide               (same for every plan)     <- cache breakpoint
+    3. CEIDG + research context  (same for every section)  <- cache breakpoint
+    4. Upstream sections, in plan order                    <- cache breakpoint
+    5. Per-section instructions                            (not cached)
+"""
+
+import json
+from typing import Optional
+
+from app.models.ceidg_data import CEIDGData
+from app.models.order import Order
+from app.models.research_result import ResearchResult
+from app.services.section_scheduler import SectionResult, SectionSpec
+from config.settings import settings
+
+SYSTEM_INSTRUCTIONS = """\
+Jesteś doświadczonym doradcą biznesowym, który przygotowuje biznesplany dla \
+jednoosobowych działalności gospodarczych w Polsce (np. do wniosków o dotacje, \
+kredyty lub leasing). Piszesz po polsku, rzeczowo i profesjonalnie.
+
+Zasady:
+- Opierasz się wyłącznie na dostarczonych danych z CEIDG, danych rynkowych i \
+informacjach od klienta. Nie wymyślasz liczb ani źródeł.
+- Każde twierdzenie rynkowe (wielkość rynku, dynamika, udziały) opatrujesz \
+odwołaniem do źródła z listy źródeł.
+- Dane finansowe są spójne w całym dokumencie (przychody, koszty, marże).
+- Zwracasz wyłącznie treść sekcji w formacie Markdown, bez komentarzy od siebie."""
+
+STYLE_GUIDE = """\
+# Przewodnik stylu biznesplanu
+
+## Format
+- Nagłówek sekcji: `## <numer>. <tytuł>`; podsekcje `###`.
+- Akapity 3-6 zdań. Wypunktowania tylko dla list (min. 3 punkty).
+- Tabele Markdown dla danych liczbowych (prognozy, koszty, konkurencja).
+- Kwoty w PLN z separatorem tysięcy i bez groszy: `120 000 zł`.
+- Daty w formacie `DD.MM.RRRR`, lata jako `2025 r.`.
+- Odwołania do źródeł w nawiasach kwadratowych: `[1]`, `[2]`, zgodnie z \
+numeracją listy źródeł.
+
+## Język
+- Forma bezosobowa lub trzecia osoba ("Firma świadczy...", "Planuje się...").
+- Unikaj superlatywów i języka marketingowego ("najlepszy", "rewolucyjny").
+- Terminy branżowe objaśniaj przy pierwszym użyciu.
+- Nie używaj angielskich wtrąceń, jeśli istnieje polski odpowiednik.
+
+## Treść
+- Konkretne liczby zamiast ogólników; każda prognoza z założeniami.
+- Ryzyka opisuj razem ze sposobem ich ograniczania.
+- Odnoś się do regionu działalności (województwo) tam, gdzie to istotne.
+- Zachowaj spójność z wcześniejszymi sekcjami — nie powtarzaj ich treści, \
+tylko się do nich odwołuj.
+
+## Długość
+- Cały dokument: {target_pages} stron A4 (ok. 500 słów na stronę).
+- Sekcje analityczne (rynek, konkurencja, finanse): 3-5 stron.
+- Streszczenie: maksymalnie 1 strona. Pismo przewodnie: pół strony."""
+
+SECTION_INSTRUCTIONS = {
+    "outline": "Przygotuj szczegółowy konspekt biznesplanu: lista sekcji z 3-5 punktami kluczowych treści dla każdej.",
+    "opis_dzialalnosci": "Napisz sekcję opisującą działalność: profil firmy, właściciel, forma prawna, oferowane usługi, lokalizacja, PKD.",
+    "analiza_rynku": "Napisz analizę rynku: wielkość i dynamika rynku w Polsce i regionie, trendy, grupy docelowe. Każda liczba ze źródłem.",
+    "analiza_konkurencji": "Napisz analizę konkurencji: główni gracze, tabela porównawcza, przewagi konkurencyjne firmy.",
+    "plan_finansowy": "Napisz plan finansowy: prognoza przychodów i kosztów na 3 lata (tabele), założenia, próg rentowności.",
+    "analiza_swot": "Napisz analizę SWOT w formie tabeli 2x2 z omówieniem najważniejszych punktów, spójną z analizą rynku i konkurencji.",
+    "plan_marketingowy": "Napisz plan marketingowy: kanały pozyskania klientów, cennik, budżet marketingowy, harmonogram działań.",
+    "streszczenie": "Napisz streszczenie całego biznesplanu na podstawie poprzednich sekcji (maks. 1 strona).",
+    "pismo_przewodnie": "Napisz krótkie pismo przewodnie do instytucji finansującej, przedstawiające firmę i cel biznesplanu.",
+}
+
+# CEIDG fields that go into the prompt (timestamps/ids would break caching)
+_CEIDG_CONTEXT_FIELDS = (
+    "nip", "regon", "nazwa_firmy", "imie", "nazwisko",
+    "adres_miejscowosc", "adres_powiat", "adres_wojewodztwo",
+    "pkd_glowny", "pkd_glowny_nazwa", "pkd_pozostale",
+    "data_rozpoczecia_dzialalnosci", "status_wpisu",
+)
+
+
+def canonical_json(value) -> str:
+    """Deterministic JSON (sorted keys, fixed separators) for cacheable prompts"""
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def cache_control(ttl: int = settings.PROMPT_CACHE_TTL) -> dict:
+    """Anthropic cache breakpoint (5 minute default, 1 hour extended TTL)"""
+    control = {"type": "ephemeral"}
+    if ttl >= 3600:
+        control["ttl"] = "1h"
+    return control
+
+
+def build_context(order: Order, ceidg: Optional[CEIDGData], research: Optional[ResearchResult]) -> str:
+    """Order-level context block, identical for every section of a plan"""
+    context = {
+        "klient": {
+            "uslugi": order.uslugi or [],
+            "planowany_dochod_roczny": order.planowany_dochod_roczny,
+            "dodatkowe_informacje": order.dodatkowe_informacje,
+        },
+        "ceidg": {name: getattr(ceidg, name) for name in _CEIDG_CONTEXT_FIELDS} if ceidg else None,
+        "rynek": research.market_data if research else None,
+        "swot": research.swot_data if research else None,
+        "zrodla": [
+            {"nr": number, **source}
+            for number, source in enumerate((research.sources or []) if research else [], start=1)
+        ],
+    }
+    return "# Dane firmy i rynku\n\n" + canonical_json(context)
+
+
+class PromptBuilder:
+    """
+    Builds Messages API requests for one plan.
+
+    The system blocks are computed once per plan and reused by every section
+    request, so the cached prefix is byte-identical across calls.
+    """
+
+    def __init__(
+        self,
+        order: Order,
+        ceidg: Optional[CEIDGData],
+        research: Optional[ResearchResult],
+        model: str = settings.LLM_MODEL,
+        max_tokens: int = settings.LLM_MAX_TOKENS,
+        temperature: float = settings.LLM_TEMPERATURE,
+        cache_ttl: int = settings.PROMPT_CACHE_TTL,
+    ):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.breakpoint = cache_control(cache_ttl)
+        self.system = [
+            {"type": "text", "text": SYSTEM_INSTRUCTIONS},
+            {
+                "type": "text",
+                "text": STYLE_GUIDE.format(target_pages=settings.BIZNESPLAN_TARGET_PAGES),
+                "cache_control": self.breakpoint,
+            },
+            {"type": "text", "text": build_context(order, ceidg, research), "cache_control": self.breakpoint},
+        ]
+
+    def section_request(
+        self,
+        section: SectionSpec,
+        upstream: Optional[dict[str, SectionResult]] = None,
+        extra_instructions: Optional[str] = None,
+    ) -> dict:
+        """
+        Request for one section.
+
+        Upstream sections are separate content blocks in plan order (as passed
+        by SectionScheduler), with a breakpoint after the last one. Sections
+        with a common upstream prefix (e.g. everything after the outline, or
+        the cover letter after the summary) then read it from the cache.
+        """
+        content = [
+            {"type": "text", "text": f"# Sekcja: {result.title}\n\n{result.content}"}
+            for result in (upstream or {}).values()
+        ]
+        if content:
+            content[-1]["cache_control"] = self.breakpoint
+
+        instructions = SECTION_INSTRUCTIONS.get(section.key, f"Napisz sekcję: {section.title}.")
+        if extra_instructions:
+            instructions = f"{instructions}\n\n{extra_instructions}"
+        content.append({"type": "text", "text": f"# Zadanie\n\n{instructions}"})
+
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "system": self.system,
+            "messages": [{"role": "user", "content": content}],
+        }
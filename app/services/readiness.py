@@ -0,0 +1,190 @@
+"""
+Readiness
+
+Background probes of the database (and read replica) and Redis for `/ready`.
+
+Probes run every READY_PROBE_INTERVAL seconds in one task per process and
+`/ready` only reads the last result, so load balancer polling adds no
+database or Redis traffic. Connection pool figures are read live on each
+request (attribute reads on the pool). An instance reports not ready when
+a probe failed, the probes went stale, or checkouts waited on average more
+than READY_MAX_POOL_WAIT_MS during the last interval, so it leaves
+rotation before requests queue up behind an exhausted pool.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config.database import engine as default_engine, replica_engine as default_replica
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProbeResult:
+    ok: bool
+    latency_ms: float
+    error: Optional[str] = None
+
+
+async def _ping_redis() -> None:
+    from app.utils.redis import get_redis
+    await get_redis().ping()
+
+
+class ReadinessMonitor:
+    """Periodic dependency probes plus connection pool statistics"""
+
+    def __init__(
+        self,
+        engine: AsyncEngine = default_engine,
+        replica: Optional[AsyncEngine] = default_replica,
+        ping_redis: Optional[Callable[[], Awaitable[None]]] = _ping_redis if settings.READY_REQUIRE_REDIS else None,
+        interval: float = settings.READY_PROBE_INTERVAL,
+        timeout: float = settings.READY_PROBE_TIMEOUT,
+        max_pool_wait_ms: float = settings.READY_MAX_POOL_WAIT_MS,
+    ):
+        self.engine = engine
+        self.replica = replica
+        self.ping_redis = ping_redis
+        self.interval = interval
+        self.timeout = timeout
+        self.max_pool_wait_ms = max_pool_wait_ms
+        self.probes: dict[str, ProbeResult] = {}
+        self.checked_at: Optional[float] = None  # time.monotonic() of the last probe round
+        self.pool_wait: dict = {"avg_ms": 0.0, "max_ms": 0.0, "checkouts": 0}
+        self._last_counters: Optional[tuple] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            await self.check()  # Serve a real result from the first request on
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Readiness probe round failed")
+
+    async def _probe(self, name: str, probe: Callable[[], Awaitable[None]]) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(probe(), self.timeout)
+            result = ProbeResult(ok=True, latency_ms=0.0)
+        except asyncio.TimeoutError:
+            result = ProbeResult(ok=False, latency_ms=0.0, error=f"timed out after {self.timeout:g}s")
+        except Exception as exc:
+            result = ProbeResult(ok=False, latency_ms=0.0, error=f"{type(exc).__name__}: {exc}"[:200])
+        result.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        if not result.ok and self.probes.get(name, result).ok:
+            logger.warning("Readiness: %s probe failed: %s", name, result.error)
+        self.probes[name] = result
+
+    @staticmethod
+    async def _ping_database(engine: AsyncEngine) -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def check(self) -> None:
+        """Run one probe round and sample pool wait times"""
+        probes = [self._probe("database", lambda: self._ping_database(self.engine))]
+        if self.replica is not None:
+            probes.append(self._probe("replica", lambda: self._ping_database(self.replica)))
+        if self.ping_redis is not None:
+            probes.append(self._probe("redis", self.ping_redis))
+        await asyncio.gather(*probes)
+        self._sample_pool_wait()
+        self.checked_at = time.monotonic()
+
+    def _sample_pool_wait(self) -> None:
+        pool = self.engine.pool
+        if not hasattr(pool, "take_wait_max"):  # Not a config.database.TimedPool
+            return
+        counters = (id(pool), pool.checkouts, pool.wait_seconds_total)
+        previous = self._last_counters
+        self._last_counters = counters
+        if previous is None or previous[0] != counters[0]:  # First sample or pool recreated
+            previous = (counters[0], 0, 0.0)
+        checkouts = counters[1] - previous[1]
+        waited = counters[2] - previous[2]
+        self.pool_wait = {
+            "avg_ms": round(waited / checkouts * 1000, 2) if checkouts else 0.0,
+            "max_ms": round(pool.take_wait_max() * 1000, 2),
+            "checkouts": checkouts,
+        }
+
+    def pool_stats(self) -> dict:
+        """Live pool figures plus wait times over the last probe interval"""
+        pool = self.engine.pool
+        stats = {}
+        if hasattr(pool, "checkedout"):
+            size = pool.size()
+            stats = {
+                "size": size,
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "saturated": pool.checkedout() >= size + max(pool._max_overflow, 0),
+            }
+        if hasattr(pool, "timeouts"):
+            stats["timeouts_total"] = pool.timeouts
+        stats["wait"] = self.pool_wait
+        return stats
+
+    def status(self) -> tuple[bool, dict]:
+        """(ready, report) from the last probe round; no I/O"""
+        reasons = []
+        if self.checked_at is None:
+            reasons.append("not probed yet")
+        elif time.monotonic() - self.checked_at > 3 * self.interval + self.timeout:
+            reasons.append("probes stale")
+        reasons += [f"{name} unavailable" for name, result in self.probes.items() if not result.ok]
+        if self.pool_wait["avg_ms"] > self.max_pool_wait_ms:
+            reasons.append("database pool congested")
+
+        report = {
+            "status": "not_ready" if reasons else "ready",
+            "reasons": reasons,
+            "checks": {name: asdict(result) for name, result in self.probes.items()},
+            "checked_seconds_ago": None if self.checked_at is None else round(time.monotonic() - self.checked_at, 1),
+            "pool": self.pool_stats(),
+        }
+        return not reasons, report
+
+
+_monitor: Optional[ReadinessMonitor] = None
+
+
+def get_readiness_monitor() -> ReadinessMonitor:
+    """Process-wide monitor (one per web worker)"""
+    global _monitor
+    if _monitor is None:
+        _monitor = ReadinessMonitor()
+    return _monitor
+
+
+def set_readiness_monitor(monitor: Optional[ReadinessMonitor]) -> None:
+    """Override the process-wide monitor (tests, benchmarks)"""
+    global _monitor
+    _monitor = monitor
@@ -0,0 +1,254 @@
+"""
+Research Service
+
+Market research for business plans, shared across orders.
+
+The market part of a plan depends only on the business's main PKD code and
+voivodeship, so each market query's answer is cached content-addressed
+under a hash of the normalized (PKD, region, query) for CACHE_TTL_RESEARCH.
+Queries are independent, so they can run concurrently in one process or as
+separate Celery tasks (app.tasks.pipeline). Only the SWOT analysis, which
+depends on the individual order, is produced per order and layered on top
+of the shared market data.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import httpx
+
+from app.models.ceidg_data import CEIDGData
+from app.models.order import Order
+from app.models.research_result import ResearchResult
+from app.services.cache import TwoTierCache
+from app.services.ceidg import normalize_pkd
+from app.utils.redis import get_redis
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when the shape of cached market data changes
+RESEARCH_CACHE_VERSION = 2
+
+# Market queries, keyed by the market_data field they fill.
+# Placeholders: {pkd}, {pkd_nazwa}, {region}
+MARKET_QUERIES = {
+    "industry_overview": "Przedstaw przegląd branży {pkd_nazwa} (PKD {pkd}) w Polsce: charakterystyka, struktura rynku, bariery wejścia.",
+    "market_size_poland": "Jaka jest wielkość rynku {pkd_nazwa} (PKD {pkd}) w Polsce? Podaj najnowsze dane liczbowe i źródła (GUS, raporty branżowe).",
+    "market_growth_rate": "Jaka jest dynamika wzrostu rynku {pkd_nazwa} (PKD {pkd}) w Polsce w ostatnich latach i prognozy na kolejne 3 lata?",
+    "trends": "Jakie są najważniejsze trendy w branży {pkd_nazwa} (PKD {pkd}) w Polsce?",
+    "key_players": "Kto jest głównymi graczami na rynku {pkd_nazwa} (PKD {pkd}) w Polsce i w województwie {region}?",
+    "regional_market": "Opisz sytuację rynkową branży {pkd_nazwa} (PKD {pkd}) w województwie {region}: popyt, konkurencja, wynagrodzenia.",
+}
+
+SWOT_QUERY = (
+    "Na podstawie poniższych danych rynkowych przygotuj analizę SWOT dla jednoosobowej "
+    "działalności gospodarczej (PKD {pkd}, województwo {region}) świadczącej usługi: {uslugi}. "
+    "Planowany roczny przychód: {dochod} PLN. Dodatkowe informacje: {info}.\n\n"
+    "Dane rynkowe:\n{market}\n\n"
+    "Odpowiedz wyłącznie obiektem JSON z kluczami strengths, weaknesses, opportunities, threats "
+    "(każdy to lista krótkich punktów)."
+)
+
+
+def normalize_region(region: Optional[str]) -> str:
+    """'WOJ. MAZOWIECKIE' / 'województwo mazowieckie' -> 'mazowieckie'"""
+    if not region:
+        return ""
+    value = region.casefold().strip()
+    value = re.sub(r"^(województwo|woj\.?)\s*", "", value)
+    return re.sub(r"\s+", " ", value)
+
+
+def research_cache_key(pkd: Optional[str], region: Optional[str], queries: dict[str, str]) -> str:
+    """Content address for shared market research"""
+    material = json.dumps(
+        {
+            "v": RESEARCH_CACHE_VERSION,
+            "pkd": normalize_pkd(pkd) or "",
+            "region": normalize_region(region),
+            "queries": sorted(queries.items()),
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class PerplexityClient:
+    """Minimal async client for the Perplexity chat completions API"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = settings.PERPLEXITY_API_KEY,
+        base_url: str = settings.PERPLEXITY_API_URL,
+        model: str = settings.PERPLEXITY_MODEL,
+        timeout: float = settings.LLM_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.model = model
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=timeout,
+            transport=transport,
+        )
+
+    async def search(self, query: str) -> dict:
+        """Answer text and cited URLs: {"content": str, "citations": [url, ...]}"""
+        response = await self._http.post(
+            "/chat/completions",
+            json={"model": self.model, "messages": [{"role": "user", "content": query}]},
+        )
+        response.raise_for_status()
+        payload = response.json()
+        return {
+            "content": payload["choices"][0]["message"]["content"],
+            "citations": payload.get("citations") or [],
+        }
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+def _parse_swot(content: str) -> dict:
+    """Extract the SWOT JSON object from a model answer"""
+    match = re.search(r"\{.*\}", content, re.DOTALL)
+    try:
+        data = json.loads(match.group(0)) if match else {}
+    except ValueError:
+        data = {}
+    return {key: list(data.get(key) or []) for key in ("strengths", "weaknesses", "opportunities", "threats")}
+
+
+class ResearchService:
+    """Shared market research + per-order SWOT"""
+
+    def __init__(self, client: PerplexityClient, cache: TwoTierCache, queries: dict[str, str] = MARKET_QUERIES):
+        self.client = client
+        self.cache = cache
+        self.queries = queries
+
+    @property
+    def stats(self):
+        return self.cache.stats
+
+    async def research_query(
+        self, field: str, pkd: Optional[str], pkd_nazwa: Optional[str], region: Optional[str]
+    ) -> dict:
+        """
+        Cached answer to one market query:
+        {"field", "query", "content", "citations", "researched_at", "duration_seconds"}
+        """
+        pkd = normalize_pkd(pkd) or ""
+        region = normalize_region(region)
+        template = self.queries[field]
+        key = research_cache_key(pkd, region, {field: template})
+
+        async def load() -> dict:
+            started = time.monotonic()
+            query = template.format(pkd=pkd, pkd_nazwa=pkd_nazwa or pkd, region=region or "całej Polski")
+            answer = await self.client.search(query)
+            logger.info("Researched %s for PKD %s / %s", field, pkd, region)
+            return {
+                "field": field,
+                "query": query,
+                "content": answer["content"],
+                "citations": answer["citations"],
+                "researched_at": datetime.now(timezone.utc).isoformat(),
+                "duration_seconds": round(time.monotonic() - started, 1),
+            }
+
+        return await self.cache.get_or_load(key, load)
+
+    @staticmethod
+    def assemble_market(answers: list[dict]) -> dict:
+        """
+        Market bundle from research_query answers:
+        {"market_data", "sources", "queries", "researched_at", "duration_seconds"}
+        """
+        market_data, sources, seen = {}, [], set()
+        for answer in answers:
+            market_data[answer["field"]] = answer["content"]
+            for url in answer["citations"]:
+                if url not in seen:
+                    seen.add(url)
+                    sources.append({"url": url, "used_for": answer["field"]})
+        return {
+            "market_data": market_data,
+            "sources": sources,
+            "queries": [answer["query"] for answer in answers],
+            "researched_at": min(answer["researched_at"] for answer in answers),
+            "duration_seconds": round(max(answer["duration_seconds"] for answer in answers)),
+        }
+
+    async def market_research(self, pkd: Optional[str], pkd_nazwa: Optional[str], region: Optional[str]) -> dict:
+        """All market queries for a (PKD, region), concurrently (see assemble_market)"""
+        answers = await asyncio.gather(
+            *(self.research_query(field, pkd, pkd_nazwa, region) for field in self.queries)
+        )
+        return self.assemble_market(list(answers))
+
+    async def swot_analysis(self, order: Order, ceidg: CEIDGData, market: dict) -> dict:
+        """Order-specific SWOT on top of shared market data (never cached)"""
+        query = SWOT_QUERY.format(
+            pkd=ceidg.pkd_glowny or "",
+            region=normalize_region(ceidg.adres_wojewodztwo) or "brak danych",
+            uslugi=", ".join(order.uslugi or []) or "brak danych",
+            dochod=order.planowany_dochod_roczny or "brak danych",
+            info=order.dodatkowe_informacje or "brak",
+            market=json.dumps(market["market_data"], ensure_ascii=False),
+        )
+        answer = await self.client.search(query)
+        return _parse_swot(answer["content"])
+
+    async def build_research_result(
+        self, order: Order, ceidg: CEIDGData, market: Optional[dict] = None
+    ) -> ResearchResult:
+        """New (unsaved) ResearchResult: shared market data (researched unless given) + order SWOT"""
+        if market is None:
+            market = await self.market_research(ceidg.pkd_glowny, ceidg.pkd_glowny_nazwa, ceidg.adres_wojewodztwo)
+        started = time.monotonic()
+        swot = await self.swot_analysis(order, ceidg, market)
+
+        return ResearchResult(
+            order_id=order.id,
+            market_data=market["market_data"],
+            swot_data=swot,
+            sources=market["sources"],
+            research_method="perplexity",
+            research_queries=market["queries"],
+            research_duration_seconds=market["duration_seconds"] + round(time.monotonic() - started),
+            source_count=len(market["sources"]),
+            researched_at=datetime.fromisoformat(market["researched_at"]),
+        )
+
+
+_service: Optional[ResearchService] = None
+
+
+def get_research_service() -> ResearchService:
+    """Process-wide research service"""
+    global _service
+    if _service is None:
+        settings.require("perplexity")
+        cache = TwoTierCache(
+            "research",
+            ttl=settings.CACHE_TTL_RESEARCH,
+            redis=get_redis(),
+            local_maxsize=settings.CACHE_LOCAL_MAX_ENTRIES,
+        )
+        _service = ResearchService(PerplexityClient(), cache)
+    return _service
+
+
+def set_research_service(service: Optional[ResearchService]) -> None:
+    """Override the process-wide service (tests, benchmarks)"""
+    global _service
+    _service = service
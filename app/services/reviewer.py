@@ -0,0 +1,362 @@
+"""
+Biznesplan Reviewer
+
+Scores generated sections and drives the refinement loop.
+
+Each section is reviewed on its own (score, issues, feedback), next to
+digests (first paragraph plus lines with figures) of the sections it was
+written from, and a short consistency check compares all sections through
+their digests. Reviews are cached in `reviewer_logs` under the SHA-256 of
+the section's title and content and of its upstream sections, so after a
+refinement only the revised sections and their dependents, and the
+consistency check if anything changed, go back to the LLM; the overall
+score is recomputed from cached and fresh reviews. Tokens the cached
+reviews cost when they were made are counted as saved.
+
+An answer that is not valid review JSON is asked for once more; if the
+second answer is unreadable too, the review fails (score 0 and a major
+issue), which blocks approval and sends the section to revision. Failed
+reviews are never cached.
+
+Reviewer requests reuse the generator's system blocks (PromptBuilder), so
+the instructions, style guide and order context are read from the prompt
+cache.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from app.models.order import OrderStatus
+from app.services.costs import log_llm_call
+from app.services.llm import LLMClient, LLMResponse, record_call_totals
+from app.services.llm_budget import LLMPriority
+from app.services.prompts import PromptBuilder
+from app.services.section_scheduler import SectionResult
+from app.utils.instrumentation import observe_llm_call
+from config.database import AsyncSessionLocal
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+REVIEW_HEADING = "# Zadanie recenzenta"
+
+REVIEW_INSTRUCTIONS = f"""\
+{REVIEW_HEADING}
+
+Oceń powyższą sekcję biznesplanu względem zasad, przewodnika stylu oraz danych \
+firmy i rynku. Sprawdź zgodność z danymi, odwołania do źródeł przy twierdzeniach \
+rynkowych, kompletność treści sekcji, język i format.
+
+Zwróć wyłącznie JSON:
+{{"score": <0.0-1.0>, "issues": [{{"issue": "<opis>", "severity": "minor|major|critical"}}], \
+"feedback": "<1-2 zdania>"}}"""
+
+CONSISTENCY_INSTRUCTIONS = f"""\
+{REVIEW_HEADING}: spójność
+
+Powyżej są skróty wszystkich sekcji biznesplanu (pierwszy akapit i wiersze z \
+liczbami). Sprawdź wyłącznie spójność między sekcjami: kwoty, prognozy, daty, \
+nazwy i fakty muszą się zgadzać w całym dokumencie.
+
+Zwróć wyłącznie JSON:
+{{"score": <0.0-1.0>, "issues": [{{"section": "<tytuł sekcji>", "issue": "<opis>", \
+"severity": "minor|major|critical"}}], "feedback": "<1-2 zdania>"}}"""
+
+REVISION_INSTRUCTIONS = """\
+Popraw poniższą wersję sekcji zgodnie z uwagami recenzenta. Zachowaj fragmenty, \
+które nie budzą zastrzeżeń, i zwróć pełną, poprawioną treść sekcji.
+
+## Uwagi recenzenta
+{issues}
+
+## Poprzednia wersja
+{content}"""
+
+CONSISTENCY_WEIGHT = 0.2  # Share of the overall score from the consistency check
+REVIEW_ATTEMPTS = 2  # Calls per review before an unreadable answer counts as failed
+UNREADABLE_ISSUE = "Recenzja nie powiodła się: odpowiedź recenzenta była nieczytelna."
+BLOCKING_SEVERITIES = ("major", "critical")  # Issues that block approval and send a section back
+DIGEST_CHARS = 800  # Max characters per section in the consistency check
+
+
+def section_hash(result: SectionResult) -> str:
+    """Cache key of a section's review"""
+    return hashlib.sha256(f"{result.title}\0{result.content}".encode("utf-8")).hexdigest()
+
+
+def section_digest(result: SectionResult, max_chars: int = DIGEST_CHARS) -> str:
+    """First paragraph plus every line with a figure, for the consistency check"""
+    lines = [line.strip() for line in result.content.splitlines() if line.strip()]
+    kept = lines[:1] + [line for line in lines[1:] if any(char.isdigit() for char in line)]
+    return f"## {result.title}\n\n" + "\n".join(kept)[:max_chars]
+
+
+def parse_review(text: str) -> Optional[dict]:
+    """{"score", "issues", "feedback"} from a reviewer answer, or None if it is not valid JSON"""
+    start, end = text.find("{"), text.rfind("}")
+    try:
+        payload = json.loads(text[start:end + 1]) if 0 <= start < end else None
+        score = min(max(float(payload["score"]), 0.0), 1.0)
+    except (TypeError, KeyError, ValueError):
+        return None
+    issues = [issue for issue in payload.get("issues") or [] if isinstance(issue, dict) and issue.get("issue")]
+    return {"score": score, "issues": issues, "feedback": str(payload.get("feedback") or "")}
+
+
+@dataclass
+class SectionReview:
+    """One cached review; `hash` is empty if the review failed (never reused)"""
+    hash: str
+    score: float
+    issues: list = field(default_factory=list)
+    feedback: str = ""
+    tokens: int = 0  # Prompt + output tokens of the calls that produced it
+    cost_usd: float = 0.0
+
+    @classmethod
+    def from_responses(cls, content_hash: str, responses: list[LLMResponse]) -> "SectionReview":
+        """Review from the last answer; a failed review if it is unreadable"""
+        parsed = parse_review(responses[-1].text)
+        if parsed is None:
+            parsed = {"score": 0.0, "issues": [{"issue": UNREADABLE_ISSUE, "severity": "major"}], "feedback": ""}
+            content_hash = ""
+        return cls(
+            hash=content_hash,
+            tokens=sum(response.usage.prompt_tokens + response.usage.output_tokens for response in responses),
+            cost_usd=round(sum(response.usage.cost_usd for response in responses), 6),
+            **parsed,
+        )
+
+
+@dataclass
+class ReviewOutcome:
+    """Result of one review pass"""
+    overall_score: float
+    approved: bool
+    issues: list[dict]  # Biznesplan.final_issues shape: {"section", "issue", "severity"}
+    section_issues: dict[str, list[dict]]  # Section key -> its own and consistency issues
+    to_revise: list[str]  # Section keys, in plan order
+    logs: dict  # Updated reviewer_logs
+
+
+class Reviewer:
+    """
+    Reviews the sections of one plan.
+
+    With `incremental` off every pass reviews every section (for
+    comparison). `upstream` maps a section key to the keys it was
+    generated from (SectionScheduler.upstream). Costs go to the ledger when
+    `order_id` is set.
+    """
+
+    def __init__(
+        self,
+        llm: LLMClient,
+        builder: PromptBuilder,
+        order_id: Optional[int] = None,
+        session_factory=AsyncSessionLocal,
+        incremental: bool = settings.BIZNESPLAN_REVIEW_INCREMENTAL,
+        threshold: float = settings.BIZNESPLAN_QUALITY_THRESHOLD,
+        concurrency: int = settings.BIZNESPLAN_SECTION_CONCURRENCY,
+        max_tokens: int = settings.BIZNESPLAN_REVIEW_MAX_TOKENS,
+        upstream: Optional[dict[str, list[str]]] = None,
+    ):
+        self.llm = llm
+        self.builder = builder
+        self.order_id = order_id
+        self.session_factory = session_factory
+        self.incremental = incremental
+        self.threshold = threshold
+        self.concurrency = concurrency
+        self.max_tokens = max_tokens
+        self.upstream = upstream or {}
+
+    def _request(self, content: list[dict]) -> dict:
+        return {
+            "model": self.builder.model,
+            "max_tokens": self.max_tokens,
+            "temperature": 0.0,
+            "system": self.builder.system,
+            "messages": [{"role": "user", "content": content}],
+        }
+
+    def section_request(self, result: SectionResult, upstream: Optional[dict[str, SectionResult]] = None) -> dict:
+        content = [
+            {"type": "text", "text": f"# Sekcja: {result.title}\n\n{result.content}"},
+            {"type": "text", "text": REVIEW_INSTRUCTIONS},
+        ]
+        if upstream:
+            digests = "\n\n".join(section_digest(source) for source in upstream.values())
+            content.insert(0, {"type": "text", "text": f"# Sekcje, na których opiera się sekcja\n\n{digests}"})
+        return self._request(content)
+
+    def _upstream(self, key: str, sections: dict[str, SectionResult]) -> dict[str, SectionResult]:
+        return {source: sections[source] for source in self.upstream.get(key, ()) if source in sections}
+
+    def consistency_request(self, sections: dict[str, SectionResult]) -> dict:
+        digests = "\n\n".join(section_digest(result) for result in sections.values())
+        return self._request([
+            {"type": "text", "text": f"# Skrót biznesplanu\n\n{digests}"},
+            {"type": "text", "text": CONSISTENCY_INSTRUCTIONS},
+        ])
+
+    async def review(self, sections: dict[str, SectionResult], logs: Optional[dict] = None) -> ReviewOutcome:
+        """Review `sections` (in plan order), reusing cached reviews from `logs`"""
+        started = time.monotonic()
+        logs = dict(logs or {})
+        cached = logs.get("section_reviews", {}) if self.incremental else {}
+        own = {key: section_hash(result) for key, result in sections.items()}
+        hashes = {}  # Review cache keys: a change upstream invalidates the dependents' reviews
+        for key in sections:
+            sources = [own[source] for source in self._upstream(key, sections)]
+            combined = "".join([own[key], *sources])
+            hashes[key] = hashlib.sha256(combined.encode("ascii")).hexdigest() if sources else own[key]
+        reviews = {
+            key: SectionReview(**cached[key])
+            for key in sections if key in cached and cached[key]["hash"] == hashes[key]
+        }
+        stale = [key for key in sections if key not in reviews]
+
+        consistency_hash = hashlib.sha256("".join(own.values()).encode("ascii")).hexdigest()
+        consistency = logs.get("consistency") if self.incremental else None
+        check_consistency = consistency is None or consistency["hash"] != consistency_hash
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def call(label: str, name: str, request: dict) -> list[LLMResponse]:
+            """Answers of one review: a second call if the first is unreadable"""
+            responses = []
+            for attempt in range(1, REVIEW_ATTEMPTS + 1):
+                async with semaphore:
+                    response = await self.llm.complete(request, priority=LLMPriority.REVIEW)
+                observe_llm_call(f"review:{label}", response)
+                if self.order_id is not None:
+                    await log_llm_call(
+                        response, name, agent="reviewer", order_id=self.order_id, session_factory=self.session_factory,
+                    )
+                responses.append(response)
+                if parse_review(response.text) is not None:
+                    break
+                logger.warning("Unreadable reviewer answer for %s (attempt %d of %d): %.200r",
+                               label, attempt, REVIEW_ATTEMPTS, response.text)
+            return responses
+
+        calls = [
+            call(key, f"Recenzja: {sections[key].title}",
+                 self.section_request(sections[key], self._upstream(key, sections)))
+            for key in stale
+        ]
+        if check_consistency:
+            calls.append(call("consistency", "Recenzja: spójność", self.consistency_request(sections)))
+        answers = await asyncio.gather(*calls)
+
+        input_tokens = output_tokens = 0
+        for response in (response for responses in answers for response in responses):
+            logs = record_call_totals(logs, response)
+            input_tokens += response.usage.prompt_tokens
+            output_tokens += response.usage.output_tokens
+        for key, responses in zip(stale, answers):
+            reviews[key] = SectionReview.from_responses(hashes[key], responses)
+        consistency = (
+            SectionReview.from_responses(consistency_hash, answers[-1]) if check_consistency
+            else SectionReview(**consistency)
+        )
+        saved = [reviews[key] for key in sections if key not in stale]
+        if not check_consistency:
+            saved.append(consistency)
+
+        # Word-weighted mean of the sections, blended with the consistency score
+        weights = {key: max(1, len(result.content.split())) for key, result in sections.items()}
+        section_score = sum(reviews[key].score * weight for key, weight in weights.items()) / sum(weights.values())
+        overall = round((1 - CONSISTENCY_WEIGHT) * section_score + CONSISTENCY_WEIGHT * consistency.score, 3)
+
+        keys_by_title = {result.title: key for key, result in sections.items()}
+        section_issues = {
+            key: [{"section": sections[key].title, **issue} for issue in reviews[key].issues] for key in sections
+        }
+        unplaced = []
+        for issue in consistency.issues:
+            key = keys_by_title.get(issue.get("section"))
+            (section_issues[key] if key else unplaced).append({"section": issue.get("section") or "", **issue})
+        issues = [issue for key in sections for issue in section_issues[key]] + unplaced
+        to_revise = [
+            key for key in sections
+            if reviews[key].score < self.threshold
+            or any(issue.get("severity") in BLOCKING_SEVERITIES for issue in section_issues[key])
+        ]
+        approved = overall >= self.threshold and not any(
+            issue.get("severity") in BLOCKING_SEVERITIES for issue in issues
+        )
+
+        tokens_saved = sum(review.tokens for review in saved)
+        cost_saved = sum(review.cost_usd for review in saved)
+        logs["section_reviews"] = {key: asdict(review) for key, review in reviews.items() if review.hash}
+        logs["consistency"] = asdict(consistency) if consistency.hash else None
+        logs["tokens_saved"] = logs.get("tokens_saved", 0) + tokens_saved
+        logs["cost_saved_usd"] = round(logs.get("cost_saved_usd", 0.0) + cost_saved, 6)
+        logs["reviews"] = list(logs.get("reviews", [])) + [{
+            "iteration": len(logs.get("reviews", [])) + 1,
+            "overall_score": overall,
+            "issues": issues,
+            "approved": approved,
+            "feedback": consistency.feedback,
+            "sections_reviewed": len(stale),
+            "sections_cached": len(sections) - len(stale),
+            "consistency_checked": check_consistency,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "tokens_saved": tokens_saved,
+            "cost_saved_usd": round(cost_saved, 6),
+            "duration_seconds": round(time.monotonic() - started, 1),
+        }]
+        return ReviewOutcome(overall, approved, issues, section_issues, to_revise, logs)
+
+
+def revision_instructions(result: SectionResult, issues: list[dict]) -> str:
+    """Extra section instructions asking for a revision that addresses `issues`"""
+    listed = "\n".join(f"- [{issue.get('severity', 'minor')}] {issue['issue']}" for issue in issues)
+    return REVISION_INSTRUCTIONS.format(issues=listed or "- Podnieś ogólną jakość sekcji.", content=result.content)
+
+
+# revise(current result, its issues, all sections as of the start of the round) -> revised result
+ReviseFn = Callable[[SectionResult, list[dict], dict[str, SectionResult]], Awaitable[SectionResult]]
+# on_phase(order status, refinements so far)
+PhaseFn = Callable[[OrderStatus, int], Awaitable[None]]
+
+
+async def review_and_refine(
+    reviewer: Reviewer,
+    sections: dict[str, SectionResult],
+    revise: ReviseFn,
+    max_iterations: int = settings.BIZNESPLAN_MAX_ITERATIONS,
+    on_phase: Optional[PhaseFn] = None,
+) -> tuple[dict[str, SectionResult], ReviewOutcome, int]:
+    """
+    Review, revise the flagged sections, and review again until approved,
+    nothing is flagged, or `max_iterations` refinements were made.
+
+    Returns the final sections, the last review and the refinement count.
+    """
+    logs: dict = {}
+    refinements = 0
+    while True:
+        if on_phase is not None:
+            await on_phase(OrderStatus.REVIEWING, refinements)
+        outcome = await reviewer.review(sections, logs)
+        logs = outcome.logs
+        if outcome.approved or not outcome.to_revise or refinements >= max_iterations:
+            return sections, outcome, refinements
+
+        refinements += 1
+        if on_phase is not None:
+            await on_phase(OrderStatus.REFINING, refinements)
+        # Every revision in a round sees the same sections, whatever finishes first
+        revised = await asyncio.gather(
+            *(revise(sections[key], outcome.section_issues[key], sections) for key in outcome.to_revise)
+        )
+        sections = {**sections, **{result.key: result for result in revised}}
@@ -0,0 +1,243 @@
+"""
+Section Scheduler
+
+Concurrent, dependency-aware generation of biznesplan sections.
+
+Sections declare which other sections they need. Every section whose
+dependencies are finished starts immediately (up to a concurrency cap), so a
+plan takes roughly as long as its longest dependency chain instead of the
+sum of all sections.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import update
+
+from app.models.biznesplan import Biznesplan
+from app.models.order import Order
+from app.services.log_sink import ProcessLogSink, get_log_sink
+from config.database import AsyncSessionLocal
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SectionSpec:
+    """One section of the plan and the sections it builds on"""
+    key: str
+    title: str
+    depends_on: tuple[str, ...] = ()
+
+
+# Outline first; body sections need only the outline (plus CEIDG/research
+# context, which is available before scheduling starts).
+BIZNESPLAN_SECTIONS: tuple[SectionSpec, ...] = (
+    SectionSpec("outline", "Konspekt"),
+    SectionSpec("opis_dzialalnosci", "Opis działalności", ("outline",)),
+    SectionSpec("analiza_rynku", "Analiza rynku", ("outline",)),
+    SectionSpec("analiza_konkurencji", "Analiza konkurencji", ("outline",)),
+    SectionSpec("plan_finansowy", "Plan finansowy", ("outline",)),
+    SectionSpec("analiza_swot", "Analiza SWOT", ("analiza_rynku", "analiza_konkurencji")),
+    SectionSpec("plan_marketingowy", "Plan marketingowy", ("analiza_rynku", "analiza_konkurencji")),
+    SectionSpec(
+        "streszczenie",
+        "Streszczenie",
+        ("opis_dzialalnosci", "analiza_rynku", "analiza_konkurencji", "plan_finansowy", "analiza_swot", "plan_marketingowy"),
+    ),
+    SectionSpec("pismo_przewodnie", "Pismo przewodnie", ("streszczenie",)),
+)
+
+
+class SectionGraphError(ValueError):
+    """Invalid section dependency graph (unknown dependency or cycle)"""
+
+
+def validate_sections(sections: tuple[SectionSpec, ...]) -> list[SectionSpec]:
+    """Topologically sorted sections; raises SectionGraphError if invalid"""
+    by_key = {section.key: section for section in sections}
+    if len(by_key) != len(sections):
+        raise SectionGraphError("Duplicate section keys")
+    for section in sections:
+        missing = set(section.depends_on) - by_key.keys()
+        if missing:
+            raise SectionGraphError(f"Section {section.key!r} depends on unknown {sorted(missing)}")
+
+    ordered, state = [], {}
+
+    def visit(key: str, path: tuple[str, ...]) -> None:
+        if state.get(key) == "done":
+            return
+        if state.get(key) == "visiting":
+            raise SectionGraphError(f"Dependency cycle: {' -> '.join(path + (key,))}")
+        state[key] = "visiting"
+        for dependency in by_key[key].depends_on:
+            visit(dependency, path + (key,))
+        state[key] = "done"
+        ordered.append(by_key[key])
+
+    for section in sections:
+        visit(section.key, ())
+    return ordered
+
+
+def critical_path_length(sections: tuple[SectionSpec, ...], durations: dict[str, float]) -> float:
+    """Lower bound on wall-clock time with unlimited concurrency"""
+    finish: dict[str, float] = {}
+    for section in validate_sections(sections):
+        start = max((finish[dep] for dep in section.depends_on), default=0.0)
+        finish[section.key] = start + durations.get(section.key, 0.0)
+    return max(finish.values(), default=0.0)
+
+
+@dataclass
+class SectionResult:
+    """Output of one generated section"""
+    key: str
+    title: str
+    content: str
+    started_at: float
+    finished_at: float
+    metadata: dict = field(default_factory=dict)
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.finished_at - self.started_at
+
+
+# generate(section, upstream_results) -> content or (content, metadata)
+GenerateFn = Callable[[SectionSpec, dict[str, SectionResult]], Awaitable]
+# on_progress(completed_count, total, result)
+ProgressFn = Callable[[int, int, SectionResult], Awaitable[None]]
+
+
+class SectionScheduler:
+    """
+    Runs section generation as a DAG.
+
+    A section starts as soon as all of its dependencies finished; at most
+    `concurrency` sections run at once. `generate` receives the results of
+    all upstream sections (direct and transitive), in plan order. If any section fails, sections not
+    yet started are cancelled and the error is raised.
+    """
+
+    def __init__(
+        self,
+        sections: tuple[SectionSpec, ...] = BIZNESPLAN_SECTIONS,
+        concurrency: int = settings.BIZNESPLAN_SECTION_CONCURRENCY,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        self.sections = validate_sections(sections)
+        self.concurrency = concurrency
+
+        # Upstream (transitive) dependencies of each section, in plan order.
+        # Passing them in a fixed order keeps prompt prefixes shared between
+        # sections (see PromptBuilder).
+        position = {section.key: index for index, section in enumerate(self.sections)}
+        self.upstream: dict[str, list[str]] = {}
+        for section in self.sections:
+            ancestors = set(section.depends_on)
+            for dependency in section.depends_on:
+                ancestors.update(self.upstream[dependency])
+            self.upstream[section.key] = sorted(ancestors, key=position.__getitem__)
+
+    @property
+    def total(self) -> int:
+        return len(self.sections)
+
+    async def run(self, generate: GenerateFn, on_progress: Optional[ProgressFn] = None) -> dict[str, SectionResult]:
+        """Generate all sections; returns results keyed by section key"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        done: dict[str, asyncio.Future] = {
+            section.key: asyncio.get_running_loop().create_future() for section in self.sections
+        }
+        results: dict[str, SectionResult] = {}
+        progress_lock = asyncio.Lock()
+
+        async def run_section(section: SectionSpec) -> None:
+            for dependency in section.depends_on:
+                await done[dependency]
+            dependencies = {key: results[key] for key in self.upstream[section.key]}
+
+            async with semaphore:
+                started = time.monotonic()
+                output = await generate(section, dependencies)
+                content, metadata = output if isinstance(output, tuple) else (output, {})
+                result = SectionResult(section.key, section.title, content, started, time.monotonic(), metadata)
+
+            results[section.key] = result
+            done[section.key].set_result(None)
+            logger.debug("Section %s finished in %.1fs", section.key, result.duration_seconds)
+
+            if on_progress is not None:
+                # Serialize progress callbacks so counters/DB updates stay ordered
+                async with progress_lock:
+                    await on_progress(len(results), self.total, result)
+
+        tasks = [asyncio.create_task(run_section(section), name=f"section:{section.key}") for section in self.sections]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for future in done.values():
+                if not future.done():
+                    future.cancel()
+            raise
+
+        return {section.key: results[section.key] for section in self.sections}
+
+
+def make_progress_reporter(
+    order_id: int,
+    biznesplan_id: int,
+    session_factory=AsyncSessionLocal,
+    sink: Optional[ProcessLogSink] = None,
+) -> ProgressFn:
+    """
+    Progress callback for SectionScheduler.run().
+
+    With sections finishing out of order, `current_section_index` holds the
+    number of completed sections; each completion is also logged to
+    ProcessLog (via the buffered sink) for the SSE stream.
+    """
+    sink = sink or get_log_sink()
+
+    async def report(completed: int, total: int, result: SectionResult) -> None:
+        async with session_factory() as session:
+            await session.execute(
+                update(Biznesplan)
+                .where(Biznesplan.id == biznesplan_id)
+                .values(current_section_index=completed, total_sections=total)
+            )
+            await session.execute(
+                update(Order)
+                .where(Order.id == order_id)
+                .values(
+                    current_phase=f"Generating sections {completed}/{total}",
+                    progress_percent=int(completed / total * 100),
+                )
+            )
+            await session.commit()
+
+        await sink.emit(
+            order_id,
+            f"section_{result.key}",
+            f"Ukończono sekcję: {result.title} ({completed}/{total})",
+            data={
+                "section_name": result.title,
+                "section_key": result.key,
+                "duration_seconds": round(result.duration_seconds, 1),
+                **result.metadata,
+            },
+            progress_current=completed,
+            progress_total=total,
+        )
+
+    return report
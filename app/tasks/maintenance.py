@@ -0,0 +1,62 @@
+"""
+Maintenance Tasks
+
+Periodic housekeeping, scheduled by Celery beat (see app.tasks.worker):
+
+    celery -A app.tasks.worker beat
+
+maintain_process_logs creates upcoming process_logs partitions and rolls
+up and drops expired ones (see app.services.log_retention).
+
+requeue_stranded_orders enqueues Podio orders whose enqueue failed at
+ingestion (PENDING, no Celery task id, older than PODIO_REQUEUE_AFTER;
+see app.services.podio_ingest).
+
+Both run on the io queue; re-running them is harmless.
+"""
+
+import logging
+
+from app.services.log_retention import maintain_process_logs as _maintain_process_logs
+from app.services.podio_ingest import requeue_stranded_orders as _requeue_stranded_orders
+from app.tasks.worker import celery_app, run_async
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+MAINTAIN_PROCESS_LOGS_TASK = "app.tasks.maintenance.maintain_process_logs"
+REQUEUE_STRANDED_ORDERS_TASK = "app.tasks.maintenance.requeue_stranded_orders"
+
+
+@celery_app.task(
+    name=MAINTAIN_PROCESS_LOGS_TASK,
+    queue=settings.CELERY_IO_QUEUE,
+    priority=settings.CELERY_IO_PRIORITY,
+    time_limit=settings.CELERY_TASK_TIME_LIMIT,
+    soft_time_limit=settings.CELERY_TASK_SOFT_TIME_LIMIT,
+)
+def maintain_process_logs() -> dict:
+    """Partition upkeep and retention for process_logs; returns the run's stats"""
+    stats = run_async(_maintain_process_logs())
+    logger.info(
+        "Process log maintenance: %d partitions created, %d retired, %d rows of %d orders rolled up",
+        len(stats["created"]), len(stats["retired"]), stats["rows"], stats["orders"],
+    )
+    return stats
+
+
+@celery_app.task(
+    name=REQUEUE_STRANDED_ORDERS_TASK,
+    queue=settings.CELERY_IO_QUEUE,
+    priority=settings.CELERY_IO_PRIORITY,
+    time_limit=settings.CELERY_TASK_TIME_LIMIT,
+    soft_time_limit=settings.CELERY_TASK_SOFT_TIME_LIMIT,
+)
+def requeue_stranded_orders() -> dict:
+    """Enqueue ingested orders that never got a generation task; returns counts"""
+    stats = run_async(_requeue_stranded_orders())
+    if stats["found"]:
+        logger.warning(
+            "Re-queued %d of %d stranded orders (%d failed)", stats["enqueued"], stats["found"], stats["failed"],
+        )
+    return stats
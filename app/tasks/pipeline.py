@@ -0,0 +1,230 @@
+"""
+Order Pipeline
+
+Celery canvas for one order:
+
+    fetch_ceidg                                   (io)
+      -> chord(research_query x MARKET_QUERIES)   (io, in parallel)
+      -> assemble_research                        (io)
+      -> generate_plan                            (llm)
+
+The market queries need the PKD code and voivodeship from CEIDG, so the
+registry lookup runs first (usually a cache hit); every query then runs as
+its own task and the chord body joins them. Short I/O tasks and long LLM
+tasks use separate queues, so run dedicated workers:
+
+    celery -A app.tasks.worker worker -Q io -c 16
+    celery -A app.tasks.worker worker -Q llm -c 4
+
+Every task takes `order_id` as a keyword argument, so OrderTask.on_failure
+can mark the order FAILED once a task has exhausted its retries; this
+also works in eager mode, unlike link_error callbacks.
+
+If COST_LIMIT_DAILY is set and the day's LLM spend reaches it,
+generate_plan re-schedules itself every COST_BUDGET_RETRY_DELAY seconds
+instead of starting; the check reads one rollup row. COST_ALERT_DAILY
+only logs a warning.
+
+`order_phase` labels each task's duration metric with the OrderStatus it
+runs under (see app.tasks.worker).
+"""
+
+import logging
+from datetime import datetime, timezone
+
+from celery import Task, chain, chord, group
+from sqlalchemy import select, update
+from sqlalchemy.orm import selectinload
+
+from app.models.ceidg_data import CEIDGData
+from app.models.order import Order, OrderStatus
+from app.models.research_result import ResearchResult
+from app.services.ceidg import CEIDGError, CEIDGNotFoundError, get_ceidg_service
+from app.services.costs import is_over_daily_budget
+from app.services.generator import generate_biznesplan
+from app.services.research import get_research_service
+from app.tasks.worker import PROCESS_ORDER_TASK, celery_app, run_async
+from config.database import AsyncSessionLocal
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+IO_TASK_OPTIONS = {
+    "queue": settings.CELERY_IO_QUEUE,
+    "priority": settings.CELERY_IO_PRIORITY,
+    "time_limit": settings.CELERY_IO_TASK_TIME_LIMIT,
+    "soft_time_limit": settings.CELERY_IO_TASK_TIME_LIMIT - 15,
+}
+LLM_TASK_OPTIONS = {
+    "queue": settings.CELERY_LLM_QUEUE,
+    "priority": settings.CELERY_LLM_PRIORITY,
+    "time_limit": settings.CELERY_TASK_TIME_LIMIT,
+    "soft_time_limit": settings.CELERY_TASK_SOFT_TIME_LIMIT,
+}
+
+
+async def _set_status(order_id: int, status: OrderStatus, **values) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(update(Order).where(Order.id == order_id).values(status=status, **values))
+        await session.commit()
+
+
+class DailyBudgetExceeded(Exception):
+    """Today's LLM spend reached COST_LIMIT_DAILY"""
+
+
+async def _mark_failed(order_id: int, message: str) -> None:
+    """FAILED with the first error (an eager parent task fails with the same one)"""
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(Order)
+            .where(Order.id == order_id, Order.status != OrderStatus.FAILED)
+            .values(status=OrderStatus.FAILED, error_message=message)
+        )
+        await session.commit()
+
+
+class OrderTask(Task):
+    """Pipeline task: a final failure marks the order (kwargs["order_id"]) FAILED"""
+
+    abstract = True
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        order_id = kwargs.get("order_id")
+        if order_id is None:
+            return
+        logger.error("Pipeline for order %s failed in %s: %s", order_id, self.name, exc)
+        try:
+            run_async(_mark_failed(order_id, f"{self.name}: {exc}"[:1000]))
+        except Exception:
+            logger.exception("Could not mark order %s as failed", order_id)
+
+
+async def _fetch_ceidg(order_id: int) -> dict:
+    async with AsyncSessionLocal() as session:
+        order = (await session.execute(
+            select(Order).where(Order.id == order_id).options(selectinload(Order.ceidg_data))
+        )).scalar_one()
+        order.status = OrderStatus.FETCHING_DATA
+        order.started_at = order.started_at or datetime.now(timezone.utc)
+        order.current_phase = "Fetching CEIDG data"
+        await session.commit()
+
+        if order.ceidg_data is None:
+            order.ceidg_data = await get_ceidg_service().build_ceidg_data(order.id, order.nip)
+            order.current_phase = "Researching market"
+            await session.commit()
+        ceidg = order.ceidg_data
+        return {
+            "pkd": ceidg.pkd_glowny,
+            "pkd_nazwa": ceidg.pkd_glowny_nazwa,
+            "region": ceidg.adres_wojewodztwo,
+        }
+
+
+@celery_app.task(
+    base=OrderTask,
+    name="app.tasks.pipeline.fetch_ceidg",
+    order_phase=OrderStatus.FETCHING_DATA.value,
+    autoretry_for=(CEIDGError,),
+    dont_autoretry_for=(CEIDGNotFoundError,),
+    retry_backoff=True,
+    max_retries=3,
+    **IO_TASK_OPTIONS,
+)
+def fetch_ceidg(order_id: int) -> dict:
+    """Store CEIDG data for the order; returns what the research queries need"""
+    return run_async(_fetch_ceidg(order_id))
+
+
+@celery_app.task(
+    base=OrderTask,
+    name="app.tasks.pipeline.research_query",
+    order_phase=OrderStatus.FETCHING_DATA.value,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    max_retries=3,
+    **IO_TASK_OPTIONS,
+)
+def research_query(company: dict, field: str, order_id: int) -> dict:
+    """One market query (cached across orders with the same PKD/region)"""
+    return run_async(get_research_service().research_query(field, company["pkd"], company["pkd_nazwa"], company["region"]))
+
+
+async def _assemble_research(answers: list[dict], order_id: int) -> None:
+    service = get_research_service()
+    async with AsyncSessionLocal() as session:
+        order = (await session.execute(
+            select(Order).where(Order.id == order_id).options(selectinload(Order.research_result))
+        )).scalar_one()
+        ceidg = await session.scalar(select(CEIDGData).where(CEIDGData.order_id == order_id))
+        result: ResearchResult = await service.build_research_result(order, ceidg, market=service.assemble_market(answers))
+        if order.research_result is not None:
+            await session.delete(order.research_result)
+            await session.flush()
+        order.research_result = result
+        order.current_phase = "Research complete"
+        await session.commit()
+
+
+@celery_app.task(
+    base=OrderTask,
+    name="app.tasks.pipeline.assemble_research",
+    order_phase=OrderStatus.FETCHING_DATA.value,
+    **IO_TASK_OPTIONS,
+)
+def assemble_research(answers: list[dict], order_id: int) -> None:
+    """Chord body: join market answers, add the order's SWOT, store ResearchResult"""
+    run_async(_assemble_research(answers, order_id))
+
+
+async def _over_daily_budget(order_id: int) -> bool:
+    async with AsyncSessionLocal() as session:
+        if not await is_over_daily_budget(session):
+            return False
+        await session.execute(
+            update(Order).where(Order.id == order_id).values(current_phase="Waiting for daily cost budget")
+        )
+        await session.commit()
+        return True
+
+
+async def _generate_plan(order_id: int) -> int:
+    biznesplan_id = await generate_biznesplan(order_id)
+    await _set_status(order_id, OrderStatus.COMPLETED, completed_at=datetime.now(timezone.utc))
+    return biznesplan_id
+
+
+@celery_app.task(
+    bind=True,
+    base=OrderTask,
+    name="app.tasks.pipeline.generate_plan",
+    order_phase=OrderStatus.GENERATING.value,
+    **LLM_TASK_OPTIONS,
+)
+def generate_plan(self, order_id: int) -> int:
+    """Generate the plan, or wait for the next day's budget"""
+    if settings.COST_LIMIT_DAILY > 0 and run_async(_over_daily_budget(order_id)):
+        if self.request.is_eager:  # An eager retry would re-run inline right away
+            raise DailyBudgetExceeded(f"Daily LLM budget of ${settings.COST_LIMIT_DAILY:.2f} reached")
+        raise self.retry(countdown=settings.COST_BUDGET_RETRY_DELAY, max_retries=None)
+    return run_async(_generate_plan(order_id))
+
+
+def build_pipeline(order_id: int):
+    """Canvas for one order (see module docstring)"""
+    research = chord(
+        group(research_query.s(field=field, order_id=order_id) for field in get_research_service().queries),
+        assemble_research.s(order_id=order_id),
+    )
+    return chain(
+        fetch_ceidg.si(order_id=order_id),
+        research,
+        generate_plan.si(order_id=order_id),
+    )
+
+
+@celery_app.task(base=OrderTask, name=PROCESS_ORDER_TASK, order_phase=OrderStatus.PENDING.value, **IO_TASK_OPTIONS)
+def process_order(order_id: int) -> None:
+    """Entry point enqueued by the Podio ingestor"""
+    build_pipeline(order_id).apply_async()
@@ -0,0 +1,150 @@
+"""
+Celery Application
+
+    celery -A app.tasks.worker worker -Q io,llm --loglevel=info
+    celery -A app.tasks.worker beat  # Periodic maintenance, one instance
+
+Producers enqueue by task name (`send_task`) so the web process does not
+import the generation code. Tasks live in app.tasks.pipeline; scheduled
+housekeeping in app.tasks.maintenance.
+
+For tests, CELERY_TASK_ALWAYS_EAGER runs tasks (including chords) inline,
+and CELERY_BROKER_URL=memory:// with CELERY_RESULT_BACKEND=cache+memory://
+replaces Redis in a single process.
+
+Task durations are recorded per OrderStatus phase (the task's
+`order_phase` option). With METRICS_WORKER_PORT set, each pool child
+serves its metrics on METRICS_WORKER_PORT + child index.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+from celery import Celery, signals
+from celery.schedules import crontab
+from kombu import Queue
+
+from config.settings import settings
+
+# Entry point of the generation pipeline for one order
+PROCESS_ORDER_TASK = "app.tasks.pipeline.process_order"
+
+celery_app = Celery(
+    "biznesplan",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=["app.tasks.pipeline", "app.tasks.maintenance"],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    result_serializer="json",
+    timezone="Europe/Warsaw",
+    task_time_limit=settings.CELERY_TASK_TIME_LIMIT,
+    task_soft_time_limit=settings.CELERY_TASK_SOFT_TIME_LIMIT,
+    task_acks_late=True,  # Re-deliver if a worker dies mid-task
+    worker_prefetch_multiplier=1,  # Long tasks: don't hoard messages
+    # Short I/O and long LLM tasks never share a queue (see app.tasks.pipeline)
+    task_queues=[Queue(settings.CELERY_IO_QUEUE), Queue(settings.CELERY_LLM_QUEUE)],
+    task_default_queue=settings.CELERY_IO_QUEUE,
+    task_default_priority=settings.CELERY_IO_PRIORITY,
+    broker_transport_options={
+        "queue_order_strategy": "priority",  # Redis: priority 0 is served first
+        "priority_steps": list(range(10)),
+        "sep": ":",
+    },
+    task_always_eager=settings.CELERY_TASK_ALWAYS_EAGER,
+    task_eager_propagates=False,  # Failures still go through OrderTask.on_failure
+    beat_schedule={
+        "maintain-process-logs": {
+            "task": "app.tasks.maintenance.maintain_process_logs",
+            "schedule": crontab(hour=settings.PROCESS_LOG_MAINTENANCE_HOUR, minute=0),
+        },
+        "requeue-stranded-orders": {
+            "task": "app.tasks.maintenance.requeue_stranded_orders",
+            "schedule": settings.PODIO_REQUEUE_AFTER,
+        },
+    },
+)
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_order(order_id: int) -> str:
+    """Queue generation for an order; returns the Celery task id"""
+    if celery_app.conf.task_always_eager:
+        from app.tasks.pipeline import process_order  # send_task ignores eager mode
+        return process_order.delay(order_id=order_id).id
+    return celery_app.send_task(PROCESS_ORDER_TASK, kwargs={"order_id": order_id}).id
+
+
+_local = threading.local()
+
+
+def run_async(coro):
+    """
+    Run a coroutine from a task on this thread's persistent event loop.
+
+    The database pool, Redis and HTTP clients bind to the loop they were
+    first used on, so all tasks in a worker reuse one loop instead of
+    asyncio.run(). Process logs are flushed before the task returns.
+    Process-wide services are shared, so use the prefork (default) or solo
+    pool, not threads; eager tasks must be called from code that is not
+    inside a running loop.
+    """
+    loop = getattr(_local, "loop", None)
+    if loop is None:
+        loop = _local.loop = asyncio.new_event_loop()
+    return loop.run_until_complete(_with_log_sink(coro))
+
+
+async def _with_log_sink(coro):
+    from app.services.log_sink import get_log_sink
+
+    sink = get_log_sink()
+    await sink.start()
+    try:
+        return await coro
+    finally:
+        await sink.stop()
+
+
+_task_started: dict[str, float] = {}
+
+
+@signals.task_prerun.connect
+def _task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@signals.task_postrun.connect
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is None or not settings.METRICS_ENABLED:
+        return
+    from app.utils.instrumentation import CELERY_TASK_SECONDS
+
+    phase = getattr(task, "order_phase", "other")
+    CELERY_TASK_SECONDS.observe(time.perf_counter() - started, task.name, phase, state or "UNKNOWN")
+
+
+@signals.worker_process_init.connect
+def _init_worker_metrics(**kwargs):
+    if not settings.METRICS_ENABLED:
+        return
+    from app.utils.instrumentation import instrument_engine
+    from config.database import engine
+
+    instrument_engine(engine)
+    if settings.METRICS_WORKER_PORT:
+        from billiard.process import current_process
+        from app.utils.metrics import start_http_exporter
+
+        port = settings.METRICS_WORKER_PORT + getattr(current_process(), "index", 0)
+        try:
+            start_http_exporter(port)
+        except OSError as exc:
+            logger.warning("Metrics exporter on port %s not started: %s", port, exc)
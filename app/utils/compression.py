@@ -0,0 +1,102 @@
+"""
+Zstandard Compression
+
+Codec used by the compressed column types (app.models.types).
+
+Values are standard zstd frames, so rows written with and without a
+dictionary can be mixed: frames carry the id of the dictionary they were
+compressed with, and frames without one decode with any codec. Values
+shorter than COMPRESSION_MIN_SIZE are stored as plain UTF-8 (a frame
+would not be smaller), which is also how uncompressed legacy rows read.
+"""
+
+import threading
+from typing import Iterable, Optional
+
+import zstandard
+
+from config.settings import settings
+
+
+class ZstdCodec:
+    """
+    zstd compressor/decompressor with an optional shared dictionary.
+
+    A trained dictionary pays off for small, similar values (CEIDG payloads);
+    large plan documents compress well on their own. zstd contexts are not
+    thread-safe, so each thread gets its own.
+    """
+
+    def __init__(self, level: int = 9, dictionary: Optional[bytes] = None):
+        self.level = level
+        self.dictionary = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        self.dictionary_id = self.dictionary.dict_id() if self.dictionary else 0
+        self._local = threading.local()
+
+    def _contexts(self) -> tuple[zstandard.ZstdCompressor, zstandard.ZstdDecompressor]:
+        contexts = getattr(self._local, "contexts", None)
+        if contexts is None:
+            contexts = (
+                zstandard.ZstdCompressor(level=self.level, dict_data=self.dictionary),
+                zstandard.ZstdDecompressor(dict_data=self.dictionary),
+            )
+            self._local.contexts = contexts
+        return contexts
+
+    def compress(self, data: bytes) -> bytes:
+        return self._contexts()[0].compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        frame_dictionary = zstandard.get_frame_parameters(data).dict_id
+        if frame_dictionary and frame_dictionary != self.dictionary_id:
+            raise ValueError(
+                f"Value was compressed with zstd dictionary {frame_dictionary}, "
+                f"configured dictionary is {self.dictionary_id or 'none'}"
+            )
+        return self._contexts()[1].decompress(data)
+
+
+# First bytes of every zstd frame. UTF-8 text never starts with them (0xB5
+# is a continuation byte and cannot follow "("), so plain values are told
+# apart from frames without a marker of their own.
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def pack(data: bytes) -> bytes:
+    """Compress UTF-8 `data`, unless shorter than COMPRESSION_MIN_SIZE (kept as is)"""
+    if len(data) < settings.COMPRESSION_MIN_SIZE:
+        return data
+    return get_codec().compress(data)
+
+
+def unpack(data: bytes) -> bytes:
+    """Inverse of pack(): zstd frames are decompressed, plain UTF-8 returned unchanged"""
+    if data[:4] == ZSTD_MAGIC:
+        return get_codec().decompress(data)
+    return data
+
+
+def train_dictionary(samples: Iterable[bytes], size: int = 64 * 1024) -> bytes:
+    """Train a zstd dictionary from sample values (save to COMPRESSION_DICTIONARY_PATH)"""
+    return zstandard.train_dictionary(size, list(samples)).as_bytes()
+
+
+_codec: Optional[ZstdCodec] = None
+
+
+def get_codec() -> ZstdCodec:
+    """Process-wide codec configured from settings"""
+    global _codec
+    if _codec is None:
+        dictionary = None
+        if settings.COMPRESSION_DICTIONARY_PATH:
+            with open(settings.COMPRESSION_DICTIONARY_PATH, "rb") as f:
+                dictionary = f.read()
+        _codec = ZstdCodec(level=settings.COMPRESSION_LEVEL, dictionary=dictionary)
+    return _codec
+
+
+def set_codec(codec: Optional[ZstdCodec]) -> None:
+    """Override the process-wide codec (None re-reads settings)"""
+    global _codec
+    _codec = codec
@@ -0,0 +1,146 @@
+"""
+Instrumentation
+
+Application metrics (see app.utils.metrics) and the hooks that feed them:
+
+- MetricsMiddleware: request latency per route template and status,
+- instrument_engine(): query timings and connection hold times from
+  SQLAlchemy engine/pool events, pool gauges from config.database.TimedPool,
+- observe_llm_call(): LLM latency and tokens per section,
+- CELERY_TASK_SECONDS: task durations per order phase (app.tasks.worker).
+"""
+
+import time
+import weakref
+from typing import Optional, Union
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.utils.metrics import Counter, Gauge, Histogram
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency (SSE: stream lifetime)", ["method", "route"],
+)
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests", ["method", "route", "status"])
+
+DB_QUERY_SECONDS = Histogram("db_query_duration_seconds", "SQL statement execution time", ["operation"])
+DB_CONNECTION_HELD_SECONDS = Histogram(
+    "db_connection_held_seconds", "Time a pooled connection stays checked out (session/transaction length)",
+)
+
+LLM_CALL_SECONDS = Histogram("llm_call_duration_seconds", "LLM call latency", ["section", "model"])
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens", ["section", "kind"])
+
+CELERY_TASK_SECONDS = Histogram(
+    "celery_task_duration_seconds", "Celery task run time by order phase", ["task", "phase", "state"],
+)
+
+_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing each HTTP request by its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], route)
+            HTTP_REQUESTS.inc(scope["method"], route, str(status))
+
+
+def _operation(statement: str) -> str:
+    head = statement[:32].lstrip().upper()
+    return next((operation for operation in _OPERATIONS if head.startswith(operation)), "OTHER")
+
+
+_instrumented: "weakref.WeakSet" = weakref.WeakSet()
+_pool_engine: Optional[Union[AsyncEngine, Engine]] = None  # Engine whose pool the gauges report
+
+
+def _pool_figures() -> dict:
+    if _pool_engine is None:
+        return {}
+    pool = _pool_engine.pool
+    return {
+        ("checked_out",): pool.checkedout(),
+        ("idle",): pool.checkedin(),
+        ("overflow",): max(pool.overflow(), 0),
+    }
+
+
+def _pool_waits() -> dict:
+    pool = _pool_engine.pool if _pool_engine is not None else None
+    if not hasattr(pool, "wait_seconds_total"):  # Not a config.database.TimedPool
+        return {}
+    return {
+        ("checkouts_total",): pool.checkouts,
+        ("wait_seconds_total",): pool.wait_seconds_total,
+        ("timeouts_total",): pool.timeouts,
+    }
+
+
+Gauge("db_pool_connections", "Connections in the engine pool by state", _pool_figures, ["state"])
+Gauge("db_pool_checkout", "Cumulative pool checkouts, wait time and timeouts", _pool_waits, ["figure"])
+
+
+def instrument_engine(engine: Union[AsyncEngine, Engine], report_pool: bool = True) -> None:
+    """Attach query/connection timing listeners (idempotent); `report_pool`: export its pool gauges"""
+    global _pool_engine
+    if report_pool:
+        _pool_engine = engine
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if sync_engine in _instrumented:
+        return
+    _instrumented.add(sync_engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        DB_QUERY_SECONDS.observe(time.perf_counter() - conn.info["query_started"].pop(), _operation(statement))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    @event.listens_for(sync_engine, "checkout")
+    def checkout(dbapi_connection, record, proxy):
+        record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "checkin")
+    def checkin(dbapi_connection, record):
+        started = record.info.pop("checked_out_at", None)
+        if started is not None:
+            DB_CONNECTION_HELD_SECONDS.observe(time.perf_counter() - started)
+
+
+def observe_llm_call(section: str, response) -> None:
+    """Record one LLMResponse under `section`"""
+    usage = response.usage
+    LLM_CALL_SECONDS.observe(response.duration_seconds, section, response.model)
+    LLM_TOKENS.inc(section, "input", amount=usage.input_tokens)
+    LLM_TOKENS.inc(section, "output", amount=usage.output_tokens)
+    LLM_TOKENS.inc(section, "cache_read", amount=usage.cache_read_tokens)
+    LLM_TOKENS.inc(section, "cache_creation", amount=usage.cache_creation_tokens)
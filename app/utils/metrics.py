@@ -0,0 +1,334 @@
+"""
+Metrics
+
+Small Prometheus-compatible registry (text exposition format 0.0.4).
+
+Counters and histograms keep one shard per thread: recording only touches
+the calling thread's dict, without locks, and shards are summed when the
+registry is rendered. A shard is only written by its own thread, so the
+only shared state is the list of shards (locked once per thread).
+Gauges are callbacks evaluated at render time.
+
+Every process (web worker, Celery child) has its own registry. Preforked
+web workers share one scrape target through a directory
+(`MultiprocessStore`, set up by app.server): each worker writes its
+counter and histogram totals to <directory>/<pid>.json every
+METRICS_MULTIPROC_INTERVAL seconds, and rendering in any worker adds the
+other workers' files to its own live values. Files of exited workers are
+kept so totals stay monotonic when workers are recycled; a worker that
+dies without a clean shutdown loses at most one interval. Gauges stay
+per process. Celery children are scraped one by one (METRICS_WORKER_PORT).
+"""
+
+import bisect
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers fast queries up to full LLM sections
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, "_Metric"] = {}
+        self._lock = threading.Lock()
+        self.multiprocess: Optional["MultiprocessStore"] = None
+
+    def register(self, metric: "_Metric") -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional["_Metric"]:
+        return self._metrics.get(name)
+
+    def dump(self) -> dict:
+        """Counter and histogram totals of this process, JSON-serializable"""
+        return {
+            metric.name: metric.dump()
+            for metric in list(self._metrics.values())
+            if isinstance(metric, _ShardedMetric)
+        }
+
+    def render(self) -> str:
+        remote = self.multiprocess.read_others() if self.multiprocess is not None else {}
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render(remote.get(metric.name, ())))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def render(self, remote: Iterable = ()) -> list[str]:
+        """Exposition lines; `remote` holds other processes' dump() entries"""
+        raise NotImplementedError
+
+
+class _ShardedMetric(_Metric):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+        self._shards: list[dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _snapshot(self) -> list[dict]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [dict(shard) for shard in shards]
+
+    def values(self) -> dict:
+        raise NotImplementedError
+
+    @staticmethod
+    def _add(totals: dict, labels: tuple, value) -> None:
+        raise NotImplementedError
+
+    def dump(self) -> list:
+        """[[label values as strings], value] entries of this process"""
+        return [[[str(label) for label in labels], value] for labels, value in self.values().items()]
+
+    def collect(self, remote: Iterable = ()) -> dict:
+        """This process's values plus other processes' dumps, keyed by label strings"""
+        totals: dict = {}
+        for labels, value in self.values().items():
+            self._add(totals, tuple(str(label) for label in labels), value)
+        for labels, value in remote:
+            self._add(totals, tuple(labels), value)
+        return totals
+
+
+class Counter(_ShardedMetric):
+    """Monotonic counter: `inc(*labelvalues, amount=1)`"""
+
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> dict[tuple, float]:
+        totals: dict[tuple, float] = {}
+        for shard in self._snapshot():
+            for labels, value in shard.items():
+                self._add(totals, labels, value)
+        return totals
+
+    @staticmethod
+    def _add(totals: dict, labels: tuple, value: float) -> None:
+        totals[labels] = totals.get(labels, 0) + value
+
+    def render(self, remote: Iterable = ()) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.collect(remote).items())
+        ]
+
+
+class Histogram(_ShardedMetric):
+    """Histogram: `observe(value, *labelvalues)`"""
+
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Iterable[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels) -> None:
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            # One slot per bucket, one for +Inf, then the sum
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def values(self) -> dict[tuple, list]:
+        totals: dict[tuple, list] = {}
+        for shard in self._snapshot():
+            for labels, counts in shard.items():
+                self._add(totals, labels, counts)
+        return totals
+
+    @staticmethod
+    def _add(totals: dict, labels: tuple, counts: list) -> None:
+        merged = totals.get(labels)
+        if merged is None:
+            totals[labels] = list(counts)
+        else:
+            for index, value in enumerate(counts):
+                merged[index] += value
+
+    def render(self, remote: Iterable = ()) -> list[str]:
+        lines = []
+        for labels, counts in sorted(self.collect(remote).items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value read at render time: `callback()` returns {labelvalues tuple: value}"""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], dict], labelnames: Iterable[str] = (),
+                 registry: Registry = REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.callback = callback
+
+    def render(self, remote: Iterable = ()) -> list[str]:
+        try:
+            values = self.callback()
+        except Exception:
+            return []
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class MultiprocessStore:
+    """
+    Per-process metric files in a directory shared by preforked workers.
+
+    Create it (and `clear()` it) in the parent before forking; each child
+    calls `start()`, which records its pid and writes its registry's
+    dump() every `interval` seconds from a daemon thread.
+    """
+
+    def __init__(self, directory: str, registry: "Registry", interval: float = 1.0):
+        self.directory = directory
+        self.registry = registry
+        self.interval = interval
+        self.pid: Optional[int] = None
+        self._stopped = threading.Event()
+
+    def clear(self) -> None:
+        """Remove files left by an earlier run"""
+        os.makedirs(self.directory, exist_ok=True)
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                os.unlink(os.path.join(self.directory, name))
+
+    def start(self) -> None:
+        self.pid = os.getpid()
+        self._stopped.clear()
+        own = os.path.join(self.directory, f"{self.pid}.json")
+        if os.path.exists(own):  # An exited worker had this pid; keep its totals
+            os.replace(own, os.path.join(self.directory, f"{self.pid}-{os.urandom(4).hex()}.json"))
+        threading.Thread(target=self._run, name="metrics-multiprocess", daemon=True).start()
+
+    def stop(self) -> None:
+        """Stop the writer thread after a final write"""
+        self._stopped.set()
+        self.write()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                logger.warning("Failed to write metrics to %s", self.directory, exc_info=True)
+
+    def write(self) -> None:
+        if self.pid is None:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{self.pid}-")
+        with os.fdopen(fd, "w") as file:
+            json.dump(self.registry.dump(), file)
+        os.replace(tmp_path, os.path.join(self.directory, f"{self.pid}.json"))
+
+    def read_others(self) -> dict[str, list]:
+        """Dump entries of every other process (exited ones included), by metric name"""
+        merged: dict[str, list] = {}
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return merged
+        for name in names:
+            if not name.endswith(".json") or name == f"{self.pid}.json":
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as file:
+                    dump = json.load(file)
+            except (OSError, ValueError):
+                continue  # Replaced or removed meanwhile
+            for metric_name, entries in dump.items():
+                merged.setdefault(metric_name, []).extend(entries)
+        return merged
+
+
+def start_http_exporter(port: int, registry: Registry = REGISTRY, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve `registry` on http://host:port/metrics from a daemon thread (Celery workers)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name=f"metrics-{port}", daemon=True).start()
+    return server
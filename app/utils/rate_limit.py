@@ -0,0 +1,236 @@
+"""
+Rate Limiting
+
+ASGI middleware enforcing RATE_LIMIT_GENERATION on the (re)generate
+endpoints and RATE_LIMIT_API on the other /api routes.
+
+Limits use a sliding-window counter: the previous fixed window's count is
+weighted by how much of it still overlaps the sliding window, which gives a
+smooth limit with just two counters per client and route group. Counters
+live in-process (single worker) or in Redis via an atomic Lua script
+(multi-worker).
+"""
+
+import json
+import logging
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_UNITS = {
+    "s": 1, "sec": 1, "second": 1, "seconds": 1,
+    "m": 60, "min": 60, "minute": 60, "minutes": 60,
+    "h": 3600, "hour": 3600, "hours": 3600,
+    "d": 86400, "day": 86400, "days": 86400,
+}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """`limit` requests per `period` seconds"""
+    limit: int
+    period: int
+
+    def __str__(self) -> str:
+        return f"{self.limit}/{self.period}s"
+
+
+def parse_rate(spec: str) -> RateLimit:
+    """Parse '10/minute', '100/min', '5/second', '1000/2hours'"""
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d*)\s*([a-zA-Z]+)\s*", spec or "")
+    if not match or match.group(3).lower() not in _UNITS:
+        raise ValueError(f"Invalid rate limit: {spec!r}")
+    count, multiplier, unit = match.groups()
+    return RateLimit(int(count), int(multiplier or 1) * _UNITS[unit.lower()])
+
+
+def _sliding_estimate(previous: int, current: int, elapsed: float, rate: RateLimit) -> tuple[bool, int]:
+    """(allowed, retry_after seconds) for the counts before this request"""
+    weight = 1 - elapsed / rate.period
+    if previous * weight + current < rate.limit:
+        return True, 0
+    if current >= rate.limit or previous == 0:
+        return False, max(1, math.ceil(rate.period - elapsed))
+    # Time until the previous window's weighted share drops enough
+    needed = rate.period * (1 - (rate.limit - current) / previous) - elapsed
+    return False, max(1, math.ceil(needed))
+
+
+class MemoryRateLimiter:
+    """Sliding-window counters in process memory (single worker)"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._windows: dict[str, list] = {}  # key -> [window index, previous, current, period]
+
+    async def hit(self, key: str, rate: RateLimit) -> tuple[bool, int]:
+        now = time.time()
+        window = int(now // rate.period)
+        entry = self._windows.get(key)
+        if entry is None:
+            if len(self._windows) >= self.max_keys:
+                self._prune(now)
+            entry = self._windows[key] = [window, 0, 0, rate.period]
+        elif entry[0] != window:
+            # Roll windows; counts older than one window no longer matter
+            entry[:] = [window, entry[2] if window - entry[0] == 1 else 0, 0, rate.period]
+
+        allowed, retry_after = _sliding_estimate(entry[1], entry[2], now - window * rate.period, rate)
+        if allowed:
+            entry[2] += 1
+        return allowed, retry_after
+
+    def _prune(self, now: float) -> None:
+        """Drop windows idle for over a day (or everything, if still full)"""
+        stale = [key for key, entry in self._windows.items() if now - entry[0] * entry[3] > 86400]
+        for key in stale:
+            del self._windows[key]
+        if len(self._windows) >= self.max_keys:
+            self._windows.clear()
+
+
+# KEYS: counter key prefix (window index is appended from server time)
+# ARGV: limit, period
+# Returns {allowed (0/1), retry_after seconds}
+_SLIDING_WINDOW_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local limit, period = tonumber(ARGV[1]), tonumber(ARGV[2])
+local window = math.floor(now / period)
+local current_key = KEYS[1] .. ':' .. window
+local elapsed = now - window * period
+local current = tonumber(redis.call('GET', current_key) or '0')
+local previous = tonumber(redis.call('GET', KEYS[1] .. ':' .. (window - 1)) or '0')
+local weight = 1 - elapsed / period
+if previous * weight + current < limit then
+  redis.call('INCR', current_key)
+  redis.call('EXPIRE', current_key, period * 2)
+  return {1, 0}
+end
+if current >= limit or previous == 0 then
+  return {0, math.max(1, math.ceil(period - elapsed))}
+end
+return {0, math.max(1, math.ceil(period * (1 - (limit - current) / previous) - elapsed))}
+"""
+
+
+class RedisRateLimiter:
+    """Sliding-window counters in Redis, shared by all workers"""
+
+    def __init__(self, redis, prefix: str = "ratelimit"):
+        self.redis = redis
+        self.prefix = prefix
+        self._script = redis.register_script(_SLIDING_WINDOW_SCRIPT)
+
+    async def hit(self, key: str, rate: RateLimit) -> tuple[bool, int]:
+        allowed, retry_after = await self._script(
+            keys=[f"{self.prefix}:{key}:{rate.period}"],
+            args=[rate.limit, rate.period],
+        )
+        return bool(int(allowed)), int(retry_after)
+
+
+@dataclass(frozen=True)
+class RouteGroup:
+    """Requests matching `match(method, path)` share one limit per client"""
+    name: str
+    rate: RateLimit
+    match: Callable[[str, str], bool]
+
+
+# Manual (re)generation, e.g. POST /api/orders/{id}/regenerate. Orders from
+# the Podio webhook are not limited here: it has its own backpressure and
+# must not get 429s.
+_GENERATION_PATH = re.compile(r"^/api/orders/[^/]+/(generate|regenerate)/?$")
+
+
+def default_route_groups() -> list[RouteGroup]:
+    """(Re)generate endpoints get RATE_LIMIT_GENERATION, other /api routes RATE_LIMIT_API"""
+    return [
+        RouteGroup(
+            "generation",
+            parse_rate(settings.RATE_LIMIT_GENERATION),
+            lambda method, path: method == "POST" and bool(_GENERATION_PATH.match(path)),
+        ),
+        RouteGroup(
+            "api",
+            parse_rate(settings.RATE_LIMIT_API),
+            lambda method, path: path.startswith("/api/"),
+        ),
+    ]
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware (no per-request Request/Response objects).
+
+    The first matching route group applies; unmatched paths (health checks,
+    docs, static files) are never counted. If Redis is unavailable the
+    request is let through rather than failing the API.
+    """
+
+    def __init__(
+        self,
+        app,
+        limiter=None,
+        groups: Optional[list[RouteGroup]] = None,
+        trust_forwarded: bool = settings.RATE_LIMIT_TRUST_FORWARDED,
+    ):
+        self.app = app
+        self.limiter = limiter or MemoryRateLimiter()
+        self.groups = groups if groups is not None else default_route_groups()
+        self.trust_forwarded = trust_forwarded
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method, path = scope["method"], scope["path"]
+        group = next((group for group in self.groups if group.match(method, path)), None)
+        if group is None:
+            return await self.app(scope, receive, send)
+
+        key = f"{group.name}:{self._client_id(scope)}"
+        try:
+            allowed, retry_after = await self.limiter.hit(key, group.rate)
+        except Exception:
+            logger.warning("Rate limiter unavailable, allowing request", exc_info=True)
+            allowed, retry_after = True, 0
+
+        if allowed:
+            return await self.app(scope, receive, send)
+
+        body = json.dumps({"detail": "Rate limit exceeded", "retry_after": retry_after}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+                (b"x-ratelimit-limit", str(group.rate.limit).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    def _client_id(self, scope) -> str:
+        if self.trust_forwarded:
+            for name, value in scope.get("headers", ()):
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+
+def build_rate_limiter():
+    """Limiter backend selected by settings.RATE_LIMIT_BACKEND"""
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        from app.utils.redis import get_redis
+        return RedisRateLimiter(get_redis())
+    return MemoryRateLimiter()
@@ -0,0 +1,87 @@
+"""
+Redis Client
+
+Shared async Redis connection pool for caches and rate limits.
+
+`redis.asyncio` connections belong to the event loop they were opened on,
+and one process can run several loops (the web server's, plus the
+per-thread loops of `run_async` in Celery tasks and `asyncio.to_thread`
+callers). The shared client therefore keeps one pooled client per loop.
+"""
+
+import asyncio
+from typing import Callable, Optional
+
+from config.settings import settings
+
+
+class LoopBoundRedis:
+    """
+    Redis client facade that forwards to a client of the running loop.
+
+    Attribute access (commands, pipeline(), register_script scripts) goes
+    to the current loop's client, created by `factory` on first use there.
+    Outside a running loop, a loop-less client serves non-I/O calls such as
+    script registration.
+    """
+
+    def __init__(self, factory: Callable[[], object]):
+        self._factory = factory
+        self._clients: dict[Optional[asyncio.AbstractEventLoop], object] = {}
+
+    def client(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        client = self._clients.get(loop)
+        if client is None:
+            # Loops are long-lived; forget clients of loops that are gone
+            for closed in [other for other in self._clients if other is not None and other.is_closed()]:
+                del self._clients[closed]
+            client = self._clients[loop] = self._factory()
+        return client
+
+    def register_script(self, script):
+        from redis.commands.core import AsyncScript
+        return AsyncScript(self, script)
+
+    def __getattr__(self, name):
+        return getattr(self.client(), name)
+
+    async def aclose(self) -> None:
+        """Close the running loop's client (the others close with their loops)"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_client = None
+
+
+def get_redis(url: Optional[str] = None):
+    """
+    Process-wide Redis client (lazy, pooled per event loop).
+
+    Imported lazily so modules that only need the in-process fallbacks
+    do not pull in the redis package.
+    """
+    global _client
+    if _client is None:
+        import redis.asyncio as aioredis
+        url = url or settings.REDIS_URL
+        _client = LoopBoundRedis(lambda: aioredis.from_url(url, decode_responses=True))
+    return _client
+
+
+def set_redis(client) -> None:
+    """Override the shared client (e.g. fakeredis in tests)"""
+    global _client
+    _client = client
+
+
+async def close_redis() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,30 @@
+"""
+JSON Responses
+
+orjson encoding for API responses.
+
+FastJSONResponse is the app's default response class. Routes with large
+payloads return model_response(): FastAPI would otherwise validate the
+returned model again against response_model and run jsonable_encoder over
+it before encoding, which costs ~10x more than model_dump() + orjson for
+an order with its plan and logs (see benchmarks/order_detail.py).
+response_model still documents those routes.
+"""
+
+from typing import Any, Optional
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson with UTC datetimes as "Z", like Pydantic's own JSON"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+def model_response(model: BaseModel, status_code: int = 200, headers: Optional[dict] = None) -> FastJSONResponse:
+    """Response for an already-built response model, without FastAPI's re-validation"""
+    return FastJSONResponse(model.model_dump(), status_code=status_code, headers=headers)
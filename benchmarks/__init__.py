@@ -0,0 +1,32 @@
+"""
+Benchmarks
+
+Standalone performance scripts, run as modules:
+
+    python -m benchmarks.process_log_sink
+
+They default to a throwaway SQLite database (aiosqlite) and the in-process
+progress broker, so no external services or real API keys are needed.
+Set DATABASE_URL to benchmark against a local PostgreSQL instead.
+
+benchmarks.load_test drives the whole app over HTTP against fake upstream
+services and fails on regressions against benchmarks/baselines.
+"""
+
+import os
+
+# Credentials enable the integrations (e.g. the Podio webhook route);
+# benchmarks never call the real services.
+_BENCHMARK_ENV = {
+    "DATABASE_URL": "sqlite+aiosqlite:///./benchmark.sqlite",
+    "CEIDG_API_KEY": "benchmark",
+    "PODIO_APP_ID": "benchmark",
+    "PODIO_APP_TOKEN": "benchmark",
+    "PODIO_WORKSPACE_ID": "benchmark",
+    "ANTHROPIC_API_KEY": "benchmark",
+    "PERPLEXITY_API_KEY": "benchmark",
+    "PROGRESS_BROKER": "memory",
+}
+
+for _key, _value in _BENCHMARK_ENV.items():
+    os.environ.setdefault(_key, _value)
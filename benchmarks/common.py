@@ -0,0 +1,51 @@
+"""
+Shared benchmark helpers
+"""
+
+import time
+from contextlib import contextmanager
+
+import app.models  # noqa: F401  (register models with Base)
+from config.database import Base, engine
+
+
+async def reset_database() -> None:
+    """Drop and recreate all tables on the configured database"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def create_orders(count: int, prefix: str = "bench") -> list[int]:
+    """Insert minimal orders and return their ids (`prefix` keeps podio_item_id unique across calls)"""
+    from sqlalchemy import insert
+    from app.models import Order
+
+    async with engine.begin() as conn:
+        result = await conn.execute(
+            insert(Order).returning(Order.id, sort_by_parameter_order=True),
+            [
+                {"podio_item_id": f"{prefix}-{i}", "nip": f"{i:010d}", "imie_nazwisko": "Jan Kowalski"}
+                for i in range(count)
+            ],
+        )
+        return list(result.scalars())
+
+
+@contextmanager
+def timer():
+    """Yields a dict whose 'seconds' key is filled on exit"""
+    elapsed = {"seconds": 0.0}
+    start = time.perf_counter()
+    try:
+        yield elapsed
+    finally:
+        elapsed["seconds"] = time.perf_counter() - start
+
+
+def report(title: str, rows: list[tuple]) -> None:
+    """Print an aligned results table"""
+    print(f"\n{title}")
+    width = max(len(str(row[0])) for row in rows)
+    for row in rows:
+        print(f"  {str(row[0]).ljust(width)}  " + "  ".join(str(col) for col in row[1:]))
@@ -0,0 +1,68 @@
+"""
+Compressed column storage size and encode/decode throughput.
+
+Plan documents are ~27-page Polish Markdown; CEIDG payloads are small JSON
+documents, where a trained dictionary matters most. The synthetic plans
+reuse a small set of sentences, so their ratios are optimistic; expect
+roughly 3-4x on real plan text.
+
+    python -m benchmarks.compression --documents 50
+"""
+
+import argparse
+import json
+
+from benchmarks.common import report, timer
+from benchmarks.fakes import fake_ceidg_firm, fake_plan_markdown
+from app.utils.compression import ZstdCodec, train_dictionary
+
+
+def measure(codec: ZstdCodec, values: list[bytes], rounds: int = 3) -> tuple[float, float, float]:
+    """(compression ratio, compress MB/s, decompress MB/s)"""
+    raw = sum(len(v) for v in values)
+    compressed = [codec.compress(v) for v in values]
+    with timer() as encode:
+        for _ in range(rounds):
+            for value in values:
+                codec.compress(value)
+    with timer() as decode:
+        for _ in range(rounds):
+            for value in compressed:
+                codec.decompress(value)
+    megabytes = raw * rounds / 1e6
+    return raw / sum(len(c) for c in compressed), megabytes / encode["seconds"], megabytes / decode["seconds"]
+
+
+def main(documents: int) -> None:
+    plans = [fake_plan_markdown(seed).encode("utf-8") for seed in range(documents)]
+    firms = [
+        json.dumps(fake_ceidg_firm(f"{i:010d}"), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        for i in range(documents * 20)
+    ]
+    # Train on a disjoint sample, as a deployment would train on older rows
+    dictionary = train_dictionary(
+        [json.dumps(fake_ceidg_firm(f"9{i:09d}"), ensure_ascii=False).encode("utf-8") for i in range(2000)]
+        + [fake_plan_markdown(10_000 + seed, pages=3).encode("utf-8") for seed in range(50)]
+    )
+
+    rows = []
+    for label, values in (("plan", plans), ("ceidg", firms)):
+        raw = sum(len(v) for v in values) // len(values)
+        rows.append((f"{label} raw", f"{raw:>9,} B/row", "", ""))
+        for level in (3, 9, 19):
+            for name, codec in (("", ZstdCodec(level)), (" +dict", ZstdCodec(level, dictionary))):
+                ratio, encode, decode = measure(codec, values, rounds=1 if level == 19 else 3)
+                rows.append((
+                    f"{label} zstd-{level}{name}",
+                    f"{raw / ratio:>9,.0f} B/row ({ratio:4.1f}x)",
+                    f"enc {encode:7.1f} MB/s",
+                    f"dec {decode:7.1f} MB/s",
+                ))
+    report(f"zstd column compression ({documents} plans, {len(firms)} CEIDG payloads)", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=50)
+    args = parser.parse_args()
+    main(args.documents)
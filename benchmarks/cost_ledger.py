@@ -0,0 +1,110 @@
+"""
+Budget check and cost dashboard: parsing plan logs vs reading rollups.
+
+"before" sums generator/reviewer logs of the plans in range (the previous
+way), "after" reads llm_cost_rollups. Plans are spread over the last
+--days days; the ledger is written call by call with record_llm_call.
+
+    python -m benchmarks.cost_ledger --plans 1000
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select
+
+from benchmarks.common import create_orders, report, reset_database, timer
+from benchmarks.fakes import fake_generator_logs
+from app.models import Biznesplan
+from app.services.costs import cost_day, cost_summary, is_over_daily_budget, record_llm_call
+from app.services.llm import LLMResponse, TokenUsage
+from config.database import AsyncSessionLocal, engine
+from config.settings import settings
+
+REPEAT = 50
+
+
+async def seed(plans: int, days: int) -> None:
+    await reset_database()
+    order_ids = await create_orders(plans)
+    now = datetime.now(timezone.utc)
+    logs = fake_generator_logs()
+    started = [now - timedelta(days=i % days) for i in range(plans)]
+    async with engine.begin() as conn:
+        await conn.execute(insert(Biznesplan), [
+            {"order_id": order_id, "status": "approved", "generator_logs": logs, "reviewer_logs": logs,
+             "generation_started_at": started[i]}
+            for i, order_id in enumerate(order_ids)
+        ])
+
+    logging.getLogger("app.services.costs").setLevel(logging.ERROR)  # Every seeded day crosses the alert
+    async with AsyncSessionLocal() as session:
+        for i, order_id in enumerate(order_ids):
+            for section in logs["sections"]:
+                response = LLMResponse(
+                    text="",
+                    usage=TokenUsage(section["input_tokens"], section["output_tokens"]),
+                    duration_seconds=section["duration_seconds"],
+                    model=settings.LLM_MODEL,
+                )
+                await record_llm_call(session, response, section["name"], order_id=order_id, day=cost_day(started[i]))
+            if i % 100 == 99:
+                await session.commit()
+        await session.commit()
+
+
+async def logs_since(since: datetime) -> dict:
+    """Previous approach: load the logs of every plan in range and fold them"""
+    totals = {"total": 0.0, "by_section": {}}
+    async with AsyncSessionLocal() as session:
+        rows = await session.execute(
+            select(Biznesplan.generator_logs, Biznesplan.reviewer_logs)
+            .where(Biznesplan.generation_started_at >= since)
+        )
+        for generator_logs, reviewer_logs in rows:
+            for logs in (generator_logs, reviewer_logs):
+                totals["total"] += (logs or {}).get("total_cost_usd", 0.0)
+            for section in (generator_logs or {}).get("sections", []):
+                by_section = totals["by_section"]
+                by_section[section["name"]] = by_section.get(section["name"], 0.0) + section["cost_usd"]
+    return totals
+
+
+async def rollup_check() -> bool:
+    async with AsyncSessionLocal() as session:
+        return await is_over_daily_budget(session, settings.COST_ALERT_DAILY)
+
+
+async def rollup_dashboard(days: int) -> dict:
+    async with AsyncSessionLocal() as session:
+        return await cost_summary(session, days)
+
+
+async def measure(call) -> float:
+    with timer() as elapsed:
+        for _ in range(REPEAT):
+            await call()
+    return elapsed["seconds"] / REPEAT * 1000
+
+
+async def main(plans: int, days: int) -> None:
+    await seed(plans, days)
+    midnight = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    window = midnight - timedelta(days=days)
+    rows = [
+        ("over budget today? before", f"{await measure(lambda: logs_since(midnight)):8.2f} ms"),
+        ("over budget today? after", f"{await measure(rollup_check):8.2f} ms"),
+        (f"dashboard ({days} days) before", f"{await measure(lambda: logs_since(window)):8.2f} ms"),
+        (f"dashboard ({days} days) after", f"{await measure(lambda: rollup_dashboard(days)):8.2f} ms"),
+    ]
+    report(f"Cost ledger ({plans} plans over {days} days, per request)", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plans", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(main(args.plans, args.days))
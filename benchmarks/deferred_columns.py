@@ -0,0 +1,103 @@
+"""
+Order detail/list payload: eager heavy columns vs deferred.
+
+"before" undefers every heavy column (the previous default), "after" uses
+the model defaults. Bytes are the sizes of all attribute values loaded
+into the session.
+
+    python -m benchmarks.deferred_columns --orders 200
+"""
+
+import argparse
+import asyncio
+import json
+
+from sqlalchemy import insert, inspect, select
+from sqlalchemy.orm import selectinload, undefer_group
+
+from benchmarks.common import create_orders, report, reset_database, timer
+from benchmarks.fakes import fake_ceidg_firm, fake_generator_logs, fake_plan_markdown
+from app.models import Biznesplan, CEIDGData, Order
+from config.database import AsyncSessionLocal, engine
+
+EAGER = (undefer_group("content"), undefer_group("logs"))
+
+
+def loaded_bytes(objects) -> int:
+    total = 0
+    for obj in objects:
+        for key, value in inspect(obj).dict.items():
+            if key.startswith("_") or isinstance(value, (list, Order, Biznesplan, CEIDGData)):
+                continue
+            total += len(value.encode()) if isinstance(value, str) else len(json.dumps(value, default=str))
+    return total
+
+
+async def seed(orders: int) -> list[int]:
+    await reset_database()
+    order_ids = await create_orders(orders)
+    document = fake_plan_markdown()
+    logs = fake_generator_logs()
+    async with engine.begin() as conn:
+        await conn.execute(insert(Biznesplan), [
+            {"order_id": order_id, "content_markdown": document, "status": "approved",
+             "generator_logs": logs, "reviewer_logs": logs}
+            for order_id in order_ids
+        ])
+        await conn.execute(insert(CEIDGData), [
+            {"order_id": order_id, "nip": f"{order_id:010d}", "nazwa_firmy": "Firma",
+             "raw_response": fake_ceidg_firm(f"{order_id:010d}")}
+            for order_id in order_ids
+        ])
+    return order_ids
+
+
+async def detail(order_ids: list[int], eager: bool) -> tuple[float, int]:
+    """Order + plan + CEIDG per request"""
+    plan_loader = selectinload(Order.biznesplan)
+    ceidg_loader = selectinload(Order.ceidg_data)
+    if eager:
+        plan_loader = plan_loader.undefer_group("content").undefer_group("logs")
+        ceidg_loader = ceidg_loader.undefer_group("raw")
+    total_bytes = 0
+    with timer() as elapsed:
+        for order_id in order_ids:
+            async with AsyncSessionLocal() as session:
+                order = (await session.execute(
+                    select(Order).where(Order.id == order_id).options(plan_loader, ceidg_loader)
+                )).scalar_one()
+                total_bytes += loaded_bytes([order, order.biznesplan, order.ceidg_data])
+    return elapsed["seconds"] / len(order_ids) * 1000, total_bytes // len(order_ids)
+
+
+async def listing(order_ids: list[int], eager: bool, page: int = 50) -> tuple[float, int]:
+    """Pages of plans (status/progress)"""
+    pages = [order_ids[i:i + page] for i in range(0, len(order_ids), page)]
+    total_bytes = 0
+    with timer() as elapsed:
+        for ids in pages:
+            async with AsyncSessionLocal() as session:
+                query = select(Biznesplan).where(Biznesplan.order_id.in_(ids))
+                if eager:
+                    query = query.options(*EAGER)
+                plans = (await session.execute(query)).scalars().all()
+                total_bytes += loaded_bytes(plans)
+    return elapsed["seconds"] / len(pages) * 1000, total_bytes // len(pages)
+
+
+async def main(orders: int) -> None:
+    order_ids = await seed(orders)
+    rows = []
+    for name, scenario in (("detail", detail), ("list page (50)", listing)):
+        before_ms, before_bytes = await scenario(order_ids, eager=True)
+        after_ms, after_bytes = await scenario(order_ids, eager=False)
+        rows.append((f"{name} before", f"{before_ms:8.2f} ms", f"{before_bytes:>10,} B"))
+        rows.append((f"{name} after", f"{after_ms:8.2f} ms", f"{after_bytes:>10,} B"))
+    report(f"Deferred heavy columns ({orders} orders, per request)", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.orders))
@@ -0,0 +1,147 @@
+"""
+Fake external services over real HTTP, for load tests.
+
+One ASGI app stands in for every upstream API, each under its own prefix,
+so the application's real clients (httpx, the Anthropic SDK) are used
+unchanged:
+
+    /ceidg/firma?nip=...           CEIDG v2
+    /podio/oauth/token, /item/{id} Podio
+    /perplexity/chat/completions   Perplexity
+    /anthropic/v1/messages         Anthropic Messages API
+
+Every response waits a latency drawn from a seeded RNG, so runs with the
+same seed and settings see the same upstream delays.
+"""
+
+import asyncio
+import random
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks.fakes import FakePromptCacheLLM, fake_ceidg_firm, fake_podio_item
+
+_MARKET_ANSWER = "Rynek usług IT w Polsce rośnie w tempie kilku procent rocznie według danych GUS. " * 40
+_SWOT_ANSWER = (
+    '{"strengths": ["Doświadczenie właściciela"], "weaknesses": ["Brak rozpoznawalnej marki"], '
+    '"opportunities": ["Cyfryzacja MŚP"], "threats": ["Presja cenowa freelancerów"]}'
+)
+
+
+@dataclass
+class Latency:
+    """Upstream response time: `seconds` +/- `jitter` (fraction), uniformly"""
+    seconds: float = 0.0
+    jitter: float = 0.2
+
+    def sample(self, rng: random.Random) -> float:
+        if self.seconds <= 0:
+            return 0.0
+        return self.seconds * rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+@dataclass
+class FakeLatencies:
+    ceidg: Latency = field(default_factory=lambda: Latency(0.05))
+    podio: Latency = field(default_factory=lambda: Latency(0.05))
+    perplexity: Latency = field(default_factory=lambda: Latency(0.3))
+    llm: Latency = field(default_factory=lambda: Latency(0.3))
+
+
+def build_fake_services(latencies: FakeLatencies, seed: int = 0, llm_output_chars: int = 6000) -> FastAPI:
+    """ASGI app serving all fakes; `app.state.calls` counts requests per service"""
+    app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+    rng = random.Random(seed)
+    llm = FakePromptCacheLLM(output_chars=llm_output_chars)
+    app.state.calls = Counter()
+
+    async def upstream(service: str) -> None:
+        app.state.calls[service] += 1
+        delay = getattr(latencies, service).sample(rng)
+        if delay:
+            await asyncio.sleep(delay)
+
+    @app.get("/ceidg/firma")
+    async def ceidg_firma(nip: str):
+        await upstream("ceidg")
+        return {"firma": [fake_ceidg_firm(nip)]}
+
+    @app.post("/podio/oauth/token")
+    async def podio_token():
+        return {"access_token": "benchmark", "expires_in": 3600}
+
+    @app.get("/podio/item/{item_id}")
+    async def podio_item(item_id: int):
+        await upstream("podio")
+        return fake_podio_item(item_id)
+
+    @app.post("/perplexity/chat/completions")
+    async def perplexity(request: Request):
+        payload = await request.json()
+        await upstream("perplexity")
+        query = payload["messages"][-1]["content"]
+        content = _SWOT_ANSWER if "SWOT" in query else _MARKET_ANSWER
+        return {
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            "citations": [f"https://example.org/raport-{zlib.crc32(query.encode()) % 50}", "https://stat.gov.pl/"],
+        }
+
+    @app.post("/anthropic/v1/messages")
+    async def anthropic_messages(request: Request):
+        payload = await request.json()
+        await upstream("llm")
+        response = await llm.complete(payload)  # Token accounting with simulated prompt caching
+        usage = response.usage
+        return JSONResponse({
+            "id": f"msg_bench_{app.state.calls['llm']}",
+            "type": "message",
+            "role": "assistant",
+            "model": payload["model"],
+            "content": [{"type": "text", "text": response.text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": usage.input_tokens,
+                "output_tokens": usage.output_tokens,
+                "cache_read_input_tokens": usage.cache_read_tokens,
+                "cache_creation_input_tokens": usage.cache_creation_tokens,
+            },
+        })
+
+    return app
+
+
+class ServedApp:
+    """
+    Serve an ASGI app with uvicorn on 127.0.0.1 (random port) inside the
+    running event loop; `url` is set once it accepts connections.
+    """
+
+    def __init__(self, app, lifespan: str = "off"):
+        import uvicorn
+
+        self._server = uvicorn.Server(uvicorn.Config(
+            app, host="127.0.0.1", port=0, lifespan=lifespan, log_level="warning",
+            timeout_graceful_shutdown=5,
+        ))
+        self._task: Optional[asyncio.Task] = None
+        self.url: Optional[str] = None
+
+    async def __aenter__(self) -> "ServedApp":
+        self._task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            if self._task.done():
+                self._task.result()  # Startup failed: raise its error
+            await asyncio.sleep(0.01)
+        port = self._server.servers[0].sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._server.should_exit = True
+        await self._task
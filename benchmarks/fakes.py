@@ -0,0 +1,176 @@
+"""
+Fake external services for benchmarks
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from typing import Callable, Optional
+
+from app.services.llm import LLMResponse, TokenUsage
+from app.services.reviewer import REVIEW_HEADING
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+class FakePromptCacheLLM:
+    """
+    Stand-in for LLMClient that simulates Anthropic prompt caching.
+
+    Prompt blocks are walked in order (system, then message content). A call
+    reads from the cache the longest prefix, ending at any block boundary,
+    that an earlier call wrote; prefixes ending at a `cache_control` block are
+    written. Output is `output_chars` of filler text (different for every
+    prompt) after `latency` seconds; reviewer requests get the JSON that
+    `review(reviewed text)` returns (by default a passing score).
+    """
+
+    def __init__(
+        self,
+        output_chars: int = 6000,
+        latency: float = 0.0,
+        review: Optional[Callable[[str], dict]] = None,
+    ):
+        self.output_chars = output_chars
+        self.latency = latency
+        self.review = review or (lambda text: {"score": 0.9, "issues": [], "feedback": "Sekcja spełnia kryteria."})
+        self.cached_prefixes: set[str] = set()
+        self.calls = 0
+
+    async def complete(self, request: dict, priority=None) -> LLMResponse:
+        started = time.monotonic()
+        self.calls += 1
+        blocks = list(request.get("system") or [])
+        for message in request["messages"]:
+            content = message["content"]
+            blocks.extend(content if isinstance(content, list) else [{"type": "text", "text": content}])
+
+        digest = hashlib.sha256()
+        boundaries = []  # (prefix hash, tokens up to here, is breakpoint)
+        tokens = 0
+        for block in blocks:
+            digest.update(json.dumps(block["text"], ensure_ascii=False).encode("utf-8"))
+            tokens += estimate_tokens(block["text"])
+            boundaries.append((digest.hexdigest(), tokens, "cache_control" in block))
+
+        last_breakpoint = max((i for i, (_, _, bp) in enumerate(boundaries) if bp), default=-1)
+        read = 0
+        for prefix, prefix_tokens, _ in boundaries[: last_breakpoint + 1]:
+            if prefix in self.cached_prefixes:
+                read = prefix_tokens
+        written_upto = boundaries[last_breakpoint][1] if last_breakpoint >= 0 else 0
+        created = max(0, written_upto - read)
+        for prefix, _, is_breakpoint in boundaries:
+            if is_breakpoint:
+                self.cached_prefixes.add(prefix)
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if blocks[-1]["text"].startswith(REVIEW_HEADING):
+            text = json.dumps(self.review(blocks[-2]["text"]), ensure_ascii=False)
+        else:
+            filler = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * (self.output_chars // 57 + 1)
+            text = f"Wersja {digest.hexdigest()[:12]}. {filler}"[: self.output_chars]
+        usage = TokenUsage(
+            input_tokens=tokens - read - created,
+            output_tokens=estimate_tokens(text),
+            cache_read_tokens=read,
+            cache_creation_tokens=created,
+        )
+        return LLMResponse(text=text, usage=usage, duration_seconds=time.monotonic() - started, model=request["model"])
+
+
+_PLAN_SENTENCES = (
+    "Firma świadczy usługi programistyczne dla klientów z sektora MŚP na terenie województwa {region}.",
+    "Według danych GUS wartość rynku usług IT w Polsce w 2024 r. przekroczyła 60 mld zł [{n}].",
+    "Planowane przychody w pierwszym roku działalności wynoszą {amount} zł, przy marży na poziomie {pct}%.",
+    "Główne ryzyko stanowi sezonowość zamówień, ograniczana przez umowy ramowe z kluczowymi klientami.",
+    "Konkurencję stanowią zarówno software house'y, jak i freelancerzy oferujący usługi na platformach B2B.",
+    "Działania marketingowe obejmują kampanie w wyszukiwarkach, obecność na LinkedIn oraz polecenia.",
+    "Właściciel posiada ponad {years} lat doświadczenia w projektowaniu systemów informatycznych.",
+    "Koszty stałe obejmują księgowość, licencje oprogramowania, sprzęt oraz ubezpieczenie OC.",
+)
+_PLAN_SECTIONS = (
+    "Streszczenie", "Opis działalności", "Analiza rynku", "Analiza konkurencji",
+    "Analiza SWOT", "Plan marketingowy", "Plan finansowy", "Pismo przewodnie",
+)
+
+
+def fake_plan_markdown(seed: int = 0, pages: int = 27) -> str:
+    """Realistic-looking Polish plan Markdown (~500 words per page)"""
+    import random
+
+    rng = random.Random(seed)
+    regions = ("mazowieckiego", "małopolskiego", "śląskiego", "pomorskiego", "wielkopolskiego")
+    lines = [f"# Biznesplan — Firma {seed}\n"]
+    words_per_section = pages * 500 // len(_PLAN_SECTIONS)
+    for number, title in enumerate(_PLAN_SECTIONS, start=1):
+        lines.append(f"## {number}. {title}\n")
+        words = 0
+        while words < words_per_section:
+            paragraph = " ".join(
+                rng.choice(_PLAN_SENTENCES).format(
+                    region=rng.choice(regions), n=rng.randint(1, 12),
+                    amount=f"{rng.randint(80, 400) * 1000:,}".replace(",", " "),
+                    pct=rng.randint(15, 45), years=rng.randint(3, 15),
+                )
+                for _ in range(rng.randint(3, 6))
+            )
+            lines.append(paragraph + "\n")
+            words += len(paragraph.split())
+        lines.append("| Rok | Przychody | Koszty | Zysk |\n|---|---|---|---|")
+        for year in range(2025, 2028):
+            revenue = rng.randint(150, 500) * 1000
+            cost = int(revenue * rng.uniform(0.5, 0.8))
+            lines.append(f"| {year} | {revenue} zł | {cost} zł | {revenue - cost} zł |")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def fake_generator_logs(sections: int = 9) -> dict:
+    return {
+        "api_calls": sections,
+        "total_input_tokens": 50000,
+        "total_output_tokens": 25000,
+        "cached_tokens": 40000,
+        "total_cost_usd": 0.25,
+        "sections": [
+            {"name": f"Sekcja {i}", "input_tokens": 5000, "output_tokens": 2000, "cost_usd": 0.02,
+             "duration_seconds": 15, "prompt_preview": "x" * 2000}
+            for i in range(sections)
+        ],
+    }
+
+
+def fake_ceidg_firm(nip: str) -> dict:
+    """CEIDG v2 `firma` object"""
+    return {
+        "id": nip, "nazwa": f"Firma {nip}", "status": "AKTYWNY", "dataRozpoczecia": "2020-01-01",
+        "wlasciciel": {"imie": "Jan", "nazwisko": "Kowalski", "nip": nip, "regon": "123456789"},
+        "adresDzialalnosci": {"ulica": "ul. Prosta", "budynek": "1", "lokal": "2", "miasto": "Warszawa",
+                              "kod": "00-001", "gmina": "Warszawa", "powiat": "Warszawa",
+                              "wojewodztwo": "MAZOWIECKIE", "kraj": "PL"},
+        "pkdGlowny": {"kod": "6201Z", "nazwa": "Działalność związana z oprogramowaniem"},
+        "pkd": [{"kod": code, "nazwa": f"PKD {code}"} for code in ("6201Z", "6202Z", "6209Z", "6311Z", "7022Z")],
+        "spolki": [], "obywatelstwa": [{"symbol": "PL", "kraj": "Polska"}],
+        "link": f"https://dane.biznes.gov.pl/api/ceidg/v2/firma/{nip}",
+    }
+
+
+def fake_podio_item(item_id: int) -> dict:
+    """Podio order item as returned by GET /item/{item_id}"""
+    return {
+        "item_id": item_id,
+        "app": {"app_id": 1001, "space_id": 2002},
+        "fields": [
+            {"external_id": "nip", "values": [{"value": f"{item_id % 10**10:010d}"}]},
+            {"external_id": "imie-i-nazwisko", "values": [{"value": f"Klient {item_id}"}]},
+            {"external_id": "email", "values": [{"type": "work", "value": f"k{item_id}@example.com"}]},
+            {"external_id": "uslugi", "values": [{"value": {"text": "Programowanie"}}]},
+            {"external_id": "planowany-dochod-roczny", "values": [{"value": "250000.0000"}]},
+        ],
+    }
@@ -0,0 +1,115 @@
+"""
+Incremental review: reviewer tokens and review time per plan with reviews
+cached by section (and upstream) hash, against re-reviewing every section
+each iteration.
+
+Each plan is generated once against a fake LLM; both modes then run the
+same review/refine loop from those sections. The fake reviewer scores by a
+hash of the text it is shown (`--flag-percent` of section versions fail
+with a major issue), so both modes revise the same sections and must end
+with the same score; exits with status 1 if they don't.
+
+    python -m benchmarks.incremental_review --plans 5 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import zlib
+
+from benchmarks.common import report
+from benchmarks.fakes import FakePromptCacheLLM
+from benchmarks.prompt_cache import sample_order
+from app.services.generator import DOCUMENT_ORDER
+from app.services.prompts import PromptBuilder
+from app.services.reviewer import Reviewer, review_and_refine, revision_instructions
+from app.services.section_scheduler import SectionResult, SectionScheduler
+
+
+def scripted_review(flag_percent: int):
+    def review(text: str) -> dict:
+        if not text.startswith("# Skrót") and zlib.crc32(text.encode("utf-8")) % 100 < flag_percent:
+            return {"score": 0.6, "issues": [{"issue": "Brak źródeł dla danych rynkowych", "severity": "major"}],
+                    "feedback": "Sekcja wymaga uzupełnienia źródeł."}
+        return {"score": 0.92, "issues": [], "feedback": "Sekcja spełnia kryteria."}
+    return review
+
+
+async def run_mode(incremental: bool, builder: PromptBuilder, scheduler: SectionScheduler,
+                   generated: dict[str, SectionResult], args) -> dict:
+    llm = FakePromptCacheLLM(output_chars=args.output_chars, latency=args.latency,
+                             review=scripted_review(args.flag_percent))
+    specs = {section.key: section for section in scheduler.sections}
+
+    async def revise(result: SectionResult, issues: list[dict], current: dict[str, SectionResult]) -> SectionResult:
+        section = specs[result.key]
+        latest = {**generated, **current}
+        upstream = {key: latest[key] for key in scheduler.upstream[section.key]}
+        started = time.monotonic()
+        response = await llm.complete(builder.section_request(section, upstream, revision_instructions(result, issues)))
+        return SectionResult(section.key, section.title, response.text, started, time.monotonic())
+
+    reviewer = Reviewer(llm, builder, incremental=incremental, upstream=scheduler.upstream)
+    _, outcome, refinements = await review_and_refine(
+        reviewer, {key: generated[key] for key in DOCUMENT_ORDER}, revise, max_iterations=args.iterations,
+    )
+    logs = outcome.logs
+    return {
+        "score": outcome.overall_score,
+        "refinements": refinements,
+        "calls": logs["api_calls"],
+        "tokens": sum(review["input_tokens"] + review["output_tokens"] for review in logs["reviews"]),
+        "cost": logs["total_cost_usd"],
+        "seconds": sum(review["duration_seconds"] for review in logs["reviews"]),
+        "saved": logs.get("tokens_saved", 0),
+        "rereview_calls": sum(review["sections_reviewed"] + review["consistency_checked"] for review in logs["reviews"][1:]),
+        "rereview_tokens": sum(review["input_tokens"] + review["output_tokens"] for review in logs["reviews"][1:]),
+    }
+
+
+async def main(args) -> int:
+    totals = {True: {}, False: {}}
+    for index in range(1, args.plans + 1):
+        builder = PromptBuilder(*sample_order(index))
+        scheduler = SectionScheduler()
+        generator = FakePromptCacheLLM(output_chars=args.output_chars)
+
+        async def generate(section, upstream):
+            return (await generator.complete(builder.section_request(section, upstream))).text
+
+        generated = await scheduler.run(generate)
+        results = {mode: await run_mode(mode, builder, scheduler, generated, args) for mode in (False, True)}
+        if results[True]["score"] != results[False]["score"]:
+            print(f"FAIL: plan {index} scored {results[True]['score']} incrementally, {results[False]['score']} in full")
+            return 1
+        for mode, result in results.items():
+            for key, value in result.items():
+                totals[mode][key] = totals[mode].get(key, 0) + value
+
+    rows = []
+    for mode, name in ((False, "full re-review"), (True, "incremental")):
+        total = totals[mode]
+        rows.append((name, f"{total['refinements']} refinements", f"{total['calls']:4d} calls",
+                     f"{total['tokens']:9,d} tokens", f"${total['cost']:.4f}", f"review time {total['seconds']:6.1f} s",
+                     f"logged as saved {total['saved']:,d}"))
+    full, incremental = totals[False], totals[True]
+    rows.append(("saving", "", f"{1 - incremental['calls'] / full['calls']:4.0%}",
+                 f"{1 - incremental['tokens'] / full['tokens']:9.0%}", f"{1 - incremental['cost'] / full['cost']:7.0%}",
+                 f"{1 - incremental['seconds'] / max(full['seconds'], 1e-9):18.0%}"))
+    rows.append(("re-review passes only", "", f"{incremental['rereview_calls']:4d} vs {full['rereview_calls']} calls",
+                 f"{incremental['rereview_tokens']:,d} vs {full['rereview_tokens']:,d} tokens",
+                 f"({1 - incremental['rereview_tokens'] / max(full['rereview_tokens'], 1):.0%} fewer)"))
+    report(f"Review phase over {args.plans} plans ({args.flag_percent}% of section versions flagged, "
+           f"{args.latency}s per call)", rows)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, default=5)
+    parser.add_argument("--flag-percent", type=int, default=30, help="Share of section versions the reviewer fails")
+    parser.add_argument("--iterations", type=int, default=3, help="Max refinement iterations")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per fake LLM call")
+    parser.add_argument("--output-chars", type=int, default=6000, help="Generated characters per section")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,473 @@
+"""
+Load test: the web app and pipeline against fake upstream services.
+
+The app is served by uvicorn (real HTTP, real SSE) next to fake CEIDG,
+Podio, Perplexity and Anthropic servers (benchmarks.fake_services) with
+configurable latency. Scenarios, in order:
+
+- ingest:      Podio item.create webhooks, half of them duplicates, until
+               every distinct item is an order
+- polling:     clients polling an order's status (GET /api/orders?nip=)
+- pagination:  clients walking the list of completed orders page by page
+- sse:         subscribers on one order's event stream; latency from
+               emitting a process log to receiving it
+- generation:  orders run through CEIDG, market research, plan
+               generation and review concurrently (the Celery task bodies,
+               on this event loop)
+
+Server, fakes and clients share one event loop, so figures compare runs on
+the same machine rather than measure capacity. Latencies are drawn from
+a seeded RNG, so runs with the same arguments replay the same upstream
+delays.
+
+Results go to --output as JSON. With a baseline for the database dialect
+(benchmarks/baselines/load_test.<dialect>.json, written by
+--update-baseline), the run exits 1 when a scenario's p95 latency grows or
+its throughput drops by more than --tolerance:
+
+    python -m benchmarks.load_test
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.load_test --llm-ms 500
+    python -m benchmarks.load_test --scenarios ingest polling --update-baseline
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import httpx
+from sqlalchemy import func, select
+
+from benchmarks.common import create_orders, report, reset_database
+from benchmarks.fake_services import FakeLatencies, Latency, ServedApp, build_fake_services
+from app.models import Order, OrderStatus
+from config.database import AsyncSessionLocal, engine
+from config.settings import settings
+
+SCENARIOS = ("ingest", "polling", "pagination", "sse", "generation")
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+
+class Recorder:
+    """Latencies (seconds) and errors of one scenario"""
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.errors = 0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def add(self, seconds: float, ok: bool = True) -> None:
+        self.latencies.append(seconds)
+        if not ok:
+            self.errors += 1
+
+    def stop(self) -> None:
+        self.finished = time.perf_counter()
+
+    def summary(self, unit: str = "requests", **extra) -> dict:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        ordered = sorted(self.latencies) or [0.0]
+
+        def percentile(fraction: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 2)
+
+        return {
+            unit: len(self.latencies),
+            "errors": self.errors,
+            "seconds": round(elapsed, 2),
+            "throughput_per_s": round(len(self.latencies) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(statistics.median(ordered) * 1000, 2),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(ordered[-1] * 1000, 2),
+            **extra,
+        }
+
+
+async def timed(recorder: Recorder, request: Awaitable[httpx.Response], expected: tuple = (200,)) -> httpx.Response:
+    started = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError:
+        recorder.add(time.perf_counter() - started, ok=False)
+        raise
+    recorder.add(time.perf_counter() - started, ok=response.status_code in expected)
+    return response
+
+
+async def run_clients(concurrency: int, work: list, handle: Callable[[object], Awaitable[None]]) -> None:
+    """`concurrency` clients draining `work` in order"""
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in work:
+        queue.put_nowait(item)
+
+    async def client() -> None:
+        while not queue.empty():
+            try:
+                await handle(queue.get_nowait())
+            except httpx.HTTPError:
+                pass  # Counted by timed()
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+
+
+async def count_orders() -> int:
+    async with AsyncSessionLocal() as session:
+        return await session.scalar(select(func.count(Order.id)))
+
+
+async def scenario_ingest(client: httpx.AsyncClient, args, rng: random.Random, enqueued: dict) -> dict:
+    item_ids = list(range(1, args.ingest_items + 1))
+    events = item_ids + rng.sample(item_ids, len(item_ids))  # Every item delivered twice
+    rng.shuffle(events)
+    recorder = Recorder()
+
+    async def send(item_id: int) -> None:
+        await timed(recorder, client.post("/webhooks/podio", data={"type": "item.create", "item_id": str(item_id)}))
+
+    await run_clients(args.concurrency, events, send)
+    while await count_orders() < args.ingest_items and not recorder.errors:
+        await asyncio.sleep(0.05)  # Staged items are fetched and written in batches
+    recorder.stop()
+    return recorder.summary(orders=await count_orders(), enqueued=sum(enqueued.values()))
+
+
+async def scenario_polling(client: httpx.AsyncClient, args, rng: random.Random) -> dict:
+    if not await count_orders():  # Run without the ingest scenario
+        await create_orders(args.ingest_items, prefix="poll")
+    async with AsyncSessionLocal() as session:
+        nips = list((await session.scalars(select(Order.nip).order_by(Order.id).limit(1000))).all())
+    recorder = Recorder()
+
+    async def poll(nip: str) -> None:
+        await timed(recorder, client.get("/api/orders", params={"nip": nip, "limit": 1}))
+
+    await run_clients(args.concurrency, [rng.choice(nips) for _ in range(args.poll_requests)], poll)
+    recorder.stop()
+    return recorder.summary()
+
+
+async def seed_completed_orders(count: int) -> None:
+    """
+    Completed orders with distinct, explicit timestamps (one per second,
+    in the past). On SQLite, server-default timestamps have one-second
+    resolution and a different text format than bound parameters, so a
+    keyset cursor inside one second would not advance.
+    """
+    from sqlalchemy import insert
+
+    oldest = datetime.now(timezone.utc) - timedelta(days=30)
+    async with engine.begin() as conn:
+        await conn.execute(insert(Order), [
+            {"podio_item_id": f"list-{i}", "nip": f"{i:010d}", "imie_nazwisko": "Jan Kowalski",
+             "status": OrderStatus.COMPLETED, "created_at": oldest + timedelta(seconds=i)}
+            for i in range(count)
+        ])
+
+
+async def scenario_pagination(client: httpx.AsyncClient, args, rng: random.Random) -> dict:
+    await seed_completed_orders(args.list_orders)
+    recorder = Recorder()
+    pages_per_walk: list[int] = []
+
+    async def walk(_) -> None:
+        cursor, pages = None, 0
+        while True:
+            params = {"status": OrderStatus.COMPLETED.value, "limit": args.page_size}
+            if cursor:
+                params["cursor"] = cursor
+            response = await timed(recorder, client.get("/api/orders", params=params))
+            pages += 1
+            next_cursor = response.json().get("next_cursor")
+            if not next_cursor or next_cursor == cursor or pages > args.list_orders:
+                recorder.errors += bool(next_cursor)  # Cursor stopped advancing
+                break
+            cursor = next_cursor
+        pages_per_walk.append(pages)
+
+    await run_clients(args.concurrency, range(args.list_walkers), walk)
+    recorder.stop()
+    return recorder.summary(orders=args.list_orders, pages_per_walk=max(pages_per_walk, default=0))
+
+
+async def scenario_sse(client: httpx.AsyncClient, args, rng: random.Random) -> dict:
+    from app.services.log_sink import get_log_sink
+    from app.services.progress import get_broker
+
+    order_id = (await create_orders(1, prefix="sse"))[0]
+    recorder = Recorder()
+    connected = asyncio.Event()
+    subscribed = 0
+
+    async def subscriber() -> None:
+        nonlocal subscribed
+        received = 0
+        try:
+            async with client.stream("GET", f"/api/orders/{order_id}/events", timeout=None) as response:
+                subscribed += 1
+                if subscribed == args.sse_subscribers:
+                    connected.set()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = json.loads(line[6:]).get("data") or {}
+                    if "sent_at" in data:
+                        recorder.add(time.perf_counter() - data["sent_at"])
+                        received += 1
+                        if received == args.sse_events:
+                            return
+        except httpx.HTTPError:
+            pass  # Missing deliveries are counted as errors
+
+    subscribers = [asyncio.create_task(subscriber()) for _ in range(args.sse_subscribers)]
+    try:
+        await asyncio.wait_for(connected.wait(), 30)
+        while get_broker().subscriber_count < args.sse_subscribers:
+            await asyncio.sleep(0.01)  # Response headers are sent before the broker subscription
+
+        recorder.started = time.perf_counter()
+        sink = get_log_sink()
+        for index in range(args.sse_events):
+            await sink.emit(order_id, "benchmark", f"Event {index}", data={"sent_at": time.perf_counter()})
+            await asyncio.sleep(1 / args.sse_rate)
+        await asyncio.wait(subscribers, timeout=30)
+    finally:
+        for task in subscribers:
+            task.cancel()
+        await asyncio.gather(*subscribers, return_exceptions=True)
+    recorder.stop()
+    expected = args.sse_subscribers * args.sse_events
+    recorder.errors = expected - len(recorder.latencies)
+    return recorder.summary(unit="deliveries", subscribers=args.sse_subscribers, events=args.sse_events)
+
+
+async def run_pipeline(order_id: int) -> None:
+    """Task bodies of app.tasks.pipeline, in canvas order"""
+    from app.services.research import get_research_service
+    from app.tasks.pipeline import _assemble_research, _fetch_ceidg, _generate_plan
+
+    company = await _fetch_ceidg(order_id)
+    service = get_research_service()
+    answers = await asyncio.gather(*(
+        service.research_query(field, company["pkd"], company["pkd_nazwa"], company["region"])
+        for field in service.queries
+    ))
+    await _assemble_research(list(answers), order_id)
+    await _generate_plan(order_id)
+
+
+async def scenario_generation(client: httpx.AsyncClient, args, rng: random.Random) -> dict:
+    order_ids = await create_orders(args.plans, prefix="plan")
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.plan_concurrency)
+
+    async def generate(order_id: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await run_pipeline(order_id)
+                recorder.add(time.perf_counter() - started)
+            except Exception:
+                logging.getLogger(__name__).exception("Pipeline failed for order %s", order_id)
+                recorder.add(time.perf_counter() - started, ok=False)
+
+    await asyncio.gather(*(generate(order_id) for order_id in order_ids))
+    recorder.stop()
+    summary = recorder.summary(unit="plans")
+    summary["plans_per_minute"] = round(summary["throughput_per_s"] * 60, 2)
+    return summary
+
+
+def use_fake_services(base_url: str) -> dict:
+    """Point the process-wide clients at the fakes; returns enqueue counts per order"""
+    from app.services.cache import TwoTierCache
+    from app.services.ceidg import CEIDGClient, CEIDGService, set_ceidg_service
+    from app.services.llm import LLMClient, set_llm_client
+    from app.services.podio import PodioClient, set_podio_client
+    from app.services.podio_ingest import PodioIngestor, set_podio_ingestor
+    from app.services.research import PerplexityClient, ResearchService, set_research_service
+
+    # Local cache tier only: no Redis needed
+    set_ceidg_service(CEIDGService(
+        CEIDGClient(base_url=f"{base_url}/ceidg"), TwoTierCache("ceidg", ttl=settings.CACHE_TTL_CEIDG),
+    ))
+    set_research_service(ResearchService(
+        PerplexityClient(base_url=f"{base_url}/perplexity"), TwoTierCache("research", ttl=settings.CACHE_TTL_RESEARCH),
+    ))
+    set_llm_client(LLMClient(base_url=f"{base_url}/anthropic", max_retries=0))
+    podio = PodioClient(base_url=f"{base_url}/podio")
+    set_podio_client(podio)
+
+    enqueued: dict[int, int] = {}
+
+    async def enqueue(order_id: int) -> str:
+        enqueued[order_id] = enqueued.get(order_id, 0) + 1
+        return f"benchmark-{order_id}"
+
+    set_podio_ingestor(PodioIngestor(podio=podio, enqueue=enqueue))  # Started by the app lifespan
+    return enqueued
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def workload_arguments(args) -> dict:
+    """Arguments that shape the workload (stored with results and baselines)"""
+    return {
+        key: value for key, value in vars(args).items()
+        if key not in ("output", "baseline", "update_baseline", "tolerance")
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of `results` against `baseline` (same scenarios only)"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"{name}: {current['errors']} errors (baseline {previous.get('errors', 0)})")
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']:.1f} ms > baseline {previous['p95_ms']:.1f} ms")
+        if current["throughput_per_s"] < previous["throughput_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {current['throughput_per_s']:.1f}/s < baseline {previous['throughput_per_s']:.1f}/s"
+            )
+    return regressions
+
+
+async def run(args) -> dict:
+    from app.main import create_app
+
+    logging.basicConfig(level=logging.WARNING)
+    for noisy in ("app", "httpx", "uvicorn.error"):
+        logging.getLogger(noisy).setLevel(logging.ERROR)
+    settings.RATE_LIMIT_ENABLED = False  # Clients would hit the per-IP limits
+
+    await reset_database()
+    rng = random.Random(args.seed)
+    latencies = FakeLatencies(
+        ceidg=Latency(args.ceidg_ms / 1000, args.jitter),
+        podio=Latency(args.podio_ms / 1000, args.jitter),
+        perplexity=Latency(args.perplexity_ms / 1000, args.jitter),
+        llm=Latency(args.llm_ms / 1000, args.jitter),
+    )
+    fakes_app = build_fake_services(latencies, seed=args.seed)
+    results = {}
+    async with ServedApp(fakes_app) as fakes:
+        enqueued = use_fake_services(fakes.url)
+        scenarios = {
+            "ingest": functools.partial(scenario_ingest, enqueued=enqueued),
+            "polling": scenario_polling,
+            "pagination": scenario_pagination,
+            "sse": scenario_sse,
+            "generation": scenario_generation,
+        }
+        async with ServedApp(create_app(), lifespan="on") as server:
+            limits = httpx.Limits(max_connections=max(args.concurrency, args.sse_subscribers) + 10)
+            async with httpx.AsyncClient(base_url=server.url, limits=limits, timeout=60) as client:
+                for name in args.scenarios:
+                    print(f"running {name} ...", file=sys.stderr)
+                    results[name] = await scenarios[name](client, args, rng)
+        results["_upstream_calls"] = dict(fakes_app.state.calls)
+    await engine.dispose()
+    return results
+
+
+def main(args) -> int:
+    results = asyncio.run(run(args))
+    upstream_calls = results.pop("_upstream_calls")
+    dialect = engine.dialect.name
+
+    document = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "database": dialect,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "arguments": workload_arguments(args),
+        "upstream_calls": upstream_calls,
+        "scenarios": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(document, indent=2) + "\n")
+
+    rows = []
+    for name, summary in results.items():
+        count_key = next(iter(summary))
+        rows.append((
+            name, f"{summary[count_key]:6d} {count_key:<11}", f"{summary['throughput_per_s']:9.1f}/s",
+            f"p50 {summary['p50_ms']:8.1f} ms", f"p95 {summary['p95_ms']:8.1f} ms", f"errors {summary['errors']}",
+        ))
+    report(f"Load test ({dialect}, results in {args.output})", rows)
+
+    baseline_path = args.baseline or BASELINE_DIR / f"load_test.{dialect}.json"
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"\nBaseline written to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"\nNo baseline at {baseline_path} (create one with --update-baseline)")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text())
+    changed = sorted(
+        key for key, value in document["arguments"].items()
+        if key != "scenarios" and baseline["arguments"].get(key) != value
+    )
+    if changed:
+        print(f"\nWarning: {', '.join(changed)} differ from the baseline run; figures may not be comparable")
+    regressions = compare(results, baseline["scenarios"], args.tolerance)
+    if regressions:
+        print(f"\nFAIL: regressions against {baseline_path} (tolerance {args.tolerance:.0%}):")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\nOK: within {args.tolerance:.0%} of {baseline_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--concurrency", type=int, default=20, help="HTTP clients for ingest/polling/pagination")
+    parser.add_argument("--ingest-items", type=int, default=1000, help="Distinct Podio items (each sent twice)")
+    parser.add_argument("--poll-requests", type=int, default=2000)
+    parser.add_argument("--list-orders", type=int, default=5000, help="Completed orders walked by pagination")
+    parser.add_argument("--list-walkers", type=int, default=4, help="Full walks of the order list")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--sse-subscribers", type=int, default=200)
+    parser.add_argument("--sse-events", type=int, default=20)
+    parser.add_argument("--sse-rate", type=float, default=20.0, help="Events emitted per second")
+    parser.add_argument("--plans", type=int, default=10)
+    parser.add_argument("--plan-concurrency", type=int, default=10)
+    parser.add_argument("--ceidg-ms", type=float, default=50)
+    parser.add_argument("--podio-ms", type=float, default=50)
+    parser.add_argument("--perplexity-ms", type=float, default=300)
+    parser.add_argument("--llm-ms", type=float, default=300)
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency spread (fraction of the mean)")
+    parser.add_argument("--output", type=Path, default=Path("benchmarks/results/load_test.json"))
+    parser.add_argument("--baseline", type=Path, help="Default: benchmarks/baselines/load_test.<dialect>.json")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p95/throughput regression")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,183 @@
+"""
+Process log retention: rollup correctness, maintenance time and timeline
+reads from summaries against folding raw logs.
+
+Seeds orders whose logs are spread over the last `--months` months (every
+fifth order runs across a month boundary, some across the retention
+cutoff), then:
+
+1. reads every order's timeline from raw logs,
+2. runs maintenance (rollup into process_log_summaries, then partition
+   drop or DELETE of the expired months),
+3. reads the timelines again; they must be identical, no log older than
+   the cutoff may remain, and a second maintenance run must do nothing.
+   Exits with status 1 otherwise.
+
+Timeline latency is compared for the orders whose logs were all rolled up.
+reset_database() creates a plain process_logs table (DELETE path); to
+measure partition drops, point DATABASE_URL at a scratch PostgreSQL
+database upgraded with `alembic upgrade head` and pass --keep-schema
+(its orders are truncated).
+
+    python -m benchmarks.log_retention --orders 500 --logs 40 --months 6
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, select, text
+
+from benchmarks.common import create_orders, report, reset_database, timer
+from app.models import LogLevel, ProcessLog
+from app.services.log_retention import (
+    add_months,
+    create_partition_sql,
+    is_partitioned,
+    maintain_process_logs,
+    month_start,
+    order_timeline,
+    retention_cutoff,
+)
+from config.database import AsyncSessionLocal, engine
+from config.settings import settings
+
+PHASES = ["fetching_ceidg", "research", "generating", "reviewing", "refining", "exporting"]
+
+
+async def prepare(keep_schema: bool) -> None:
+    if keep_schema and engine.dialect.name == "postgresql":
+        async with engine.begin() as conn:
+            await conn.execute(text("TRUNCATE orders CASCADE"))
+    else:
+        await reset_database()
+
+
+def order_logs(order_id: int, started: datetime, count: int) -> list[dict]:
+    """One order's run: phases in sequence, a warning in research, sometimes an error"""
+    rows = []
+    for step in range(count):
+        phase = PHASES[step * len(PHASES) // count]
+        level = LogLevel.INFO
+        if phase == "research" and step % 7 == 0:
+            level = LogLevel.WARNING
+        elif order_id % 11 == 0 and step == count - 1:
+            level = LogLevel.ERROR
+        rows.append({
+            "order_id": order_id, "phase": phase, "message": f"Krok {step} ({phase})", "level": level,
+            "data": {"step": step}, "progress_current": step, "progress_total": count,
+            "created_at": started + timedelta(seconds=30 * step),
+        })
+    return rows
+
+
+async def seed(orders: int, logs: int, months: int, now: datetime) -> list[int]:
+    order_ids = await create_orders(orders, prefix="retention")
+    first_month = add_months(month_start(now), -months)
+    rows = []
+    for index, order_id in enumerate(order_ids):
+        month = add_months(first_month, index % (months + 1))
+        if index % 5 == 0:  # Runs across the end of the month
+            started = add_months(month, 1) - timedelta(seconds=30 * logs // 2)
+        else:
+            started = month + timedelta(days=index % 27, hours=index % 24)
+        rows.extend(order_logs(order_id, min(started, now - timedelta(hours=1)), logs))
+
+    async with AsyncSessionLocal() as session:
+        if await is_partitioned(session):
+            for offset in range(months + 1):
+                await session.execute(text(create_partition_sql(add_months(first_month, offset))))
+            await session.commit()
+    async with engine.begin() as conn:
+        for offset in range(0, len(rows), 5000):
+            await conn.execute(insert(ProcessLog), rows[offset:offset + 5000])
+    return order_ids
+
+
+async def timelines(order_ids: list[int]) -> dict[int, dict]:
+    async with AsyncSessionLocal() as session:
+        result = {}
+        for order_id in order_ids:
+            timeline = await order_timeline(session, order_id)
+            timeline.pop("rolled_up_through")
+            result[order_id] = timeline
+        return result
+
+
+async def timeline_latency(order_ids: list[int], repeat: int) -> list[float]:
+    samples = []
+    async with AsyncSessionLocal() as session:
+        for _ in range(repeat):
+            for order_id in order_ids:
+                started = time.perf_counter()
+                await order_timeline(session, order_id)
+                samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def count_logs(before: datetime = None) -> int:
+    async with AsyncSessionLocal() as session:
+        query = select(func.count()).select_from(ProcessLog)
+        if before is not None:
+            query = query.where(ProcessLog.created_at < before)
+        return await session.scalar(query)
+
+
+async def main(args) -> int:
+    now = datetime.now(timezone.utc)
+    cutoff = retention_cutoff(now)
+    await prepare(args.keep_schema)
+    order_ids = await seed(args.orders, args.logs, args.months, now)
+
+    before = await timelines(order_ids)
+    retired = [order_id for order_id, timeline in before.items() if timeline["last_at"] < cutoff]
+    rows_before, expired_rows = await count_logs(), await count_logs(cutoff)
+    latency_raw = await timeline_latency(retired[:args.sample], args.repeat)
+
+    with timer() as maintenance:
+        stats = await maintain_process_logs(AsyncSessionLocal, now)
+    after = await timelines(order_ids)
+    latency_summary = await timeline_latency(retired[:args.sample], args.repeat)
+    rerun = await maintain_process_logs(AsyncSessionLocal, now)
+
+    failures = []
+    changed = [order_id for order_id in order_ids if before[order_id] != after[order_id]]
+    if changed:
+        failures.append(f"{len(changed)} timelines changed by the rollup (first: order {changed[0]})")
+    if await count_logs(cutoff):
+        failures.append(f"{await count_logs(cutoff)} logs older than {cutoff:%Y-%m} remain")
+    if stats["rows"] != expired_rows:
+        failures.append(f"rolled up {stats['rows']} rows, expected {expired_rows}")
+    if rerun["rows"] or rerun["retired"]:
+        failures.append(f"second run was not a no-op: {rerun}")
+
+    mode = "partitions dropped" if stats["partitioned"] else "rows deleted"
+    report(f"Maintenance ({engine.dialect.name}, {mode}, keep {settings.PROCESS_LOG_RETENTION_MONTHS} months)", [
+        ("process_logs rows", f"{rows_before:,d} -> {await count_logs():,d}"),
+        ("rolled up", f"{stats['rows']:,d} rows of {stats['orders']} orders", f"months {', '.join(stats['retired'])}"),
+        ("duration", f"{maintenance['seconds']:.2f} s", f"{stats['rows'] / max(maintenance['seconds'], 1e-9):,.0f} rows/s"),
+    ])
+    raw, summary = statistics.median(latency_raw), statistics.median(latency_summary)
+    report(f"GET timeline of a fully rolled-up order ({args.logs} logs, {len(latency_raw)} reads)", [
+        ("raw logs", f"p50 {raw * 1000:6.2f} ms"),
+        ("summary", f"p50 {summary * 1000:6.2f} ms", f"({(summary - raw) / raw:+.0%})"),
+    ])
+    if failures:
+        print("\nFAIL: " + "; ".join(failures))
+        return 1
+    print(f"\nOK: {len(order_ids)} timelines identical after rollup")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--logs", type=int, default=40, help="Process logs per order")
+    parser.add_argument("--months", type=int, default=6, help="Months of history before the current one")
+    parser.add_argument("--sample", type=int, default=50, help="Orders timed per latency pass")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep-schema", action="store_true", help="Use the migrated schema (PostgreSQL)")
+    sys.exit(asyncio.run(main(parser.parse_args())))
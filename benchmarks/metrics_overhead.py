@@ -0,0 +1,185 @@
+"""
+Metrics overhead: per-request cost of MetricsMiddleware plus the engine
+hooks, and the cost of one observation.
+
+Requests go through the ASGI app in-process (httpx.ASGITransport); apps
+with and without MetricsMiddleware serve alternating rounds so drift hits
+both equally. The engine hooks cannot be detached from the shared engine,
+so they are timed on two private in-memory SQLite engines (synchronous,
+so thread hand-offs of the async driver don't drown the difference), one
+of them instrumented, running the same checkout + query; the figure for
+a database route adds them once per statement the route issues.
+
+Observations are timed on one thread and on several threads at once;
+the lock-based variant is what a shared dict behind one lock would cost.
+
+    python -m benchmarks.metrics_overhead --requests 2000 --threads 8
+"""
+
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+import httpx
+
+from sqlalchemy import QueuePool, create_engine, text
+
+from benchmarks.common import report, reset_database
+from app.utils.instrumentation import DB_QUERY_SECONDS, instrument_engine
+from app.utils.metrics import Histogram, Registry
+from config.settings import settings
+
+async def time_requests(app, path: str, count: int) -> list[float]:
+    """Per-request seconds for `count` sequential GETs"""
+    samples = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(20):
+            await client.get(path)  # Warm up
+        for _ in range(count):
+            started = time.perf_counter()
+            response = await client.get(path)
+            samples.append(time.perf_counter() - started)
+            response.raise_for_status()
+    return samples
+
+
+async def middleware_overhead(count: int, rounds: int) -> tuple[float, float]:
+    """Median seconds per /health request without and with MetricsMiddleware"""
+    from app.main import create_app
+
+    settings.RATE_LIMIT_ENABLED = False
+    settings.METRICS_ENABLED = False
+    plain = create_app()
+    settings.METRICS_ENABLED = True
+    instrumented = create_app()
+    off, on = [], []
+    for _ in range(rounds):
+        off += await time_requests(plain, "/health", count // rounds)
+        on += await time_requests(instrumented, "/health", count // rounds)
+    return statistics.median(off), statistics.median(on)
+
+
+def time_queries(engine, count: int) -> list[float]:
+    """Per-iteration seconds for `count` connection checkouts running one query"""
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def query_overhead(count: int, rounds: int) -> tuple[float, float]:
+    """Median seconds per checkout + query without and with the engine hooks"""
+    plain = create_engine("sqlite://", poolclass=QueuePool)
+    instrumented = create_engine("sqlite://", poolclass=QueuePool)
+    instrument_engine(instrumented)
+    off, on = [], []
+    try:
+        for _ in range(rounds):
+            off += time_queries(plain, count // rounds)
+            on += time_queries(instrumented, count // rounds)
+    finally:
+        plain.dispose()
+        instrumented.dispose()
+    return statistics.median(off), statistics.median(on)
+
+
+async def statements_per_request(path: str) -> float:
+    """Statements one request to `path` executes (hooks on the shared engine)"""
+    from app.main import create_app
+
+    settings.METRICS_ENABLED = True
+    app = create_app()
+    before = _query_count()
+    await time_requests(app, path, 50)
+    return (_query_count() - before) / 70  # 20 warm-up requests + 50
+
+
+def _query_count() -> int:
+    return sum(sum(counts[:-1]) for counts in DB_QUERY_SECONDS.values().values())
+
+
+async def request_overhead(count: int, rounds: int = 8) -> list[tuple]:
+    await reset_database()
+    health_off, health_on = await middleware_overhead(count, rounds)
+    query_off, query_on = query_overhead(count * 5, rounds)
+    statements = await statements_per_request("/api/costs")
+
+    middleware_us = (health_on - health_off) * 1e6
+    query_us = (query_on - query_off) * 1e6
+    return [
+        ("/health (middleware)", f"{health_off * 1e6:8.1f} us -> {health_on * 1e6:8.1f} us", f"overhead {middleware_us:+6.1f} us"),
+        ("checkout + SELECT 1 (hooks)", f"{query_off * 1e6:8.1f} us -> {query_on * 1e6:8.1f} us", f"overhead {query_us:+6.1f} us"),
+        (f"/api/costs ({statements:.0f} statements)", "", f"overhead {middleware_us + statements * query_us:+6.1f} us (estimated)"),
+    ]
+
+
+class LockedHistogram(Histogram):
+    """Shared dict behind one lock, for comparison"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._shared: dict = {}
+
+    def _shard(self) -> dict:
+        return self._shared
+
+    def observe(self, value: float, *labels) -> None:
+        with self._lock:
+            super().observe(value, *labels)
+
+
+def observe_ns(histogram: Histogram, threads: int, per_thread: int) -> float:
+    """Wall-clock ns per observation with `threads` threads observing at once"""
+    barrier = threading.Barrier(threads + 1)
+    labels = [("GET", f"/route/{index}") for index in range(8)]
+
+    def work():
+        observe = histogram.observe
+        barrier.wait()
+        for index in range(per_thread):
+            observe(0.003, *labels[index & 7])
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - started) * 1e9 / (threads * per_thread)
+
+
+def observation_cost(threads: int, per_thread: int) -> list[tuple]:
+    registry = Registry()
+    rows = []
+    for name, cls in (("per-thread shards", Histogram), ("single lock", LockedHistogram)):
+        histogram = cls(f"bench_{cls.__name__.lower()}", "benchmark", ["method", "route"], registry=registry)
+        single = observe_ns(histogram, 1, per_thread)
+        multi = observe_ns(histogram, threads, per_thread)
+        rows.append((f"observe() {name}", f"{single:6.0f} ns (1 thread)", f"{multi:6.0f} ns ({threads} threads)"))
+
+    started = time.perf_counter()
+    text = registry.render()
+    rows.append(("render()", f"{(time.perf_counter() - started) * 1000:6.2f} ms", f"({len(text.splitlines())} lines)"))
+    return rows
+
+
+def main(requests: int, threads: int, observations: int) -> None:
+    rows = asyncio.run(request_overhead(requests))
+    rows += observation_cost(threads, observations)
+    report("Metrics overhead (median per request)", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests (and queries) per mode")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--observations", type=int, default=200_000, help="Observations per thread")
+    args = parser.parse_args()
+    main(args.requests, args.threads, args.observations)
@@ -0,0 +1,121 @@
+"""
+Order endpoints: JSON encoding of large payloads.
+
+Times GET /api/orders/{id}?profile=full (model_response, orjson) against
+the same payload returned FastAPI's default way (re-validated against
+response_model, jsonable_encoder, json.dumps), in alternating rounds.
+
+SQL statements per endpoint are asserted by tests/test_order_queries.py,
+which seeds orders with this module's `seed()`.
+
+    python -m benchmarks.order_detail --orders 20 --logs 200 --requests 500
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from benchmarks.common import report, reset_database
+from benchmarks.fakes import fake_generator_logs, fake_plan_markdown
+from app.models import Biznesplan, CEIDGData, Order, OrderStatus, ProcessLog, ResearchResult
+from app.schemas import OrderFull
+from app.services.orders import LoaderProfile, get_order, order_loader
+from config.database import AsyncSessionLocal, get_read_db
+from config.settings import settings
+
+
+async def seed(orders: int, logs: int, offset: int = 0) -> list[int]:
+    """Completed orders with CEIDG data, research, a plan and `logs` process logs each"""
+    async with AsyncSessionLocal() as session:
+        created = []
+        for index in range(offset, offset + orders):
+            order = Order(
+                podio_item_id=f"detail-{index}", nip=f"{index:010d}", imie_nazwisko="Jan Kowalski",
+                status=OrderStatus.COMPLETED, uslugi=["Programowanie", "Testy QA"], planowany_dochod_roczny=240000,
+                ceidg_data=CEIDGData(nip=f"{index:010d}", nazwa_firmy=f"Firma {index}", pkd_glowny="62.01.Z",
+                                     pkd_pozostale=[{"kod": "62.02.Z", "nazwa": None}], raw_response={"firma": []}),
+                research_result=ResearchResult(
+                    market_data={"trends": "Rynek rośnie. " * 400}, swot_data={"strengths": ["Doświadczenie"]},
+                    sources=[{"url": f"https://example.org/{i}", "used_for": "trends"} for i in range(12)],
+                    source_count=12,
+                ),
+                biznesplan=Biznesplan(
+                    status="approved", content_markdown=fake_plan_markdown(index), final_quality_score=90,
+                    final_issues=[{"section": "Analiza SWOT", "issue": "Brak źródeł", "severity": "minor"}],
+                    generator_logs=fake_generator_logs(), reviewer_logs=fake_generator_logs(),
+                ),
+                process_logs=[
+                    ProcessLog(phase=f"section_{step}", message=f"Ukończono sekcję {step}",
+                               data={"section_key": f"s{step}", "duration_seconds": 1.5},
+                               progress_current=step, progress_total=logs)
+                    for step in range(logs)
+                ],
+            )
+            session.add(order)
+            created.append(order)
+        await session.commit()
+        return [order.id for order in created]
+
+
+def default_route() -> APIRouter:
+    """The full profile returned FastAPI's default way, for comparison"""
+    router = APIRouter()
+
+    @router.get("/{order_id}", response_model=OrderFull, response_class=JSONResponse)
+    async def default_full(order_id: int, db=Depends(get_read_db)):
+        return OrderFull.model_validate(await get_order(db, order_id, *order_loader(LoaderProfile.FULL)))
+
+    return router
+
+
+async def encoding_latency(client: httpx.AsyncClient, order_ids: list[int], count: int, rounds: int) -> list[tuple]:
+    paths = {"model_response (orjson)": "/api/orders/{}?profile=full", "FastAPI default": "/bench/default/{}"}
+    samples = {name: [] for name in paths}
+    sizes = {}
+    for _ in range(rounds):
+        for name, template in paths.items():
+            for index in range(count // rounds):
+                path = template.format(order_ids[index % len(order_ids)])
+                started = time.perf_counter()
+                response = await client.get(path)
+                samples[name].append(time.perf_counter() - started)
+                response.raise_for_status()
+                sizes[name] = len(response.content)
+
+    baseline = statistics.median(samples["FastAPI default"])
+    rows = []
+    for name, values in samples.items():
+        median = statistics.median(values)
+        rows.append((name, f"p50 {median * 1000:7.2f} ms", f"p95 {sorted(values)[int(len(values) * 0.95)] * 1000:7.2f} ms",
+                     f"{sizes[name] / 1024:6.0f} KiB", f"({(median - baseline) / baseline:+.0%})" if median != baseline else ""))
+    return rows
+
+
+async def main(orders: int, logs: int, requests: int, rounds: int) -> int:
+    from app.main import create_app
+
+    await reset_database()
+    order_ids = await seed(orders, logs)
+    settings.RATE_LIMIT_ENABLED = False
+    app = create_app()
+    app.include_router(default_route(), prefix="/bench/default")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        report(f"GET full order ({requests} requests each)", await encoding_latency(client, order_ids, requests, rounds))
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=20)
+    parser.add_argument("--logs", type=int, default=200, help="Process logs per order")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.orders, args.logs, args.requests, args.rounds)))
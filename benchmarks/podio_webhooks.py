@@ -0,0 +1,139 @@
+"""
+Podio webhook load test: 10k item.create events, half of them duplicates.
+
+Replays the events through the ASGI app concurrently, with Podio mocked
+(httpx.MockTransport) and Celery replaced by a recording enqueue. Checks
+that every distinct item becomes exactly one order and one enqueue.
+
+With --fail-rate, that share of Podio fetches answers 503 and of enqueues
+raises; failed fetches must be retried by the ingestor and failed
+enqueues picked up by requeue_stranded_orders, still exactly once.
+
+    python -m benchmarks.podio_webhooks --items 5000 --concurrency 50 --fail-rate 0.1
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+from collections import Counter
+
+import httpx
+from sqlalchemy import func, select
+
+from benchmarks.common import report, reset_database, timer
+from benchmarks.fakes import fake_podio_item
+from app.models import Order
+from app.services.podio import PodioClient
+from app.services.podio_ingest import PodioIngestor, requeue_stranded_orders, set_podio_ingestor
+
+
+def podio_handler(fail_rate: float, rng: random.Random):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/oauth/token":
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        await asyncio.sleep(0.005)  # Podio API latency
+        if rng.random() < fail_rate:
+            return httpx.Response(503)
+        return httpx.Response(200, json=fake_podio_item(int(request.url.path.rsplit("/", 1)[1])))
+    return handler
+
+
+def build_events(items: int) -> list[int]:
+    """Each item twice; most duplicates arrive close together, like retry bursts"""
+    rng = random.Random(7)
+    item_ids = list(range(1, items + 1))
+    rng.shuffle(item_ids)
+    keyed = []
+    for position, item_id in enumerate(item_ids):
+        keyed.append((position, item_id))
+        delay = rng.uniform(0, 20) if rng.random() < 0.8 else rng.uniform(0, items)
+        keyed.append((position + delay, item_id))
+    return [item_id for _, item_id in sorted(keyed)]
+
+
+async def main(items: int, concurrency: int, fail_rate: float) -> None:
+    await reset_database()
+    rng = random.Random(11)
+    enqueued: Counter = Counter()
+
+    async def enqueue(order_id: int) -> str:
+        if rng.random() < fail_rate:
+            raise ConnectionError("broker unavailable")
+        enqueued[order_id] += 1
+        return f"task-{order_id}"
+
+    ingestor = PodioIngestor(
+        podio=PodioClient(transport=httpx.MockTransport(podio_handler(fail_rate, rng))),
+        enqueue=enqueue,
+        retry_delay=0.05,
+    )
+    set_podio_ingestor(ingestor)
+    await ingestor.start()
+
+    from app.main import create_app
+    app = create_app()
+
+    events = build_events(items)
+    queue: asyncio.Queue = asyncio.Queue()
+    for item_id in events:
+        queue.put_nowait(item_id)
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+
+    async def client_worker(client: httpx.AsyncClient) -> None:
+        while not queue.empty():
+            item_id = queue.get_nowait()
+            with timer() as elapsed:
+                response = await client.post("/webhooks/podio", data={"type": "item.create", "item_id": str(item_id)})
+            latencies.append(elapsed["seconds"] * 1000)
+            statuses[response.status_code] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        with timer() as total:
+            await asyncio.gather(*(client_worker(client) for _ in range(concurrency)))
+        with timer() as drain:
+            while ingestor.stats()["in_flight"]:  # Retries included
+                await asyncio.sleep(0.05)
+            await ingestor.stop()
+
+    sweeps = []
+    while fail_rate and len(enqueued) < items and len(sweeps) < 10:
+        sweeps.append(await requeue_stranded_orders(enqueue=enqueue, older_than=0))
+
+    from config.database import AsyncSessionLocal
+    async with AsyncSessionLocal() as session:
+        orders = await session.scalar(select(func.count(Order.id)))
+        with_task = await session.scalar(select(func.count(Order.id)).where(Order.celery_task_id.isnot(None)))
+
+    latencies.sort()
+    rows = [
+        ("events sent", f"{len(events):,} ({items:,} distinct)"),
+        ("HTTP statuses", dict(statuses)),
+        ("webhook throughput", f"{len(events) / total['seconds']:,.0f} req/s"),
+        ("webhook latency p50", f"{statistics.median(latencies):.2f} ms"),
+        ("webhook latency p99", f"{latencies[int(len(latencies) * 0.99)]:.2f} ms"),
+        ("drain after last event", f"{drain['seconds'] * 1000:.0f} ms"),
+        ("orders created", orders),
+        ("orders with task id", with_task),
+        ("enqueued (distinct / total)", f"{len(enqueued)} / {sum(enqueued.values())}"),
+        ("ingestor", ingestor.stats()),
+    ]
+    if fail_rate:
+        rows.append(("stranded order sweeps", sweeps))
+    report(f"Podio webhook ingestion ({concurrency} concurrent clients)", rows)
+
+    ok = orders == items == with_task and len(enqueued) == items and sum(enqueued.values()) == items
+    print("\nexactly-once:", "OK" if ok else "FAILED")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of Podio fetches and enqueues that fail")
+    args = parser.parse_args()
+    asyncio.run(main(args.items, args.concurrency, args.fail_rate))
@@ -0,0 +1,75 @@
+"""
+ProcessLog write throughput: insert-per-event vs buffered bulk sink.
+
+    python -m benchmarks.process_log_sink --orders 20 --events 50
+"""
+
+import argparse
+import asyncio
+
+from benchmarks.common import create_orders, report, reset_database, timer
+from app.services.log_sink import ProcessLogSink
+from app.services.progress import record_process_log
+from config.database import AsyncSessionLocal
+
+
+async def insert_per_event(order_ids: list[int], events: int) -> None:
+    """Current path: one session, INSERT and COMMIT per event, orders in parallel"""
+    async def run_order(order_id: int):
+        for i in range(events):
+            async with AsyncSessionLocal() as session:
+                await record_process_log(
+                    session, order_id, f"phase_{i}", f"Event {i}",
+                    progress_current=i, progress_total=events,
+                )
+
+    await asyncio.gather(*(run_order(order_id) for order_id in order_ids))
+
+
+async def buffered_sink(order_ids: list[int], events: int, batch_size: int) -> ProcessLogSink:
+    sink = ProcessLogSink(batch_size=batch_size, flush_interval=0.05)
+    await sink.start()
+
+    async def run_order(order_id: int):
+        for i in range(events):
+            await sink.emit(
+                order_id, f"phase_{i}", f"Event {i}",
+                progress_current=i, progress_total=events,
+            )
+
+    await asyncio.gather(*(run_order(order_id) for order_id in order_ids))
+    await sink.stop()
+    return sink
+
+
+async def main(orders: int, events: int, batch_size: int) -> None:
+    total = orders * events
+    results = []
+
+    await reset_database()
+    order_ids = await create_orders(orders)
+    with timer() as elapsed:
+        await insert_per_event(order_ids, events)
+    results.append(("insert-per-event", f"{total / elapsed['seconds']:>10.0f} rows/s", f"{elapsed['seconds']:.3f}s"))
+
+    await reset_database()
+    order_ids = await create_orders(orders)
+    with timer() as elapsed:
+        sink = await buffered_sink(order_ids, events, batch_size)
+    results.append((
+        f"buffered sink (batch={batch_size})",
+        f"{total / elapsed['seconds']:>10.0f} rows/s",
+        f"{elapsed['seconds']:.3f}s",
+        f"{sink.batches_written} batches",
+    ))
+
+    report(f"ProcessLog writes: {orders} orders x {events} events = {total} rows", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=20)
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.events, args.batch_size))
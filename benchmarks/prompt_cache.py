@@ -0,0 +1,83 @@
+"""
+Prompt cache hit rate: replay a full plan generation against a fake LLM.
+
+Exits with status 1 if the measured rate is below
+PROMPT_CACHE_HIT_RATE_TARGET.
+
+    python -m benchmarks.prompt_cache --plans 3
+"""
+
+import argparse
+import asyncio
+import sys
+
+from benchmarks.common import report
+from benchmarks.fakes import FakePromptCacheLLM
+from app.models import Biznesplan, CEIDGData, Order, ResearchResult
+from app.services.llm import apply_generation_stats, cache_hit_rate, record_generation_call
+from app.services.prompts import PromptBuilder
+from app.services.section_scheduler import SectionScheduler
+from config.settings import settings
+
+# ~1000 words of Perplexity output per market query
+_MARKET_TEXT = "Rynek usług IT w Polsce rośnie w tempie kilku procent rocznie według danych GUS. " * 80
+
+
+def sample_order(index: int) -> tuple[Order, CEIDGData, ResearchResult]:
+    order = Order(id=index, nip=f"{index:010d}", uslugi=["Tworzenie oprogramowania", "Testy QA"],
+                  planowany_dochod_roczny=240000, dodatkowe_informacje="Współpraca B2B")
+    ceidg = CEIDGData(nip=order.nip, nazwa_firmy=f"Firma {index}", imie="Jan", nazwisko="Kowalski",
+                      adres_miejscowosc="Warszawa", adres_wojewodztwo="MAZOWIECKIE",
+                      pkd_glowny="62.01.Z", pkd_glowny_nazwa="Działalność związana z oprogramowaniem",
+                      pkd_pozostale=[{"kod": "62.02.Z", "nazwa": None}], status_wpisu="AKTYWNY")
+    research = ResearchResult(
+        market_data={field: _MARKET_TEXT for field in ("industry_overview", "market_size_poland",
+                                                       "market_growth_rate", "trends", "key_players",
+                                                       "regional_market")},
+        swot_data={"strengths": ["Doświadczenie"], "weaknesses": ["Brak marki"],
+                   "opportunities": ["Cyfryzacja"], "threats": ["Konkurencja"]},
+        sources=[{"url": f"https://example.org/raport-{i}", "used_for": "trends"} for i in range(12)],
+    )
+    return order, ceidg, research
+
+
+async def generate_plan(llm: FakePromptCacheLLM, index: int) -> Biznesplan:
+    order, ceidg, research = sample_order(index)
+    builder = PromptBuilder(order, ceidg, research)
+    plan = Biznesplan(id=index, order_id=index, generator_logs={})
+
+    async def generate(section, upstream):
+        response = await llm.complete(builder.section_request(section, upstream))
+        plan.generator_logs = record_generation_call(plan.generator_logs, section.title, response)
+        return response.text
+
+    await SectionScheduler().run(generate)
+    apply_generation_stats(plan, plan.generator_logs)
+    return plan
+
+
+async def main(plans: int, output_chars: int) -> int:
+    llm = FakePromptCacheLLM(output_chars=output_chars, latency=0.01)
+    rows, totals = [], {}
+    for index in range(1, plans + 1):
+        plan = await generate_plan(llm, index)
+        logs = plan.generator_logs
+        for key in ("cached_tokens", "total_input_tokens", "cache_creation_tokens"):
+            totals[key] = totals.get(key, 0) + logs[key]
+        rows.append((f"plan {index}", f"hit rate {plan.cache_hit_rate}%",
+                     f"read={logs['cached_tokens']}", f"write={logs['cache_creation_tokens']}",
+                     f"uncached={logs['total_input_tokens']}", f"${logs['total_cost_usd']:.4f}"))
+
+    rate = cache_hit_rate(totals)
+    target = settings.PROMPT_CACHE_HIT_RATE_TARGET
+    rows.append(("overall", f"hit rate {rate:.1%}", f"target {target:.0%}"))
+    report(f"Prompt cache replay: {plans} plans x {llm.calls // plans} calls", rows)
+    return 0 if rate >= target else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plans", type=int, default=3)
+    parser.add_argument("--output-chars", type=int, default=6000, help="Generated characters per section")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.plans, args.output_chars)))
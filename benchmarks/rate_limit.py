@@ -0,0 +1,85 @@
+"""
+Rate limiter hot-path overhead per request.
+
+Calls the middleware directly (no HTTP stack) around a trivial ASGI app and
+compares against the bare app. The Redis variant runs when --redis-url is
+given (or against fakeredis if installed; that measures script cost, not
+network latency).
+
+    python -m benchmarks.rate_limit --requests 20000
+"""
+
+import argparse
+import asyncio
+
+from benchmarks.common import report, timer
+from app.utils.rate_limit import MemoryRateLimiter, RateLimitMiddleware, RedisRateLimiter, RouteGroup, parse_rate
+
+
+async def bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message):
+    pass
+
+
+def _scope(client: int) -> dict:
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/orders",
+        "headers": [],
+        "client": (f"10.0.{client // 256}.{client % 256}", 50000),
+    }
+
+
+async def measure(app, requests: int, clients: int) -> float:
+    """Mean microseconds per request"""
+    scopes = [_scope(i) for i in range(clients)]
+    with timer() as elapsed:
+        for i in range(requests):
+            await app(scopes[i % clients], _receive, _send)
+    return elapsed["seconds"] / requests * 1e6
+
+
+async def main(requests: int, clients: int, redis_url: str) -> None:
+    # Limit high enough that every request takes the full (allowed) path
+    groups = [RouteGroup("api", parse_rate("1000000/minute"), lambda method, path: path.startswith("/api/"))]
+    baseline = await measure(bare_app, requests, clients)
+    rows = [("bare app", f"{baseline:8.2f} us/req", "")]
+
+    memory = await measure(RateLimitMiddleware(bare_app, MemoryRateLimiter(), groups), requests, clients)
+    rows.append(("memory limiter", f"{memory:8.2f} us/req", f"+{memory - baseline:.2f} us"))
+
+    redis = None
+    if redis_url:
+        import redis.asyncio as aioredis
+        redis = aioredis.from_url(redis_url, decode_responses=True)
+    else:
+        try:
+            import fakeredis.aioredis
+            redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        except ImportError:
+            pass
+    if redis is not None:
+        count = min(requests, 5000)
+        redis_cost = await measure(RateLimitMiddleware(bare_app, RedisRateLimiter(redis), groups), count, clients)
+        label = "redis limiter" if redis_url else "redis limiter (fakeredis)"
+        rows.append((label, f"{redis_cost:8.2f} us/req", f"+{redis_cost - baseline:.2f} us"))
+
+    report(f"Rate limit overhead: {requests} requests, {clients} clients", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--redis-url", default="")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.clients, args.redis_url))
@@ -0,0 +1,171 @@
+"""
+Read-only sessions and replica routing.
+
+1. Routing check on two local databases (two SQLite files by default):
+   each gets a marker row, then reads through the routing session must
+   see the replica's row until the session writes, and the primary's
+   afterwards; read-only sessions must refuse writes.
+2. Request latency of GET /api/orders with get_read_db (autocommit, no
+   COMMIT) against the same route with get_db (BEGIN ... COMMIT), in
+   alternating rounds, with round trips per request counted from engine
+   events.
+
+    python -m benchmarks.read_sessions --requests 3000
+    DATABASE_URL=postgresql+asyncpg://localhost/bench \\
+        python -m benchmarks.read_sessions --replica-url postgresql+asyncpg://localhost/bench_replica
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.common import create_orders, report, reset_database
+from app.models import Order
+from config.database import (
+    Base,
+    ReadOnlySessionError,
+    engine,
+    get_db,
+    get_read_db,
+    make_read_sessionmaker,
+    make_routing_sessionmaker,
+)
+from config.settings import settings
+
+
+async def verify_routing(replica_url: str) -> list[tuple]:
+    """Run the routing checks against DATABASE_URL + `replica_url`; raises AssertionError"""
+    primary = create_async_engine(settings.DATABASE_URL)
+    replica = create_async_engine(replica_url)
+    try:
+        for target, name in ((primary, "primary"), (replica, "replica")):
+            async with target.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(insert(Order).values(podio_item_id="marker", nip="0000000000", imie_nazwisko=name))
+
+        marker = select(Order.imie_nazwisko).where(Order.podio_item_id == "marker")
+        checks = []
+        async with make_routing_sessionmaker(primary, replica)() as session:
+            checks.append(("read before writing", await session.scalar(marker), "replica"))
+            await session.execute(update(Order).where(Order.podio_item_id == "marker").values(imie_nazwisko="primary*"))
+            checks.append(("read after an UPDATE", await session.scalar(marker), "primary*"))
+            await session.commit()
+            checks.append(("read after commit", await session.scalar(marker), "primary*"))
+
+        async with make_routing_sessionmaker(primary, replica)() as session:
+            checks.append(("new session reads", await session.scalar(marker), "replica"))
+            session.add(Order(podio_item_id="added", nip="0000000001", imie_nazwisko="added"))
+            await session.flush()
+            checks.append(("orders after a flush", await session.scalar(select(func.count(Order.id))), 2))
+            await session.commit()
+
+        async with make_read_sessionmaker(replica)() as session:
+            checks.append(("read-only session reads", await session.scalar(marker), "replica"))
+            try:
+                await session.execute(update(Order).values(imie_nazwisko="x"))
+                refused = False
+            except ReadOnlySessionError:
+                refused = True
+            checks.append(("read-only session refuses UPDATE", refused, True))
+
+        failed = [name for name, got, expected in checks if got != expected]
+        if failed:
+            raise AssertionError(f"Routing checks failed: {', '.join(failed)}")
+        return [(name, got, "OK") for name, got, _ in checks]
+    finally:
+        await primary.dispose()
+        await replica.dispose()
+
+
+class RoundTrips:
+    """Statements and COMMITs seen on the primary engine"""
+
+    def __init__(self, target):
+        self.statements = 0
+        self.commits = 0
+        sync_engine = target.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._statement)
+        event.listen(sync_engine, "commit", self._commit)
+
+    def _statement(self, *args):
+        self.statements += 1
+
+    def _commit(self, *args):
+        self.commits += 1
+
+
+async def time_requests(app, count: int, limit: int) -> list[float]:
+    samples = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(count):
+            started = time.perf_counter()
+            response = await client.get("/api/orders", params={"limit": limit})
+            samples.append(time.perf_counter() - started)
+            response.raise_for_status()
+    return samples
+
+
+async def request_latency(count: int, rounds: int, limit: int) -> list[tuple]:
+    from app.main import create_app
+
+    await reset_database()
+    await create_orders(500)
+    settings.RATE_LIMIT_ENABLED = False
+    read_only = create_app()
+    with_commit = create_app()
+    with_commit.dependency_overrides[get_read_db] = get_db  # Same route, transactional session
+    counter = RoundTrips(engine)
+
+    samples = {"get_read_db": [], "get_db": []}
+    round_trips = {"get_read_db": [0, 0], "get_db": [0, 0]}
+    for app in (read_only, with_commit):
+        await time_requests(app, 50, limit)  # Warm up
+    for _ in range(rounds):
+        for name, app in (("get_read_db", read_only), ("get_db", with_commit)):
+            statements, commits = counter.statements, counter.commits
+            samples[name] += await time_requests(app, count // rounds, limit)
+            round_trips[name][0] += counter.statements - statements
+            round_trips[name][1] += counter.commits - commits
+
+    rows = []
+    baseline = statistics.median(samples["get_db"])
+    for name, values in samples.items():
+        median = statistics.median(values)
+        p95 = sorted(values)[int(len(values) * 0.95)]
+        statements, commits = (total / len(values) for total in round_trips[name])
+        rows.append((
+            name, f"p50 {median * 1000:7.3f} ms", f"p95 {p95 * 1000:7.3f} ms",
+            f"{statements:.1f} statements + {commits:.1f} COMMIT per request",
+            f"({(median - baseline) / baseline:+.1%})" if name != "get_db" else "",
+        ))
+    return rows
+
+
+async def main(requests: int, rounds: int, limit: int, replica_url: str) -> int:
+    try:
+        routing_rows = await verify_routing(replica_url)
+    except AssertionError as exc:
+        print(f"FAIL: {exc}")
+        return 1
+    report(f"Replica routing ({engine.dialect.name}, replica {replica_url.split('@')[-1]})", routing_rows)
+    report(f"GET /api/orders?limit={limit} ({engine.dialect.name}, {requests} requests per session type)",
+           await request_latency(requests, rounds, limit))
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=6)
+    parser.add_argument("--limit", type=int, default=20, help="Page size")
+    parser.add_argument("--replica-url", default="sqlite+aiosqlite:///./benchmark-replica.sqlite",
+                        help="Second database for the routing check (its tables are recreated)")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.requests, args.rounds, args.limit, args.replica_url)))
@@ -0,0 +1,44 @@
+"""
+Section generation wall-clock: sequential vs DAG scheduler.
+
+Each section is simulated with a fixed latency (seconds per section, scaled
+down from real LLM calls).
+
+    python -m benchmarks.section_scheduler --latency 0.2 --concurrency 4
+"""
+
+import argparse
+import asyncio
+
+from benchmarks.common import report, timer
+from app.services.section_scheduler import BIZNESPLAN_SECTIONS, SectionScheduler, critical_path_length
+
+
+async def main(latency: float, concurrency: int) -> None:
+    async def generate(section, dependencies):
+        await asyncio.sleep(latency)
+        return section.title
+
+    durations = {section.key: latency for section in BIZNESPLAN_SECTIONS}
+    rows = [
+        ("sum of sections", f"{latency * len(BIZNESPLAN_SECTIONS):.2f}s"),
+        ("critical path", f"{critical_path_length(BIZNESPLAN_SECTIONS, durations):.2f}s"),
+    ]
+
+    with timer() as elapsed:
+        await SectionScheduler(concurrency=1).run(generate)
+    rows.append(("scheduler, concurrency=1", f"{elapsed['seconds']:.2f}s"))
+
+    with timer() as elapsed:
+        await SectionScheduler(concurrency=concurrency).run(generate)
+    rows.append((f"scheduler, concurrency={concurrency}", f"{elapsed['seconds']:.2f}s"))
+
+    report(f"{len(BIZNESPLAN_SECTIONS)} sections x {latency}s", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.concurrency))
@@ -0,0 +1,279 @@
+"""
+Serving: throughput of the production entrypoint against the old launch
+mode, and graceful shutdown with an open SSE stream.
+
+Each mode is started as its own server process on a free port, against
+the same seeded database (orders with CEIDG data, research and a plan):
+
+- `python -m app.main` as it ran before app.server: one uvicorn process
+  with --reload (and its access log),
+- `python -m app.server` with one worker and with `--workers` workers
+  (default: one per CPU), uvloop + httptools.
+
+All servers run at once and take turns under load, in `--rounds`
+alternating rounds. Load comes from `--clients` separate processes, each
+holding its share of `--concurrency` keep-alive connections with one
+request in flight (a bare asyncio HTTP/1.1 client: httpx would saturate
+first), cycling through health, list and order detail requests; the
+first second of each round is warm-up.
+
+Then each server gets SIGTERM while an SSE stream is open. app.server must
+end the stream and exit cleanly within WEB_GRACEFUL_TIMEOUT; exits with
+status 1 if it does not, or if any of its requests failed. The old mode is
+killed after --drain-wait seconds if it has not exited by then.
+
+    python -m benchmarks.serve_throughput --duration 12 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+
+from benchmarks.common import report, reset_database
+from benchmarks.order_detail import seed
+from app.server import worker_count
+from config.settings import settings
+
+WARMUP_SECONDS = 1.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_env() -> dict:
+    return {
+        **os.environ,
+        "RATE_LIMIT_ENABLED": "false",  # All load comes from one IP
+        "READY_REQUIRE_REDIS": "false",
+        "LOG_LEVEL": "WARNING",
+        "PYTHONWARNINGS": "ignore::DeprecationWarning",
+    }
+
+
+def modes(workers: int) -> dict[str, list[str]]:
+    commands = {
+        "python -m app.main (1 process, --reload)": [
+            sys.executable, "-m", "uvicorn", "app.main:create_app", "--factory", "--reload",
+            "--host", "127.0.0.1", "--port", "{port}", "--log-level", "info",
+        ],
+        "python -m app.server --workers 1": [
+            sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", "{port}", "--workers", "1",
+        ],
+    }
+    if workers > 1:
+        commands[f"python -m app.server --workers {workers}"] = [
+            sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", "{port}", "--workers", str(workers),
+            "--allow-per-worker-state",  # In-process progress broker: the drain check subscribes on one worker
+        ]
+    return commands
+
+
+class Server:
+    def __init__(self, command: list[str]):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.process = subprocess.Popen(
+            [part.format(port=self.port) for part in command], env=server_env(),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+        )
+
+    async def wait_ready(self, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient(base_url=self.url) as client:
+            while time.monotonic() < deadline:
+                if self.process.poll() is not None:
+                    raise RuntimeError(f"server exited with {self.process.returncode}")
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        return
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.1)
+        raise RuntimeError("server did not start")
+
+    def kill(self) -> None:
+        if self.process.poll() is None:
+            os.killpg(self.process.pid, signal.SIGKILL)
+            self.process.wait()
+
+
+async def _connection(host: str, port: int, paths: list[str], offset: int, step: int, deadline: float,
+                      started: float, latencies: list, counts: dict) -> None:
+    """One keep-alive HTTP/1.1 connection sending requests back to back (lighter than httpx)"""
+    reader, writer = await asyncio.open_connection(host, port)
+    index = offset
+    try:
+        while time.monotonic() < deadline:
+            path = paths[index % len(paths)]
+            index += step
+            sent = time.monotonic()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            status = int(head.split(b" ", 2)[1])
+            length = 0
+            for line in head.split(b"\r\n"):
+                name, _, value = line.partition(b":")
+                if name.lower() == b"content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            if sent - started >= WARMUP_SECONDS:
+                latencies.append(time.monotonic() - sent)
+                counts["errors"] += status != 200
+    except (OSError, asyncio.IncompleteReadError, ValueError):
+        counts["errors"] += 1
+    finally:
+        writer.close()
+
+
+async def _client_load(url: str, paths: list[str], concurrency: int, duration: float, offset: int) -> dict:
+    host, port = url.removeprefix("http://").split(":")
+    latencies, counts = [], {"errors": 0}
+    started = time.monotonic()
+    await asyncio.gather(*(
+        _connection(host, int(port), paths, offset + index, concurrency, started + duration, started, latencies, counts)
+        for index in range(concurrency)
+    ))
+    return {"latencies": latencies, "errors": counts["errors"]}
+
+
+def client_process(url: str, paths: list[str], concurrency: int, duration: float, offset: int) -> dict:
+    return asyncio.run(_client_load(url, paths, concurrency, duration, offset))
+
+
+def load(pool: ProcessPoolExecutor, url: str, paths: list[str], clients: int, concurrency: int, duration: float) -> dict:
+    per_client = max(concurrency // clients, 1)
+    results = list(pool.map(client_process, [url] * clients, [paths] * clients, [per_client] * clients,
+                            [duration] * clients, [index * per_client for index in range(clients)]))
+    return {
+        "latencies": [value for result in results for value in result["latencies"]],
+        "errors": sum(result["errors"] for result in results),
+        "seconds": duration - WARMUP_SECONDS,
+    }
+
+
+def summarize(rounds: list[dict]) -> dict:
+    latencies = sorted(value for result in rounds for value in result["latencies"])
+    return {
+        "errors": sum(result["errors"] for result in rounds),
+        "throughput": len(latencies) / sum(result["seconds"] for result in rounds),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+async def drain(server: Server, order_id: int, wait: float) -> dict:
+    """SIGTERM with an SSE stream open: when the stream ends and the server exits"""
+    received = asyncio.Event()
+    stream_closed_at = None
+
+    async def listen():
+        nonlocal stream_closed_at
+        async with httpx.AsyncClient(base_url=server.url, timeout=None) as client:
+            try:
+                async with client.stream("GET", f"/api/orders/{order_id}/events") as response:
+                    async for _ in response.aiter_text():
+                        received.set()
+            except httpx.HTTPError:
+                pass
+        stream_closed_at = time.monotonic()
+
+    listener = asyncio.create_task(listen())
+    await asyncio.wait_for(received.wait(), 10)
+    signalled = time.monotonic()
+    server.process.send_signal(signal.SIGTERM)
+
+    while server.process.poll() is None and time.monotonic() - signalled < wait:
+        await asyncio.sleep(0.05)
+    exited = server.process.poll() is not None
+    exit_seconds = time.monotonic() - signalled if exited else None
+    server.kill()
+    await asyncio.wait_for(listener, 5)
+    return {
+        "stream_seconds": stream_closed_at - signalled,
+        "exit_seconds": exit_seconds,
+        "returncode": server.process.returncode if exited else None,
+    }
+
+
+async def main(args) -> int:
+    await reset_database()
+    order_ids = await seed(args.orders, args.logs)
+    paths = []
+    for order_id in order_ids:
+        paths += ["/health", "/api/orders?limit=20", f"/api/orders/{order_id}?profile=detail"]
+
+    servers = {name: Server(command) for name, command in modes(args.workers).items()}
+    rounds = {name: [] for name in servers}
+    drains = {}
+    try:
+        for server in servers.values():
+            await server.wait_ready()
+        # Servers run side by side and take turns, so drift hits every mode alike
+        with ProcessPoolExecutor(args.clients) as pool:
+            for _ in range(args.rounds):
+                for name, server in servers.items():
+                    rounds[name].append(await asyncio.to_thread(
+                        load, pool, server.url, paths, args.clients, args.concurrency,
+                        WARMUP_SECONDS + args.duration / args.rounds,
+                    ))
+        for name, server in servers.items():
+            drains[name] = await drain(server, order_ids[0], args.drain_wait)
+    finally:
+        for server in servers.values():
+            server.kill()
+    results = {name: summarize(values) for name, values in rounds.items()}
+
+    baseline = next(iter(results.values()))["throughput"]
+    report(f"Throughput ({args.concurrency} connections from {args.clients} client processes, {args.duration:.0f} s, "
+           f"{os.cpu_count()} CPUs)", [
+        (name, f"{result['throughput']:8.1f} req/s", f"p50 {result['p50_ms']:7.2f} ms", f"p99 {result['p99_ms']:7.2f} ms",
+         f"{result['errors']} errors", f"({result['throughput'] / baseline - 1:+.0%})")
+        for name, result in results.items()
+    ])
+    report("SIGTERM with an open SSE stream", [
+        (name, f"stream ended after {result['stream_seconds']:5.2f} s",
+         f"exited after {result['exit_seconds']:5.2f} s (code {result['returncode']})"
+         if result["exit_seconds"] is not None else f"still running after {args.drain_wait:.0f} s (killed)")
+        for name, result in drains.items()
+    ])
+
+    failures = []
+    for name in results:
+        if "app.server" not in name:
+            continue
+        if results[name]["errors"]:
+            failures.append(f"{name}: {results[name]['errors']} failed requests")
+        result = drains[name]
+        if result["exit_seconds"] is None or result["returncode"] != 0:
+            failures.append(f"{name}: no clean exit after SIGTERM ({result})")
+        elif result["stream_seconds"] > settings.WEB_GRACEFUL_TIMEOUT:
+            failures.append(f"{name}: SSE stream outlived the graceful timeout")
+    if failures:
+        print("\nFAIL: " + "; ".join(failures))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=12.0, help="Seconds of load per mode (after warm-up)")
+    parser.add_argument("--rounds", type=int, default=3, help="Alternating rounds the duration is split into")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight")
+    parser.add_argument("--clients", type=int, default=2, help="Load generator processes")
+    parser.add_argument("--workers", type=int, default=worker_count(), help="app.server workers for the multi-worker run")
+    parser.add_argument("--orders", type=int, default=20)
+    parser.add_argument("--logs", type=int, default=20, help="Process logs per seeded order")
+    parser.add_argument("--drain-wait", type=float, default=10.0, help="Seconds to wait for each server to exit")
+    sys.exit(asyncio.run(main(parser.parse_args())))
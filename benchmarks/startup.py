@@ -0,0 +1,99 @@
+"""
+Web tier startup: import time of `create_app()` and the modules it loads.
+
+Each run is a fresh interpreter timing `from app.main import create_app;
+create_app()` (interpreter start excluded). Exits non-zero when the median
+exceeds --max-ms or when a worker-only module (LLM SDKs, Celery, HTTP
+clients, renderers) is imported, so it can gate CI (tests/test_startup.py
+runs the same probe):
+
+    python -m benchmarks.startup --runs 7 --max-ms 1500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import report
+
+DEFAULT_MAX_MS = 1500  # Budget for the create_app() median
+
+# Imported only when an integration or the pipeline is used
+WORKER_ONLY_MODULES = (
+    "anthropic",
+    "langchain",
+    "langgraph",
+    "celery",
+    "kombu",
+    "redis",
+    "httpx",
+    "markdown",
+    "jinja2",
+    "weasyprint",
+)
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from app.main import create_app
+create_app()
+elapsed = time.perf_counter() - started
+print(json.dumps({"ms": elapsed * 1000, "modules": sorted({name.split(".")[0] for name in sys.modules})}))
+"""
+
+
+def probe() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        check=True, capture_output=True, text=True, env=os.environ.copy(),
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_packages(count: int = 8) -> list[tuple[str, int]]:
+    """Top-level packages by total self import time (python -X importtime)"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "from app.main import create_app; create_app()"],
+        check=True, capture_output=True, text=True, env=os.environ.copy(),
+    ).stderr
+    totals: dict[str, int] = {}
+    for line in stderr.splitlines()[1:]:
+        try:
+            own, _, name = line.removeprefix("import time:").split("|")
+            package = name.strip().split(".")[0]
+            totals[package] = totals.get(package, 0) + int(own)
+        except ValueError:
+            continue
+    return [(name, us // 1000) for name, us in sorted(totals.items(), key=lambda item: item[1], reverse=True)[:count]]
+
+
+def main(runs: int, max_ms: float) -> int:
+    probe()  # Warm the bytecode cache
+    results = [probe() for _ in range(runs)]
+    median = statistics.median(result["ms"] for result in results)
+    unexpected = sorted(set(results[-1]["modules"]) & set(WORKER_ONLY_MODULES))
+
+    rows = [("create_app() median", f"{median:8.1f} ms", f"(budget {max_ms:.0f} ms, {runs} runs)")]
+    rows += [(f"  {name}", f"{ms:8d} ms") for name, ms in slowest_packages()]
+    rows.append(("worker-only modules", ", ".join(unexpected) or "none"))
+    report("Web tier startup", rows)
+
+    failed = False
+    if median > max_ms:
+        print(f"\nFAIL: startup {median:.0f} ms exceeds {max_ms:.0f} ms")
+        failed = True
+    if unexpected:
+        print(f"\nFAIL: create_app() imported {', '.join(unexpected)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--max-ms", type=float, default=DEFAULT_MAX_MS)
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.max_ms))
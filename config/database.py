@@ -2,32 +2,151 @@
 Database Configuration
 
 SQLAlchemy 2.0 async engine and session management.
+
+- AsyncSessionLocal: primary only (services, Celery tasks, anything that
+  reads in order to write).
+- get_db: request sessions; with DATABASE_REPLICA_URL set, reads go to
+  the replica until the session writes, then it stays on the primary.
+- get_read_db: read-only request sessions on the replica (or primary)
+  in autocommit mode: no BEGIN/COMMIT round trips, but no snapshot shared
+  across statements and no read-your-writes across requests (replica lag).
 """
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+import logging
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, AsyncAttrs, async_sessionmaker
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config.settings import settings
 
-# Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DB_ECHO,
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_pre_ping=True,  # Verify connections before using
-)
+logger = logging.getLogger(__name__)
+
+
+class TimedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that also records how long checkouts wait for a connection.
+
+    Counters are cumulative since the pool was created (engine.dispose()
+    starts a new pool); readers take deltas, see app.services.readiness.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0  # Reset by take_wait_max()
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+                self.timeouts += timed_out
+
+    def take_wait_max(self) -> float:
+        """Longest wait since the previous call"""
+        with self._stats_lock:
+            value, self.wait_seconds_max = self.wait_seconds_max, 0.0
+        return value
+
 
-# Create async session factory
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
+def _create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=TimedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=True,  # Verify connections before using
+    )
+
+
+# Create async engines (primary, optional read replica)
+engine = _create_engine(settings.DATABASE_URL)
+replica_engine: Optional[AsyncEngine] = (
+    _create_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
 )
 
+
+class ReadOnlySessionError(RuntimeError):
+    """A write was attempted through a read-only session"""
+
+
+def _is_plain_read(clause) -> bool:
+    """SELECT without FOR UPDATE; text() and DML count as writes"""
+    return getattr(clause, "is_select", False) and getattr(clause, "_for_update_arg", None) is None
+
+
+class RoutingSession(Session):
+    """
+    Sends reads to `info["replica"]` (a sync engine) and the rest to the
+    session's bind. After its first flush, DML or locking read the session
+    sticks to the primary, so it reads its own writes despite replica lag.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is not None and not self.info.get("on_primary"):
+            if not self._flushing and _is_plain_read(clause):
+                return replica
+            self.info["on_primary"] = True
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+class ReadOnlySession(Session):
+    """Session that refuses flushes and anything but plain SELECTs"""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or not _is_plain_read(clause):
+            raise ReadOnlySessionError("Read-only session: use get_db / AsyncSessionLocal to write")
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+_SESSION_OPTIONS = {"class_": AsyncSession, "expire_on_commit": False, "autocommit": False, "autoflush": False}
+
+# Create async session factories
+AsyncSessionLocal = async_sessionmaker(engine, **_SESSION_OPTIONS)
+
+
+def make_routing_sessionmaker(primary: AsyncEngine, replica: Optional[AsyncEngine]) -> async_sessionmaker:
+    """Sessions on `primary` that read from `replica` until they write"""
+    info = {"replica": replica.sync_engine} if replica is not None else {}
+    return async_sessionmaker(primary, sync_session_class=RoutingSession, info=info, **_SESSION_OPTIONS)
+
+
+def make_read_sessionmaker(engine: AsyncEngine) -> async_sessionmaker:
+    """Read-only sessions in autocommit mode (no transaction to commit or roll back)"""
+    return async_sessionmaker(
+        engine.execution_options(isolation_level="AUTOCOMMIT"),
+        sync_session_class=ReadOnlySession,
+        **_SESSION_OPTIONS,
+    )
+
+
+RoutingSessionLocal = make_routing_sessionmaker(engine, replica_engine)
+ReadSessionLocal = make_read_sessionmaker(replica_engine or engine)
+
 # Base class for all models
-Base = declarative_base()
+# AsyncAttrs adds `obj.awaitable_attrs.<name>` for loading deferred columns
+# and lazy relationships from async code.
+Base = declarative_base(cls=AsyncAttrs)
 
 
 async def get_db() -> AsyncSession:
@@ -40,7 +159,7 @@ async def get_db() -> AsyncSession:
             result = await db.execute(select(Item))
             return result.scalars().all()
     """
-    async with AsyncSessionLocal() as session:
+    async with RoutingSessionLocal() as session:
         try:
             yield session
             await session.commit()
@@ -51,13 +170,44 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
-async def init_db():
-    """Initialize database (create tables if not exist)"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+async def get_read_db() -> AsyncSession:
+    """
+    Dependency for routes that only read: replica when configured, no
+    transaction, no commit (see module docstring). Writes raise
+    ReadOnlySessionError.
+    """
+    async with ReadSessionLocal() as session:
+        yield session
+
+
+async def init_db(create_tables: bool = False):
+    """
+    Open this process's engines (app lifespan, so after a worker fork).
+
+    Pooled connections inherited from a parent process are dropped without
+    closing them (the parent still owns the sockets), then one connection
+    per engine is opened so the first requests don't wait for it. An
+    unreachable database is logged rather than raised; /ready reports it.
+    `create_tables` creates missing tables (development; alembic otherwise).
+    """
+    for each in (engine, replica_engine):
+        if each is None:
+            continue
+        await each.dispose(close=False)
+        try:
+            async with each.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        except Exception as e:
+            logger.warning("Database %s not reachable at startup: %s", each.url.render_as_string(hide_password=True), e)
+
+    if create_tables:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
 
 
 async def close_db():
     """Close database connections"""
     await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
 
@@ -3,12 +3,29 @@ Application Settings
 
 Configuration management using Pydantic Settings.
 Loads environment variables from .env file.
+
+Only DATABASE_URL is required at import time. Integration credentials are
+checked when a client for that integration is built (`settings.require`),
+so the web tier starts without the worker-only keys.
 """
 
 from pydantic_settings import BaseSettings
 from typing import Optional
 
 
+class MissingSettingsError(RuntimeError):
+    """An integration is used without its credentials"""
+
+
+# Settings each external integration needs
+INTEGRATION_SETTINGS = {
+    "anthropic": ("ANTHROPIC_API_KEY",),
+    "ceidg": ("CEIDG_API_KEY",),
+    "perplexity": ("PERPLEXITY_API_KEY",),
+    "podio": ("PODIO_APP_ID", "PODIO_APP_TOKEN", "PODIO_WORKSPACE_ID"),
+}
+
+
 class Settings(BaseSettings):
     """Application configuration settings"""
     
@@ -19,30 +36,101 @@ class Settings(BaseSettings):
     
     # Database (PostgreSQL)
     DATABASE_URL: str
+    DATABASE_REPLICA_URL: Optional[str] = None  # Read replica for get_db reads / get_read_db (optional)
     DB_POOL_SIZE: int = 10
     DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0  # Max seconds a checkout waits for a connection
     DB_ECHO: bool = False  # Set to True for SQL query logging
+    COMPRESSION_LEVEL: int = 9  # zstd level for compressed columns
+    COMPRESSION_DICTIONARY_PATH: Optional[str] = None  # Trained zstd dictionary (optional)
+    COMPRESSION_MIN_SIZE: int = 128  # Shorter values (bytes) are stored uncompressed
     
     # Redis (Celery broker + cache)
     REDIS_URL: str = "redis://localhost:6379/0"
     CACHE_TTL_CEIDG: int = 259200  # 72 hours (3 days)
     CACHE_TTL_RESEARCH: int = 604800  # 7 days
-    
-    # API Keys - External Services
-    CEIDG_API_KEY: str
-    PODIO_APP_ID: str
-    PODIO_APP_TOKEN: str
-    PODIO_WORKSPACE_ID: str
+    CACHE_LOCAL_MAX_ENTRIES: int = 1024  # In-process LRU size (per cache)
+
+    # Web Server (python -m app.server: gunicorn with uvicorn workers)
+    WEB_HOST: str = "0.0.0.0"
+    PORT: int = 8000  # Set by Render
+    WEB_WORKERS: int = 0  # 0: one per CPU available to the process
+    WEB_GRACEFUL_TIMEOUT: int = 30  # Seconds a stopping worker gets to finish in-flight requests
+    WEB_KEEPALIVE: int = 5  # Idle keep-alive seconds (keep below the load balancer's idle timeout)
+    WEB_MAX_REQUESTS: int = 0  # Restart a worker after this many requests, with 10% jitter (0: never)
+
+    # Real-time Progress (SSE)
+    PROGRESS_BROKER: str = "redis"  # redis / memory (single process, tests)
+    SSE_HEARTBEAT_SECONDS: int = 15  # Keep-alive comment interval
+    SSE_REPLAY_LIMIT: int = 500  # Missed events per replay query on reconnect (paged until caught up)
+    SSE_QUEUE_SIZE: int = 100  # Per-subscriber buffer before it is dropped
+
+    # Readiness (/ready)
+    READY_PROBE_INTERVAL: float = 5.0  # Seconds between background DB/Redis probes
+    READY_PROBE_TIMEOUT: float = 2.0  # Per-probe timeout
+    READY_REQUIRE_REDIS: bool = True  # Redis down -> not ready
+    READY_MAX_POOL_WAIT_MS: float = 250.0  # Not ready when checkouts waited longer on average
+
+    # Metrics (Prometheus)
+    METRICS_ENABLED: bool = True  # /metrics endpoint + request/query/LLM/task timings
+    METRICS_WORKER_PORT: int = 0  # Celery: child N serves /metrics on port + N (0 = off)
+    METRICS_MULTIPROC_DIR: str = ""  # app.server workers share counters here (default: a temp dir per run)
+    METRICS_MULTIPROC_INTERVAL: float = 1.0  # Seconds between a worker's metric file writes
+
+    # Process Log Sink (buffered bulk inserts)
+    LOG_SINK_BATCH_SIZE: int = 200  # Rows per multi-row INSERT
+    LOG_SINK_FLUSH_INTERVAL: float = 0.5  # Max seconds a row waits in memory
+    LOG_SINK_MAX_PENDING: int = 10000  # Queue bound; emit() blocks when full
+    LOG_SINK_WRITE_ATTEMPTS: int = 4  # INSERT tries per batch before it is dropped
+    LOG_SINK_RETRY_DELAY: float = 0.5  # First retry delay; doubles per attempt
+
+    # Process Log Retention (monthly partitions, see app.services.log_retention)
+    PROCESS_LOG_RETENTION_MONTHS: int = 3  # Full months of raw logs kept before the current one
+    PROCESS_LOG_PARTITIONS_AHEAD: int = 3  # Future monthly partitions kept created
+    PROCESS_LOG_DETACH_ONLY: bool = False  # Detach rolled-up partitions instead of dropping them
+    PROCESS_LOG_MAINTENANCE_HOUR: int = 3  # Daily maintenance (Celery beat, CELERY timezone)
+
+    # API Keys - External Services (validated per integration, see INTEGRATION_SETTINGS)
+    CEIDG_API_KEY: Optional[str] = None
+    PODIO_APP_ID: Optional[str] = None
+    PODIO_APP_TOKEN: Optional[str] = None
+    PODIO_WORKSPACE_ID: Optional[str] = None
     PODIO_CLIENT_ID: Optional[str] = None  # Global Podio OAuth (optional)
     PODIO_SECRET_KEY: Optional[str] = None  # Global Podio OAuth (optional)
-    ANTHROPIC_API_KEY: str
-    PERPLEXITY_API_KEY: Optional[str] = None  # Optional for MVP
+    ANTHROPIC_API_KEY: Optional[str] = None
+    PERPLEXITY_API_KEY: Optional[str] = None
+
+    # Podio API (order intake)
+    PODIO_API_URL: str = "https://api.podio.com"
+    PODIO_TIMEOUT: int = 10  # Request timeout (seconds)
+    PODIO_WEBHOOK_SECRET: Optional[str] = None  # Required ?token= on the webhook URL
+    PODIO_INGEST_BATCH_SIZE: int = 100  # Items per upsert
+    PODIO_INGEST_FLUSH_INTERVAL: float = 0.5  # Max seconds an item stays staged
+    PODIO_INGEST_MAX_PENDING: int = 10000  # Staging bound; webhook answers 503 beyond
+    PODIO_FETCH_CONCURRENCY: int = 10  # Parallel item fetches per batch
+    PODIO_INGEST_MAX_ATTEMPTS: int = 8  # Tries per item before it is given up (logged)
+    PODIO_INGEST_RETRY_DELAY: float = 2.0  # First retry delay; doubles per attempt, capped at 5 min
+    PODIO_REQUEUE_AFTER: int = 300  # Re-enqueue PENDING orders with no Celery task after this many seconds
+
+    # Perplexity API (market research)
+    PERPLEXITY_API_URL: str = "https://api.perplexity.ai"
+    PERPLEXITY_MODEL: str = "sonar"
+
+    # CEIDG API
+    CEIDG_API_URL: str = "https://dane.biznes.gov.pl/api/ceidg/v2"
+    CEIDG_TIMEOUT: int = 10  # Request timeout (seconds)
     
     # Celery Configuration
     CELERY_BROKER_URL: Optional[str] = None  # Defaults to REDIS_URL
     CELERY_RESULT_BACKEND: Optional[str] = None  # Defaults to REDIS_URL
     CELERY_TASK_TIME_LIMIT: int = 1800  # 30 minutes max per task
     CELERY_TASK_SOFT_TIME_LIMIT: int = 1500  # 25 minutes soft limit
+    CELERY_TASK_ALWAYS_EAGER: bool = False  # Run tasks inline (tests)
+    CELERY_IO_QUEUE: str = "io"  # CEIDG / research / bookkeeping tasks
+    CELERY_LLM_QUEUE: str = "llm"  # Long-running generation tasks
+    CELERY_IO_PRIORITY: int = 0  # Redis broker: 0 = highest, 9 = lowest
+    CELERY_LLM_PRIORITY: int = 5
+    CELERY_IO_TASK_TIME_LIMIT: int = 120  # Hard limit for I/O tasks (seconds)
     
     # LLM Configuration (Anthropic Claude)
     LLM_MODEL: str = "claude-sonnet-4-5-20241022"
@@ -50,29 +138,56 @@ class Settings(BaseSettings):
     LLM_TEMPERATURE: float = 0.7
     LLM_TIMEOUT: int = 60  # API call timeout (seconds)
     LLM_MAX_RETRIES: int = 3
+
+    # LLM Token Budget (shared by all workers via Redis)
+    LLM_BUDGET_ENABLED: bool = True
+    LLM_INPUT_TOKENS_PER_MINUTE: int = 400000  # Provider ITPM limit for the key
+    LLM_OUTPUT_TOKENS_PER_MINUTE: int = 80000  # Provider OTPM limit for the key
+    LLM_BUDGET_MAX_WAIT: int = 600  # Max seconds a call queues for budget
+
+    # LLM Pricing (USD per million tokens)
+    LLM_PRICE_INPUT_PER_MTOK: float = 3.0
+    LLM_PRICE_OUTPUT_PER_MTOK: float = 15.0
+    LLM_PRICE_CACHE_READ_PER_MTOK: float = 0.30
+    LLM_PRICE_CACHE_WRITE_PER_MTOK: float = 3.75
     
     # Cost Thresholds (USD)
     COST_ALERT_DAILY: float = 5.0  # Alert if daily cost exceeds this
     COST_ALERT_PER_PLAN: float = 0.50  # Alert if single plan costs more
     COST_TARGET_PER_PLAN: float = 0.30  # Target cost per biznesplan
+    COST_TIMEZONE: str = "Europe/Warsaw"  # Day boundaries for daily rollups
+    COST_LIMIT_DAILY: float = 0.0  # Defer new generations once daily cost reaches this (0 = no cap)
+    COST_BUDGET_RETRY_DELAY: int = 900  # Seconds before a deferred generation checks again
     
     # Prompt Caching
     PROMPT_CACHE_TTL: int = 300  # 5 minutes (Anthropic default)
     PROMPT_CACHE_HIT_RATE_TARGET: float = 0.80  # Target 80% cache hit rate
     
+    # Plan Export (HTML/PDF)
+    EXPORT_CACHE_DIR: str = "/tmp/biznesplan-export"  # Rendered files (shared by workers)
+    EXPORT_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # LRU eviction above this
+    EXPORT_CHUNK_SIZE: int = 64 * 1024  # Streaming chunk size
+
     # Business Plan Generation
     BIZNESPLAN_TARGET_PAGES: int = 27  # Target: 25-30 pages
     BIZNESPLAN_MIN_SOURCES: int = 3  # Minimum sources per market claim
     BIZNESPLAN_MAX_ITERATIONS: int = 3  # Max refinement iterations
     BIZNESPLAN_QUALITY_THRESHOLD: float = 0.85  # Reviewer approval threshold
+    BIZNESPLAN_SECTION_CONCURRENCY: int = 4  # Max sections generated in parallel
+    BIZNESPLAN_REVIEW_ENABLED: bool = True  # Review and refine generated plans
+    BIZNESPLAN_REVIEW_MAX_TOKENS: int = 1500  # Max tokens per reviewer response
+    BIZNESPLAN_REVIEW_INCREMENTAL: bool = True  # Re-review only sections whose content changed
     
     # API Rate Limiting
-    RATE_LIMIT_GENERATION: str = "10/minute"  # Max 10 generation requests per minute
+    RATE_LIMIT_GENERATION: str = "10/minute"  # POST /api/orders/{id}/regenerate
     RATE_LIMIT_API: str = "100/minute"  # Max 100 API calls per minute
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory (single worker) / redis (multi-worker)
+    RATE_LIMIT_TRUST_FORWARDED: bool = False  # Use X-Forwarded-For (behind a proxy)
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
-    ADMIN_USERNAME: str = "admin"
+    ADMIN_USERNAME: str = "admin"  # HTTP Basic for admin endpoints (regenerate)
     ADMIN_PASSWORD: str = "change-this-password"
     ALLOWED_HOSTS: list[str] = ["*"]  # Configure for production
     
@@ -85,6 +200,19 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
         case_sensitive = False
     
+    def configured(self, integration: str) -> bool:
+        """True if every setting the integration needs is set"""
+        return not self._missing(integration)
+
+    def require(self, integration: str) -> None:
+        """Raise MissingSettingsError unless the integration is configured"""
+        missing = self._missing(integration)
+        if missing:
+            raise MissingSettingsError(f"{integration} integration needs {', '.join(missing)}")
+
+    def _missing(self, integration: str) -> list[str]:
+        return [name for name in INTEGRATION_SETTINGS[integration] if not getattr(self, name)]
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         # Set Celery URLs to Redis if not specified
@@ -0,0 +1,36 @@
+"""
+Test configuration: a throwaway SQLite database and dummy credentials, set
+before anything imports config.settings (same defaults as benchmarks/).
+"""
+
+import os
+import tempfile
+
+import pytest_asyncio
+
+_TEST_ENV = {
+    "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='biznesplan-tests-'), 'test.sqlite')}",
+    "CEIDG_API_KEY": "test",
+    "PODIO_APP_ID": "test",
+    "PODIO_APP_TOKEN": "test",
+    "PODIO_WORKSPACE_ID": "test",
+    "ANTHROPIC_API_KEY": "test",
+    "PERPLEXITY_API_KEY": "test",
+    "PROGRESS_BROKER": "memory",
+}
+
+for _key, _value in _TEST_ENV.items():
+    os.environ.setdefault(_key, _value)
+
+
+@pytest_asyncio.fixture
+async def database():
+    """Freshly created tables on the test database; yields the engine"""
+    import app.models  # noqa: F401  (register models with Base)
+    from config.database import Base, engine
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()  # Pooled connections belong to this test's event loop
@@ -0,0 +1,106 @@
+"""CEIDG lookups through the two-tier cache (fakeredis + a stub registry)"""
+
+import asyncio
+import threading
+
+import fakeredis
+import fakeredis.aioredis
+import httpx
+import pytest
+
+from app.services.cache import TwoTierCache
+from app.services.ceidg import CEIDGClient, CEIDGNotFoundError, CEIDGService
+from app.utils.redis import LoopBoundRedis
+
+NIP = "5260250274"
+FIRM = {"nazwa": "Firma Testowa", "wlasciciel": {"nip": NIP}, "pkdGlowny": {"kod": "6201Z", "nazwa": "Programowanie"}}
+
+
+class Registry:
+    """Stub CEIDG API counting requests"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        if request.url.params["nip"] != NIP:
+            return httpx.Response(404)
+        return httpx.Response(200, json={"firma": [FIRM]})
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def service(server, registry: Registry) -> CEIDGService:
+    """A worker process: its own local tier, the shared Redis"""
+    cache = TwoTierCache("ceidg", ttl=3600, redis=fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+    return CEIDGService(CEIDGClient(base_url="http://ceidg.test", transport=httpx.MockTransport(registry)), cache)
+
+
+@pytest.mark.asyncio
+async def test_tiers(server):
+    registry = Registry()
+    first, second = service(server, registry), service(server, registry)
+
+    entry = await first.lookup(NIP)
+    assert entry["firma"] == FIRM
+    assert await first.lookup(f"PL {NIP}") == entry
+    assert (first.stats.loads, first.stats.local_hits) == (1, 1)
+
+    assert await second.lookup(NIP) == entry  # Other process: from Redis
+    assert await second.lookup(NIP) == entry  # Then from its local tier
+    assert (second.stats.loads, second.stats.redis_hits, second.stats.local_hits) == (0, 1, 1)
+    assert registry.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_request(server):
+    registry = Registry(delay=0.05)
+    ceidg = service(server, registry)
+
+    entries = await asyncio.gather(*(ceidg.lookup(NIP) for _ in range(20)))
+    assert all(entry == entries[0] for entry in entries)
+    assert registry.requests == 1
+    assert (ceidg.stats.loads, ceidg.stats.coalesced) == (1, 19)
+
+
+@pytest.mark.asyncio
+async def test_not_found_is_not_cached(server):
+    registry = Registry(delay=0.05)
+    ceidg = service(server, registry)
+
+    results = await asyncio.gather(*(ceidg.lookup("1234563218") for _ in range(5)), return_exceptions=True)
+    assert all(isinstance(result, CEIDGNotFoundError) for result in results)
+    with pytest.raises(CEIDGNotFoundError):
+        await ceidg.lookup("1234563218")
+    assert registry.requests == 2
+
+
+def test_one_client_per_event_loop(server):
+    redis = LoopBoundRedis(lambda: fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+
+    async def use(key: str):
+        await redis.set(key, "1")
+        assert await redis.get(key) == "1"
+        assert redis.client() is redis.client()
+        return redis.client()
+
+    clients = [asyncio.run(use("main"))]
+    thread = threading.Thread(target=lambda: clients.append(asyncio.run(use("thread"))))
+    thread.start()
+    thread.join()
+    assert len(clients) == 2 and clients[0] is not clients[1]
+    assert len(redis._clients) == 1  # The first loop's client was dropped with its loop
+
+
+def test_scripts_run_on_the_current_loop(server):
+    redis = LoopBoundRedis(lambda: fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+    script = redis.register_script("return redis.call('INCR', KEYS[1])")
+
+    assert asyncio.run(script(keys=["counter"])) == 1
+    assert asyncio.run(script(keys=["counter"])) == 2
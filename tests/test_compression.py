@@ -0,0 +1,93 @@
+"""Compressed Text/JSON columns round-trip, including short values, legacy plain rows and NULL"""
+
+import json
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import Column, Integer, MetaData, Table, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.models.types import CompressedJSON, CompressedText
+from app.utils import compression
+from app.utils.compression import ZSTD_MAGIC, ZstdCodec, train_dictionary
+
+PLAN = "## Analiza rynku\n\nRynek usług IT w województwie mazowieckim rośnie o 8% rocznie. " * 200
+RAW = {"firma": [{"nazwa": "Firma Testowa Sp. z o.o.", "pkd": [f"62.0{i}.Z" for i in range(9)]}] * 10}
+
+metadata = MetaData()
+documents = Table(
+    "documents", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("text", CompressedText),
+    Column("data", CompressedJSON),
+)
+raw_documents = Table(  # The same table as stored bytes
+    "documents", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("text", CompressedText.impl),
+    Column("data", CompressedJSON.impl),
+)
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'documents.sqlite'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+async def store(engine, **values) -> tuple[tuple, tuple]:
+    """Write through the compressed types; returns (read back, stored bytes)"""
+    async with engine.begin() as conn:
+        row_id = (await conn.execute(insert(documents).returning(documents.c.id), [values])).scalar_one()
+        loaded = (await conn.execute(select(documents.c.text, documents.c.data).where(documents.c.id == row_id))).one()
+        stored = (await conn.execute(
+            select(raw_documents.c.text, raw_documents.c.data).where(raw_documents.c.id == row_id)
+        )).one()
+    return tuple(loaded), tuple(stored)
+
+
+@pytest.mark.asyncio
+async def test_large_values_are_compressed(engine):
+    (text, data), (stored_text, stored_data) = await store(engine, text=PLAN, data=RAW)
+    assert (text, data) == (PLAN, RAW)
+    assert stored_text.startswith(ZSTD_MAGIC) and len(stored_text) < len(PLAN.encode()) / 10
+    assert stored_data.startswith(ZSTD_MAGIC)
+
+
+@pytest.mark.asyncio
+async def test_small_values_are_stored_plain(engine):
+    (text, data), (stored_text, stored_data) = await store(engine, text="Źle", data={"nip": "5260250274"})
+    assert (text, data) == ("Źle", {"nip": "5260250274"})
+    assert stored_text == "Źle".encode()
+    assert stored_data == b'{"nip":"5260250274"}'
+
+
+@pytest.mark.asyncio
+async def test_legacy_plain_rows_read_back(engine):
+    """Rows written as plain UTF-8 before compression, however large"""
+    async with engine.begin() as conn:
+        await conn.execute(insert(raw_documents), [{"text": PLAN.encode(), "data": json.dumps(RAW).encode()}])
+        assert tuple((await conn.execute(select(documents.c.text, documents.c.data))).one()) == (PLAN, RAW)
+
+
+@pytest.mark.asyncio
+async def test_null(engine):
+    assert await store(engine, text=None, data=None) == ((None, None), (None, None))
+
+
+def test_dictionary_frames(monkeypatch):
+    samples = [f'{{"nazwa":"Firma {i}","nip":"{5260250274 + i}","pkd":"62.0{i % 9}.Z"}}'.encode() for i in range(500)]
+    codec = ZstdCodec(dictionary=train_dictionary(samples, size=4096))
+    plain = ZstdCodec()
+    value = samples[0] * 20
+
+    assert codec.decompress(codec.compress(value)) == value
+    assert codec.decompress(plain.compress(value)) == value  # Frames without a dictionary decode anywhere
+    with pytest.raises(ValueError, match="dictionary"):
+        plain.decompress(codec.compress(value))
+
+    monkeypatch.setattr(compression, "_codec", codec)
+    assert compression.unpack(compression.pack(value)) == value
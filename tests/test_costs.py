@@ -0,0 +1,48 @@
+"""COST_ALERT_DAILY only alerts; generations are deferred only past an opt-in COST_LIMIT_DAILY"""
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.services.costs import cost_summary, is_over_daily_budget, record_llm_call
+from app.services.llm import LLMResponse, TokenUsage
+from config.settings import settings
+
+
+async def spend(engine, calls: int) -> None:
+    """Record `calls` calls of $1 each"""
+    response = LLMResponse(text="", usage=TokenUsage(input_tokens=1_000_000), duration_seconds=1.0, model="test")
+    async with async_sessionmaker(engine)() as session:
+        for _ in range(calls):
+            await record_llm_call(session, response, "summary")
+        await session.commit()
+
+
+@pytest.fixture(autouse=True)
+def prices(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PRICE_INPUT_PER_MTOK", 1.0)
+    monkeypatch.setattr(settings, "COST_ALERT_DAILY", 2.0)
+
+
+@pytest.mark.asyncio
+async def test_alert_does_not_defer_by_default(database):
+    await spend(database, 3)
+    async with async_sessionmaker(database)() as session:
+        assert not await is_over_daily_budget(session)
+        summary = await cost_summary(session)
+    assert summary["over_daily_alert"]
+    assert summary["daily_limit_usd"] is None
+    assert not summary["over_daily_budget"]
+
+
+@pytest.mark.asyncio
+async def test_limit_defers_once_reached(database, monkeypatch):
+    monkeypatch.setattr(settings, "COST_LIMIT_DAILY", 3.0)
+    await spend(database, 2)
+    async with async_sessionmaker(database)() as session:
+        assert not await is_over_daily_budget(session)
+    await spend(database, 1)
+    async with async_sessionmaker(database)() as session:
+        assert await is_over_daily_budget(session)
+        summary = await cost_summary(session)
+    assert summary["daily_limit_usd"] == 3.0
+    assert summary["over_daily_budget"]
@@ -0,0 +1,126 @@
+"""Heavy plan/CEIDG columns stay out of list and detail queries and load only when asked for"""
+
+import httpx
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models import Biznesplan, CEIDGData, Order
+from app.services.orders import (
+    WITH_CEIDG_RAW,
+    WITH_PLAN_CONTENT,
+    WITH_PLAN_LOGS,
+    get_ceidg_raw_response,
+    get_plan_content,
+    get_plan_logs,
+)
+from benchmarks.fakes import fake_generator_logs, fake_plan_markdown
+from benchmarks.order_detail import seed
+from config.settings import settings
+
+HEAVY = ("content_markdown", "generator_logs", "reviewer_logs", "raw_response")
+
+
+class Statements:
+    """SQL sent to the database while active"""
+
+    def __init__(self, engine):
+        self.engine = engine.sync_engine
+        self.sql: list[str] = []
+
+    def _record(self, conn, cursor, statement, *args):
+        self.sql.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    def heavy(self) -> set[str]:
+        """Heavy columns any statement selected"""
+        return {column for column in HEAVY for sql in self.sql if column in sql}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path, heavy", [
+    ("/api/orders?limit=50", set()),
+    ("/api/orders/{id}?profile=summary", set()),
+    ("/api/orders/{id}?profile=detail", set()),
+    ("/api/orders/{id}?profile=full", {"content_markdown"}),  # The plan text is what "full" is for
+])
+async def test_endpoints_select_only_what_they_show(database, monkeypatch, path, heavy):
+    from app.main import create_app
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    order_id, = await seed(1, 3)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://test") as client:
+        with Statements(database) as statements:
+            response = await client.get(path.format(id=order_id))
+    assert response.status_code == 200
+    assert statements.heavy() == heavy
+    assert "generator_logs" not in response.text and "raw_response" not in response.text
+
+
+@pytest.mark.asyncio
+async def test_relationships_defer_heavy_columns(database):
+    order_id, = await seed(1, 0)
+    async with async_sessionmaker(database, expire_on_commit=False)() as session:
+        with Statements(database) as statements:
+            order = await session.get(Order, order_id)
+            plan = await order.awaitable_attrs.biznesplan
+            ceidg = await order.awaitable_attrs.ceidg_data
+        assert statements.heavy() == set()
+        assert plan.status == "approved" and ceidg.nazwa_firmy == "Firma 0"
+
+        with Statements(database) as statements:
+            content = await plan.awaitable_attrs.content_markdown
+        assert statements.heavy() == {"content_markdown"}  # Its own group, one query
+        assert len(statements.sql) == 1 and content == fake_plan_markdown(0)
+
+        with Statements(database) as statements:
+            assert await plan.awaitable_attrs.generator_logs == fake_generator_logs()
+            assert await plan.awaitable_attrs.reviewer_logs == fake_generator_logs()
+        assert statements.heavy() == {"generator_logs", "reviewer_logs"} and len(statements.sql) == 1
+
+        with Statements(database) as statements:
+            assert await ceidg.awaitable_attrs.raw_response == {"firma": []}
+        assert statements.heavy() == {"raw_response"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("option, loaded", [
+    (WITH_PLAN_CONTENT, {"content_markdown"}),
+    (WITH_PLAN_LOGS, {"generator_logs", "reviewer_logs"}),
+    (WITH_CEIDG_RAW, {"raw_response"}),
+])
+async def test_loader_options(database, option, loaded):
+    order_id, = await seed(1, 0)
+    async with async_sessionmaker(database, expire_on_commit=False)() as session:
+        with Statements(database) as statements:
+            order = await session.scalar(select(Order).where(Order.id == order_id).options(option))
+        assert statements.heavy() == loaded
+
+        target = order.ceidg_data if "raw_response" in loaded else order.biznesplan
+        with Statements(database) as statements:
+            for column in loaded:
+                assert getattr(target, column) is not None  # No further query
+        assert statements.sql == []
+
+
+@pytest.mark.asyncio
+async def test_accessors_select_one_column(database):
+    order_id, = await seed(1, 0)
+    async with async_sessionmaker(database)() as session:
+        with Statements(database) as statements:
+            assert await get_plan_content(session, order_id) == fake_plan_markdown(0)
+            assert await get_plan_logs(session, order_id) == (fake_generator_logs(), fake_generator_logs())
+            assert await get_ceidg_raw_response(session, order_id) == {"firma": []}
+            assert await get_plan_content(session, order_id + 1) is None
+        assert len(statements.sql) == 4
+        assert not any("biznesplans.status" in sql or "ceidg_data.nazwa_firmy" in sql for sql in statements.sql)
+
+        plan = await session.scalar(select(Biznesplan).where(Biznesplan.order_id == order_id))
+        ceidg = await session.scalar(select(CEIDGData).where(CEIDGData.order_id == order_id))
+        assert not set(HEAVY) & (plan.__dict__.keys() | ceidg.__dict__.keys())  # Not loaded with the rows
@@ -0,0 +1,51 @@
+"""Plan export renders untrusted Markdown without passing HTML or script URLs through"""
+
+import pytest
+
+from app.services.export import is_safe_url, render_html
+
+
+def body(markdown_text: str) -> str:
+    page = render_html(markdown_text).decode("utf-8")
+    return page[page.index("<body>"):page.index("</body>")]
+
+
+@pytest.mark.parametrize("markdown_text", [
+    "<script>alert(1)</script>",
+    "Tekst <img src=x onerror=alert(1)> dalej",
+    '<div onclick="alert(1)">blok</div>',
+    "| a |\n|---|\n| <iframe src=x></iframe> |",
+])
+def test_raw_html_is_escaped(markdown_text):
+    html = body(markdown_text)
+    assert "<script" not in html and "<img" not in html and "<div" not in html and "<iframe" not in html
+    assert "&lt;" in html
+
+
+@pytest.mark.parametrize("url", [
+    "javascript:alert(1)",
+    "JaVaScRiPt:alert(1)",
+    "java\tscript:alert(1)",
+    "&#106;avascript:alert(1)",
+    "data:text/html;base64,PHNjcmlwdD4=",
+    "vbscript:msgbox",
+])
+def test_unsafe_urls_are_dropped(url):
+    assert not is_safe_url(url)
+    html = body(f"[link]({url}) ![image]({url})")
+    assert 'href=""' in html and 'src=""' in html
+
+
+@pytest.mark.parametrize("url", ["https://example.com/a?b=1", "http://example.com", "mailto:biuro@example.com",
+                                 "#sekcja", "/relative/path", "plik.pdf"])
+def test_safe_urls_are_kept(url):
+    assert is_safe_url(url)
+    assert f'href="{url}"' in body(f"[link]({url})")
+
+
+def test_markdown_still_renders():
+    html = body("# Biznesplan\n\n## Analiza\n\n**ważne**\n\n| a | b |\n|---|---|\n| 1 | 2 |\n\n```\n<b>kod</b>\n```")
+    assert '<h2 id="analiza">Analiza</h2>' in html
+    assert "<strong>ważne</strong>" in html
+    assert "<td>1</td>" in html
+    assert "&lt;b&gt;kod&lt;/b&gt;" in html
@@ -0,0 +1,85 @@
+"""Revisions in one refinement round see the same sections, whichever finishes first"""
+
+import json
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models import Biznesplan, CEIDGData, Order, ResearchResult
+from app.services import generator
+from app.services.generator import generate_biznesplan
+from app.services.llm import LLMResponse, TokenUsage
+from app.services import log_sink
+from app.services.log_sink import ProcessLogSink
+from app.services.prompts import SECTION_INSTRUCTIONS
+from app.services.reviewer import REVIEW_HEADING
+from app.services.section_scheduler import BIZNESPLAN_SECTIONS, SectionScheduler
+
+FLAGGED = ("Analiza rynku", "Plan marketingowy")  # Plan marketingowy is written from Analiza rynku
+PASS = {"score": 0.95, "issues": [], "feedback": ""}
+FAIL = {"score": 0.5, "issues": [{"issue": "Brak źródeł", "severity": "major"}], "feedback": ""}
+
+
+class PlanLLM:
+    """
+    Sections answer "<key> v1", revisions "<key> v2"; flagged v1 sections
+    fail review. Nothing suspends, so (with the ledger stubbed out) a
+    revision completes before the next one in the round starts.
+    """
+
+    def __init__(self):
+        self.revisions: dict[str, list[dict]] = {}
+
+    async def complete(self, request: dict, priority=None) -> LLMResponse:
+        blocks = request["messages"][0]["content"]
+        task = blocks[-1]["text"]
+        if task.startswith(REVIEW_HEADING):
+            shown = blocks[-2]["text"]
+            failed = any(shown.startswith(f"# Sekcja: {title}\n") for title in FLAGGED) and shown.endswith(" v1")
+            text = json.dumps(FAIL if failed else PASS)
+        else:
+            key = next(
+                spec.key for spec in BIZNESPLAN_SECTIONS
+                if task.startswith(f"# Zadanie\n\n{SECTION_INSTRUCTIONS.get(spec.key, f'Napisz sekcję: {spec.title}.')}")
+            )
+            if "## Uwagi recenzenta" in task:
+                self.revisions.setdefault(key, []).append(request)
+                text = f"{key} v2"
+            else:
+                text = f"{key} v1"
+        return LLMResponse(text, TokenUsage(input_tokens=100, output_tokens=20), 0.0, "claude-test")
+
+
+@pytest.mark.asyncio
+async def test_revisions_use_the_sections_of_their_round(database, monkeypatch):
+    async def log_llm_call(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(generator, "log_llm_call", log_llm_call)
+    session_factory = async_sessionmaker(database, expire_on_commit=False)
+    async with session_factory() as session:
+        order = Order(podio_item_id="gen", nip="5260250274", imie_nazwisko="Jan Kowalski")
+        order.ceidg_data = CEIDGData(nip=order.nip, nazwa_firmy="Firma Testowa", pkd_glowny="62.01.Z")
+        order.research_result = ResearchResult(market_data={"trends": "Rynek rośnie."}, swot_data={}, sources=[])
+        session.add(order)
+        await session.commit()
+
+    llm = PlanLLM()
+    sink = ProcessLogSink(session_factory)  # Bound to this test's loop, not the process-wide one
+    monkeypatch.setattr(log_sink, "_sink", sink)
+    await sink.start()
+    try:
+        plan_id = await generate_biznesplan(order.id, session_factory, llm=llm, scheduler=SectionScheduler())
+    finally:
+        await sink.stop()
+
+    assert set(llm.revisions) == {"analiza_rynku", "plan_marketingowy"}
+    marketing_upstream = [block["text"] for block in llm.revisions["plan_marketingowy"][0]["messages"][0]["content"]]
+    assert "# Sekcja: Analiza rynku\n\nanaliza_rynku v1" in marketing_upstream
+
+    async with session_factory() as session:
+        plan = await session.scalar(select(Biznesplan).where(Biznesplan.id == plan_id))
+        document = await session.scalar(select(Biznesplan.content_markdown).where(Biznesplan.id == plan_id))
+    assert plan.status == "approved" and plan.iterations == 1
+    assert "analiza_rynku v2" in document and "plan_marketingowy v2" in document
@@ -0,0 +1,77 @@
+"""JSON array lookups: json_each on SQLite, JSONB containment on PostgreSQL"""
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models import Biznesplan, CEIDGData, Order
+from app.services.orders import _pkd_condition, orders_offering, orders_with_secondary_pkd, plans_with_issue_in
+
+POSTGRES = SimpleNamespace(bind=SimpleNamespace(dialect=postgresql.dialect()))
+
+
+async def seed(engine) -> dict[str, int]:
+    """Orders a (62.01.Z, 62.02.Z), b (62.09.Z) and c (no CEIDG data); returns their ids"""
+    async with engine.begin() as conn:
+        ids = (await conn.execute(insert(Order).returning(Order.id, sort_by_parameter_order=True), [
+            {"podio_item_id": name, "nip": "1234567890", "imie_nazwisko": "Jan", "uslugi": services}
+            for name, services in [("a", ["Software Development", "QA"]), ("b", ["QA"]), ("c", None)]
+        ])).scalars().all()
+        orders = dict(zip("abc", ids))
+        await conn.execute(insert(CEIDGData), [
+            {"order_id": orders["a"], "nip": "1234567890", "nazwa_firmy": "A",
+             "pkd_pozostale": [{"kod": "62.01.Z", "nazwa": "Programowanie"}, {"kod": "62.02.Z", "nazwa": None}]},
+            {"order_id": orders["b"], "nip": "1234567890", "nazwa_firmy": "B",
+             "pkd_pozostale": [{"kod": "62.09.Z", "nazwa": None}]},
+        ])
+        await conn.execute(insert(Biznesplan), [
+            {"order_id": orders["a"], "final_issues": [{"section": "analiza_rynku", "issue": "Brak danych"}]},
+            {"order_id": orders["b"], "final_issues": []},
+        ])
+    return orders
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kod, expected", [
+    ("62.01.Z", "a"),
+    ("6201Z", "a"),
+    ("62.01", "a"),
+    ("62", "ba"),
+    ("62.1", ""),
+    ("47.11.Z", ""),
+])
+async def test_secondary_pkd_on_sqlite(database, kod, expected):
+    orders = await seed(database)
+    async with async_sessionmaker(database)() as db:
+        found = await orders_with_secondary_pkd(db, kod)
+    assert [order.id for order in found] == [orders[name] for name in expected]
+
+
+@pytest.mark.asyncio
+async def test_issue_and_service_lookups_on_sqlite(database):
+    orders = await seed(database)
+    async with async_sessionmaker(database)() as db:
+        assert [plan.order_id for plan in await plans_with_issue_in(db, "analiza_rynku")] == [orders["a"]]
+        assert await plans_with_issue_in(db, "swot") == []
+        assert [order.id for order in await orders_offering(db, "QA")] == [orders["b"], orders["a"]]
+        assert await orders_offering(db, "Software") == []
+
+
+def compiled(condition):
+    return condition.compile(dialect=postgresql.dialect())
+
+
+def test_full_pkd_code_uses_containment_on_postgresql():
+    sql = compiled(_pkd_condition(POSTGRES, "6201Z"))
+    assert str(sql) == "ceidg_data.pkd_pozostale @> %(param_1)s::JSONB"
+    assert sql.params == {"param_1": [{"kod": "62.01.Z"}]}
+
+
+def test_pkd_class_uses_jsonpath_on_postgresql():
+    sql = compiled(_pkd_condition(POSTGRES, "62.01"))
+    assert str(sql).startswith("jsonb_path_exists(ceidg_data.pkd_pozostale, CAST(")
+    assert "starts with $prefix" in next(value for value in sql.params.values() if "$[*]" in str(value))
+    assert {"62.01", "62.01."} <= set(sql.params.values())
@@ -0,0 +1,86 @@
+"""The app lifespan stops whatever it started, in reverse order, however startup or serving ends"""
+
+import asyncio
+
+import pytest
+
+from app import main
+from app.services import podio_ingest
+
+
+class Resource:
+    """Stub service recording start/stop calls in a shared list"""
+
+    def __init__(self, name: str, calls: list, fail: bool = False):
+        self.name = name
+        self.calls = calls
+        self.fail = fail
+
+    async def start(self) -> None:
+        self.calls.append(f"start {self.name}")
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed")
+
+    async def stop(self) -> None:
+        self.calls.append(f"stop {self.name}")
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    async def init_db():
+        calls.append("init_db")
+
+    async def close_db():
+        calls.append("close_db")
+
+    monkeypatch.setattr(main, "init_db", init_db)
+    monkeypatch.setattr(main, "close_db", close_db)
+    for name, getter in (("broker", "get_broker"), ("sink", "get_log_sink"), ("monitor", "get_readiness_monitor")):
+        resource = Resource(name, calls)
+        monkeypatch.setattr(main, getter, lambda resource=resource: resource)
+    ingestor = Resource("ingestor", calls)
+    monkeypatch.setattr(podio_ingest, "_ingestor", ingestor)
+    monkeypatch.setattr(main.settings, "PODIO_APP_ID", "test")  # Podio enabled
+    return calls
+
+
+STARTED = ["init_db", "start broker", "start sink", "start monitor", "start ingestor"]
+STOPPED = ["stop ingestor", "stop monitor", "stop sink", "stop broker", "close_db"]
+
+
+@pytest.mark.asyncio
+async def test_clean_shutdown(calls):
+    app = main.create_app()
+    async with app.router.lifespan_context(app):
+        assert calls == STARTED
+    assert calls == STARTED + STOPPED
+
+
+@pytest.mark.asyncio
+async def test_failed_start_stops_what_started(calls, monkeypatch):
+    monkeypatch.setattr(main, "get_readiness_monitor", lambda: Resource("monitor", calls, fail=True))
+    app = main.create_app()
+    with pytest.raises(RuntimeError, match="monitor failed"):
+        async with app.router.lifespan_context(app):
+            pass
+    assert calls == ["init_db", "start broker", "start sink", "start monitor", "stop sink", "stop broker", "close_db"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_while_serving(calls):
+    app = main.create_app()
+    serving = asyncio.Event()
+
+    async def serve():
+        async with app.router.lifespan_context(app):
+            serving.set()
+            await asyncio.Event().wait()
+
+    task = asyncio.create_task(serve())
+    await serving.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert calls == STARTED + STOPPED
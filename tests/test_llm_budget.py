@@ -0,0 +1,107 @@
+"""TokenBudget against fakeredis (Lua scripts run through lupa)"""
+
+import asyncio
+
+import fakeredis.aioredis
+import pytest
+
+from app.services.llm_budget import BudgetTimeoutError, LLMPriority, TokenBudget
+
+CAPACITY = 1000
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.aioredis.FakeRedis()
+
+
+def budget(redis) -> TokenBudget:
+    return TokenBudget(redis, input_per_minute=CAPACITY, output_per_minute=CAPACITY, max_poll_interval=0.01)
+
+
+async def tokens(redis) -> tuple[float, float]:
+    bucket = await redis.hgetall("llm_budget:bucket")
+    return float(bucket[b"in"]), float(bucket[b"out"])
+
+
+async def waiting(redis, task: asyncio.Task) -> None:
+    """Let `task` queue its ticket and poll a few times"""
+    for _ in range(5):
+        await asyncio.sleep(0.02)
+    assert not task.done()
+
+
+@pytest.mark.asyncio
+async def test_reserve_and_settle(redis):
+    tokens_budget = budget(redis)
+    reservation = await tokens_budget.reserve(300, 200)
+    assert await tokens(redis) == pytest.approx((700, 800), abs=1)
+    assert await redis.zcard("llm_budget:queue") == 0
+
+    await tokens_budget.settle(reservation, 100, 250)  # Refund 200 input, charge 50 output
+    assert await tokens(redis) == pytest.approx((900, 750), abs=1)
+
+
+@pytest.mark.asyncio
+async def test_waits_and_times_out_when_empty(redis):
+    tokens_budget = budget(redis)
+    await tokens_budget.reserve(CAPACITY, 1)
+    with pytest.raises(BudgetTimeoutError):
+        await tokens_budget.reserve(CAPACITY, 1, timeout=0.05)
+    assert await redis.zcard("llm_budget:queue") == 0  # Ticket withdrawn
+
+
+@pytest.mark.asyncio
+async def test_serves_higher_priority_first(redis):
+    tokens_budget = budget(redis)
+    held = await tokens_budget.reserve(CAPACITY, 1)
+
+    background = asyncio.create_task(tokens_budget.reserve(CAPACITY, 1, LLMPriority.BACKGROUND))
+    await waiting(redis, background)
+    interactive = asyncio.create_task(tokens_budget.reserve(CAPACITY, 1, LLMPriority.INTERACTIVE))
+    await waiting(redis, interactive)
+
+    await tokens_budget.release(held)
+    first = await interactive
+    await waiting(redis, background)
+
+    await tokens_budget.release(first)
+    await background
+
+
+@pytest.mark.asyncio
+async def test_other_pollers_keep_a_new_ticket_queued(redis):
+    """A poll landing between queueing and the first deadline must not evict the ticket"""
+    interactive_budget, background_budget = budget(redis), budget(redis)
+    held = await interactive_budget.reserve(CAPACITY, 1)
+
+    background_polled = asyncio.Event()
+    background_script = background_budget._reserve
+
+    async def background_reserve(**kwargs):
+        result = await background_script(**kwargs)
+        background_polled.set()
+        return result
+
+    background_budget._reserve = background_reserve
+
+    interactive_script = interactive_budget._reserve
+
+    async def interactive_reserve(**kwargs):
+        await background_polled.wait()
+        return await interactive_script(**kwargs)
+
+    interactive_budget._reserve = interactive_reserve
+
+    interactive = asyncio.create_task(interactive_budget.reserve(CAPACITY, 1, LLMPriority.INTERACTIVE))
+    await asyncio.sleep(0)
+    background = asyncio.create_task(background_budget.reserve(CAPACITY, 1, LLMPriority.BACKGROUND))
+    await waiting(redis, interactive)
+    assert await redis.zcard("llm_budget:queue") == 2
+
+    await interactive_budget.release(held)
+    first = await asyncio.wait_for(interactive, 1)
+    assert not background.done()
+
+    await interactive_budget.release(first)
+    await background
@@ -0,0 +1,91 @@
+"""LLMClient keeps working when the Redis token budget does not"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.llm import LLMClient
+from app.services.llm_budget import BudgetTimeoutError, Reservation
+
+
+class Messages:
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.calls = 0
+
+    async def create(self, **request):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(
+            content=[SimpleNamespace(type="text", text="odpowiedź")],
+            usage=SimpleNamespace(input_tokens=10, output_tokens=5),
+            model=request["model"],
+        )
+
+
+class Budget:
+    """TokenBudget stand-in whose Redis calls can be made to fail"""
+
+    def __init__(self, fail_reserve=None, fail_settle=False):
+        self.fail_reserve = fail_reserve
+        self.fail_settle = fail_settle
+        self.settled = []
+
+    async def reserve(self, input_tokens, output_tokens, priority):
+        if self.fail_reserve is not None:
+            raise self.fail_reserve
+        return Reservation("ticket", input_tokens, output_tokens, 0.0)
+
+    async def settle(self, reservation, input_tokens, output_tokens):
+        if self.fail_settle:
+            raise ConnectionError("redis down")
+        self.settled.append((input_tokens, output_tokens))
+
+    async def release(self, reservation):
+        await self.settle(reservation, 0, 0)
+
+
+def client(budget: Budget, messages: Messages) -> LLMClient:
+    llm = LLMClient(api_key="test", budget=budget)
+    llm._client = SimpleNamespace(messages=messages)
+    return llm
+
+
+REQUEST = {"model": "claude-test", "max_tokens": 100, "messages": [{"role": "user", "content": "Cześć"}]}
+
+
+@pytest.mark.asyncio
+async def test_settles_real_usage():
+    budget = Budget()
+    response = await client(budget, Messages()).complete(REQUEST)
+    assert response.text == "odpowiedź"
+    assert budget.settled == [(10, 5)]
+
+
+@pytest.mark.asyncio
+async def test_calls_unbudgeted_when_reserve_fails():
+    messages = Messages()
+    response = await client(Budget(fail_reserve=ConnectionError("redis down")), messages).complete(REQUEST)
+    assert response.text == "odpowiedź"
+    assert messages.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_budget_timeout_still_raises():
+    messages = Messages()
+    with pytest.raises(BudgetTimeoutError):
+        await client(Budget(fail_reserve=BudgetTimeoutError("busy")), messages).complete(REQUEST)
+    assert messages.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_settle_returns_response():
+    response = await client(Budget(fail_settle=True), Messages()).complete(REQUEST)
+    assert response.usage.output_tokens == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_release_keeps_api_error():
+    with pytest.raises(ValueError, match="api error"):
+        await client(Budget(fail_settle=True), Messages(ValueError("api error"))).complete(REQUEST)
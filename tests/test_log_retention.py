@@ -0,0 +1,117 @@
+"""Process log retention on an unpartitioned table: expired months are rolled up, then deleted"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models import LogLevel, Order, ProcessLog, ProcessLogSummary
+from app.services import log_retention
+from app.services.log_retention import (
+    add_months,
+    create_partition_sql,
+    maintain_process_logs,
+    order_timeline,
+    partition_name,
+    retention_cutoff,
+)
+
+NOW = datetime(2026, 10, 17, 9, 30, tzinfo=timezone.utc)  # Cutoff with 3 months kept: 2026-07-01
+
+
+def at(month: int, day: int, minute: int = 0) -> datetime:
+    return datetime(2026, month, day, 10, minute, tzinfo=timezone.utc)
+
+
+# (month, day, minute, phase, level)
+OLD_ORDER_LOGS = [
+    (5, 3, 0, "fetching_ceidg", LogLevel.INFO),
+    (5, 3, 1, "research", LogLevel.INFO),
+    (5, 3, 2, "research", LogLevel.WARNING),
+    (5, 3, 5, "generating", LogLevel.INFO),
+    (6, 20, 0, "generating", LogLevel.ERROR),  # Retried a month later
+    (6, 20, 4, "reviewing", LogLevel.INFO),
+    (9, 1, 0, "reviewing", LogLevel.INFO),  # Within retention
+    (9, 1, 3, "completed", LogLevel.INFO),
+]
+NEW_ORDER_LOGS = [(10, 1, 0, "research", LogLevel.INFO), (10, 1, 2, "completed", LogLevel.INFO)]
+
+
+async def seed(engine) -> tuple[int, int]:
+    async with engine.begin() as conn:
+        old_id, new_id = (await conn.execute(
+            insert(Order).returning(Order.id, sort_by_parameter_order=True),
+            [{"podio_item_id": name, "nip": "1234567890", "imie_nazwisko": "Jan"} for name in ("old", "new")],
+        )).scalars().all()
+        await conn.execute(insert(ProcessLog), [
+            {"order_id": order_id, "phase": phase, "level": level, "message": f"{phase} {level.value}",
+             "created_at": at(month, day, minute)}
+            for order_id, logs in ((old_id, OLD_ORDER_LOGS), (new_id, NEW_ORDER_LOGS))
+            for month, day, minute, phase, level in logs
+        ])
+    return old_id, new_id
+
+
+def test_month_arithmetic():
+    assert retention_cutoff(NOW) == datetime(2026, 7, 1, tzinfo=timezone.utc)
+    assert add_months(datetime(2026, 11, 1, tzinfo=timezone.utc), 3) == datetime(2027, 2, 1, tzinfo=timezone.utc)
+    assert add_months(datetime(2026, 1, 1, tzinfo=timezone.utc), -1) == datetime(2025, 12, 1, tzinfo=timezone.utc)
+    month = datetime(2026, 12, 1, tzinfo=timezone.utc)
+    assert partition_name(month) == "process_logs_y2026m12"
+    assert create_partition_sql(month) == (
+        "CREATE TABLE IF NOT EXISTS process_logs_y2026m12 PARTITION OF process_logs "
+        "FOR VALUES FROM ('2026-12-01T00:00:00+00:00') TO ('2027-01-01T00:00:00+00:00')"
+    )
+
+
+@pytest.mark.asyncio
+async def test_expired_months_are_rolled_up_and_deleted(database):
+    session_factory = async_sessionmaker(database, expire_on_commit=False)
+    old_id, new_id = await seed(database)
+    async with session_factory() as db:
+        before = {order_id: await order_timeline(db, order_id) for order_id in (old_id, new_id)}
+
+    stats = await maintain_process_logs(session_factory, now=NOW)
+    assert stats == {"partitioned": False, "created": [], "retired": ["2026-05", "2026-06"], "orders": 2, "rows": 6}
+
+    async with session_factory() as db:
+        remaining = (await db.execute(
+            select(ProcessLog.order_id, func.count()).group_by(ProcessLog.order_id).order_by(ProcessLog.order_id)
+        )).all()
+        summary = await db.get(ProcessLogSummary, old_id)
+        after = {order_id: await order_timeline(db, order_id) for order_id in (old_id, new_id)}
+    assert remaining == [(old_id, 2), (new_id, 2)]
+
+    assert summary.entries == 6
+    assert summary.level_counts == {"error": 1, "info": 4, "warning": 1}
+    assert [phase["phase"] for phase in summary.phases] == ["fetching_ceidg", "research", "generating", "reviewing"]
+    assert [error["level"] for error in summary.errors] == ["warning", "error"]
+    assert log_retention._utc(summary.rolled_up_through) == retention_cutoff(NOW)
+
+    # Summary plus the remaining rows tell the same story as the raw logs did
+    assert after[old_id]["rolled_up_through"] == retention_cutoff(NOW)
+    for order_id in (old_id, new_id):
+        assert {**after[order_id], "rolled_up_through": None} == before[order_id]
+
+
+@pytest.mark.asyncio
+async def test_maintenance_is_safe_to_rerun(database):
+    session_factory = async_sessionmaker(database, expire_on_commit=False)
+    old_id, _ = await seed(database)
+    await maintain_process_logs(session_factory, now=NOW)
+
+    stats = await maintain_process_logs(session_factory, now=NOW)
+    assert (stats["retired"], stats["rows"]) == ([], 0)
+    async with session_factory() as db:
+        assert (await db.get(ProcessLogSummary, old_id)).entries == 6
+
+    stats = await maintain_process_logs(session_factory, now=NOW + timedelta(days=62))  # Cutoff 2026-09-01
+    assert (stats["retired"], stats["rows"]) == ([], 0)  # No logs in July or August
+    stats = await maintain_process_logs(session_factory, now=NOW + timedelta(days=92))  # Cutoff 2026-10-01
+    assert (stats["retired"], stats["orders"], stats["rows"]) == (["2026-09"], 1, 2)
+    async with session_factory() as db:
+        summary = await db.get(ProcessLogSummary, old_id)
+        timeline = await order_timeline(db, old_id)
+    assert summary.entries == 8 and summary.phases[-1]["phase"] == "completed"
+    assert timeline["entries"] == 8
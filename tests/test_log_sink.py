@@ -0,0 +1,75 @@
+"""ProcessLogSink retries failed writes and flushes everything on stop()"""
+
+import asyncio
+
+import pytest
+
+from app.services.log_sink import ProcessLogSink
+
+
+class Database:
+    """Stands in for the INSERT; fails the first `failures` writes"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.rows = []
+
+    async def insert(self, rows: list[dict]) -> list[int]:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database unavailable")
+        self.rows.extend(rows)
+        return list(range(len(self.rows) - len(rows), len(self.rows)))
+
+
+def sink(database: Database, **options) -> ProcessLogSink:
+    log_sink = ProcessLogSink(publish=False, retry_delay=0.01, **options)
+    log_sink._insert = database.insert
+    return log_sink
+
+
+@pytest.mark.asyncio
+async def test_retries_failed_write():
+    database = Database(failures=2)
+    log_sink = sink(database, write_attempts=3)
+    await log_sink.start()
+    for step in range(5):
+        await log_sink.emit(1, "research", f"krok {step}")
+    await log_sink.stop()
+    assert [row["message"] for row in database.rows] == [f"krok {step}" for step in range(5)]
+    assert log_sink.write_retries == 2 and log_sink.rows_dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_drops_batch_after_last_attempt():
+    database = Database(failures=3)
+    log_sink = sink(database, write_attempts=3)
+    await log_sink.start()
+    await log_sink.emit(1, "research", "krok")
+    await log_sink.stop()
+    assert database.rows == [] and log_sink.rows_dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_rows_queued_behind_sentinel():
+    database = Database()
+    log_sink = sink(database)
+    await log_sink.start()
+    stopping = asyncio.create_task(log_sink.stop())
+    await asyncio.sleep(0)  # Sentinel queued
+    log_sink._queue.put_nowait({"order_id": 1, "phase": "research", "message": "spóźniony"})
+    await stopping
+    assert [row["message"] for row in database.rows] == ["spóźniony"]
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_blocked_emitters():
+    database = Database(failures=1)  # Writer is busy retrying while the queue fills
+    log_sink = sink(database, batch_size=2, max_pending=2, flush_interval=0.01)
+    await log_sink.start()
+    emitters = [asyncio.create_task(log_sink.emit(1, "research", f"krok {step}")) for step in range(10)]
+    await asyncio.sleep(0)
+    await log_sink.stop()
+    await asyncio.gather(*emitters)
+    assert sorted(row["message"] for row in database.rows) == sorted(f"krok {step}" for step in range(10))
+    assert log_sink.pending == 0
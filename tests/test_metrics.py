@@ -0,0 +1,47 @@
+"""Counters and histograms add up across processes sharing a metrics directory"""
+
+from app.utils.metrics import Counter, Histogram, MultiprocessStore, Registry
+
+
+def worker(directory, pid: int):
+    """One preforked worker: its own registry, store and metrics"""
+    registry = Registry()
+    registry.multiprocess = MultiprocessStore(str(directory), registry)
+    registry.multiprocess.pid = pid  # start() without the writer thread
+    requests = Counter("requests_total", "Requests", ["route"], registry=registry)
+    latency = Histogram("latency_seconds", "Latency", buckets=(0.1, 1), registry=registry)
+    return registry, requests, latency
+
+
+def test_render_adds_other_workers(tmp_path):
+    first, first_requests, first_latency = worker(tmp_path, 101)
+    second, second_requests, second_latency = worker(tmp_path, 102)
+    first_requests.inc("/health", amount=3)
+    first_latency.observe(0.05)
+    second_requests.inc("/health", amount=2)
+    second_requests.inc("/orders")
+    second_latency.observe(0.5)
+    second.multiprocess.write()
+
+    text = first.render()
+    assert 'requests_total{route="/health"} 5' in text
+    assert 'requests_total{route="/orders"} 1' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert "latency_seconds_count 2" in text
+
+    first_requests.inc("/health")  # Live values, not the last write
+    assert 'requests_total{route="/health"} 6' in first.render()
+
+
+def test_exited_worker_totals_are_kept(tmp_path):
+    first, first_requests, _ = worker(tmp_path, 101)
+    first_requests.inc("/health", amount=4)
+    first.multiprocess.write()
+    first.multiprocess.clear()  # New run: nothing carried over
+    assert list(tmp_path.iterdir()) == []
+
+    first.multiprocess.write()
+    second, second_requests, _ = worker(tmp_path, 102)
+    second_requests.inc("/health")
+    assert 'requests_total{route="/health"} 5' in second.render()
@@ -0,0 +1,57 @@
+"""SQL statements per order read endpoint stay constant as the data grows"""
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from benchmarks.order_detail import seed
+from config.settings import settings
+
+# Statements per request; detail/full must not grow with the data
+EXPECTED_QUERIES = {
+    "/api/orders?limit=50": 1,
+    "/api/orders?status=completed&limit=50": 1,
+    "/api/orders/{id}?profile=summary": 1,
+    "/api/orders/{id}?profile=detail": 1,
+    "/api/orders/{id}?profile=full": 2,
+    "/api/orders/{missing}": 1,
+    "/api/orders/{id}/plan.html": 1,
+    "/api/orders/{id}/timeline": 3,
+}
+
+
+class StatementCounter:
+    """Counts statements sent to the database (engine before_cursor_execute events)"""
+
+    def __init__(self, engine):
+        self.engine = engine.sync_engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("template, expected", EXPECTED_QUERIES.items())
+async def test_queries_per_request(database, monkeypatch, template, expected):
+    from app.main import create_app
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    order_ids = await seed(2, 5) + await seed(2, 60, offset=2)  # Few and many process logs
+    app = create_app()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        counts = []
+        for order_id in order_ids:
+            path = template.format(id=order_id, missing=max(order_ids) + 1000)
+            with StatementCounter(database) as counter:
+                response = await client.get(path)
+            assert response.status_code == (404 if "{missing}" in template else 200), path
+            counts.append(counter.count)
+    assert counts == [expected] * len(order_ids)
@@ -0,0 +1,106 @@
+"""Keyset pagination of GET /api/orders over (created_at, id)"""
+
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlalchemy import event, insert
+
+from app.models import Order, OrderStatus
+from app.utils.pagination import decode_cursor, encode_cursor
+from config.settings import settings
+
+T0 = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+STATUSES = [OrderStatus.COMPLETED, OrderStatus.FAILED, OrderStatus.PENDING]
+
+
+async def seed(engine) -> list[dict]:
+    """11 orders; created_at repeats (three rows per timestamp) to test ties"""
+    rows = [
+        {"podio_item_id": str(i), "nip": "1234567890", "imie_nazwisko": "Jan",
+         "status": STATUSES[i % 3], "created_at": T0 + timedelta(minutes=i // 3)}
+        for i in range(11)
+    ]
+    async with engine.begin() as conn:
+        ids = (await conn.execute(insert(Order).returning(Order.id, sort_by_parameter_order=True), rows)).scalars()
+        for row, order_id in zip(rows, ids):
+            row["id"] = order_id
+    return sorted(rows, key=lambda row: (row["created_at"], row["id"]), reverse=True)
+
+
+async def pages(client, **params) -> list[list[int]]:
+    """Ids page by page, following next_cursor to the end"""
+    result, cursor = [], None
+    while True:
+        response = await client.get("/api/orders", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        body = response.json()
+        result.append([item["id"] for item in body["items"]])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return result
+
+
+@pytest.fixture
+def app(monkeypatch):
+    from app.main import create_app
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    return create_app()
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 3, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+    assert "=" not in encode_cursor(created_at, 42)
+    for cursor in ("", "not-base64!", encode_cursor(created_at, 42)[:-3]):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 11, 50])
+async def test_pages_cover_every_order_once(database, app, limit):
+    ordered = await seed(database)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        result = await pages(client, limit=limit)
+    assert [order_id for page in result for order_id in page] == [row["id"] for row in ordered]
+    assert all(len(page) == limit for page in result[:-1])
+
+
+@pytest.mark.asyncio
+async def test_status_filter(database, app):
+    ordered = await seed(database)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        result = await pages(client, status="failed", limit=2)
+        assert (await client.get("/api/orders", params={"cursor": "garbage"})).status_code == 400
+    expected = [row["id"] for row in ordered if row["status"] == OrderStatus.FAILED]
+    assert [order_id for page in result for order_id in page] == expected
+    assert [len(page) for page in result] == [2, 2]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("params, index", [
+    ({"status": "failed", "limit": 2}, "ix_orders_status_created_at_id"),
+    ({"limit": 2}, "ix_orders_created_at_id"),
+])
+async def test_pages_use_the_keyset_indexes(database, app, params, index):
+    await seed(database)
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        cursor = (await client.get("/api/orders", params=params)).json()["next_cursor"]
+        event.listen(database.sync_engine, "before_cursor_execute", capture)
+        try:
+            await client.get("/api/orders", params={**params, "cursor": cursor})
+        finally:
+            event.remove(database.sync_engine, "before_cursor_execute", capture)
+
+    (statement, parameters), = statements
+    async with database.connect() as conn:
+        plan = " ".join(row[-1] for row in await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+    assert f"USING INDEX {index}" in plan and "TEMP B-TREE" not in plan  # Range scan, no sort
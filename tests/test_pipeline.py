@@ -0,0 +1,134 @@
+"""The order pipeline (chain + research chord) in eager mode, with stubbed registry and research APIs"""
+
+import json
+
+import httpx
+import pytest
+from sqlalchemy import insert, select
+
+from app.models import CEIDGData, Order, OrderStatus, ResearchResult
+from app.services.cache import TwoTierCache
+from app.services.ceidg import CEIDGClient, CEIDGService, set_ceidg_service
+from app.services.costs import record_llm_call
+from app.services.llm import LLMResponse, TokenUsage
+from app.services.research import PerplexityClient, ResearchService, set_research_service
+from app.tasks import pipeline
+from app.tasks.worker import celery_app, enqueue_order, run_async
+from config.database import AsyncSessionLocal, engine
+from config.settings import settings
+
+NIP = "5260250274"
+FIRM = {
+    "nazwa": "Firma Testowa",
+    "wlasciciel": {"nip": NIP},
+    "pkdGlowny": {"kod": "6201Z", "nazwa": "Programowanie"},
+    "adresDzialalnosci": {"wojewodztwo": "mazowieckie"},
+}
+SWOT = {"strengths": ["Doświadczenie"], "weaknesses": [], "opportunities": ["Cyfryzacja"], "threats": []}
+
+
+def ceidg_api(request: httpx.Request) -> httpx.Response:
+    if request.url.params["nip"] != NIP:
+        return httpx.Response(404)
+    return httpx.Response(200, json={"firma": [FIRM]})
+
+
+def perplexity_api(request: httpx.Request) -> httpx.Response:
+    query = json.loads(request.content)["messages"][0]["content"]
+    content = json.dumps(SWOT) if "SWOT" in query else f"Odpowiedź: {query[:20]}"
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}], "citations": ["https://gus.gov.pl"]})
+
+
+@pytest.fixture
+def eager(database, monkeypatch):
+    """Eager Celery, stub services, and a stubbed generator recording its calls"""
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    set_ceidg_service(CEIDGService(
+        CEIDGClient(base_url="http://ceidg.test", transport=httpx.MockTransport(ceidg_api)),
+        TwoTierCache("ceidg", ttl=60),
+    ))
+    set_research_service(ResearchService(
+        PerplexityClient(base_url="http://perplexity.test", transport=httpx.MockTransport(perplexity_api)),
+        TwoTierCache("research", ttl=60),
+        queries={"rynek": "Rynek PKD {pkd} w {region}", "konkurencja": "Konkurencja PKD {pkd}"},
+    ))
+
+    generated = []
+
+    async def generate_biznesplan(order_id: int) -> int:
+        generated.append(order_id)
+        return 1
+
+    monkeypatch.setattr(pipeline, "generate_biznesplan", generate_biznesplan)
+    yield generated
+    set_ceidg_service(None)
+    set_research_service(None)
+    run_async(engine.dispose())  # Connections opened on run_async's loop
+
+
+def create_order(nip: str = NIP) -> int:
+    async def create() -> int:
+        async with AsyncSessionLocal() as session:
+            order_id = (await session.execute(
+                insert(Order).returning(Order.id), [{"podio_item_id": nip, "nip": nip, "imie_nazwisko": "Jan"}]
+            )).scalar_one()
+            await session.commit()
+            return order_id
+    return run_async(create())
+
+
+def load(order_id: int) -> tuple[Order, CEIDGData, ResearchResult]:
+    async def fetch():
+        async with AsyncSessionLocal() as session:
+            return (
+                await session.get(Order, order_id),
+                await session.scalar(select(CEIDGData).where(CEIDGData.order_id == order_id)),
+                await session.scalar(select(ResearchResult).where(ResearchResult.order_id == order_id)),
+            )
+    return run_async(fetch())
+
+
+def test_order_completes(eager):
+    order_id = create_order()
+    enqueue_order(order_id)
+
+    order, ceidg, research = load(order_id)
+    assert order.status == OrderStatus.COMPLETED
+    assert order.completed_at is not None and order.error_message is None
+    assert ceidg.pkd_glowny == "62.01.Z"
+    assert set(research.market_data) == {"rynek", "konkurencja"}  # One chord member per query
+    assert research.swot_data == SWOT
+    assert eager == [order_id]
+
+
+def test_failed_task_marks_order_failed(eager):
+    order_id = create_order("1234563218")  # Not in the registry
+    enqueue_order(order_id)
+
+    order, ceidg, research = load(order_id)
+    assert order.status == OrderStatus.FAILED
+    assert order.error_message.startswith("app.tasks.pipeline.fetch_ceidg: NIP 1234563218 not found")
+    assert ceidg is None and research is None
+    assert eager == []
+
+
+def test_daily_budget_stops_generation(eager, monkeypatch):
+    monkeypatch.setattr(settings, "COST_LIMIT_DAILY", 1.0)
+    monkeypatch.setattr(settings, "LLM_PRICE_INPUT_PER_MTOK", 2.0)
+
+    async def spend():
+        async with AsyncSessionLocal() as session:
+            response = LLMResponse(text="", usage=TokenUsage(input_tokens=1_000_000), duration_seconds=1.0, model="test")
+            await record_llm_call(session, response, "summary")
+            await session.commit()
+
+    run_async(spend())
+    order_id = create_order()
+    enqueue_order(order_id)
+
+    order, _, research = load(order_id)
+    assert order.status == OrderStatus.FAILED
+    assert order.current_phase == "Waiting for daily cost budget"
+    assert "Daily LLM budget of $1.00 reached" in order.error_message
+    assert research is not None  # Research ran; only generation waits for the budget
+    assert eager == []
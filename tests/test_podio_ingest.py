@@ -0,0 +1,147 @@
+"""Podio webhooks become exactly one order each; staged items are flushed on stop()"""
+
+import asyncio
+from collections import Counter
+
+import httpx
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models import Order, OrderStatus
+from app.services import podio_ingest
+from app.services.podio import PodioClient
+from app.services.podio_ingest import PodioIngestor
+from benchmarks.fakes import fake_podio_item
+
+
+class Podio:
+    """Stub Podio API: counts item requests; ids in `failing` answer 503 once"""
+
+    def __init__(self, failing=()):
+        self.requests: Counter = Counter()
+        self.failing = set(failing)
+        self.before_item = None  # Awaited before answering (to interleave workers)
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/oauth/token":
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        item_id = int(request.url.path.rsplit("/", 1)[1])
+        self.requests[item_id] += 1
+        if item_id in self.failing:
+            self.failing.discard(item_id)
+            return httpx.Response(503)
+        if self.before_item is not None:
+            await self.before_item(item_id)
+        return httpx.Response(200, json=fake_podio_item(item_id))
+
+
+class Enqueue:
+    def __init__(self):
+        self.calls: Counter = Counter()
+
+    async def __call__(self, order_id: int) -> str:
+        self.calls[order_id] += 1
+        return f"task-{order_id}"
+
+
+def ingestor(database, podio: Podio, enqueue: Enqueue, **kwargs) -> PodioIngestor:
+    return PodioIngestor(
+        session_factory=async_sessionmaker(database, expire_on_commit=False),
+        podio=PodioClient(base_url="http://podio.test", transport=httpx.MockTransport(podio)),
+        enqueue=enqueue,
+        **kwargs,
+    )
+
+
+async def orders(database) -> list[tuple]:
+    async with database.connect() as conn:
+        return (await conn.execute(
+            select(Order.podio_item_id, Order.status, Order.celery_task_id).order_by(Order.podio_item_id)
+        )).all()
+
+
+@pytest.mark.asyncio
+async def test_duplicate_webhooks(database, monkeypatch):
+    from app.main import create_app
+
+    podio, enqueue = Podio(), Enqueue()
+    ingest = ingestor(database, podio, enqueue, flush_interval=0.05)
+    monkeypatch.setattr(podio_ingest, "_ingestor", ingest)
+    await ingest.start()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://test") as client:
+        async def webhook(item_id: int) -> str:
+            response = await client.post("/webhooks/podio", data={"type": "item.create", "item_id": str(item_id)})
+            return response.json()["status"]
+
+        assert [await webhook(item_id) for item_id in (7, 7, 8)] == ["accepted", "duplicate", "accepted"]
+        while ingest.stats()["in_flight"]:
+            await asyncio.sleep(0.01)
+        assert await webhook(7) == "accepted"  # Redelivered after ingestion: dropped before calling Podio
+        await ingest.stop()
+
+    assert [(item_id, status) for item_id, status, _ in await orders(database)] == [
+        ("7", OrderStatus.PENDING), ("8", OrderStatus.PENDING)]
+    assert podio.requests == {7: 1, 8: 1}
+    assert sorted(enqueue.calls.values()) == [1, 1]
+    assert ingest.stats()["inserted"] == 2 and ingest.stats()["duplicates"] == 2
+
+
+@pytest.mark.asyncio
+async def test_racing_workers_insert_once(database):
+    """Another worker inserts the item while this one fetches it: ON CONFLICT DO NOTHING"""
+    enqueue = Enqueue()
+    first = ingestor(database, Podio(), enqueue)
+    podio = Podio()
+    second = ingestor(database, podio, enqueue)
+
+    async def other_worker_wins(item_id: int) -> None:
+        await first._process([str(item_id)])
+
+    podio.before_item = other_worker_wins
+    assert await second._process(["9"]) == set()
+
+    assert [item_id for item_id, _, _ in await orders(database)] == ["9"]
+    assert sum(enqueue.calls.values()) == 1
+    assert (first.inserted, second.inserted, second.duplicates, second.enqueued) == (1, 0, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_staged_items(database):
+    podio, enqueue = Podio(failing={3}), Enqueue()
+    ingest = ingestor(database, podio, enqueue, flush_interval=0.01, retry_delay=60)
+    await ingest.start()
+    ingest.stage("3")
+    while not ingest.stats()["retrying"]:  # Fetch failed; retry due in a minute
+        await asyncio.sleep(0.01)
+
+    ingest.flush_interval = 60
+    for item_id in ("1", "2"):
+        ingest.stage(item_id)
+    await asyncio.sleep(0.05)  # Still inside the flush window: nothing written yet
+    assert await orders(database) == []
+
+    await ingest.stop()
+    assert [(item_id, task_id) for item_id, _, task_id in await orders(database)] == [
+        ("1", "task-1"), ("2", "task-2"), ("3", "task-3")]
+    assert podio.requests[3] == 2  # Retried at stop, without waiting out the delay
+    assert ingest.stats() == {
+        "received": 3, "duplicates": 0, "inserted": 3, "enqueued": 3, "retried": 1, "failed": 0,
+        "pending": 0, "retrying": 0, "in_flight": 0,
+    }
+    with pytest.raises(RuntimeError):
+        ingest.stage("4")
+
+
+@pytest.mark.asyncio
+async def test_items_failing_in_the_final_flush_are_reported(database):
+    podio, enqueue = Podio(failing={5}), Enqueue()
+    ingest = ingestor(database, podio, enqueue, flush_interval=60, retry_delay=60)
+    await ingest.start()
+    ingest.stage("5")
+    ingest.stage("6")
+
+    await ingest.stop()
+    assert [item_id for item_id, _, _ in await orders(database)] == ["6"]
+    assert (ingest.stats()["failed"], ingest.stats()["retrying"], ingest.stats()["in_flight"]) == (1, 0, 0)
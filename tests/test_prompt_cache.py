@@ -0,0 +1,92 @@
+"""Prompt-cache breakpoints in generation requests, and cache hit-rate accounting"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.models import Biznesplan
+from app.services.llm import LLMResponse, TokenUsage, apply_generation_stats, cache_hit_rate, record_call_totals
+from app.services.prompts import PromptBuilder, cache_control
+from app.services.section_scheduler import BIZNESPLAN_SECTIONS, SectionResult
+from benchmarks.prompt_cache import sample_order
+
+MAX_BREAKPOINTS = 4  # Anthropic limit per request
+
+
+def breakpoints(request: dict) -> list[str]:
+    """Where the cache breakpoints are: "system:<index>" and "message:<index>" """
+    marked = [f"system:{index}" for index, block in enumerate(request["system"]) if "cache_control" in block]
+    content = request["messages"][0]["content"]
+    return marked + [f"message:{index}" for index, block in enumerate(content) if "cache_control" in block]
+
+
+def upstream(*keys: str) -> dict[str, SectionResult]:
+    return {key: SectionResult(key, key.title(), f"Treść sekcji {key}.", 0, 1) for key in keys}
+
+
+@pytest.fixture
+def builder() -> PromptBuilder:
+    return PromptBuilder(*sample_order(1))
+
+
+def test_system_prefix_is_cached_after_style_guide_and_context(builder):
+    request = builder.section_request(BIZNESPLAN_SECTIONS[0])
+    assert breakpoints(request) == ["system:1", "system:2"]
+
+
+def test_breakpoint_after_last_upstream_section_only(builder):
+    section = BIZNESPLAN_SECTIONS[1]
+    request = builder.section_request(section, upstream("outline", "summary", "company"))
+    assert breakpoints(request) == ["system:1", "system:2", "message:2"]
+    assert len(breakpoints(request)) <= MAX_BREAKPOINTS
+    task = request["messages"][0]["content"][-1]
+    assert task["text"].startswith("# Zadanie") and "cache_control" not in task
+
+
+def test_cached_prefix_is_byte_identical_across_sections(builder):
+    first = builder.section_request(BIZNESPLAN_SECTIONS[1], upstream("outline"))
+    second = builder.section_request(BIZNESPLAN_SECTIONS[2], upstream("outline"), extra_instructions="Popraw.")
+    assert json.dumps(first["system"]) == json.dumps(second["system"])
+    assert first["messages"][0]["content"][:-1] == second["messages"][0]["content"][:-1]
+
+
+def test_context_is_deterministic_across_builders():
+    assert PromptBuilder(*sample_order(1)).system == PromptBuilder(*sample_order(1)).system
+
+
+@pytest.mark.parametrize("ttl, expected", [(300, {"type": "ephemeral"}), (3600, {"type": "ephemeral", "ttl": "1h"})])
+def test_cache_control_ttl(ttl, expected):
+    assert cache_control(ttl) == expected
+
+
+def response(input_tokens: int, cache_read: int, cache_write: int) -> LLMResponse:
+    usage = TokenUsage.from_response(SimpleNamespace(
+        input_tokens=input_tokens, output_tokens=50,
+        cache_read_input_tokens=cache_read, cache_creation_input_tokens=cache_write,
+    ))
+    return LLMResponse("tekst", usage, 1.0, "claude-test")
+
+
+def test_hit_rate_counts_reads_against_all_prompt_tokens():
+    logs = record_call_totals(None, response(input_tokens=200, cache_read=0, cache_write=8000))  # Cold call
+    for _ in range(3):
+        logs = record_call_totals(logs, response(input_tokens=200, cache_read=8000, cache_write=0))
+    assert logs["api_calls"] == 4
+    assert logs["cached_tokens"] == 24000
+    assert logs["cache_creation_tokens"] == 8000
+    assert logs["total_input_tokens"] == 800
+    assert cache_hit_rate(logs) == pytest.approx(24000 / (24000 + 8000 + 800))
+
+
+def test_hit_rate_without_calls_is_zero():
+    assert cache_hit_rate(None) == 0.0
+    assert cache_hit_rate({}) == 0.0
+
+
+def test_plan_stores_hit_rate_as_percent():
+    logs = record_call_totals(None, response(input_tokens=100, cache_read=900, cache_write=0))
+    plan = Biznesplan(id=1, order_id=1)
+    apply_generation_stats(plan, logs)
+    assert plan.cache_hit_rate == 90
+    assert plan.generator_logs is logs
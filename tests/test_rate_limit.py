@@ -0,0 +1,221 @@
+"""Sliding-window rate limits: in-memory and Redis counters, the middleware and the generation group"""
+
+import json
+
+import fakeredis.aioredis
+import httpx
+import pytest
+from sqlalchemy import insert, select
+
+from app.models import Order, OrderStatus
+from app.utils import rate_limit
+from app.utils.rate_limit import (
+    MemoryRateLimiter,
+    RateLimitMiddleware,
+    RedisRateLimiter,
+    RouteGroup,
+    default_route_groups,
+    parse_rate,
+)
+from config.settings import settings
+
+RATE = parse_rate("3/10s")
+
+
+class Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(1000.0)  # Start of a 10 s window
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+def test_parse_rate():
+    assert parse_rate("10/minute") == rate_limit.RateLimit(10, 60)
+    assert parse_rate(" 1000 / 2hours ") == rate_limit.RateLimit(1000, 7200)
+    with pytest.raises(ValueError):
+        parse_rate("10 per minute")
+
+
+@pytest.mark.asyncio
+async def test_memory_limit_boundary(clock):
+    limiter = MemoryRateLimiter()
+    assert [await limiter.hit("a", RATE) for _ in range(3)] == [(True, 0)] * 3
+    assert await limiter.hit("a", RATE) == (False, 10)  # Whole window left
+    clock.now = 1004.2
+    assert await limiter.hit("a", RATE) == (False, 6)
+
+    clock.now = 1010.0  # Next window: the previous one still counts in full
+    assert await limiter.hit("a", RATE) == (False, 1)
+    clock.now = 1013.5  # The previous window weighs 3 * 0.65 = 1.95, so two more fit
+    assert [await limiter.hit("a", RATE) for _ in range(2)] == [(True, 0)] * 2
+    assert await limiter.hit("a", RATE) == (False, 4)  # Until its weight drops to 1/3 at 1016.67
+
+    clock.now = 1030.0  # Two windows later nothing counts
+    assert await limiter.hit("a", RATE) == (True, 0)
+
+
+@pytest.mark.asyncio
+async def test_memory_keys_are_separate(clock):
+    limiter = MemoryRateLimiter()
+    for _ in range(3):
+        await limiter.hit("api:10.0.0.1", RATE)
+    assert (await limiter.hit("api:10.0.0.1", RATE))[0] is False
+    assert (await limiter.hit("api:10.0.0.2", RATE))[0] is True
+    assert (await limiter.hit("generation:10.0.0.1", RATE))[0] is True
+
+
+@pytest.mark.asyncio
+async def test_redis_script():
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    limiter = RedisRateLimiter(redis)
+    rate = parse_rate("3/hour")
+
+    assert [await limiter.hit("a", rate) for _ in range(3)] == [(True, 0)] * 3
+    allowed, retry_after = await limiter.hit("a", rate)
+    assert not allowed and 1 <= retry_after <= 3600
+    assert await limiter.hit("b", rate) == (True, 0)
+
+    seconds, _ = await redis.time()
+    current = f"ratelimit:a:3600:{seconds // 3600}"
+    assert await redis.get(current) == "3"  # The denied request was not counted
+    assert 3600 < await redis.ttl(current) <= 7200
+
+
+@pytest.mark.asyncio
+async def test_redis_script_weighs_previous_window():
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    limiter = RedisRateLimiter(redis)
+    rate = parse_rate("3/day")
+    seconds, _ = await redis.time()
+    await redis.set(f"ratelimit:a:86400:{seconds // 86400 - 1}", 100)  # Weighs over 3 all day
+
+    allowed, retry_after = await limiter.hit("a", rate)
+    assert not allowed and 1 <= retry_after <= 86400
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def call(app, path: str, method: str = "GET", client: str = "10.0.0.1", forwarded: str = None) -> dict:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    scope = {"type": "http", "method": method, "path": path, "headers": headers, "client": (client, 50000)}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    start, body = sent
+    return {"status": start["status"], "headers": dict(start["headers"]), "body": body["body"]}
+
+
+@pytest.mark.asyncio
+async def test_middleware_429(clock):
+    groups = [RouteGroup("api", RATE, lambda method, path: path.startswith("/api/"))]
+    app = RateLimitMiddleware(ok_app, MemoryRateLimiter(), groups)
+
+    assert [(await call(app, "/api/orders"))["status"] for _ in range(3)] == [200] * 3
+    clock.now = 1002.0
+    response = await call(app, "/api/orders")
+    assert response["status"] == 429
+    assert response["headers"][b"retry-after"] == b"8"
+    assert response["headers"][b"x-ratelimit-limit"] == b"3"
+    assert json.loads(response["body"]) == {"detail": "Rate limit exceeded", "retry_after": 8}
+
+    assert (await call(app, "/api/orders", client="10.0.0.2"))["status"] == 200
+    assert (await call(app, "/health"))["status"] == 200  # Unmatched paths are never counted
+
+
+@pytest.mark.asyncio
+async def test_middleware_forwarded_clients(clock):
+    groups = [RouteGroup("api", parse_rate("1/minute"), lambda method, path: True)]
+    trusting = RateLimitMiddleware(ok_app, MemoryRateLimiter(), groups, trust_forwarded=True)
+    assert (await call(trusting, "/api/x", forwarded="1.1.1.1, 10.0.0.1"))["status"] == 200
+    assert (await call(trusting, "/api/x", forwarded="2.2.2.2, 10.0.0.1"))["status"] == 200  # Same proxy
+    assert (await call(trusting, "/api/x", forwarded="1.1.1.1"))["status"] == 429
+
+    direct = RateLimitMiddleware(ok_app, MemoryRateLimiter(), groups, trust_forwarded=False)
+    assert (await call(direct, "/api/x", forwarded="1.1.1.1"))["status"] == 200
+    assert (await call(direct, "/api/x", forwarded="2.2.2.2"))["status"] == 429  # Spoofable header ignored
+
+
+@pytest.mark.asyncio
+async def test_middleware_lets_requests_through_without_backend():
+    class Down:
+        async def hit(self, key, rate):
+            raise ConnectionError("redis down")
+
+    app = RateLimitMiddleware(ok_app, Down(), [RouteGroup("api", RATE, lambda method, path: True)])
+    assert (await call(app, "/api/orders"))["status"] == 200
+
+
+def test_route_groups():
+    generation, api = default_route_groups()
+    assert generation.match("POST", "/api/orders/12/regenerate")
+    assert not generation.match("GET", "/api/orders/12/regenerate")
+    assert not generation.match("POST", "/api/orders/12/plan.html")
+    assert api.match("GET", "/api/orders") and not api.match("GET", "/health")
+
+
+@pytest.mark.asyncio
+async def test_regenerate_is_rate_limited(database, monkeypatch):
+    from app.main import create_app
+    from app.tasks import worker
+
+    queued = []
+    monkeypatch.setattr(worker, "enqueue_order", lambda order_id: queued.append(order_id) or f"task-{order_id}")
+    monkeypatch.setattr(settings, "RATE_LIMIT_GENERATION", "2/minute")
+    async with database.begin() as conn:
+        order_ids = (await conn.execute(
+            insert(Order).returning(Order.id, sort_by_parameter_order=True),
+            [{"podio_item_id": str(i), "nip": "1234567890", "imie_nazwisko": "Jan", "status": OrderStatus.FAILED,
+              "error_message": "boom", "retry_count": 0} for i in range(3)],
+        )).scalars().all()
+
+    credentials = (settings.ADMIN_USERNAME, settings.ADMIN_PASSWORD)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://test") as client:
+        assert (await client.post(f"/api/orders/{order_ids[0]}/regenerate")).status_code == 401  # Counted too
+        response = await client.post(f"/api/orders/{order_ids[0]}/regenerate", auth=credentials)
+        assert response.status_code == 202
+        assert response.json()["status"] == "pending"
+        response = await client.post(f"/api/orders/{order_ids[1]}/regenerate", auth=credentials)
+        assert response.status_code == 429 and response.headers["x-ratelimit-limit"] == "2"
+        assert (await client.get(f"/api/orders/{order_ids[1]}")).status_code == 200  # The API limit is separate
+
+    assert queued == [order_ids[0]]
+    async with database.connect() as conn:
+        order = (await conn.execute(select(Order.__table__).where(Order.id == order_ids[0]))).one()
+    assert (order.status, order.error_message, order.retry_count, order.celery_task_id) == (
+        OrderStatus.PENDING, None, 1, f"task-{order_ids[0]}")
+
+
+@pytest.mark.asyncio
+async def test_regenerate_only_failed_orders(database, monkeypatch):
+    from app.main import create_app
+    from app.tasks import worker
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(worker, "enqueue_order", lambda order_id: "task")
+    async with database.begin() as conn:
+        order_id = (await conn.execute(
+            insert(Order).returning(Order.id), [{"podio_item_id": "1", "nip": "1234567890", "imie_nazwisko": "Jan"}]
+        )).scalar_one()
+
+    credentials = (settings.ADMIN_USERNAME, settings.ADMIN_PASSWORD)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://test",
+                                 auth=credentials) as client:
+        assert (await client.post(f"/api/orders/{order_id}/regenerate")).status_code == 409
+        assert (await client.post(f"/api/orders/{order_id + 1}/regenerate")).status_code == 404
@@ -0,0 +1,110 @@
+"""/ready serves cached probe results and turns 503 when a probe fails or goes stale"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.services.readiness import ReadinessMonitor, set_readiness_monitor
+from config.settings import settings
+
+
+class Redis:
+    """Stub ping counting calls; fails while `error` is set"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.error = None
+        self.pings = 0
+
+    async def __call__(self) -> None:
+        self.pings += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from app.main import create_app
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    app = create_app()  # ASGITransport does not run the lifespan, so tests drive the monitor
+    yield httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    set_readiness_monitor(None)
+
+
+def monitor_for(engine, redis: Redis, **kwargs) -> ReadinessMonitor:
+    monitor = ReadinessMonitor(engine=engine, replica=None, ping_redis=redis, **kwargs)
+    set_readiness_monitor(monitor)
+    return monitor
+
+
+@pytest.mark.asyncio
+async def test_ready_reads_cached_probes(database, client):
+    redis = Redis()
+    monitor = monitor_for(database, redis)
+    await monitor.check()
+
+    async with client:
+        responses = [await client.get("/ready") for _ in range(5)]
+    assert {response.status_code for response in responses} == {200}
+    report = responses[0].json()
+    assert report["status"] == "ready" and report["reasons"] == []
+    assert set(report["checks"]) == {"database", "redis"}
+    assert redis.pings == 1  # Polling /ready does not probe
+
+
+@pytest.mark.asyncio
+async def test_failing_probe_returns_503(database, client):
+    redis = Redis()
+    monitor = monitor_for(database, redis)
+    redis.error = ConnectionError("Connection refused")
+    await monitor.check()
+
+    async with client:
+        response = await client.get("/ready")
+        assert response.status_code == 503
+        report = response.json()
+        assert report["reasons"] == ["redis unavailable"]
+        assert report["checks"]["redis"]["error"] == "ConnectionError: Connection refused"
+        assert report["checks"]["database"]["ok"] is True
+
+        redis.error = None
+        await monitor.check()  # Back in rotation on the next round
+        assert (await client.get("/ready")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_slow_probe_times_out(database):
+    monitor = ReadinessMonitor(engine=database, replica=None, ping_redis=Redis(delay=1.0), timeout=0.05)
+    await monitor.check()
+    ready, report = monitor.status()
+    assert not ready and report["checks"]["redis"]["error"] == "timed out after 0.05s"
+
+
+@pytest.mark.asyncio
+async def test_unprobed_and_stale_results_are_not_ready(database):
+    monitor = ReadinessMonitor(engine=database, replica=None, ping_redis=None, interval=1.0, timeout=1.0)
+    assert monitor.status()[1]["reasons"] == ["not probed yet"]
+
+    await monitor.check()
+    assert monitor.status()[0]
+    monitor.checked_at = time.monotonic() - 5  # Over 3 intervals plus the timeout
+    assert monitor.status()[1]["reasons"] == ["probes stale"]
+
+
+@pytest.mark.asyncio
+async def test_background_probes(database):
+    redis = Redis()
+    monitor = ReadinessMonitor(engine=database, replica=None, ping_redis=redis, interval=0.01)
+    await monitor.start()
+    assert redis.pings == 1  # First round before start() returns
+    await asyncio.sleep(0.1)
+    await monitor.stop()
+
+    pings = redis.pings
+    assert pings > 2
+    await asyncio.sleep(0.05)
+    assert redis.pings == pings  # Stopped
@@ -0,0 +1,70 @@
+"""Request sessions against a primary and a replica (two SQLite files)"""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, select, text, update
+
+import app.models  # noqa: F401  (register models with Base)
+from app.models import Order
+from config import database
+from config.database import Base, ReadOnlySessionError, _create_engine
+
+
+@pytest_asyncio.fixture
+async def engines(tmp_path):
+    """(primary, replica), each holding one order named after it"""
+    primary = _create_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.sqlite'}")
+    replica = _create_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.sqlite'}")
+    for name, engine in (("primary", primary), ("replica", replica)):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(Order), [{"podio_item_id": name, "nip": "1234567890", "imie_nazwisko": "Jan"}])
+    yield primary, replica
+    await primary.dispose()
+    await replica.dispose()
+
+
+async def names(session) -> list[str]:
+    return list(await session.scalars(select(Order.podio_item_id).order_by(Order.id)))
+
+
+@pytest.mark.asyncio
+async def test_read_dependency_uses_replica_and_refuses_writes(engines, monkeypatch):
+    _, replica = engines
+    monkeypatch.setattr(database, "ReadSessionLocal", database.make_read_sessionmaker(replica))
+
+    async for session in database.get_read_db():
+        assert await names(session) == ["replica"]
+        with pytest.raises(ReadOnlySessionError):
+            await session.execute(update(Order).values(current_phase="x"))
+        with pytest.raises(ReadOnlySessionError):
+            await session.execute(text("DELETE FROM orders"))
+        with pytest.raises(ReadOnlySessionError):
+            await session.execute(select(Order).with_for_update())
+        session.add(Order(podio_item_id="write", nip="1234567890", imie_nazwisko="Jan"))
+        with pytest.raises(ReadOnlySessionError):
+            await session.flush()
+
+
+@pytest.mark.asyncio
+async def test_routing_session_reads_replica_until_it_writes(engines, monkeypatch):
+    primary, replica = engines
+    monkeypatch.setattr(database, "RoutingSessionLocal", database.make_routing_sessionmaker(primary, replica))
+
+    async for session in database.get_db():
+        assert await names(session) == ["replica"]
+        session.add(Order(podio_item_id="new", nip="1234567890", imie_nazwisko="Jan"))
+        await session.flush()
+        assert await names(session) == ["primary", "new"]  # Reads its own write
+
+    async with primary.connect() as conn:
+        assert (await conn.scalars(select(Order.podio_item_id).order_by(Order.id))).all() == ["primary", "new"]
+    async with replica.connect() as conn:
+        assert (await conn.scalars(select(Order.podio_item_id))).all() == ["replica"]
+
+
+@pytest.mark.asyncio
+async def test_routing_without_replica_uses_primary(engines):
+    primary, _ = engines
+    async with database.make_routing_sessionmaker(primary, None)() as session:
+        assert await names(session) == ["primary"]
@@ -0,0 +1,108 @@
+"""Reviewer: unreadable answers are retried, cached reviews are reused until a section or its upstream changes"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.llm import LLMResponse, TokenUsage
+from app.services.reviewer import Reviewer
+from app.services.section_scheduler import SectionResult
+
+PASSING = json.dumps({"score": 0.95, "issues": [], "feedback": "Sekcja spełnia kryteria."})
+
+
+class ScriptedLLM:
+    """Answers section reviews from `answers` in order; the consistency check always passes"""
+
+    def __init__(self, answers: list[str]):
+        self.answers = list(answers)
+        self.section_calls = 0
+
+    async def complete(self, request: dict, priority=None) -> LLMResponse:
+        shown = request["messages"][0]["content"][0]["text"]
+        if shown.startswith("# Sekcja"):
+            self.section_calls += 1
+            text = self.answers.pop(0)
+        else:
+            text = PASSING
+        return LLMResponse(text, TokenUsage(input_tokens=100, output_tokens=20), 0.0, "claude-test")
+
+
+def sections() -> dict[str, SectionResult]:
+    return {"summary": SectionResult("summary", "Streszczenie", "Firma świadczy usługi. Przychód 120 000 zł.", 0, 1)}
+
+
+def reviewer(llm: ScriptedLLM) -> Reviewer:
+    return Reviewer(llm, SimpleNamespace(model="claude-test", system=[]), threshold=0.8)
+
+
+@pytest.mark.asyncio
+async def test_unreadable_answer_is_retried_once():
+    llm = ScriptedLLM(["Przepraszam, nie mogę ocenić tej sekcji.", PASSING])
+    outcome = await reviewer(llm).review(sections())
+    assert llm.section_calls == 2
+    assert outcome.approved and outcome.to_revise == []
+    assert outcome.logs["section_reviews"]["summary"]["score"] == 0.95
+
+
+@pytest.mark.asyncio
+async def test_unreadable_twice_fails_the_review():
+    llm = ScriptedLLM(["bez JSON", "{niepoprawny json}"])
+    outcome = await reviewer(llm).review(sections())
+    assert llm.section_calls == 2
+    assert not outcome.approved
+    assert outcome.to_revise == ["summary"]
+    assert outcome.issues[0]["severity"] == "major"
+    assert "summary" not in outcome.logs["section_reviews"]  # Never reused from the cache
+
+
+class CountingLLM:
+    """Passes everything; records the sections each pass reviews"""
+
+    def __init__(self):
+        self.reviewed = []
+
+    async def complete(self, request: dict, priority=None) -> LLMResponse:
+        shown = request["messages"][0]["content"][-2]["text"]
+        if shown.startswith("# Sekcja: "):
+            self.reviewed.append(shown.splitlines()[0].removeprefix("# Sekcja: "))
+        return LLMResponse(PASSING, TokenUsage(input_tokens=100, output_tokens=20), 0.0, "claude-test")
+
+
+def plan(**contents: str) -> dict[str, SectionResult]:
+    return {key: SectionResult(key, key, content, 0, 1) for key, content in contents.items()}
+
+
+@pytest.mark.asyncio
+async def test_change_rereviews_section_and_its_dependents():
+    llm = CountingLLM()
+    upstream = {"marketing": ["market", "competition"], "summary": ["market", "competition", "marketing"]}
+    review = Reviewer(llm, SimpleNamespace(model="claude-test", system=[]), threshold=0.8, upstream=upstream)
+
+    outcome = await review.review(
+        plan(market="Rynek 1", competition="Konkurencja", marketing="Marketing", summary="Streszczenie"),
+    )
+    assert llm.reviewed == ["market", "competition", "marketing", "summary"]
+
+    llm.reviewed = []
+    outcome = await review.review(
+        plan(market="Rynek 2", competition="Konkurencja", marketing="Marketing", summary="Streszczenie"), outcome.logs,
+    )
+    assert llm.reviewed == ["market", "marketing", "summary"]
+    assert outcome.logs["reviews"][-1]["sections_cached"] == 1
+
+    llm.reviewed = []
+    await review.review(
+        plan(market="Rynek 2", competition="Konkurencja", marketing="Marketing", summary="Streszczenie 2"), outcome.logs,
+    )
+    assert llm.reviewed == ["summary"]
+
+
+def test_section_review_shows_upstream_digests():
+    review = Reviewer(None, SimpleNamespace(model="claude-test", system=[]), upstream={"marketing": ["market"]})
+    sections = plan(market="Rynek rośnie.\nWartość 5 mld zł.\nOpis bez liczb.", marketing="Marketing")
+    request = review.section_request(sections["marketing"], review._upstream("marketing", sections))
+    blocks = request["messages"][0]["content"]
+    assert blocks[0]["text"].endswith("## market\n\nRynek rośnie.\nWartość 5 mld zł.")
+    assert blocks[1]["text"] == "# Sekcja: marketing\n\nMarketing"
@@ -0,0 +1,148 @@
+"""Production server setup: worker count, per-worker state checks and shared metrics"""
+
+import json
+import os
+
+import pytest
+
+from app import server
+from app.utils.metrics import REGISTRY, Counter, Histogram, MultiprocessStore, Registry
+from config.settings import settings
+
+
+@pytest.fixture
+def served(monkeypatch):
+    """Options main() would hand to gunicorn (nothing is started)"""
+    runs = []
+
+    class ServeApplication:
+        def __init__(self, options):
+            self.options = options
+
+        def run(self):
+            runs.append(self.options)
+
+    monkeypatch.setattr(server, "ServeApplication", ServeApplication)
+    monkeypatch.setattr(REGISTRY, "multiprocess", None)
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    return runs
+
+
+def test_worker_count(monkeypatch):
+    monkeypatch.setattr(settings, "WEB_WORKERS", 3)
+    assert server.worker_count() == 3
+
+    monkeypatch.setattr(settings, "WEB_WORKERS", 0)
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 2}, raising=False)
+    assert server.worker_count() == 2  # CPUs this process may use, not all of them
+    monkeypatch.delattr(os, "sched_getaffinity")
+    monkeypatch.setattr(os, "cpu_count", lambda: None)
+    assert server.worker_count() == 1
+
+
+@pytest.mark.parametrize("enabled, rate_backend, broker, expected", [
+    (True, "memory", "memory", ["RATE_LIMIT_BACKEND=memory", "PROGRESS_BROKER=memory"]),
+    (False, "memory", "redis", []),
+    (True, "redis", "memory", ["PROGRESS_BROKER=memory"]),
+    (True, "redis", "redis", []),
+])
+def test_per_worker_state(monkeypatch, enabled, rate_backend, broker, expected):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", enabled)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", rate_backend)
+    monkeypatch.setattr(settings, "PROGRESS_BROKER", broker)
+    assert server.per_worker_state() == expected
+
+
+def test_refuses_memory_backends_with_several_workers(monkeypatch, served, capsys):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", "memory")
+    monkeypatch.setattr(settings, "PROGRESS_BROKER", "memory")
+
+    with pytest.raises(SystemExit) as exit_info:
+        server.main(["--workers", "2"])
+    assert exit_info.value.code == 2
+    assert "RATE_LIMIT_BACKEND=memory and PROGRESS_BROKER=memory would be per worker" in capsys.readouterr().err
+    assert served == []
+
+    server.main(["--workers", "1", "--port", "8123"])
+    server.main(["--workers", "2", "--allow-per-worker-state"])
+    assert [(options["workers"], options["bind"].rsplit(":", 1)[1]) for options in served] == [
+        (1, "8123"), (2, str(settings.PORT))]
+    assert all(options["worker_class"] == "app.server.AppWorker" and not options["preload_app"] for options in served)
+
+
+def test_starts_with_shared_backends(monkeypatch, served):
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", "redis")
+    monkeypatch.setattr(settings, "PROGRESS_BROKER", "redis")
+    server.main(["--workers", "4"])
+    assert served[0]["workers"] == 4
+
+
+def test_share_metrics(monkeypatch, tmp_path):
+    monkeypatch.setattr(REGISTRY, "multiprocess", None)
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    monkeypatch.setattr(settings, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    (tmp_path / "4242.json").write_text("{}")  # Left by an earlier run
+
+    server.share_metrics(1)
+    assert REGISTRY.multiprocess is None  # One worker has nothing to share
+
+    server.share_metrics(2)
+    assert isinstance(REGISTRY.multiprocess, MultiprocessStore)
+    assert REGISTRY.multiprocess.directory == str(tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def dump(directory, pid: int, requests: dict, latencies: list) -> None:
+    """Write the metric file worker `pid` would write"""
+    registry = Registry()
+    registry.multiprocess = MultiprocessStore(str(directory), registry)
+    registry.multiprocess.pid = pid
+    counter = Counter("requests_total", "Requests", ["route"], registry=registry)
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1), registry=registry)
+    for route, amount in requests.items():
+        counter.inc(route, amount=amount)
+    for latency in latencies:
+        histogram.observe(latency)
+    registry.multiprocess.write()
+
+
+def test_read_others_sums_two_workers(tmp_path):
+    dump(tmp_path, 101, {"/health": 3, "/api/orders": 1}, [0.05])
+    dump(tmp_path, 102, {"/health": 2}, [0.5, 2.0])
+    (tmp_path / "103.json").write_text("{not json")  # Half-written files are skipped
+    (tmp_path / ".104-tmp").write_text("{}")
+
+    registry = Registry()  # The answering worker, which has counted nothing yet
+    registry.multiprocess = MultiprocessStore(str(tmp_path), registry)
+    registry.multiprocess.pid = 101  # Its own file is not read twice
+    Counter("requests_total", "Requests", ["route"], registry=registry)
+    Histogram("latency_seconds", "Latency", buckets=(0.1, 1), registry=registry)
+
+    others = registry.multiprocess.read_others()
+    assert set(others) == {"requests_total", "latency_seconds"}
+    text = registry.render()
+    assert 'requests_total{route="/health"} 2' in text
+    assert "/api/orders" not in text
+
+    registry.multiprocess.pid = 999
+    text = registry.render()
+    assert 'requests_total{route="/health"} 5' in text
+    assert 'requests_total{route="/api/orders"} 1' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_count 3" in text
+
+
+def test_restarted_pid_keeps_the_exited_workers_totals(tmp_path):
+    dump(tmp_path, os.getpid(), {"/health": 7}, [])
+    store = MultiprocessStore(str(tmp_path), Registry(), interval=3600)
+    store.start()
+    store.stop()
+
+    files = sorted(path.name for path in tmp_path.iterdir())
+    assert len(files) == 2 and f"{os.getpid()}.json" in files
+    totals = [json.loads((tmp_path / name).read_text()) for name in files if name != f"{os.getpid()}.json"]
+    assert "requests_total" in totals[0]
+    assert "requests_total" in store.read_others()
@@ -0,0 +1,79 @@
+"""SSE reconnects replay every missed event, however many pages that takes, then stream live ones"""
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import insert
+
+from app.models import LogLevel, Order, ProcessLog
+from app.routes.orders import _event_stream, _missed_events
+from app.services.progress import ProgressEvent, get_broker
+from config.settings import settings
+
+
+class Request:
+    def __init__(self, disconnect_after: int = None):
+        self.checks = 0
+        self.disconnect_after = disconnect_after
+
+    async def is_disconnected(self) -> bool:
+        self.checks += 1
+        return self.disconnect_after is not None and self.checks > self.disconnect_after
+
+
+async def seed(engine, logs: int) -> tuple[int, list[int]]:
+    async with engine.begin() as conn:
+        order_id = (await conn.execute(
+            insert(Order).returning(Order.id), [{"podio_item_id": "sse", "nip": "1234567890", "imie_nazwisko": "Jan"}]
+        )).scalar_one()
+        if not logs:
+            return order_id, []
+        log_ids = (await conn.execute(
+            insert(ProcessLog).returning(ProcessLog.id, sort_by_parameter_order=True),
+            [{"order_id": order_id, "phase": "research", "message": f"krok {step}", "level": LogLevel.INFO,
+              "created_at": datetime.now(timezone.utc)} for step in range(logs)],
+        )).scalars().all()
+    return order_id, list(log_ids)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("logs", [0, 7, 10, 25])
+async def test_replays_past_the_page_size(database, monkeypatch, logs):
+    monkeypatch.setattr(settings, "SSE_REPLAY_LIMIT", 5)
+    order_id, log_ids = await seed(database, logs)
+    assert [event.id async for event in _missed_events(order_id, 0, Request())] == log_ids
+
+
+@pytest.mark.asyncio
+async def test_resumes_after_last_event_id(database, monkeypatch):
+    monkeypatch.setattr(settings, "SSE_REPLAY_LIMIT", 5)
+    order_id, log_ids = await seed(database, 12)
+    replayed = [event.id async for event in _missed_events(order_id, log_ids[3], Request())]
+    assert replayed == log_ids[4:]
+
+
+@pytest.mark.asyncio
+async def test_stops_paging_when_client_disconnects(database, monkeypatch):
+    monkeypatch.setattr(settings, "SSE_REPLAY_LIMIT", 5)
+    order_id, log_ids = await seed(database, 20)
+    replayed = [event.id async for event in _missed_events(order_id, 0, Request(disconnect_after=1))]
+    assert replayed == log_ids[:10]
+
+
+def event_id(frame: str) -> int:
+    return int(frame.split("\n", 1)[0].removeprefix("id: "))
+
+
+@pytest.mark.asyncio
+async def test_live_events_skip_only_replayed_ids(database, monkeypatch):
+    monkeypatch.setattr(settings, "SSE_HEARTBEAT_SECONDS", 0.05)
+    order_id, log_ids = await seed(database, 3)
+    stream = _event_stream(order_id, 0, Request())
+    assert await anext(stream) == "retry: 3000\n\n"
+    assert [event_id(await anext(stream)) for _ in log_ids] == log_ids
+
+    # A replayed row published live, then rows committed out of id order
+    for live_id in (log_ids[-1], log_ids[-1] + 10, log_ids[-1] + 5):
+        await get_broker().publish(ProgressEvent(id=live_id, order_id=order_id, phase="research", message="live"))
+    assert [event_id(await anext(stream)) for _ in range(2)] == [log_ids[-1] + 10, log_ids[-1] + 5]
+    await stream.aclose()
@@ -0,0 +1,25 @@
+"""Web tier startup stays within budget and leaves worker-only modules unimported"""
+
+import statistics
+
+import pytest
+
+from benchmarks.startup import DEFAULT_MAX_MS, WORKER_ONLY_MODULES, probe
+
+RUNS = 3
+
+
+@pytest.fixture(scope="module")
+def probes() -> list[dict]:
+    probe()  # Warm the bytecode cache
+    return [probe() for _ in range(RUNS)]
+
+
+def test_create_app_within_budget(probes):
+    median = statistics.median(result["ms"] for result in probes)
+    assert median <= DEFAULT_MAX_MS, f"create_app() took {median:.0f} ms (budget {DEFAULT_MAX_MS} ms)"
+
+
+def test_no_worker_only_modules(probes):
+    imported = sorted(set(probes[-1]["modules"]) & set(WORKER_ONLY_MODULES))
+    assert imported == [], f"create_app() imported {', '.join(imported)}"